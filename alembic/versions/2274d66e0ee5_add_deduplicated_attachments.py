@@ -0,0 +1,61 @@
+"""Add deduplicated attachments keyed by file_unique_id
+
+Revision ID: 2274d66e0ee5
+Revises: 31af69c22207
+Create Date: 2026-10-19 10:12:04.113920
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '2274d66e0ee5'
+down_revision: str | Sequence[str] | None = '31af69c22207'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Create attachments table (one row per Telegram file_unique_id)
+    op.create_table(
+        'attachments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_unique_id', sa.String(255), nullable=False),
+        sa.Column('file_id', sa.String(255), nullable=False),
+        sa.Column('file_type', sa.String(50), nullable=False),
+        sa.Column('file_name', sa.String(255), nullable=True),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('thumbnail_file_id', sa.String(255), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('ix_attachments_file_unique_id', 'file_unique_id', unique=True),
+    )
+
+    # Create request_attachments link table
+    op.create_table(
+        'request_attachments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('request_id', sa.Integer(), nullable=False),
+        sa.Column('attachment_id', sa.Integer(), nullable=False),
+        sa.Column('uploaded_by', sa.Integer(), nullable=True),
+        sa.Column('uploaded_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ),
+        sa.ForeignKeyConstraint(['attachment_id'], ['attachments.id'], ),
+        sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('request_id', 'attachment_id', name='uq_request_attachment'),
+        sa.Index('ix_request_attachments_request_id', 'request_id'),
+        sa.Index('ix_request_attachments_attachment_id', 'attachment_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('request_attachments')
+    op.drop_table('attachments')
@@ -0,0 +1,55 @@
+"""Add columns the initial migration missed
+
+The initial migration did not match the models it was written for:
+``users.first_name``, ``users.last_name``, ``users.updated_at`` and
+``requests.history`` were only ever created by ``create_all``. Databases
+built with ``create_all`` already have them, so each column is added only
+when it is missing.
+
+Revision ID: 4b7d2e9a6c15
+Revises: c6f1a8d3e472
+Create Date: 2026-10-19 23:12:48.305611
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2e9a6c15'
+down_revision: str | Sequence[str] | None = 'c6f1a8d3e472'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _missing() -> list[tuple[str, sa.Column]]:
+    columns = {
+        'users': [
+            sa.Column('first_name', sa.String(255), nullable=True),
+            sa.Column('last_name', sa.String(255), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        ],
+        'requests': [
+            sa.Column('history', sa.JSON(), server_default='[]', nullable=False),
+        ],
+    }
+    inspector = sa.inspect(op.get_bind())
+    missing = []
+    for table, table_columns in columns.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        missing.extend((table, column) for column in table_columns if column.name not in existing)
+    return missing
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Без batch-режима: пересоздание requests в SQLite удалило бы триггеры поиска
+    for table, column in _missing():
+        op.add_column(table, column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Столбцы нужны моделям с первой версии: откат их не удаляет
@@ -0,0 +1,38 @@
+"""Index comments and files by request
+
+The initial migration already creates both indexes; databases built with
+``create_all`` before ``index=True`` was set on the models do not have
+them. Each index is created only when it is missing.
+
+Revision ID: a9d3e6f1c2b7
+Revises: f7b2c81d9e04
+Create Date: 2026-10-19 18:20:41.117305
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d3e6f1c2b7'
+down_revision: str | Sequence[str] | None = 'f7b2c81d9e04'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+INDEXES = {'comments': 'ix_comments_request_id', 'files': 'ix_files_request_id'}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table, name in INDEXES.items():
+        # Комментарии заявки читает триггер поискового индекса на каждую вставку
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, ['request_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Индексы создает и начальная миграция: откат их не удаляет
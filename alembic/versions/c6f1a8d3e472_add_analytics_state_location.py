@@ -0,0 +1,31 @@
+"""Add location to analytics request state
+
+Revision ID: c6f1a8d3e472
+Revises: a9d3e6f1c2b7
+Create Date: 2026-10-19 21:05:13.482917
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1a8d3e472'
+down_revision: str | Sequence[str] | None = 'a9d3e6f1c2b7'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analytics_request_state', sa.Column('location_id', sa.Integer(), nullable=True))
+    # Старый снимок без гистограмм времени выполнения: перестроится при первом чтении
+    op.execute("DELETE FROM analytics_request_state")
+    op.execute("DELETE FROM analytics_snapshots")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('analytics_request_state', 'location_id')
@@ -0,0 +1,40 @@
+"""Add request subscribers
+
+Revision ID: d41c7a9e2b86
+Revises: b3e9d4c1a7f0
+Create Date: 2026-10-19 14:03:18.902441
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c7a9e2b86'
+down_revision: str | Sequence[str] | None = 'b3e9d4c1a7f0'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'request_subscribers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('request_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('request_id', 'user_id', name='uq_request_subscriber'),
+        sa.Index('ix_request_subscribers_request_id', 'request_id'),
+        sa.Index('ix_request_subscribers_user_id', 'user_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('request_subscribers')
@@ -0,0 +1,224 @@
+"""Add structured locations with trigger-maintained counters
+
+Revision ID: e5a8f2c9d130
+Revises: d41c7a9e2b86
+Create Date: 2026-10-19 15:21:07.118532
+
+"""
+import re
+from collections.abc import Sequence
+from typing import Optional
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8f2c9d130'
+down_revision: str | Sequence[str] | None = 'd41c7a9e2b86'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# DDL и разбор локаций зафиксированы на момент миграции (не импортируются из
+# models.location и utils.locations, чтобы их правки не меняли историю схемы)
+
+_RECOUNT = """
+    UPDATE locations SET
+        request_count = (SELECT count(*) FROM requests r WHERE r.location_id = locations.id),
+        open_count = (SELECT count(*) FROM requests r
+                      WHERE r.location_id = locations.id AND r.status IN ('OPEN', 'IN_PROGRESS'))
+"""
+
+_SQLITE_IS_OPEN = "({row}.status IN ('OPEN', 'IN_PROGRESS'))"
+
+LOCATION_DDL = {
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION location_counters_trigger() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                IF OLD.location_id IS NOT NULL THEN
+                    UPDATE locations SET
+                        request_count = request_count - 1,
+                        open_count = open_count - CASE WHEN OLD.status IN ('OPEN', 'IN_PROGRESS') THEN 1 ELSE 0 END
+                    WHERE id = OLD.location_id;
+                END IF;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                IF NEW.location_id IS NOT NULL THEN
+                    UPDATE locations SET
+                        request_count = request_count + 1,
+                        open_count = open_count + CASE WHEN NEW.status IN ('OPEN', 'IN_PROGRESS') THEN 1 ELSE 0 END
+                    WHERE id = NEW.location_id;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS location_counters ON requests",
+        """
+        CREATE TRIGGER location_counters
+        AFTER INSERT OR UPDATE OF status, location_id OR DELETE ON requests
+        FOR EACH ROW EXECUTE FUNCTION location_counters_trigger()
+        """,
+        _RECOUNT,
+    ],
+    "sqlite": [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS location_counters_ai AFTER INSERT ON requests
+        WHEN new.location_id IS NOT NULL BEGIN
+            UPDATE locations SET request_count = request_count + 1,
+                                 open_count = open_count + {_SQLITE_IS_OPEN.format(row="new")}
+            WHERE id = new.location_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS location_counters_au AFTER UPDATE OF status, location_id ON requests BEGIN
+            UPDATE locations SET request_count = request_count - 1,
+                                 open_count = open_count - {_SQLITE_IS_OPEN.format(row="old")}
+            WHERE id = old.location_id;
+            UPDATE locations SET request_count = request_count + 1,
+                                 open_count = open_count + {_SQLITE_IS_OPEN.format(row="new")}
+            WHERE id = new.location_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS location_counters_ad AFTER DELETE ON requests
+        WHEN old.location_id IS NOT NULL BEGIN
+            UPDATE locations SET request_count = request_count - 1,
+                                 open_count = open_count - {_SQLITE_IS_OPEN.format(row="old")}
+            WHERE id = old.location_id;
+        END
+        """,
+        _RECOUNT,
+    ],
+}
+
+DROP_LOCATION_DDL = {
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS location_counters ON requests",
+        "DROP FUNCTION IF EXISTS location_counters_trigger()",
+    ],
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS {name}"
+        for name in ("location_counters_ai", "location_counters_au", "location_counters_ad")
+    ],
+}
+
+_BUILDING_RE = re.compile(r"\b(?:корпус|корп|здание|зд|строение|стр)\b\.?\s*№?\s*(\w+)", re.IGNORECASE)
+_FLOOR_RE = re.compile(r"\b(?:(\d+)\s*-?\s*(?:й|ой|ий)?\s*этаж\w*|этаж\w*\s*(\d+))", re.IGNORECASE)
+_ROOM_RE = re.compile(
+    r"\b(?:кабинет|каб|кб|аудитория|ауд|комната|комн|помещение|пом)\b\.?\s*№?\s*(\w+)", re.IGNORECASE
+)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower().replace("ё", "е")))
+
+
+def parse_location(text: str) -> Optional[dict[str, Optional[str]]]:
+    """Row of ``locations`` (key, name, building, floor, room) for a free-text location."""
+    text = (text or "").strip()
+    if not text or text == "Не указано":
+        return None
+
+    building = floor = room = None
+    rest = text
+    if match := _BUILDING_RE.search(rest):
+        building = match.group(1).upper() if len(match.group(1)) == 1 else match.group(1)
+        rest = rest[:match.start()] + " " + rest[match.end():]
+    if match := _FLOOR_RE.search(rest):
+        floor = match.group(1) or match.group(2)
+        rest = rest[:match.start()] + " " + rest[match.end():]
+    if match := _ROOM_RE.search(rest):
+        room = match.group(1)
+        rest = rest[:match.start()] + " " + rest[match.end():]
+
+    rest = " ".join(re.findall(r"[\w-]+", rest))
+    if rest and not room:
+        room = rest[0].upper() + rest[1:]
+
+    if not (building or floor or room):
+        return None
+
+    parts = []
+    if room:
+        parts.append(f"Каб. {room}" if room[0].isdigit() else room)
+    if floor:
+        parts.append(f"{floor} этаж")
+    if building:
+        parts.append(f"Корпус {building}")
+    return {
+        "key": "|".join(_normalize(part or "") for part in (building, floor, room)),
+        "name": ", ".join(parts)[:100],
+        "building": building,
+        "floor": floor,
+        "room": room,
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'locations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=200), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('building', sa.String(length=50), nullable=True),
+        sa.Column('floor', sa.String(length=20), nullable=True),
+        sa.Column('room', sa.String(length=100), nullable=True),
+        sa.Column('request_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('open_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_locations_key', 'locations', ['key'], unique=True)
+    op.create_index('ix_locations_open_count', 'locations', ['open_count'])
+
+    # Без batch-режима: пересоздание requests в SQLite удалило бы триггеры поиска
+    bind = op.get_bind()
+    op.add_column('requests', sa.Column('location_id', sa.Integer(), nullable=True))
+    if bind.dialect.name != 'sqlite':
+        op.create_foreign_key('fk_requests_location_id', 'requests', 'locations', ['location_id'], ['id'])
+    op.create_index('ix_requests_location_id', 'requests', ['location_id'])
+
+    # Разбираем существующие текстовые локации
+    location_ids: dict[str, int] = {}
+    for (text,) in bind.execute(sa.text("SELECT DISTINCT location FROM requests")).all():
+        parsed = parse_location(text)
+        if parsed is None:
+            continue
+        if parsed["key"] not in location_ids:
+            bind.execute(
+                sa.text(
+                    "INSERT INTO locations (key, name, building, floor, room) "
+                    "VALUES (:key, :name, :building, :floor, :room)"
+                ),
+                parsed,
+            )
+            location_ids[parsed["key"]] = bind.execute(
+                sa.text("SELECT id FROM locations WHERE key = :key"), {"key": parsed["key"]}
+            ).scalar_one()
+        bind.execute(
+            sa.text("UPDATE requests SET location_id = :location_id WHERE location = :location"),
+            {"location_id": location_ids[parsed["key"]], "location": text},
+        )
+
+    # Триггеры счетчиков; последний оператор пересчитывает счетчики после разбора
+    for statement in LOCATION_DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for statement in DROP_LOCATION_DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+    op.drop_index('ix_requests_location_id', table_name='requests')
+    if bind.dialect.name != 'sqlite':
+        op.drop_constraint('fk_requests_location_id', 'requests', type_='foreignkey')
+    op.drop_column('requests', 'location_id')
+    op.drop_index('ix_locations_open_count', table_name='locations')
+    op.drop_index('ix_locations_key', table_name='locations')
+    op.drop_table('locations')
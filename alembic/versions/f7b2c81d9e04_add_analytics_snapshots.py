@@ -0,0 +1,50 @@
+"""Add materialized analytics snapshots
+
+Revision ID: f7b2c81d9e04
+Revises: e5a8f2c9d130
+Create Date: 2026-10-19 16:47:52.604219
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b2c81d9e04'
+down_revision: str | Sequence[str] | None = 'e5a8f2c9d130'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'analytics_snapshots',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.Column('rebuilt_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_table(
+        'analytics_request_state',
+        sa.Column('request_id', sa.Integer(), nullable=False),
+        sa.Column('cell', sa.String(length=50), nullable=False),
+        sa.Column('done_day', sa.String(length=10), nullable=True),
+        sa.Column('hours', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('request_id'),
+    )
+    # Инкрементальное обновление снимка читает заявки по updated_at
+    op.create_index('ix_requests_updated_at', 'requests', ['updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_requests_updated_at', table_name='requests')
+    op.drop_table('analytics_request_state')
+    op.drop_table('analytics_snapshots')
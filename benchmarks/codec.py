@@ -0,0 +1,90 @@
+"""JSON codec benchmark on Telegram update payloads.
+
+Compares every installed backend of ``utils.codec`` on the operations the
+bot does per update: decoding a Bot API payload, encoding one back (API
+requests, the ``Request.history`` column) and rendering a log record.
+
+Usage::
+
+    python -m benchmarks.codec
+    python -m benchmarks.codec --payloads recorded.jsonl --rounds 2000
+
+Payload files are JSON lines: a Telegram update per line, or records with
+the update under the ``"update"`` key (``UPDATE_LOG_PATH`` logs).
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from utils.codec import available_codecs
+
+DEFAULT_PAYLOADS = Path(__file__).parent / "data" / "updates.jsonl"
+
+LOG_EVENT = {
+    "event": "request_created",
+    "level": "INFO",
+    "logger": "handlers.create_request",
+    "timestamp": "2026-10-19T10:00:00.000000",
+    "request_id": 1024,
+    "user_id": 111222333,
+    "title": "Не работает батарея в кабинете 305",
+    "duration_ms": 12.5,
+}
+
+
+def load_payloads(path: Path) -> list[str]:
+    """Raw JSON of each update in a payload file."""
+    from utils.codec import get_codec
+
+    stdlib = get_codec("json")
+    payloads = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = stdlib.loads(line)
+        if "update" not in record and "update_id" not in record:
+            continue  # заголовок лога utils.update_recorder
+        payloads.append(stdlib.dumps(record.get("update", record)))
+    return payloads
+
+
+def measure(func: Callable[[], Any], rounds: int, repeat: int = 5) -> float:
+    """Median seconds per call."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        timings.append((time.perf_counter() - started) / rounds)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payloads", type=Path, default=DEFAULT_PAYLOADS, help="JSON lines with updates")
+    parser.add_argument("--rounds", type=int, default=1000, help="Passes over the payloads per measurement")
+    args = parser.parse_args()
+
+    raw = load_payloads(args.payloads)
+    size = sum(len(payload.encode()) for payload in raw)
+    print(f"{len(raw)} payloads, {size} bytes")
+    print(f"{'codec':<10}{'decode':>14}{'encode':>14}{'log record':>14}{'decode MB/s':>14}")
+
+    for codec in available_codecs():
+        objects = [codec.loads(payload) for payload in raw]
+        decode = measure(lambda: [codec.loads(payload) for payload in raw], args.rounds)
+        encode = measure(lambda: [codec.dumps(obj) for obj in objects], args.rounds)
+        log = measure(lambda: codec.dumps(LOG_EVENT), args.rounds * len(raw))
+        print(
+            f"{codec.name:<10}{decode * 1e6:>12.1f}us{encode * 1e6:>12.1f}us"
+            f"{log * 1e6:>12.2f}us{size / decode / 1e6:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
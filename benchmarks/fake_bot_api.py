@@ -0,0 +1,232 @@
+"""Local fake of the Telegram Bot API for load tests.
+
+Implements what the bot's flows use: ``getMe``, ``getUpdates`` (long
+polling), ``sendMessage``, ``editMessageText``, ``sendPhoto``,
+``sendDocument``, ``sendMediaGroup`` and ``answerCallbackQuery``; any other
+method answers ``true``. Each call can be delayed (``latency`` plus random
+``jitter``) and rejected with a 429 flood error (``flood_rate``, except
+``getMe`` so polling can start), like the real API under load.
+
+Updates are injected with ``push_update``; the bot's calls are recorded and
+can be awaited with ``wait_for``, which is how the scenario driver measures
+response times::
+
+    api = FakeBotAPI(latency=0.05)
+    url = await api.start()
+    bot = Bot(token, session=AiohttpSession(api=TelegramAPIServer.from_base(url)))
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from aiohttp import web
+
+from utils import codec
+
+BOT_USER = {"id": 7000000001, "is_bot": True, "first_name": "ZAVhoz", "username": "zavhoz_bot"}
+# Методы, которые считаются ответом бота пользователю
+REPLY_METHODS = ("sendMessage", "editMessageText", "sendPhoto", "sendDocument", "sendMediaGroup")
+
+
+@dataclass
+class Call:
+    """Bot API call made by the bot."""
+
+    method: str
+    params: dict[str, Any]
+    at: float = field(default_factory=time.perf_counter)
+    flooded: bool = False
+
+    @property
+    def chat_id(self) -> Optional[int]:
+        """Target chat, if any."""
+        chat_id = self.params.get("chat_id")
+        return int(chat_id) if chat_id is not None else None
+
+
+class FakeBotAPI:
+    """In-process fake Bot API server."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Create a server.
+
+        Args:
+            latency: Delay of every call except getUpdates, seconds
+            jitter: Extra random delay up to this value, seconds
+            flood_rate: Share of calls rejected with 429 Too Many Requests
+            retry_after: retry_after of flood errors, seconds
+            seed: Seed of the random generator
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+        self.calls: list[Call] = []
+        self.last_messages: dict[int, dict] = {}
+        self._updates: list[dict] = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1000)
+        self._new_updates = asyncio.Event()
+        self._waiters: list[tuple[Callable[[Call], bool], asyncio.Future]] = []
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application(client_max_size=50 * 1024 * 1024)
+        self.app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        self.methods: dict[str, Callable[[dict], Any]] = {
+            "getMe": lambda params: BOT_USER,
+            "sendMessage": self._send_message,
+            "editMessageText": self._edit_message_text,
+            "sendPhoto": lambda params: self._send_message(params, photo=True),
+            "sendDocument": lambda params: self._send_message(params, document=True),
+            "sendMediaGroup": self._send_media_group,
+            "answerCallbackQuery": lambda params: True,
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the base URL for ``TelegramAPIServer.from_base``."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        self._new_updates.set()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def push_update(self, update: dict) -> dict:
+        """Queue an update for getUpdates (``update_id`` is assigned)."""
+        update = {"update_id": next(self._update_ids), **update}
+        self._updates.append(update)
+        self._new_updates.set()
+        return update
+
+    def wait_for(self, predicate: Callable[[Call], bool], since: int = 0) -> asyncio.Future:
+        """Future resolved with the first call matching ``predicate``.
+
+        Args:
+            predicate: Condition on a call
+            since: Also check calls recorded from this index on
+        """
+        future = asyncio.get_running_loop().create_future()
+        for call in self.calls[since:]:
+            if predicate(call):
+                future.set_result(call)
+                return future
+        self._waiters.append((predicate, future))
+        return future
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Dispatch a Bot API call."""
+        method = request.match_info["method"]
+        params: dict[str, Any] = dict(request.query)
+        if request.method == "POST":
+            for key, value in (await request.post()).items():
+                # Файлы не сохраняем, только отмечаем
+                params[key] = value if isinstance(value, str) else f"<file {getattr(value, 'filename', '')}>"
+
+        if method == "getUpdates":
+            return self._json(True, await self._get_updates(params))
+
+        await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+        # getMe вызывается при запуске polling, его не ограничиваем
+        if method != "getMe" and self.flood_rate and self.random.random() < self.flood_rate:
+            self._record(Call(method, params, flooded=True))
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                },
+                status=429,
+                dumps=codec.dumps,
+            )
+
+        handler = self.methods.get(method, lambda params: True)
+        result = handler(params)
+        self._record(Call(method, params))
+        return self._json(True, result)
+
+    def _record(self, call: Call) -> None:
+        self.calls.append(call)
+        for waiter in list(self._waiters):
+            predicate, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+            elif predicate(call):
+                future.set_result(call)
+                self._waiters.remove(waiter)
+
+    @staticmethod
+    def _json(ok: bool, result: Any) -> web.Response:
+        return web.json_response({"ok": ok, "result": result}, dumps=codec.dumps)
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        # Подтвержденные (offset) апдейты больше не отдаем
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    def _message(self, params: dict, message_id: Optional[int] = None) -> dict:
+        chat_id = int(params["chat_id"])
+        message = {
+            "message_id": message_id or next(self._message_ids),
+            "from": BOT_USER,
+            "chat": {"id": chat_id, "type": "private"},
+            "date": int(time.time()),
+        }
+        if params.get("reply_markup"):
+            message["reply_markup"] = codec.loads(params["reply_markup"])
+        return message
+
+    def _send_message(self, params: dict, photo: bool = False, document: bool = False) -> dict:
+        message = self._message(params)
+        if photo:
+            message["photo"] = [{"file_id": f"photo-{message['message_id']}", "file_unique_id": f"p{message['message_id']}",
+                                 "width": 800, "height": 600}]
+            message["caption"] = params.get("caption", "")
+        elif document:
+            message["document"] = {"file_id": f"doc-{message['message_id']}", "file_unique_id": f"d{message['message_id']}"}
+            message["caption"] = params.get("caption", "")
+        else:
+            message["text"] = params.get("text", "")
+        self.last_messages[message["chat"]["id"]] = message
+        return message
+
+    def _edit_message_text(self, params: dict) -> dict:
+        message = self._message(params, message_id=int(params["message_id"]))
+        message["text"] = params.get("text", "")
+        message["edit_date"] = int(time.time())
+        self.last_messages[message["chat"]["id"]] = message
+        return message
+
+    def _send_media_group(self, params: dict) -> list[dict]:
+        media = codec.loads(params.get("media", "[]"))
+        return [self._send_message(params, photo=True) for _ in media]
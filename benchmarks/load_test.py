@@ -0,0 +1,404 @@
+"""Synthetic load test against a local fake Telegram Bot API.
+
+The bot runs in this process with its real handlers and database, polling
+``benchmarks.fake_bot_api.FakeBotAPI`` instead of Telegram. Simulated
+users press the buttons the bot shows them:
+
+* user: /start → create request → description → no additions → priority
+  (→ "create anyway" when a similar request is offered)
+* admin: /start → admin panel → statistics → open requests → filters →
+  high priority
+
+A step's latency is the time from putting its update on the queue to the
+bot's answer (``answerCallbackQuery`` for buttons, the first message to the
+chat for messages). The report has throughput, latency percentiles per
+step and SQL statements per update.
+
+Usage::
+
+    python -m benchmarks.load_test --users 50 --admins 2 --latency 0.05
+    python -m benchmarks.load_test --users 20 --flood-rate 0.05
+    python -m benchmarks.load_test --database-url postgresql://localhost/zavhoz_load
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+from benchmarks.fake_bot_api import REPLY_METHODS, FakeBotAPI
+from models import Priority
+
+DESCRIPTIONS = [
+    "Не работает батарея в кабинете {room}, в классе холодно",
+    "Протекает кран в туалете на {floor} этаже",
+    "Перегорели лампы в коридоре, кабинет {room}",
+    "Сломан замок двери кабинета {room}",
+    "Не закрывается окно в кабинете {room}, дует",
+    "Шатается парта в кабинете {room}, нужен ремонт",
+]
+PRIORITY_BUTTON = f"priority_{Priority.MEDIUM.value}"
+ADMIN_ID_BASE = 500000000
+USER_ID_BASE = 100000000
+
+
+@dataclass
+class StepResult:
+    """Outcome of one scenario step."""
+
+    scenario: str
+    step: str
+    latency: float
+    ok: bool
+    error: str = ""
+
+
+@dataclass
+class LoadReport:
+    """Aggregated results of a run."""
+
+    duration: float
+    steps: list[StepResult]
+    statements: int
+    api_calls: int
+    flood_errors: int
+    requests_created: int
+
+    @property
+    def updates(self) -> int:
+        """Updates processed."""
+        return len(self.steps)
+
+    @property
+    def throughput(self) -> float:
+        """Updates per second."""
+        return self.updates / self.duration if self.duration else 0.0
+
+    def percentiles(self, step: Optional[str] = None) -> dict[str, float]:
+        """p50/p90/p99 latency of successful steps (``scenario.step``, all by default), ms."""
+        latencies = [r.latency for r in self.steps if r.ok and step in (None, f"{r.scenario}.{r.step}")]
+        if not latencies:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+        p50, p90, p99 = np.percentile(np.array(latencies) * 1000, [50, 90, 99])
+        return {"p50": float(p50), "p90": float(p90), "p99": float(p99)}
+
+    def step_counts(self) -> dict[str, int]:
+        """Number of results per ``scenario.step``."""
+        return dict(sorted(_count(f"{r.scenario}.{r.step}" for r in self.steps).items()))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Report as JSON-compatible data."""
+        return {
+            "updates": self.updates,
+            "duration": self.duration,
+            "throughput": self.throughput,
+            "errors": sum(not r.ok for r in self.steps),
+            "statements": self.statements,
+            "api_calls": self.api_calls,
+            "flood_errors": self.flood_errors,
+            "requests_created": self.requests_created,
+            "latency_ms": self.percentiles(),
+            "steps": {name: {"count": count, **self.percentiles(name)} for name, count in self.step_counts().items()},
+        }
+
+    def format(self) -> str:
+        """Human-readable report."""
+        errors = [r for r in self.steps if not r.ok]
+        lines = [
+            f"updates: {self.updates} in {self.duration:.2f}s ({self.throughput:.1f}/s), errors: {len(errors)}",
+            f"requests created: {self.requests_created}, api calls: {self.api_calls}, "
+            f"flood errors injected: {self.flood_errors}",
+            f"sql statements: {self.statements} ({self.statements / max(self.updates, 1):.1f} per update)",
+            "",
+            f"{'step':<36}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}",
+        ]
+        for name, count in self.step_counts().items():
+            p = self.percentiles(name)
+            lines.append(f"{name:<36}{count:>7}{p['p50']:>10.1f}{p['p90']:>10.1f}{p['p99']:>10.1f}")
+        total = self.percentiles()
+        lines.append(f"{'all':<36}{self.updates:>7}{total['p50']:>10.1f}{total['p90']:>10.1f}{total['p99']:>10.1f}")
+        for error, count in sorted(_count(r.error for r in errors).items()):
+            lines.append(f"error: {error} x{count}")
+        return "\n".join(lines)
+
+
+def _count(items: Any) -> dict[str, int]:
+    counts: dict[str, int] = defaultdict(int)
+    for item in items:
+        counts[item] += 1
+    return counts
+
+
+class SimulatedUser:
+    """Telegram user talking to the bot through the fake API."""
+
+    _callback_ids = itertools.count(1)
+
+    def __init__(self, api: FakeBotAPI, telegram_id: int, scenario: str, timeout: float) -> None:
+        self.api = api
+        self.telegram_id = telegram_id
+        self.scenario = scenario
+        self.timeout = timeout
+        self.results: list[StepResult] = []
+        self._message_ids = itertools.count(1)
+        self.user = {"id": telegram_id, "is_bot": False, "first_name": f"User{telegram_id}", "language_code": "ru"}
+
+    @property
+    def screen(self) -> Optional[dict]:
+        """Last message the bot showed this user."""
+        return self.api.last_messages.get(self.telegram_id)
+
+    def buttons(self) -> list[str]:
+        """callback_data of the buttons on the screen."""
+        markup = (self.screen or {}).get("reply_markup") or {}
+        return [button.get("callback_data", "") for row in markup.get("inline_keyboard", []) for button in row]
+
+    async def send(self, step: str, text: str) -> bool:
+        """Send a text message and wait for the bot's reply."""
+        message = {
+            "message_id": next(self._message_ids),
+            "from": self.user,
+            "chat": {"id": self.telegram_id, "type": "private"},
+            "date": int(time.time()),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"offset": 0, "length": len(text.split()[0]), "type": "bot_command"}]
+        return await self._step(
+            step,
+            {"message": message},
+            lambda call: call.method in REPLY_METHODS and call.chat_id == self.telegram_id and not call.flooded,
+        )
+
+    async def press(self, step: str, data: str) -> bool:
+        """Press a button on the screen and wait for the callback answer."""
+        if not await self._wait_button(data):
+            self.results.append(StepResult(self.scenario, step, 0.0, False, f"no button {data}"))
+            return False
+        callback_id = str(next(self._callback_ids))
+        update = {
+            "callback_query": {
+                "id": callback_id,
+                "from": self.user,
+                "chat_instance": str(self.telegram_id),
+                "message": self.screen,
+                "data": data,
+            }
+        }
+        return await self._step(
+            step,
+            update,
+            lambda call: call.method == "answerCallbackQuery" and call.params.get("callback_query_id") == callback_id,
+        )
+
+    async def _wait_button(self, data: str) -> bool:
+        # Бот может ответить на callback раньше, чем обновит сообщение
+        deadline = time.perf_counter() + self.timeout
+        while data not in self.buttons():
+            if time.perf_counter() > deadline:
+                return False
+            await asyncio.sleep(0.005)
+        return True
+
+    async def _step(self, step: str, update: dict, predicate: Any) -> bool:
+        waiter = self.api.wait_for(predicate, since=len(self.api.calls))
+        started = time.perf_counter()
+        self.api.push_update(update)
+        try:
+            call = await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self.results.append(StepResult(self.scenario, step, time.perf_counter() - started, False, "timeout"))
+            return False
+        self.results.append(StepResult(self.scenario, step, call.at - started, True))
+        return True
+
+
+async def user_scenario(user: SimulatedUser, iterations: int, rng: random.Random) -> None:
+    """Create requests through the CreateRequestStates flow."""
+    if not await user.send("start", "/start"):
+        return
+    for _ in range(iterations):
+        description = rng.choice(DESCRIPTIONS).format(room=rng.randint(100, 450), floor=rng.randint(1, 4))
+        if not (
+            await user.press("create_request", "create_request")
+            and await user.send("description", description)
+            and await user.press("additional_no", "additional_no")
+            and await user.press("priority", PRIORITY_BUTTON)
+        ):
+            return
+        if PRIORITY_BUTTON in user.buttons():
+            # Бот нашел похожую заявку - все равно создаем новую
+            await user.press("create_anyway", PRIORITY_BUTTON)
+        await user.send("start", "/start")
+
+
+async def admin_scenario(user: SimulatedUser, iterations: int) -> None:
+    """Browse the admin panel."""
+    if not await user.send("start", "/start"):
+        return
+    for _ in range(iterations):
+        for step, data in (
+            ("admin_panel", "admin_panel"),
+            ("admin_stats", "admin_stats"),
+            ("back_to_admin", "back_to_admin"),
+            ("open_requests", "admin_open_requests"),
+        ):
+            if not await user.press(step, data):
+                return
+        await user.send("start", "/start")
+        if not (
+            await user.press("admin_panel", "admin_panel")
+            and await user.press("filters", "admin_filters_menu")
+            and await user.press("filter_high", "filter_priority_HIGH")
+        ):
+            return
+        await user.send("start", "/start")
+
+
+async def run_load_test(
+    users: int = 10,
+    admins: int = 1,
+    iterations: int = 1,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    flood_rate: float = 0.0,
+    timeout: float = 10.0,
+    seed: int = 1,
+    database_url: Optional[str] = None,
+) -> LoadReport:
+    """Run the scenarios against a fresh bot and database.
+
+    Args:
+        users: Users creating requests concurrently
+        admins: Admins browsing the panel concurrently
+        iterations: Scenario repetitions per user
+        latency: Fake API latency, seconds
+        jitter: Extra random fake API latency, seconds
+        flood_rate: Share of API calls rejected with 429
+        timeout: Max wait for a bot answer, seconds
+        seed: Seed for descriptions and fake API randomness
+        database_url: Empty database to use, a temporary SQLite one by default
+
+    Returns:
+        Load report
+    """
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from sqlalchemy import event, func, select
+
+    from bot.main import register_all_handlers
+    from database.migrations import ensure_schema
+    from models import Request, User
+    from utils import codec
+    from utils.container import Container, get_container, set_container
+    from utils.rate_limiter import MemoryRateLimiter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from database.connection import create_engine_from_env
+
+        engine = create_engine_from_env(database_url or f"sqlite:///{tmp}/load.db")
+        await ensure_schema(engine, migrate=True)
+
+        api = FakeBotAPI(latency=latency, jitter=jitter, flood_rate=flood_rate, seed=seed)
+        url = await api.start()
+        bot = Bot(
+            token="123456:LOADTEST",
+            session=AiohttpSession(
+                api=TelegramAPIServer.from_base(url), json_loads=codec.loads, json_dumps=codec.dumps
+            ),
+        )
+        container = Container(engine=engine, bot=bot, rate_limiter=MemoryRateLimiter())
+        previous = get_container()
+        set_container(container)
+
+        async with container.session_factory() as session:
+            session.add_all(
+                User(telegram_id=ADMIN_ID_BASE + i, first_name=f"Admin{i}", role="admin") for i in range(admins)
+            )
+            await session.commit()
+
+        statements = 0
+
+        def count_statement(*args: Any) -> None:
+            nonlocal statements
+            statements += 1
+
+        dp = container.dispatcher
+        register_all_handlers(dp)
+        polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+        try:
+            rng = random.Random(seed)
+            simulated = [SimulatedUser(api, USER_ID_BASE + i, "user", timeout) for i in range(users)]
+            simulated_admins = [SimulatedUser(api, ADMIN_ID_BASE + i, "admin", timeout) for i in range(admins)]
+
+            event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(user_scenario(user, iterations, random.Random(rng.random())) for user in simulated),
+                *(admin_scenario(admin, iterations) for admin in simulated_admins),
+            )
+            duration = time.perf_counter() - started
+            event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+            async with container.session_factory() as session:
+                created = await session.scalar(select(func.count(Request.id)))
+        finally:
+            await dp.stop_polling()
+            await polling
+            await api.stop()
+            await container.close()
+            set_container(previous)
+
+    return LoadReport(
+        duration=duration,
+        steps=[result for user in simulated + simulated_admins for result in user.results],
+        statements=statements,
+        api_calls=len(api.calls),
+        flood_errors=sum(call.flooded for call in api.calls),
+        requests_created=created or 0,
+    )
+
+
+def main() -> None:
+    """Run the load test from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="Concurrent users creating requests")
+    parser.add_argument("--admins", type=int, default=1, help="Concurrent admins browsing the panel")
+    parser.add_argument("--iterations", type=int, default=1, help="Scenario repetitions per user")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake Bot API latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, seconds")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Share of calls answered with 429")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Max wait for a bot answer, seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="Empty database to use (temporary SQLite by default)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from utils.logging_config import build_console_handler, init_logging
+
+    init_logging([build_console_handler()])
+    report = asyncio.run(run_load_test(
+        users=args.users,
+        admins=args.admins,
+        iterations=args.iterations,
+        latency=args.latency,
+        jitter=args.jitter,
+        flood_rate=args.flood_rate,
+        timeout=args.timeout,
+        seed=args.seed,
+        database_url=args.database_url,
+    ))
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Database query benchmark at 10k / 100k / 1M requests.
+
+Runs the real read paths of ``handlers/admin.py``, ``handlers/menu.py``,
+the export jobs and ``utils/analytics.py`` against a database grown with
+``benchmarks.seed``. Each case is timed end to end; the SQL it issues is
+timed statement by statement. Handlers get stub callbacks (nothing is sent)
+and the per-chat send interval is disabled, so the numbers are the
+database plus formatting cost.
+
+Results are written as a JSON baseline; ``--compare`` prints the change
+against an earlier one::
+
+    python -m benchmarks.queries --sizes 10000 100000
+    python -m benchmarks.queries --sizes 10000 100000 1000000 --database-url postgresql://localhost/zavhoz_bench
+    python -m benchmarks.queries --sizes 10000 --compare benchmarks/baselines/queries_sqlite.json
+
+Report caches are cleared before every run: cases measure cold reads.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from benchmarks.seed import seed_database
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+BASELINES = Path(__file__).parent / "baselines"
+
+
+class StubMessage:
+    """Message that accepts every send and keeps the texts."""
+
+    _chat_ids = itertools.count(1)
+
+    def __init__(self) -> None:
+        # Новый чат на каждый вызов: ограничитель отправок не ждет
+        self.chat = SimpleNamespace(id=next(self._chat_ids))
+        self.message_id = 1
+        self.sent: list[Any] = []
+
+    async def _send(self, content: Any, **kwargs: Any) -> "StubMessage":
+        self.sent.append(content)
+        return self
+
+    edit_text = answer = answer_document = answer_photo = _send
+
+
+class StubCallback:
+    """Callback query from an admin or user button press."""
+
+    def __init__(self, data: str, user: Any) -> None:
+        self.data = data
+        self.from_user = SimpleNamespace(id=user.telegram_id)
+        self.message = StubMessage()
+        self.bot = None
+
+    async def answer(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+
+@dataclass
+class Context:
+    """Rows the cases work with."""
+
+    admin: Any
+    author: Any
+    location_id: int
+
+
+class Case(NamedTuple):
+    """Benchmark case: runs one read path in a session."""
+
+    name: str
+    run: Callable[[AsyncSession, Context], Awaitable[Any]]
+
+
+def handler_case(name: str, handler: Any, data: str, as_author: bool = False) -> Case:
+    """Case calling a ``require_auth`` handler directly (no auth lookup)."""
+
+    async def run(session: AsyncSession, ctx: Context) -> None:
+        user = ctx.author if as_author else ctx.admin
+        await handler.__wrapped__(StubCallback(data.format(location_id=ctx.location_id), user), user=user, session=session)
+
+    return Case(name, run)
+
+
+def export_case(name: str, builder: Any, params: Callable[[], dict]) -> Case:
+    """Case building an export file in the session."""
+
+    async def run(session: AsyncSession, ctx: Context) -> None:
+        await builder(session, params(), lambda progress: None)
+
+    return Case(name, run)
+
+
+def analytics_case(name: str, method: str) -> Case:
+    """Case calling a ``RequestAnalytics`` method."""
+
+    async def run(session: AsyncSession, ctx: Context) -> None:
+        from utils.analytics import RequestAnalytics
+
+        await getattr(RequestAnalytics, method)(session)
+
+    return Case(name, run)
+
+
+def build_cases() -> list[Case]:
+    """All benchmark cases."""
+    from datetime import datetime
+
+    from handlers import admin, menu
+    from utils import export_jobs
+
+    return [
+        handler_case("admin.open_requests", admin.admin_open_requests_callback, "admin_open_requests"),
+        handler_case("admin.filter_priority_high", admin.filter_priority_callback, "filter_priority_HIGH"),
+        handler_case("admin.filter_status_in_progress", admin.filter_status_callback, "filter_status_IN_PROGRESS"),
+        handler_case("admin.filter_status_completed", admin.filter_status_callback, "filter_status_COMPLETED"),
+        handler_case("admin.filter_locations", admin.filter_locations_callback, "filter_locations"),
+        handler_case("admin.filter_location", admin.filter_location_callback, "filter_location_{location_id}"),
+        handler_case("admin.filter_today", admin.filter_today_callback, "filter_today"),
+        handler_case("admin.filter_week", admin.filter_week_callback, "filter_week"),
+        handler_case("admin.stats", admin.admin_stats_callback, "admin_stats"),
+        handler_case("admin.archive", admin.admin_archive_callback, "admin_archive"),
+        export_case("admin.export_all", export_jobs.build_all_report, dict),
+        export_case(
+            "admin.export_month",
+            export_jobs.build_month_report,
+            lambda: {"days": 30, "as_of": datetime.utcnow().date().isoformat()},
+        ),
+        export_case("admin.export_stats", export_jobs.build_stats_report, dict),
+        handler_case("menu.my_requests", menu.my_requests_callback, "my_requests", as_author=True),
+        analytics_case("analytics.daily_stats", "get_daily_stats"),
+        analytics_case("analytics.priority_distribution", "get_priority_distribution"),
+        analytics_case("analytics.status_distribution", "get_status_distribution"),
+        analytics_case("analytics.location_distribution", "get_location_distribution"),
+        analytics_case("analytics.avg_completion_time", "get_avg_completion_time"),
+        analytics_case("analytics.performance_metrics", "get_performance_metrics"),
+        analytics_case("analytics.high_priority_pending", "get_high_priority_pending"),
+        analytics_case("analytics.full_report", "get_full_report"),
+    ]
+
+
+@dataclass
+class StatementTimer:
+    """Times every SQL statement executed by an engine."""
+
+    timings: list[tuple[str, float]] = field(default_factory=list)
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """Start timing statements of ``engine``."""
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def detach(self, engine: AsyncEngine) -> None:
+        """Stop timing."""
+        event.remove(engine.sync_engine, "before_cursor_execute", self._before)
+        event.remove(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        conn.info["statement_started"] = time.perf_counter()
+
+    def _after(self, conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        self.timings.append((statement, time.perf_counter() - conn.info.pop("statement_started")))
+
+
+async def load_context(session: AsyncSession) -> Context:
+    """Admin, busiest author and busiest location of the database."""
+    from models import Location, Request, User
+
+    admin = await session.scalar(select(User).where(User.role == "admin").order_by(User.id).limit(1))
+    author_id = await session.scalar(
+        select(Request.user_id).group_by(Request.user_id).order_by(func.count().desc()).limit(1)
+    )
+    location_id = await session.scalar(select(Location.id).order_by(Location.open_count.desc()).limit(1))
+    return Context(admin=admin, author=await session.get(User, author_id), location_id=location_id)
+
+
+def clear_caches() -> None:
+    """Drop cached reports so every run reads the database."""
+    from utils.analytics import report_cache
+
+    report_cache.clear()
+
+
+async def run_case(case: Case, engine: AsyncEngine, timer: StatementTimer, repeat: int) -> dict[str, Any]:
+    """Time a case ``repeat`` times, statements of the last run."""
+    context_session = AsyncSession(engine, expire_on_commit=False)
+    ctx = await load_context(context_session)
+    durations = []
+    for _ in range(repeat):
+        clear_caches()
+        timer.timings.clear()
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            started = time.perf_counter()
+            await case.run(session, ctx)
+            durations.append(time.perf_counter() - started)
+    await context_session.close()
+
+    statement, slowest = max(timer.timings, key=lambda item: item[1], default=("", 0.0))
+    return {
+        "median_ms": statistics.median(durations) * 1000,
+        "min_ms": min(durations) * 1000,
+        "statements": len(timer.timings),
+        "sql_ms": sum(duration for _, duration in timer.timings) * 1000,
+        "slowest_sql_ms": slowest * 1000,
+        "slowest_sql": " ".join(statement.split())[:160],
+    }
+
+
+async def run_benchmark(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeat: int = 5,
+    only: Optional[str] = None,
+    database_url: Optional[str] = None,
+    seed: int = 1,
+    progress: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    """Grow the database through ``sizes`` and time every case at each size.
+
+    Args:
+        sizes: Request counts, ascending
+        repeat: Runs per case
+        only: Run only cases whose name starts with this
+        database_url: Empty database to use, a temporary SQLite one by default
+        seed: Seed of the generated data
+        progress: Receives a line per finished case
+
+    Returns:
+        Baseline data: dialect and results per size and case
+    """
+    from database.connection import create_engine_from_env
+    from database.migrations import ensure_schema
+    from utils import delivery
+
+    cases = [case for case in build_cases() if not only or case.name.startswith(only)]
+    results: dict[str, Any] = {"sizes": {}}
+    interval = delivery.send_limiter.per_chat_interval
+    delivery.send_limiter.per_chat_interval = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine_from_env(database_url or f"sqlite:///{tmp}/queries.db")
+        timer = StatementTimer()
+        try:
+            await ensure_schema(engine, migrate=True)
+            results["dialect"] = engine.dialect.name
+            seeded = 0
+            for size in sorted(sizes):
+                started = time.perf_counter()
+                await seed_database(engine, size - seeded, seed=seed + seeded)
+                seeded = size
+                progress(f"seeded {size} requests in {time.perf_counter() - started:.1f}s")
+
+                timer.attach(engine)
+                by_case = results["sizes"][str(size)] = {}
+                for case in cases:
+                    by_case[case.name] = await run_case(case, engine, timer, repeat)
+                    progress(f"{size:>8} {case.name:<36}{by_case[case.name]['median_ms']:>10.1f} ms")
+                timer.detach(engine)
+        finally:
+            delivery.send_limiter.per_chat_interval = interval
+            await engine.dispose()
+    return results
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> str:
+    """Table of median times against a baseline."""
+    lines = [f"{'size':>8} {'case':<36}{'baseline ms':>12}{'now ms':>10}{'change':>9}"]
+    for size, by_case in results["sizes"].items():
+        for name, result in by_case.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            change = (result["median_ms"] / before["median_ms"] - 1) * 100 if before["median_ms"] else 0.0
+            lines.append(f"{size:>8} {name:<36}{before['median_ms']:>12.1f}{result['median_ms']:>10.1f}{change:>+8.0f}%")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Request counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case")
+    parser.add_argument("--only", help="Run only cases starting with this (e.g. admin.)")
+    parser.add_argument("--database-url", help="Empty database to grow (temporary SQLite by default)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Baseline file (default: baselines/queries_<dialect>.json)")
+    parser.add_argument("--compare", type=Path, help="Baseline to compare with (not overwritten without --output)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from utils.logging_config import build_console_handler, init_logging
+
+    init_logging([build_console_handler()])
+    results = asyncio.run(run_benchmark(
+        sizes=tuple(args.sizes),
+        repeat=args.repeat,
+        only=args.only,
+        database_url=args.database_url,
+        seed=args.seed,
+    ))
+    if args.compare:
+        print(compare(results, json.loads(args.compare.read_text(encoding="utf-8"))))
+        if not args.output:
+            return
+    output = args.output or BASELINES / f"queries_{results['dialect']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
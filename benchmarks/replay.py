@@ -0,0 +1,244 @@
+"""Deterministic replay of a recorded update log.
+
+Feeds the updates of a ``utils.update_recorder`` log through
+``Dispatcher.feed_update`` with the real handlers, a seeded database and
+``benchmarks.fake_bot_api.FakeBotAPI`` in place of Telegram, and reports
+the handling time per update kind (``callback_query.take_N``,
+``message./start``, ...) and SQL statements per update.
+
+The database is seeded with the users of the log (admins from the log
+headers) and ``--seed-requests`` requests from ``benchmarks.seed``, so the
+same log and seed always replay against the same data. Callbacks that
+refer to requests of the production database hit whatever request has that
+id in the seeded one, or none.
+
+Usage::
+
+    python -m benchmarks.replay updates.log                # original speed
+    python -m benchmarks.replay updates.log --speed 10     # 10x faster
+    python -m benchmarks.replay updates.log --speed 0 --output replay.json
+
+``--speed 0`` handles updates one by one, as fast as possible: the most
+stable numbers for comparing code changes.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from benchmarks.load_test import LoadReport, StepResult
+from benchmarks.seed import seed_database
+from utils import codec
+
+
+def read_log(path: Path) -> tuple[list[tuple[float, dict]], set[int]]:
+    """Updates with their arrival times, and the admins of the log headers."""
+    updates: list[tuple[float, dict]] = []
+    admins: set[int] = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = codec.loads(line)
+            if "update" in record:
+                updates.append((record["at"], record["update"]))
+            admins.update(record.get("admins", ()))
+    return updates, admins
+
+
+def update_key(update: dict) -> tuple[str, str]:
+    """Kind of an update and what it does, with numbers replaced by ``N``."""
+    kind = next(key for key in update if key != "update_id")
+    event = update[kind]
+    if kind == "callback_query":
+        action = event.get("data", "")
+    elif kind == "message":
+        text = event.get("text", "")
+        if text.startswith("/"):
+            action = text.split()[0]
+        else:
+            action = next(
+                (content for content in ("text", "photo", "document", "video", "voice", "location") if content in event),
+                "other",
+            )
+    else:
+        action = kind
+    return kind, re.sub(r"\d+", "N", action)
+
+
+def update_users(updates: list[tuple[float, dict]]) -> set[int]:
+    """Telegram ids of the users sending the updates."""
+    users = set()
+    for _, update in updates:
+        for key, event in update.items():
+            if isinstance(event, dict) and "from" in event:
+                users.add(event["from"]["id"])
+    return users
+
+
+async def seed_log_users(session_factory: Any, users: set[int], admins: set[int]) -> None:
+    """Create the users of the log with their roles."""
+    from models import User
+
+    async with session_factory() as session:
+        session.add_all(
+            User(telegram_id=telegram_id, first_name="User", role="admin" if telegram_id in admins else "user")
+            for telegram_id in sorted(users | admins)
+        )
+        await session.commit()
+
+
+async def replay(
+    path: Path,
+    speed: float = 1.0,
+    max_gap: float = 5.0,
+    limit: Optional[int] = None,
+    seed_requests: int = 200,
+    seed: int = 1,
+    database_url: Optional[str] = None,
+) -> LoadReport:
+    """Replay a log against a fresh bot and seeded database.
+
+    Args:
+        path: Update log
+        speed: Playback speed; 0 handles updates one by one without pauses
+        max_gap: Pauses between updates longer than this are shortened to it, seconds
+        limit: Replay only the first updates
+        seed_requests: Requests to seed
+        seed: Seed of the generated data
+        database_url: Empty database to use, a temporary SQLite one by default
+
+    Returns:
+        Report with one step per update
+    """
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Update
+    from sqlalchemy import event, func, select
+
+    from bot.main import register_all_handlers
+    from database.connection import create_engine_from_env
+    from database.migrations import ensure_schema
+    from models import Request
+    from utils.container import Container, get_container, set_container
+    from utils.rate_limiter import MemoryRateLimiter
+
+    updates, admins = read_log(path)
+    updates = updates[:limit]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine_from_env(database_url or f"sqlite:///{tmp}/replay.db")
+        await ensure_schema(engine, migrate=True)
+
+        api = FakeBotAPI(seed=seed)
+        url = await api.start()
+        bot = Bot(
+            token="123456:REPLAY",
+            session=AiohttpSession(
+                api=TelegramAPIServer.from_base(url), json_loads=codec.loads, json_dumps=codec.dumps
+            ),
+        )
+        container = Container(engine=engine, bot=bot, rate_limiter=MemoryRateLimiter())
+        previous = get_container()
+        set_container(container)
+
+        await seed_log_users(container.session_factory, update_users(updates), admins)
+        await seed_database(engine, seed_requests, seed=seed)
+        dp = container.dispatcher
+        register_all_handlers(dp)
+
+        results: list[StepResult] = []
+        statements = 0
+
+        def count_statement(*args: Any) -> None:
+            nonlocal statements
+            statements += 1
+
+        async def feed(data: dict) -> None:
+            kind, action = update_key(data)
+            update = Update.model_validate(data, context={"bot": bot})
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            except Exception as e:
+                results.append(StepResult(kind, action, time.perf_counter() - started, False, type(e).__name__))
+            else:
+                results.append(StepResult(kind, action, time.perf_counter() - started, True))
+
+        try:
+            event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+            started = time.perf_counter()
+            tasks = []
+            offset = 0.0
+            for i, (at, data) in enumerate(updates):
+                if speed <= 0:
+                    await feed(data)
+                    continue
+                if i:
+                    # Долгие паузы (ночь, выходные) сокращаем до max_gap
+                    offset += min(at - updates[i - 1][0], max_gap) / speed
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(feed(data)))
+            await asyncio.gather(*tasks)
+            duration = time.perf_counter() - started
+            event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+            async with container.session_factory() as session:
+                created = await session.scalar(select(func.count(Request.id)))
+        finally:
+            await api.stop()
+            await container.close()
+            set_container(previous)
+
+    return LoadReport(
+        duration=duration,
+        steps=results,
+        statements=statements,
+        api_calls=len(api.calls),
+        flood_errors=0,
+        requests_created=(created or 0) - seed_requests,
+    )
+
+
+def main() -> None:
+    """Replay a log from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", type=Path, help="Update log (UPDATE_LOG_PATH)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed, 0 = one by one without pauses")
+    parser.add_argument("--max-gap", type=float, default=5.0, help="Longest pause between updates, seconds")
+    parser.add_argument("--limit", type=int, help="Replay only the first updates")
+    parser.add_argument("--seed-requests", type=int, default=200, help="Requests to seed")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="Empty database to use (temporary SQLite by default)")
+    parser.add_argument("--output", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from utils.logging_config import build_console_handler, init_logging
+
+    init_logging([build_console_handler()])
+    report = asyncio.run(replay(
+        args.log,
+        speed=args.speed,
+        max_gap=args.max_gap,
+        limit=args.limit,
+        seed_requests=args.seed_requests,
+        seed=args.seed,
+        database_url=args.database_url,
+    ))
+    print(report.format())
+    if args.output:
+        args.output.write_text(codec.dumps(report.to_dict()) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
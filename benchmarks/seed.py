@@ -0,0 +1,340 @@
+"""Bulk generator of realistic data for benchmarks.
+
+Appends users, requests, comments and attachments (``files``) to a
+database: PostgreSQL through ``COPY`` (asyncpg), anything else through
+``executemany`` in batches. Rows are generated from a seed, so the same
+arguments always give the same data:
+
+* a few busy authors file most requests (skewed distribution);
+* requests are created on school hours over ``--days`` days, older ones
+  are mostly completed or rejected, recent ones open or in progress;
+* locations are real ``utils.locations`` places, popular ones more often.
+
+Location counters and the search index are kept by the database triggers;
+the analytics snapshot is rebuilt and planner statistics are refreshed at
+the end. Seeding is additive, so a benchmark can grow one database from
+10k to 1M requests.
+
+Usage::
+
+    python -m benchmarks.seed --requests 100000 --database-url sqlite:///bench.db
+    python -m benchmarks.seed --requests 1000000 --database-url postgresql://localhost/zavhoz_bench
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from models import Comment, File, Location, Request, User
+from utils import codec
+from utils.locations import parse_location
+
+BATCH_SIZE = 20000
+ADMINS = 3
+REQUESTS_PER_USER = 25
+
+FIRST_NAMES = ["Мария", "Анна", "Елена", "Ольга", "Ирина", "Наталья", "Сергей", "Андрей", "Дмитрий", "Алексей"]
+LAST_NAMES = ["Иванова", "Петрова", "Смирнова", "Кузнецова", "Попова", "Соколов", "Лебедев", "Козлов", "Новиков"]
+SPECIAL_ROOMS = ["Спортзал", "Столовая, 1 этаж", "Актовый зал", "Библиотека", "Медкабинет", "Гардероб"]
+PROBLEMS = [
+    ("Не работает батарея", "В классе холодно, батарея ледяная с утра. Дети сидят в куртках."),
+    ("Протекает кран", "Кран в раковине не закрывается до конца, течет вода на пол."),
+    ("Перегорели лампы", "Не горят две лампы над доской, плохо видно записи."),
+    ("Сломан замок двери", "Замок заедает, ключ не проворачивается, кабинет не закрыть."),
+    ("Не закрывается окно", "Створка окна не прижимается, сильно дует, нужен ремонт фурнитуры."),
+    ("Шатается парта", "Парта у окна шатается, отломана ножка, нужен ремонт или замена."),
+    ("Не работает проектор", "Проектор не включается, лампа мигает красным."),
+    ("Засор в раковине", "Вода не уходит, в раковине стоит вода с неприятным запахом."),
+    ("Отклеился линолеум", "У входа в кабинет отклеился линолеум, можно споткнуться."),
+    ("Не работает розетка", "Розетка у учительского стола искрит и не работает."),
+]
+COMMENTS = [
+    "Посмотрю сегодня после уроков",
+    "Нужна запчасть, заказали",
+    "Спасибо, все работает!",
+    "Проблема повторилась, посмотрите еще раз",
+    "Мастер придет завтра утром",
+    "Уточните, пожалуйста, номер кабинета",
+]
+# Статусы в зависимости от возраста заявки: (до N дней, веса OPEN/IN_PROGRESS/COMPLETED/REJECTED)
+STATUS_WEIGHTS = [(2, (60, 35, 5, 0)), (14, (15, 20, 55, 10)), (None, (3, 2, 85, 10))]
+STATUSES = ("OPEN", "IN_PROGRESS", "COMPLETED", "REJECTED")
+PRIORITIES = ("HIGH", "MEDIUM", "LOW")
+SCHOOL_HOURS = list(range(7, 19))
+HOUR_WEIGHTS = [3, 10, 12, 10, 8, 6, 6, 5, 4, 3, 2, 1]
+
+
+def location_texts() -> list[str]:
+    """Places of a three-building school, as users type them."""
+    rooms = [
+        f"Корпус {building}, {floor} этаж, каб. {floor}{room:02d}"
+        for building, floor, room in itertools.product(range(1, 4), range(1, 5), range(1, 16))
+    ]
+    return rooms + SPECIAL_ROOMS
+
+
+def _cumulative(weights: list[float]) -> list[float]:
+    return list(itertools.accumulate(weights))
+
+
+def _skewed_weights(count: int, exponent: float = 1.1) -> list[float]:
+    # Закон Ципфа: несколько «активных» авторов и популярных мест
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+async def _next_id(conn: AsyncConnection, table: Table) -> int:
+    return (await conn.scalar(select(func.max(table.c.id))) or 0) + 1
+
+
+async def insert_rows(conn: AsyncConnection, table: Table, rows: list[dict[str, Any]]) -> None:
+    """Insert rows with COPY on PostgreSQL (asyncpg) or executemany elsewhere."""
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        columns = list(rows[0])
+        raw = await conn.get_raw_connection()
+        records = [
+            tuple(codec.dumps(row[c]) if isinstance(row[c], (list, dict)) else row[c] for c in columns)
+            for row in rows
+        ]
+        await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+    else:
+        await conn.execute(insert(table), rows)
+
+
+async def _ensure_locations(conn: AsyncConnection) -> list[tuple[int, str]]:
+    """Ids and names of the seed locations, creating missing ones."""
+    table = Location.__table__
+    existing = {key: (id_, name) for id_, key, name in await conn.execute(select(table.c.id, table.c.key, table.c.name))}
+    missing = []
+    next_id = await _next_id(conn, table)
+    for location_text in location_texts():
+        parsed = parse_location(location_text)
+        if parsed.key in existing:
+            continue
+        row = {
+            "id": next_id, "key": parsed.key, "name": parsed.name,
+            "building": parsed.building, "floor": parsed.floor, "room": parsed.room,
+        }
+        missing.append(row)
+        existing[parsed.key] = (next_id, parsed.name)
+        next_id += 1
+    await insert_rows(conn, table, missing)
+    return [existing[parse_location(location_text).key] for location_text in location_texts()]
+
+
+async def _seed_users(conn: AsyncConnection, count: int, rng: random.Random) -> None:
+    table = User.__table__
+    first_id = await _next_id(conn, table)
+    has_admins = await conn.scalar(select(func.count()).select_from(table).where(table.c.role == "admin"))
+    rows = []
+    for i, user_id in enumerate(range(first_id, first_id + count)):
+        rows.append({
+            "id": user_id,
+            "telegram_id": 100_000_000 + user_id,
+            "username": f"user{user_id}" if rng.random() < 0.7 else None,
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "role": "admin" if not has_admins and i < ADMINS else "user",
+            "is_active": True,
+            "created_at": datetime(2025, 9, 1, tzinfo=timezone.utc),
+        })
+    await insert_rows(conn, table, rows)
+
+
+def _status(age_days: float, rng: random.Random) -> str:
+    for limit, weights in STATUS_WEIGHTS:
+        if limit is None or age_days < limit:
+            return rng.choices(STATUSES, weights)[0]
+    raise AssertionError("unreachable")
+
+
+async def seed_database(
+    engine: AsyncEngine,
+    requests: int,
+    comments_per_request: float = 0.6,
+    files_per_request: float = 0.4,
+    days: int = 365,
+    seed: int = 1,
+    now: Optional[datetime] = None,
+    batch_size: int = BATCH_SIZE,
+) -> dict[str, int]:
+    """Append generated rows to the database.
+
+    Args:
+        engine: Engine of a database with the schema created
+        requests: Requests to add (users are added in proportion)
+        comments_per_request: Average comments per request
+        files_per_request: Average attachments per request
+        days: Requests are spread over this many days before ``now``
+        seed: Seed of the generator
+        now: Reference time, the current time by default
+        batch_size: Rows per insert batch (and transaction)
+
+    Returns:
+        Number of rows added per table
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from utils.snapshots import rebuild_snapshot
+
+    rng = random.Random(seed)
+    now = now or datetime.utcnow().replace(microsecond=0)
+    added = {"users": 0, "requests": 0, "comments": 0, "files": 0}
+
+    async with engine.begin() as conn:
+        users_table = User.__table__
+        total_requests = await conn.scalar(select(func.count()).select_from(Request.__table__)) or 0
+        total_users = await conn.scalar(select(func.count()).select_from(users_table)) or 0
+        wanted_users = max((total_requests + requests) // REQUESTS_PER_USER, 10) + ADMINS
+        if wanted_users > total_users:
+            await _seed_users(conn, wanted_users - total_users, random.Random(f"users-{seed}"))
+            added["users"] = wanted_users - total_users
+        locations = await _ensure_locations(conn)
+        user_rows = (await conn.execute(select(users_table.c.id, users_table.c.role).order_by(users_table.c.id))).all()
+
+    authors = [user_id for user_id, role in user_rows if role != "admin"]
+    admins = [user_id for user_id, role in user_rows if role == "admin"]
+    author_weights = _cumulative(_skewed_weights(len(authors), 0.8))
+    location_weights = _cumulative(_skewed_weights(len(locations)))
+
+    done = 0
+    while done < requests:
+        size = min(batch_size, requests - done)
+        async with engine.begin() as conn:
+            request_id = await _next_id(conn, Request.__table__)
+            comment_id = await _next_id(conn, Comment.__table__)
+            file_id = await _next_id(conn, File.__table__)
+            request_rows, comment_rows, file_rows = [], [], []
+            for _ in range(size):
+                created_at = (now - timedelta(days=rng.randrange(days))).replace(
+                    hour=rng.choices(SCHOOL_HOURS, HOUR_WEIGHTS)[0], minute=rng.randrange(60), second=rng.randrange(60)
+                )
+                if created_at > now:
+                    created_at -= timedelta(days=1)
+                status = _status((now - created_at).total_seconds() / 86400, rng)
+                author = authors[bisect.bisect(author_weights, rng.random() * author_weights[-1])]
+                location_id, location_name = locations[bisect.bisect(location_weights, rng.random() * location_weights[-1])]
+                title, description = rng.choice(PROBLEMS)
+                completed_at = None
+                updated_at = created_at
+                if status in ("COMPLETED", "REJECTED"):
+                    resolved = min(created_at + timedelta(hours=rng.expovariate(1 / 30)), now)
+                    updated_at = resolved
+                    completed_at = resolved if status == "COMPLETED" else None
+                elif status == "IN_PROGRESS":
+                    updated_at = min(created_at + timedelta(hours=rng.expovariate(1 / 4)), now)
+                request_rows.append({
+                    "id": request_id,
+                    "user_id": author,
+                    "title": f"{title}, {location_name}"[:100],
+                    "description": f"{description} {location_name}.",
+                    "location": location_name,
+                    "location_id": location_id,
+                    "status": status,
+                    "priority": rng.choices(PRIORITIES, (20, 60, 20))[0],
+                    "assigned_to": rng.choice(admins) if admins and status != "OPEN" else None,
+                    "created_at": created_at,
+                    "updated_at": updated_at,
+                    "completed_at": completed_at,
+                    "history": [],
+                })
+
+                while rng.random() < comments_per_request / (1 + comments_per_request):
+                    comment_rows.append({
+                        "id": comment_id,
+                        "request_id": request_id,
+                        "user_id": rng.choice(admins + [author]),
+                        "comment": rng.choice(COMMENTS),
+                        "created_at": (created_at + timedelta(hours=rng.random() * 24)).replace(tzinfo=timezone.utc),
+                    })
+                    comment_id += 1
+                while rng.random() < files_per_request / (1 + files_per_request):
+                    is_photo = rng.random() < 0.8
+                    file_rows.append({
+                        "id": file_id,
+                        "request_id": request_id,
+                        "file_type": "photo" if is_photo else "document",
+                        "file_id": f"AgAC{rng.getrandbits(200):050x}",
+                        "file_name": None if is_photo else f"акт_{request_id}.pdf",
+                        "uploaded_by": author,
+                        "uploaded_at": created_at.replace(tzinfo=timezone.utc),
+                    })
+                    file_id += 1
+                request_id += 1
+
+            await insert_rows(conn, Request.__table__, request_rows)
+            await insert_rows(conn, Comment.__table__, comment_rows)
+            await insert_rows(conn, File.__table__, file_rows)
+        done += size
+        added["requests"] += size
+        added["comments"] += len(comment_rows)
+        added["files"] += len(file_rows)
+
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Явные id не двигают последовательности
+            for table in (User.__table__, Location.__table__, Request.__table__, Comment.__table__, File.__table__):
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT max(id) FROM {table.name}))"
+                ))
+        await conn.execute(text("ANALYZE"))
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await rebuild_snapshot(session)
+    return added
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from database.connection import create_engine_from_env
+    from database.migrations import ensure_schema
+
+    engine = create_engine_from_env(args.database_url)
+    try:
+        await ensure_schema(engine, migrate=True)
+        started = time.perf_counter()
+        added = await seed_database(
+            engine,
+            args.requests,
+            comments_per_request=args.comments,
+            files_per_request=args.files,
+            days=args.days,
+            seed=args.seed,
+        )
+        elapsed = time.perf_counter() - started
+        rows = sum(added.values())
+        print(", ".join(f"{table}: +{count}" for table, count in added.items()))
+        print(f"{rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Seed a database from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="Database to append rows to")
+    parser.add_argument("--requests", type=int, default=100000, help="Requests to add")
+    parser.add_argument("--comments", type=float, default=0.6, help="Average comments per request")
+    parser.add_argument("--files", type=float, default=0.4, help="Average attachments per request")
+    parser.add_argument("--days", type=int, default=365, help="Spread requests over this many days")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from utils.logging_config import build_console_handler, init_logging
+
+    init_logging([build_console_handler()])
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
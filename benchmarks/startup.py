@@ -0,0 +1,142 @@
+"""Startup benchmark: time from process start to the first handled update.
+
+Each run is a fresh interpreter. It imports the bot, prepares the database
+(``--mode async``: revision check plus parallel pool and cache warmup as in
+``bot.main.on_startup``; ``--mode legacy``: synchronous ``create_all`` on a
+second engine, the previous startup path) and feeds a ``/start`` update
+through the dispatcher. The container's bot is replaced by one whose session answers
+every Bot API method without network access.
+
+Usage::
+
+    python -m benchmarks.startup --runs 5
+    DATABASE_URL=postgresql://... python -m benchmarks.startup --mode async
+
+Without ``DATABASE_URL`` a temporary SQLite database is used.
+"""
+
+import time
+
+STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+from datetime import datetime  # noqa: E402
+
+MODES = ("legacy", "async")
+PHASES = ("import", "schema", "first_update", "total")
+
+
+async def _run_child(mode: str) -> dict[str, float]:
+    """Measure one startup in this process."""
+    from aiogram import Bot
+    from aiogram.client.session.base import BaseSession
+    from aiogram.types import Chat, Message, Update, User
+
+    import bot.main as app
+    from utils.container import Container, set_container
+
+    class OfflineSession(BaseSession):
+        """Answers every Bot API method with an empty result."""
+
+        async def make_request(self, bot, method, timeout=None):
+            return None
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self) -> None:
+            pass
+
+    imported = time.perf_counter()
+    container = Container(bot=Bot(token=os.environ["BOT_TOKEN"], session=OfflineSession()))
+    set_container(container)
+    app.register_all_handlers(container.dispatcher)
+    if mode == "legacy":
+        from sqlalchemy import create_engine
+
+        from database.migrations import sync_url
+        from models import Base
+
+        sync_engine = create_engine(sync_url(container.engine.url.render_as_string(hide_password=False)))
+        Base.metadata.create_all(bind=sync_engine)
+        sync_engine.dispose()
+    else:
+        await app.on_startup(container)
+    ready = time.perf_counter()
+
+    update = Update(
+        update_id=1,
+        message=Message(
+            message_id=1,
+            date=datetime.now(),
+            chat=Chat(id=1, type="private"),
+            from_user=User(id=1, is_bot=False, first_name="Bench"),
+            text="/start",
+        ),
+    )
+    await container.dispatcher.feed_update(container.bot, update)
+    handled = time.perf_counter()
+    await container.close()
+
+    return {
+        "import": imported - STARTED,
+        "schema": ready - imported,
+        "first_update": handled - ready,
+        "total": handled - STARTED,
+    }
+
+
+def _prepare(env: dict[str, str]) -> None:
+    """Create and stamp the schema once, outside the measured runs."""
+    subprocess.run(
+        [sys.executable, "-c", "from database.migrations import create_tables; create_tables()"],
+        env=env,
+        check=True,
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=MODES, action="append", help="Startup path(s) to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per mode")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_run_child(args.child))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/benchmark.db")
+        env.setdefault("BOT_TOKEN", "123456:benchmark")
+        env.setdefault("ADMIN_USER_ID", "1")
+        env.setdefault("LOG_LEVEL", "WARNING")
+        _prepare(env)
+
+        print(f"{'mode':<8}" + "".join(f"{phase:>14}" for phase in PHASES))
+        for mode in args.mode or MODES:
+            runs = []
+            for _ in range(args.runs):
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.startup", "--child", mode],
+                    env=env,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            medians = {phase: statistics.median(run[phase] for run in runs) for phase in PHASES}
+            print(f"{mode:<8}" + "".join(f"{medians[phase] * 1000:>12.1f}ms" for phase in PHASES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Micro-benchmarks of the per-update hot paths (pytest-benchmark).
+
+Covers message formatting with lists of 10/100/1000 requests, keyboard
+builders, validation and the ``require_auth`` wrapper (a real user lookup
+in a SQLite database). The module is outside ``testpaths``, so the regular
+test run does not pick it up.
+
+Usage::
+
+    make bench-baseline        # save a baseline for this machine
+    make bench                 # compare, fail on a median slowdown > BENCH_THRESHOLD %
+    make bench BENCH_THRESHOLD=10
+
+Baselines live in ``benchmarks/baselines/hot_paths/<machine>/``; pytest-benchmark
+only compares runs of the same platform and Python version. Timings of a
+shared machine drift by tens of percent, so for a reliable check save the
+baseline on the base commit and compare on the same machine right after.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from aiogram import types
+
+from benchmarks.load_test import DESCRIPTIONS
+from benchmarks.seed import location_texts
+from models import Base, Location, Priority, Request, Status, User
+from utils import keyboard, validation
+from utils.auth import require_auth
+from utils.messages import format_request_info, format_request_list
+
+SIZES = (10, 100, 1000)
+TELEGRAM_ID = 700000001
+
+
+def build_requests(count: int, seed: int = 1) -> list[Request]:
+    """Detached requests with authors, assignees and realistic texts."""
+    rng = random.Random(seed)
+    locations = location_texts()
+    author = User(id=1, telegram_id=TELEGRAM_ID, first_name="Иван", last_name="Петров", username="ivanov")
+    admin = User(id=2, telegram_id=TELEGRAM_ID + 1, first_name="Завхоз", role="admin")
+    now = datetime(2026, 1, 15, 12, 0)
+    requests = []
+    for i in range(1, count + 1):
+        description = rng.choice(DESCRIPTIONS)
+        status = rng.choice(list(Status))
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        request = Request(
+            id=i,
+            title=description[:80],
+            description=description,
+            location=rng.choice(locations),
+            priority=rng.choice(list(Priority)),
+            status=status,
+            created_at=created_at,
+            completed_at=created_at + timedelta(hours=5) if status == Status.COMPLETED else None,
+        )
+        request.user = author
+        if status != Status.OPEN:
+            request.assigned_to = admin.id
+            request.assigned_user = admin
+        requests.append(request)
+    return requests
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}_requests")
+def requests(request: pytest.FixtureRequest) -> list[Request]:
+    """Requests of every benchmarked list size."""
+    return build_requests(request.param)
+
+
+def test_format_request_list(benchmark, requests: list[Request]) -> None:
+    message = benchmark(format_request_list, requests, "Открытые заявки")
+    assert f"({len(requests)})" in message
+
+
+def test_format_request_info(benchmark, requests: list[Request]) -> None:
+    def format_all() -> list[str]:
+        return [format_request_info(request, show_user=True) for request in requests]
+
+    assert len(benchmark(format_all)) == len(requests)
+
+
+def test_search_results_keyboard(benchmark, requests: list[Request]) -> None:
+    markup = benchmark(keyboard.get_search_results_keyboard, requests, True)
+    assert len(markup.inline_keyboard) == len(requests) + 3
+
+
+def test_location_report_keyboard(benchmark) -> None:
+    locations = [
+        Location(id=i, name=name, open_count=i % 5, request_count=i * 3)
+        for i, name in enumerate(location_texts(), 1)
+    ]
+    markup = benchmark(keyboard.get_location_report_keyboard, locations)
+    assert markup.inline_keyboard
+
+
+@pytest.mark.parametrize("builder", [
+    lambda: keyboard.get_main_menu_keyboard(is_admin=True),
+    keyboard.get_admin_panel_keyboard,
+    keyboard.get_priority_keyboard,
+    lambda: keyboard.get_request_actions_keyboard(42, is_admin=True),
+    lambda: keyboard.get_similar_requests_keyboard([1, 2, 3], Priority.MEDIUM.value),
+    keyboard.get_admin_filters_menu_keyboard,
+], ids=["main_menu", "admin_panel", "priority", "request_actions", "similar_requests", "admin_filters"])
+def test_static_keyboard(benchmark, builder) -> None:
+    assert benchmark(builder).inline_keyboard
+
+
+@pytest.mark.parametrize("validate,value", [
+    (validation.validate_request_title, DESCRIPTIONS[0][:80]),
+    (validation.validate_request_description, " ".join(DESCRIPTIONS)),
+    (validation.validate_location, "Корпус 2, кабинет 214"),
+    (validation.validate_comment, "Заменили кран, проверьте, пожалуйста. " * 10),
+    (validation.validate_image_caption, "Течет под раковиной"),
+], ids=["title", "description", "location", "comment", "caption"])
+def test_validation(benchmark, validate, value: str) -> None:
+    valid, _ = benchmark(validate, value)
+    assert valid
+
+
+def test_sanitize_text(benchmark) -> None:
+    text = "Не работает  розетка\n\nи свет в кабинете 214 " * 20
+    assert "\n" not in benchmark(validation.sanitize_text, text)
+
+
+@pytest.fixture(scope="module")
+def auth_loop(tmp_path_factory: pytest.TempPathFactory):
+    """Event loop with a container on a SQLite database holding the user."""
+    from database.connection import create_engine_from_env
+    from utils.container import Container, get_container, set_container
+
+    loop = asyncio.new_event_loop()
+    engine = create_engine_from_env(f"sqlite:///{tmp_path_factory.mktemp('auth')}/auth.db")
+    container = Container(engine=engine)
+    previous = get_container()
+    set_container(container)
+
+    async def prepare() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with container.session_factory() as session:
+            session.add(User(telegram_id=TELEGRAM_ID, first_name="Иван"))
+            await session.commit()
+
+    loop.run_until_complete(prepare())
+    yield loop
+    # get_db, прерванный return из обработчика, закрывает сессию фоновой задачей
+    loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop)))
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.run_until_complete(container.close())
+    set_container(previous)
+    loop.close()
+
+
+def telegram_message() -> types.Message:
+    return types.Message(
+        message_id=1,
+        date=datetime(2026, 1, 15, 12, 0),
+        chat=types.Chat(id=TELEGRAM_ID, type="private"),
+        from_user=types.User(id=TELEGRAM_ID, is_bot=False, first_name="Иван"),
+        text="📋 Мои заявки",
+    )
+
+
+@pytest.mark.parametrize("kind", ["message", "callback"])
+def test_require_auth(benchmark, auth_loop: asyncio.AbstractEventLoop, kind: str) -> None:
+    @require_auth
+    async def handler(update, user: User, session) -> int:
+        return user.telegram_id
+
+    update = telegram_message()
+    if kind == "callback":
+        update = types.CallbackQuery(
+            id="1", from_user=update.from_user, chat_instance="1", message=update, data="my_requests"
+        )
+
+    assert benchmark(lambda: auth_loop.run_until_complete(handler(update))) == TELEGRAM_ID
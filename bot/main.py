@@ -1,77 +1,185 @@
-"""Main bot entry point."""
+"""Main bot entry point.
+
+Importing this module has no side effects; the bot, the database engine
+and the services are built by the application container when ``main``
+first needs them.
+"""
 
 import asyncio
-import os
+import time
 from typing import NoReturn
 
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram import Dispatcher
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize structured logging
-from utils.logging_config import get_logger, init_logging
-
-init_logging()
-logger = get_logger(__name__)
-
-# Initialize Sentry for error tracking
-from utils.sentry_config import init_sentry
-
-init_sentry()
-
-# Get bot token
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-if not BOT_TOKEN:
-    raise ValueError("BOT_TOKEN environment variable is not set")
-
-# Initialize bot and dispatcher
-bot = Bot(token=BOT_TOKEN)
-storage = MemoryStorage()
-dp = Dispatcher(storage=storage)
-
-# Initialize notification service
-from utils.notifications import get_notification_service
-
-notification_service = get_notification_service(bot)
-
-# Import and register handlers
 from handlers import (
     register_admin_handlers,
+    register_bulk_actions_handlers,
     register_create_request_handlers,
     register_file_handlers,
+    register_inline_handlers,
     register_menu_handlers,
     register_request_actions_handlers,
+    register_search_handlers,
     register_start_handlers,
 )
+from utils.container import Container, get_container
+from utils.logging_config import get_logger, init_logging
+
+logger = get_logger(__name__)
+
+# Keep references to fire-and-forget startup tasks
+background_tasks: set[asyncio.Task] = set()
 
 
-def register_all_handlers() -> None:
+def register_all_handlers(dp: Dispatcher) -> None:
     """Register all message handlers."""
-    logger.info("Registering all handlers...", count=6)
+    logger.info("Registering all handlers...", count=9)
     register_start_handlers(dp)
     register_menu_handlers(dp)
     register_create_request_handlers(dp)
     register_admin_handlers(dp)
     register_request_actions_handlers(dp)
+    register_bulk_actions_handlers(dp)
     register_file_handlers(dp)
+    register_search_handlers(dp)
+    register_inline_handlers(dp)
     logger.info("All handlers registered successfully")
 
 
+async def backfill_file_mirror(mirror, container: Container) -> None:
+    """Schedule downloads of attachments missing from the local mirror."""
+    try:
+        async with container.session_factory() as session:
+            scheduled = await mirror.backfill(session)
+        logger.info("File mirror backfill scheduled", scheduled=scheduled)
+    except Exception as e:
+        logger.error("File mirror backfill failed", error=str(e), exc_info=True)
+
+
+async def rebuild_analytics_snapshot(container: Container) -> None:
+    """Rebuild analytics counters; stats keep using the previous snapshot meanwhile."""
+    from utils.snapshots import rebuild_snapshot_concurrently
+
+    try:
+        await rebuild_snapshot_concurrently(container.session_factory)
+    except Exception as e:
+        logger.error("Analytics snapshot rebuild failed", error=str(e), exc_info=True)
+
+
+async def start_update_recorder(recorder, container: Container) -> None:
+    """Write the log header with the current admins."""
+    from sqlalchemy import select
+
+    from models import User
+
+    try:
+        async with container.session_factory() as session:
+            admins = (await session.scalars(select(User.telegram_id).where(User.role == "admin"))).all()
+        recorder.write_header(admins)
+        logger.info("Recording updates", path=recorder.path, admins=len(admins))
+    except Exception as e:
+        logger.error("Update recorder header failed", error=str(e), exc_info=True)
+
+
+async def warm_caches(container: Container) -> None:
+    """Load in-memory indexes and fail stale export jobs, each in its own session."""
+    from utils.export_jobs import get_export_manager
+    from utils.locations import ensure_location_index
+    from utils.similarity import get_similarity_index
+
+    async def similarity_index() -> None:
+        index = get_similarity_index()
+        if not index.loaded:
+            async with container.session_factory() as session:
+                await index.load(session)
+
+    async def location_index() -> None:
+        async with container.session_factory() as session:
+            await ensure_location_index(session)
+
+    async def export_jobs() -> None:
+        # Jobs of a previous process will never finish
+        interrupted = await get_export_manager(container.bot).mark_interrupted()
+        if interrupted:
+            logger.warning("Export jobs interrupted by restart", count=interrupted)
+
+    results = await asyncio.gather(similarity_index(), location_index(), export_jobs(), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Cache warmup failed", error=str(result), exc_info=result)
+
+
+async def on_startup(container: Container) -> None:
+    """Verify the schema, then warm the connection pool and caches in parallel."""
+    from database.connection import warm_pool
+    from database.migrations import ensure_schema
+
+    started = time.perf_counter()
+    schema = await ensure_schema(container.engine)
+    connections, _ = await asyncio.gather(warm_pool(container.engine), warm_caches(container))
+    logger.info(
+        "Database ready",
+        schema=schema,
+        connections=connections,
+        seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+async def on_shutdown(container: Container) -> None:
+    """Stop worker processes and release connections."""
+    from utils.charts import get_chart_renderer
+    from utils.update_recorder import get_update_recorder
+
+    get_chart_renderer().close()
+    recorder = get_update_recorder()
+    if recorder:
+        recorder.close()
+    await container.close()
+
+
 async def main() -> NoReturn:
     """Main bot function."""
-    try:
-        register_all_handlers()
+    init_logging()
+
+    # Initialize Sentry for error tracking
+    from utils.sentry_config import init_sentry
 
-        # Create database tables
-        from database.migrations import create_tables
-        create_tables()
-        logger.info("Database tables created/verified")
+    init_sentry()
+
+    try:
+        container = get_container()
+        dp = container.dispatcher
+        register_all_handlers(dp)
+        dp.shutdown.register(on_shutdown)
+
+        await on_startup(container)
+
+        # Anonymized log of incoming updates for replay benchmarks
+        from utils.update_recorder import get_update_recorder
+        recorder = get_update_recorder()
+        if recorder:
+            await start_update_recorder(recorder, container)
+            dp.update.outer_middleware(recorder)
+
+        # Mirror attachments that are not stored locally yet (in background)
+        from utils.file_mirror import get_file_mirror
+        mirror = get_file_mirror(container.bot)
+        if mirror:
+            task = asyncio.create_task(backfill_file_mirror(mirror, container))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+
+        # Fix any drift of analytics counters (in background)
+        task = asyncio.create_task(rebuild_analytics_snapshot(container))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
 
         logger.info("Bot startup complete", status="running")
-        await dp.start_polling(bot)
+        await dp.start_polling(container.bot)
     except Exception as e:
         logger.error("Fatal error during startup", error=str(e), exc_info=True)
         raise
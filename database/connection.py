@@ -1,54 +1,101 @@
+import asyncio
 import logging
 import os
 from collections.abc import AsyncGenerator
+from typing import Any, Optional
 
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.pool import NullPool
 
+from utils import codec
+
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
-
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
-elif DATABASE_URL.startswith("sqlite://"):
-    DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
-
-# Configure timeouts based on database type
-connect_args = {}
-if "postgresql" in DATABASE_URL:
-    # PostgreSQL supports both timeout and command_timeout
-    connect_args = {
-        "timeout": 10,  # Connection timeout: 10 seconds
-        "command_timeout": 30,  # Command timeout: 30 seconds
-    }
-else:
-    # SQLite only supports timeout
-    connect_args = {
-        "timeout": 10,  # Connection timeout: 10 seconds
-    }
-
-# Create async engine with proper configuration
-engine = create_async_engine(
-    DATABASE_URL,
-    poolclass=NullPool,
-    echo=False,  # Disable query logging for security
-    future=True,
-    connect_args=connect_args
-)
-
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# Connection pool: DB_POOL_SIZE=0 opens a new connection per session
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+
+
+def async_database_url(url: str) -> str:
+    """URL with an async driver."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+def create_engine_from_env(url: Optional[str] = None) -> AsyncEngine:
+    """Create the async engine configured from the environment.
+
+    Args:
+        url: Database URL, DATABASE_URL by default
+
+    Returns:
+        Async engine
+
+    Raises:
+        ValueError: If no URL is given and DATABASE_URL is not set
+    """
+    url = url or os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+    url = async_database_url(url)
+
+    # Configure timeouts based on database type
+    if "postgresql" in url:
+        # PostgreSQL supports both timeout and command_timeout
+        connect_args = {
+            "timeout": 10,  # Connection timeout: 10 seconds
+            "command_timeout": 30,  # Command timeout: 30 seconds
+        }
+    else:
+        # SQLite only supports timeout
+        connect_args = {
+            "timeout": 10,  # Connection timeout: 10 seconds
+        }
+
+    pool_args: dict = {"poolclass": NullPool}
+    if "postgresql" in url and DB_POOL_SIZE > 0:
+        pool_args = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_pre_ping": True,  # Drop connections closed by the server
+            "pool_recycle": 1800,
+        }
+
+    return create_async_engine(
+        url,
+        echo=False,  # Disable query logging for security
+        future=True,
+        connect_args=connect_args,
+        json_serializer=codec.dumps,
+        json_deserializer=codec.loads,
+        **pool_args,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # engine и async_session создаются контейнером при первом обращении
+    if name == "engine":
+        from utils.container import get_container
+
+        return get_container().engine
+    if name == "async_session":
+        from utils.container import get_container
+
+        return get_container().session_factory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Get database session context manager."""
-    async with async_session() as session:
+    from utils.container import get_container
+
+    async with get_container().session_factory() as session:
         try:
             yield session
         except Exception as e:
@@ -57,3 +104,28 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+async def warm_pool(target: Optional[AsyncEngine] = None, size: int = DB_POOL_SIZE) -> int:
+    """Open pool connections concurrently so first updates do not wait for them.
+
+    Args:
+        target: Engine whose pool to fill, the application engine by default
+        size: Number of connections to open
+
+    Returns:
+        Number of connections opened (0 without a pool)
+    """
+    if target is None:
+        from utils.container import get_container
+
+        target = get_container().engine
+    if isinstance(target.pool, NullPool) or size <= 0:
+        return 0
+
+    connections = await asyncio.gather(*(target.connect().start() for _ in range(size)))
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in connections))
+    return len(connections)
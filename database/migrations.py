@@ -1,30 +1,161 @@
+"""Database schema verification on startup.
+
+Startup does not create tables: it reads the Alembic revision over the
+bot's own async engine and compares it with ``SCHEMA_REVISION``, which is
+two cheap queries. An empty database is always created (``create_all``
+plus a stamp of the head revision), there is no data to lose. An outdated
+one is upgraded with Alembic only when asked to (``DB_AUTO_MIGRATE=true``
+or ``python -m database.migrations``).
+
+Installs that predate the migrations were built with ``create_all`` and
+have no ``alembic_version`` table. Their schema is that of
+``BASELINE_REVISION``: it is stamped and then upgraded like any other.
+"""
+
+import asyncio
 import logging
 import os
+from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import Column, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from models import Base
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Последняя миграция в alembic/versions (сверяется тестом)
+SCHEMA_REVISION = "4b7d2e9a6c15"
+# Схема, которую create_all строил до появления миграций
+BASELINE_REVISION = "31af69c22207"
+BASELINE_TABLES = {"users", "requests", "comments", "files"}
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() == "true"
+
+ROOT = Path(__file__).resolve().parent.parent
+
+alembic_version = Table(
+    "alembic_version",
+    MetaData(),
+    Column("version_num", String(32), primary_key=True),
+)
+
+
+class SchemaNotReady(RuntimeError):
+    """Raised when the database schema does not match the code."""
+
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
+def _read_revision(conn: Connection) -> tuple[Optional[str], set[str]]:
+    """(Alembic revision, tables of the database)."""
+    tables = set(inspect(conn).get_table_names())
+    if alembic_version.name not in tables:
+        return None, tables
+    return conn.execute(select(alembic_version.c.version_num)).scalar(), tables
 
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://", 1)
+
+def _stamp(conn: Connection, revision: str = SCHEMA_REVISION) -> None:
+    alembic_version.create(conn, checkfirst=True)
+    conn.execute(alembic_version.delete())
+    conn.execute(alembic_version.insert().values(version_num=revision))
+
+
+def sync_url(url: str) -> str:
+    """URL of the async engine for a synchronous driver (used by Alembic)."""
+    return url.replace("+asyncpg", "+psycopg2", 1).replace("+aiosqlite", "", 1)
+
+
+def run_alembic_upgrade(url: str) -> None:
+    """Upgrade the database to the head revision (blocking).
+
+    Raises:
+        SchemaNotReady: If Alembic is not installed
+    """
+    try:
+        from alembic import command
+        from alembic.config import Config
+    except ImportError as e:
+        raise SchemaNotReady("Database schema is outdated and Alembic is not installed") from e
+
+    # Без alembic.ini: его URL и настройки логирования не для продакшена
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", sync_url(url).replace("%", "%%"))
+    command.upgrade(config, "head")
+
+
+async def get_schema_revision(engine: AsyncEngine) -> Optional[str]:
+    """Alembic revision the database is at (None if not stamped)."""
+    async with engine.connect() as conn:
+        revision, _ = await conn.run_sync(_read_revision)
+    return revision
+
+
+async def ensure_schema(engine: AsyncEngine, migrate: bool = DB_AUTO_MIGRATE) -> str:
+    """Check that the database schema matches the code.
+
+    Args:
+        engine: Async engine to check
+        migrate: Bring an outdated schema up to date instead of failing
+
+    Returns:
+        "current", "created" (empty database) or "migrated"
+
+    Raises:
+        SchemaNotReady: If the schema is outdated and ``migrate`` is off,
+            or the database has tables of unknown origin and no revision
+    """
+    async with engine.connect() as conn:
+        revision, tables = await conn.run_sync(_read_revision)
+
+    if revision == SCHEMA_REVISION:
+        return "current"
+    if revision is None and not tables:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_stamp)
+        logger.info(f"Database schema created at revision {SCHEMA_REVISION}")
+        return "created"
+    if revision is None and not tables <= BASELINE_TABLES:
+        raise SchemaNotReady(
+            f"Database has tables {sorted(tables - BASELINE_TABLES)} but no Alembic revision: "
+            "stamp the revision it is at with `alembic stamp`"
+        )
+    if not migrate:
+        raise SchemaNotReady(
+            f"Database schema is at {revision or 'no revision'}, expected {SCHEMA_REVISION}: "
+            "run `python -m database.migrations` or start with DB_AUTO_MIGRATE=true"
+        )
+
+    if revision is None:
+        # База из create_all до появления миграций: дальше - обычные миграции
+        async with engine.begin() as conn:
+            await conn.run_sync(_stamp, BASELINE_REVISION)
+        revision = BASELINE_REVISION
+        logger.warning(f"Database without Alembic revision stamped as baseline {BASELINE_REVISION}")
+
+    await asyncio.to_thread(run_alembic_upgrade, engine.url.render_as_string(hide_password=False))
+    logger.info(f"Database schema upgraded from {revision} to {SCHEMA_REVISION}")
+    return "migrated"
 
 
 def create_tables() -> None:
-    """Create all database tables from models."""
+    """Create or upgrade the database schema (command-line entry point)."""
+    from utils.container import get_container
+
+    engine = get_container().engine
+
+    async def run() -> None:
+        try:
+            await ensure_schema(engine, migrate=True)
+        finally:
+            await engine.dispose()
+
     try:
-        engine = create_engine(DATABASE_URL, echo=False)
-        Base.metadata.create_all(bind=engine)
+        asyncio.run(run())
         logger.info("Database tables created successfully!")
-        engine.dispose()
     except Exception as e:
         logger.error(f"Error creating tables: {e}")
         raise
@@ -25,17 +25,27 @@ fi
 echo "🛑 Останавливаем старые контейнеры..."
 docker-compose down
 
-# Сборка и запуск контейнеров
-echo "🏗️ Сборка и запуск контейнеров..."
-docker-compose up -d --build
+# Сборка образа бота
+echo "🏗️ Сборка контейнеров..."
+docker-compose build
 
-# Ожидание запуска базы данных
+# Запуск базы данных
 echo "⏳ Ожидание запуска PostgreSQL..."
-sleep 10
+docker-compose up -d db
+until docker-compose exec -T db pg_isready -U zavhoz_user -d zavhoz_db &> /dev/null; do
+    sleep 1
+done
+
+# Схема БД создается или обновляется до запуска бота: сам бот только сверяет ревизию
+echo "📊 Создание и обновление таблиц в базе данных..."
+if ! docker-compose run --rm bot python -m database.migrations; then
+    echo "❌ Не удалось обновить схему базы данных."
+    exit 1
+fi
 
-# Создание таблиц в БД
-echo "📊 Создание таблиц в базе данных..."
-docker-compose exec bot python database/migrations.py
+# Запуск бота
+echo "🤖 Запуск бота..."
+docker-compose up -d bot
 
 echo "✅ Развертывание завершено!"
 echo "🤖 Бот запущен и готов к работе."
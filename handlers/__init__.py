@@ -1,9 +1,12 @@
 # Обработчики команд и callback'ов
 from .admin import register_admin_handlers
+from .bulk_actions import register_bulk_actions_handlers
 from .create_request import register_create_request_handlers
 from .files import register_file_handlers
+from .inline import register_inline_handlers
 from .menu import register_menu_handlers
 from .request_actions import register_request_actions_handlers
+from .search import register_search_handlers
 from .start import register_start_handlers
 
 __all__ = [
@@ -12,5 +15,8 @@ __all__ = [
     "register_create_request_handlers",
     "register_admin_handlers",
     "register_request_actions_handlers",
-    "register_file_handlers"
+    "register_bulk_actions_handlers",
+    "register_file_handlers",
+    "register_search_handlers",
+    "register_inline_handlers",
 ]
@@ -2,18 +2,30 @@ from datetime import datetime, timedelta
 import logging
 
 from aiogram import F, types
-from aiogram.types import FSInputFile
-from sqlalchemy import and_, func, select
+from aiogram.filters import Command, CommandObject
+from sqlalchemy import func, select
 
-from models import Priority, Request, Status
+from models import Location, Priority, Request, Status
+from utils.analytics import RequestAnalytics
 from utils.auth import require_auth
+from utils.bundle_export import MAX_UPLOAD_BYTES, BundleBuilder, SpooledInputFile, bundle_size
+from utils.charts import ChartsUnavailable, send_report_charts
+from utils.delivery import send_long_text
+from utils.export import EXPORT_WRITERS
+from utils.export_jobs import ExportQueueFull, get_export_manager, progress_text
+from utils.file_mirror import get_file_mirror
 from utils.keyboard import (
     get_admin_panel_keyboard,
     get_admin_filters_menu_keyboard,
     get_admin_export_menu_keyboard,
+    get_archive_keyboard,
+    get_export_job_keyboard,
     get_back_keyboard,
+    get_location_report_keyboard,
+    get_stats_keyboard,
 )
-from utils.messages import format_request_list, STATUS_EMOJIS, PRIORITY_EMOJIS
+from utils.locations import top_locations
+from utils.messages import format_location_report, format_request_list, STATUS_EMOJIS, PRIORITY_EMOJIS
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +33,12 @@ logger = logging.getLogger(__name__)
 @require_auth
 async def admin_panel_callback(callback: types.CallbackQuery, user, session):
     """Панель завхоза - главное меню"""
-    logger.info(f"🔍 Admin panel access attempt: user_id={user.id}, telegram_id={user.telegram_id}, role={user.role}, is_active={user.is_active}")
-    
     if user.role != "admin":
-        logger.warning(f"❌ Access denied: user {user.telegram_id} tried to access admin panel but has role '{user.role}'")
+        logger.warning("Access denied: user %s tried to access admin panel but has role '%s'", user.telegram_id, user.role)
         await callback.answer("У вас нет доступа")
         return
 
-    logger.info(f"✅ Admin panel opened for user {user.telegram_id}")
+    logger.debug("Admin panel opened for user %s", user.telegram_id)
     keyboard = get_admin_panel_keyboard()
     await callback.message.edit_text(
         "👑 <b>ПАНЕЛЬ ЗАВХОЗА</b>\n\n🔧 Управление заявками на ремонт",
@@ -110,20 +120,23 @@ async def filter_priority_callback(callback: types.CallbackQuery, user, session)
         await callback.answer("У вас нет доступа")
         return
 
+    # В callback_data имя приоритета (HIGH) или ALL
     priority_str = callback.data.replace("filter_priority_", "")
-    priority = Priority(priority_str)
+    priority = Priority[priority_str] if priority_str != "ALL" else None
+
+    stmt = select(Request).where(Request.status.in_([Status.OPEN, Status.IN_PROGRESS]))
+    if priority is not None:
+        stmt = stmt.where(Request.priority == priority)
+    stmt = stmt.order_by(Request.created_at.asc())
 
-    stmt = select(Request).where(
-        and_(Request.priority == priority, Request.status.in_([Status.OPEN, Status.IN_PROGRESS]))
-    ).order_by(Request.created_at.asc())
-    
     result = await session.execute(stmt)
     requests = result.scalars().all()
 
-    text = format_request_list(requests, f"Заявки с приоритетом '{priority.value}'")
+    title = f"Заявки с приоритетом '{priority.value}'" if priority else "Открытые заявки"
+    text = format_request_list(requests, title)
     keyboard = get_back_keyboard("admin_filters_menu")
 
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await send_long_text(callback.message, text, reply_markup=keyboard, document_name="requests.txt")
     await callback.answer()
 
 
@@ -134,17 +147,63 @@ async def filter_status_callback(callback: types.CallbackQuery, user, session):
         await callback.answer("У вас нет доступа")
         return
 
+    # В callback_data имя статуса (IN_PROGRESS) или ALL
     status_str = callback.data.replace("filter_status_", "")
-    status = Status(status_str)
+    status = Status[status_str] if status_str != "ALL" else None
 
-    stmt = select(Request).where(Request.status == status).order_by(Request.created_at.desc())
+    stmt = select(Request)
+    if status is not None:
+        stmt = stmt.where(Request.status == status)
+    stmt = stmt.order_by(Request.created_at.desc())
     result = await session.execute(stmt)
     requests = result.scalars().all()
 
-    text = format_request_list(requests, f"Заявки со статусом '{status.value}'")
+    title = f"Заявки со статусом '{status.value}'" if status else "Все заявки"
+    text = format_request_list(requests, title)
     keyboard = get_back_keyboard("admin_filters_menu")
 
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await send_long_text(callback.message, text, reply_markup=keyboard, document_name="requests.txt")
+    await callback.answer()
+
+
+@require_auth
+async def filter_locations_callback(callback: types.CallbackQuery, user, session):
+    """Отчет по местам - счетчики из таблицы мест"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    locations = await top_locations(session)
+    await callback.message.edit_text(
+        format_location_report(locations),
+        reply_markup=get_location_report_keyboard(locations),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@require_auth
+async def filter_location_callback(callback: types.CallbackQuery, user, session):
+    """Открытые заявки одного места"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    location = await session.get(Location, int(callback.data.replace("filter_location_", "")))
+    if not location:
+        await callback.answer("Место не найдено")
+        return
+
+    stmt = select(Request).where(
+        Request.location_id == location.id,
+        Request.status.in_([Status.OPEN, Status.IN_PROGRESS])
+    ).order_by(Request.created_at.desc())
+    requests = (await session.execute(stmt)).scalars().all()
+
+    text = format_request_list(requests, f"Открытые заявки: {location.name}")
+    keyboard = get_back_keyboard("filter_locations")
+
+    await send_long_text(callback.message, text, reply_markup=keyboard, document_name="requests.txt")
     await callback.answer()
 
 
@@ -166,7 +225,7 @@ async def filter_today_callback(callback: types.CallbackQuery, user, session):
     text = format_request_list(requests, f"Заявки за сегодня ({len(requests)})")
     keyboard = get_back_keyboard("admin_filters_menu")
 
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await send_long_text(callback.message, text, reply_markup=keyboard, document_name="requests.txt")
     await callback.answer()
 
 
@@ -188,7 +247,7 @@ async def filter_week_callback(callback: types.CallbackQuery, user, session):
     text = format_request_list(requests, f"Заявки за неделю ({len(requests)})")
     keyboard = get_back_keyboard("admin_filters_menu")
 
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await send_long_text(callback.message, text, reply_markup=keyboard, document_name="requests.txt")
     await callback.answer()
 
 
@@ -199,28 +258,13 @@ async def admin_stats_callback(callback: types.CallbackQuery, user, session):
         await callback.answer("У вас нет доступа")
         return
 
-    # Получаем метрики
-    open_count = await session.scalar(
-        select(func.count(Request.id)).where(Request.status == Status.OPEN)
-    ) or 0
-    
-    in_progress_count = await session.scalar(
-        select(func.count(Request.id)).where(Request.status == Status.IN_PROGRESS)
-    ) or 0
-    
-    completed_today = await session.scalar(
-        select(func.count(Request.id)).where(
-            and_(
-                Request.status == Status.COMPLETED,
-                func.date(Request.completed_at) == func.date(datetime.utcnow())
-            )
-        )
-    ) or 0
-    
-    total = await session.scalar(select(func.count(Request.id))) or 0
-    completed = await session.scalar(
-        select(func.count(Request.id)).where(Request.status == Status.COMPLETED)
-    ) or 0
+    # Все метрики - одним запросом (с кэшем по версии данных)
+    metrics = (await RequestAnalytics.get_full_report(session))["metrics"]
+    open_count = metrics["open"]
+    in_progress_count = metrics["in_progress"]
+    completed_today = metrics["completed_today"]
+    total = metrics["total"]
+    completed = metrics["completed"]
 
     text = "📊 <b>СТАТИСТИКА РАБОТЫ</b>\n\n"
     text += "📋 <b>Текущая ситуация:</b>\n"
@@ -242,11 +286,26 @@ async def admin_stats_callback(callback: types.CallbackQuery, user, session):
     else:
         text += "🎉 <b>Поздравляем!</b> Все заявки обработаны!\n"
 
-    keyboard = get_back_keyboard("back_to_admin")
+    keyboard = get_stats_keyboard()
     await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
     await callback.answer()
 
 
+@require_auth
+async def admin_charts_callback(callback: types.CallbackQuery, user, session):
+    """Графики статистики (рисуются в отдельном процессе, кэшируются)"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    await callback.answer("📈 Готовлю графики...")
+    report = await RequestAnalytics.get_full_report(session)
+    try:
+        await send_report_charts(callback.bot, callback.message.chat.id, report)
+    except ChartsUnavailable:
+        await callback.message.answer("📈 Графики недоступны: не установлен matplotlib")
+
+
 @require_auth
 async def admin_archive_callback(callback: types.CallbackQuery, user, session):
     """Архив выполненных заявок"""
@@ -262,9 +321,9 @@ async def admin_archive_callback(callback: types.CallbackQuery, user, session):
     requests = result.scalars().all()
 
     text = format_request_list(requests, "Архив (последние 50 заявок)")
-    keyboard = get_back_keyboard("back_to_admin")
+    keyboard = get_archive_keyboard()
 
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await send_long_text(callback.message, text, reply_markup=keyboard, document_name="archive.txt")
     await callback.answer()
 
 
@@ -284,6 +343,33 @@ async def admin_export_menu_callback(callback: types.CallbackQuery, user, sessio
     await callback.answer()
 
 
+async def enqueue_export(message: types.Message, user, kind: str, params: dict) -> bool:
+    """Поставить экспорт в фоновую очередь и показать сообщение с прогрессом
+
+    Возвращает True, если запрос присоединен к уже выполняющемуся экспорту.
+    """
+    manager = get_export_manager(message.bot)
+    job, coalesced = await manager.submit(kind, params, chat_id=message.chat.id, requested_by=user.id)
+    status_message = await message.answer(
+        progress_text(kind, job.progress, job.state),
+        reply_markup=get_export_job_keyboard(job.id)
+    )
+    if not manager.watch(job.id, status_message.chat.id, status_message.message_id):
+        # Задача успела завершиться, результат уже отправлен
+        await status_message.delete()
+    return coalesced
+
+
+async def enqueue_export_from_callback(callback: types.CallbackQuery, user, kind: str, params: dict) -> None:
+    """Поставить экспорт в очередь по нажатию кнопки"""
+    try:
+        coalesced = await enqueue_export(callback.message, user, kind, params)
+    except ExportQueueFull:
+        await callback.answer("Слишком много экспортов в очереди, попробуйте позже", show_alert=True)
+        return
+    await callback.answer("Уже готовится, пришлю вместе" if coalesced else "Экспорт поставлен в очередь")
+
+
 @require_auth
 async def export_month_callback(callback: types.CallbackQuery, user, session):
     """Экспорт отчета за месяц"""
@@ -291,49 +377,8 @@ async def export_month_callback(callback: types.CallbackQuery, user, session):
         await callback.answer("У вас нет доступа")
         return
 
-    try:
-        month_ago = datetime.utcnow() - timedelta(days=30)
-        
-        stmt = select(Request).where(
-            Request.created_at >= month_ago
-        ).order_by(Request.created_at.desc())
-        
-        result = await session.execute(stmt)
-        requests = result.scalars().all()
-
-        if not requests:
-            await callback.answer("Нет данных за последний месяц")
-            return
-
-        # Создаем CSV отчет
-        report_lines = [
-            "Отчет по заявкам за последний месяц",
-            f"Период: {month_ago.strftime('%d.%m.%Y')} - {datetime.utcnow().strftime('%d.%m.%Y')}",
-            f"Всего заявок: {len(requests)}",
-            "",
-            "ID;Дата;Приоритет;Статус;Заголовок;Локация"
-        ]
-        
-        for req in requests:
-            line = f"{req.id};{req.created_at.strftime('%d.%m.%Y %H:%M')};{req.priority.value};{req.status.value};{req.title};{req.location}"
-            report_lines.append(line)
-        
-        filename = f"monthly_report_{datetime.now().strftime('%Y%m%d')}.csv"
-        with open(filename, 'w', encoding='utf-8-sig') as f:
-            f.write("\n".join(report_lines))
-
-        document = FSInputFile(filename)
-        await callback.message.reply_document(
-            document=document,
-            caption="📊 Отчет по заявкам за месяц"
-        )
-        
-        import os
-        os.remove(filename)
-        
-    except Exception as e:
-        logger.error(f"Export error: {e}", exc_info=True)
-        await callback.answer(f"Ошибка экспорта: {str(e)}", show_alert=True)
+    # Дата в параметрах: одинаковые запросы за день объединяются и кэшируются
+    await enqueue_export_from_callback(callback, user, "month", {"days": 30, "as_of": datetime.utcnow().date().isoformat()})
 
 
 @require_auth
@@ -343,60 +388,7 @@ async def export_stats_callback(callback: types.CallbackQuery, user, session):
         await callback.answer("У вас нет доступа")
         return
 
-    try:
-        # Собираем статистику
-        stats_lines = [
-            "СТАТИСТИКА РАБОТЫ",
-            f"Отчет от: {datetime.now().strftime('%d.%m.%Y %H:%M')}",
-            ""
-        ]
-        
-        total = await session.scalar(select(func.count(Request.id))) or 0
-        completed = await session.scalar(select(func.count(Request.id)).where(Request.status == Status.COMPLETED)) or 0
-        rejected = await session.scalar(select(func.count(Request.id)).where(Request.status == Status.REJECTED)) or 0
-        
-        stats_lines.extend([
-            "ОБЩАЯ СТАТИСТИКА:",
-            f"Всего заявок: {total}",
-            f"Выполнено: {completed}",
-            f"Отклонено: {rejected}",
-            ""
-        ])
-        
-        # По приоритетам
-        stats_lines.append("ПО ПРИОРИТЕТАМ:")
-        for priority in [Priority.HIGH, Priority.MEDIUM, Priority.LOW]:
-            count = await session.scalar(
-                select(func.count(Request.id)).where(Request.priority == priority)
-            ) or 0
-            stats_lines.append(f"{priority.value}: {count}")
-        
-        stats_lines.append("")
-        
-        # По статусам
-        stats_lines.append("ПО СТАТУСАМ:")
-        for status in [Status.OPEN, Status.IN_PROGRESS, Status.COMPLETED, Status.REJECTED]:
-            count = await session.scalar(
-                select(func.count(Request.id)).where(Request.status == status)
-            ) or 0
-            stats_lines.append(f"{status.value}: {count}")
-        
-        filename = f"stats_report_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("\n".join(stats_lines))
-
-        document = FSInputFile(filename)
-        await callback.message.reply_document(
-            document=document,
-            caption="📊 Статистический отчет"
-        )
-        
-        import os
-        os.remove(filename)
-        
-    except Exception as e:
-        logger.error(f"Stats export error: {e}", exc_info=True)
-        await callback.answer(f"Ошибка: {str(e)}", show_alert=True)
+    await enqueue_export_from_callback(callback, user, "stats", {})
 
 
 @require_auth
@@ -406,40 +398,155 @@ async def export_all_callback(callback: types.CallbackQuery, user, session):
         await callback.answer("У вас нет доступа")
         return
 
+    await enqueue_export_from_callback(callback, user, "all", {})
+
+
+@require_auth
+async def export_xlsx_callback(callback: types.CallbackQuery, user, session):
+    """Выгрузка всех заявок в XLSX"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    await enqueue_export_from_callback(callback, user, "requests", {"format": "xlsx"})
+
+
+@require_auth
+async def export_command(message: types.Message, command: CommandObject, user, session):
+    """Команда /export [формат] [с] [по] - выгрузка заявок в CSV, JSONL, XLSX, Parquet или Arrow"""
+    if user.role != "admin":
+        await message.reply("У вас нет доступа")
+        return
+
+    formats = ", ".join(EXPORT_WRITERS)
+    usage = f"Формат: <code>/export xlsx 01.01.2025 31.12.2025</code>\nДоступно: {formats}"
+    fmt, _, period = (command.args or "csv").partition(" ")
+    fmt = fmt.lower()
+    if fmt not in EXPORT_WRITERS:
+        await message.reply(f"❌ Неизвестный формат: {fmt}\n\n{usage}", parse_mode="HTML")
+        return
+
+    params = {"format": fmt}
+    if period.strip():
+        try:
+            date_from, date_to = parse_date_range(period)
+        except ValueError as e:
+            await message.reply(f"❌ {e}\n\n{usage}", parse_mode="HTML")
+            return
+        params.update(date_from=date_from.isoformat(), date_to=date_to.isoformat())
+
+    try:
+        await enqueue_export(message, user, "requests", params)
+    except ExportQueueFull:
+        await message.reply("Слишком много экспортов в очереди, попробуйте позже")
+
+
+@require_auth
+async def export_cancel_callback(callback: types.CallbackQuery, user, session):
+    """Отмена фонового экспорта"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    job_id = int(callback.data.split("_")[-1])
+    manager = get_export_manager(callback.bot)
+    if manager and manager.cancel(job_id):
+        await callback.answer("Экспорт отменен")
+    else:
+        await callback.answer("Экспорт уже завершен")
+
+
+def parse_date_range(args: str | None) -> tuple[datetime, datetime]:
+    """Разобрать период «с [по]» (ДД.ММ.ГГГГ или ГГГГ-ММ-ДД), по умолчанию - последние 30 дней"""
+    def parse(value: str) -> datetime:
+        for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+        raise ValueError(f"Неверная дата: {value}")
+
+    parts = (args or "").split()
+    now = datetime.utcnow()
+    if not parts:
+        return now - timedelta(days=30), now
+
+    date_from = parse(parts[0])
+    # Конечная дата включается целиком
+    date_to = parse(parts[1]) + timedelta(days=1, microseconds=-1) if len(parts) > 1 else now
+    if date_from > date_to:
+        raise ValueError("Начало периода позже конца")
+    return date_from, date_to
+
+
+async def send_export_bundle(message: types.Message, session, date_from: datetime, date_to: datetime) -> None:
+    """Собрать ZIP-архив за период и отправить одним документом"""
+    status_message = await message.answer("⏳ Собираю архив с фото, это может занять время...")
+    builder = BundleBuilder(message.bot, mirror=get_file_mirror(message.bot))
+    bundle = await builder.build(session, date_from, date_to)
     try:
-        stmt = select(Request).order_by(Request.created_at.desc())
-        result = await session.execute(stmt)
-        requests = result.scalars().all()
+        if builder.request_count == 0:
+            await status_message.edit_text("📭 Нет заявок за выбранный период")
+            return
 
-        if not requests:
-            await callback.answer("Нет заявок для экспорта")
+        size = bundle_size(bundle)
+        if size > MAX_UPLOAD_BYTES:
+            await status_message.edit_text(
+                f"❌ Архив слишком большой ({size // (1024 * 1024)} МБ).\n\n"
+                "Сузьте период, например:\n<code>/export_bundle 01.09.2025 30.09.2025</code>",
+                parse_mode="HTML"
+            )
             return
 
-        # CSV
-        report_lines = [
-            "ID;Дата создания;Дата завершения;Приоритет;Статус;Заголовок;Описание;Локация;Пользователь"
-        ]
-        
-        for req in requests:
-            line = f'{req.id};{req.created_at.strftime("%d.%m.%Y %H:%M")};{req.completed_at.strftime("%d.%m.%Y %H:%M") if req.completed_at else ""};{req.priority.value};{req.status.value};"{req.title}";"{req.description}";{req.location};{req.user.username or ""}'
-            report_lines.append(line)
-        
-        filename = f"all_requests_{datetime.now().strftime('%Y%m%d')}.csv"
-        with open(filename, 'w', encoding='utf-8-sig') as f:
-            f.write("\n".join(report_lines))
-
-        document = FSInputFile(filename)
-        await callback.message.reply_document(
-            document=document,
-            caption=f"📋 Все заявки ({len(requests)})"
+        period = f"{date_from.strftime('%d.%m.%Y')} - {date_to.strftime('%d.%m.%Y')}"
+        caption = f"📦 Архив заявок за {period}\n📋 Заявок: {builder.request_count}, 📎 файлов: {builder.attachment_count}"
+        if builder.failed_attachments:
+            caption += f"\n⚠️ Не удалось загрузить файлов: {builder.failed_attachments}"
+
+        filename = f"bundle_{date_from.strftime('%Y%m%d')}_{date_to.strftime('%Y%m%d')}.zip"
+        await message.answer_document(SpooledInputFile(bundle, filename=filename), caption=caption)
+        await status_message.delete()
+    finally:
+        bundle.close()
+
+
+@require_auth
+async def export_bundle_callback(callback: types.CallbackQuery, user, session):
+    """Экспорт ZIP-архива с фото за последние 30 дней"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    await callback.answer()
+    try:
+        date_from, date_to = parse_date_range(None)
+        await send_export_bundle(callback.message, session, date_from, date_to)
+    except Exception as e:
+        logger.error(f"Bundle export error: {e}", exc_info=True)
+        await callback.message.answer(f"❌ Ошибка экспорта: {str(e)}")
+
+
+@require_auth
+async def export_bundle_command(message: types.Message, command: CommandObject, user, session):
+    """Команда /export_bundle [с] [по] - ZIP-архив за период"""
+    if user.role != "admin":
+        await message.reply("У вас нет доступа")
+        return
+
+    try:
+        date_from, date_to = parse_date_range(command.args)
+    except ValueError as e:
+        await message.reply(
+            f"❌ {e}\n\nФормат: <code>/export_bundle 01.09.2025 30.09.2025</code>",
+            parse_mode="HTML"
         )
-        
-        import os
-        os.remove(filename)
-        
+        return
+
+    try:
+        await send_export_bundle(message, session, date_from, date_to)
     except Exception as e:
-        logger.error(f"All export error: {e}", exc_info=True)
-        await callback.answer(f"Ошибка: {str(e)}", show_alert=True)
+        logger.error(f"Bundle export error: {e}", exc_info=True)
+        await message.reply(f"❌ Ошибка экспорта: {str(e)}")
 
 
 @require_auth
@@ -456,12 +563,15 @@ def register_admin_handlers(dp):
     # Основные функции
     dp.callback_query.register(admin_open_requests_callback, F.data == "admin_open_requests")
     dp.callback_query.register(admin_stats_callback, F.data == "admin_stats")
+    dp.callback_query.register(admin_charts_callback, F.data == "admin_charts")
     dp.callback_query.register(admin_archive_callback, F.data == "admin_archive")
     
     # Фильтры
     dp.callback_query.register(admin_filters_menu_callback, F.data == "admin_filters_menu")
     dp.callback_query.register(filter_priority_callback, F.data.startswith("filter_priority_"))
     dp.callback_query.register(filter_status_callback, F.data.startswith("filter_status_"))
+    dp.callback_query.register(filter_locations_callback, F.data == "filter_locations")
+    dp.callback_query.register(filter_location_callback, F.data.startswith("filter_location_"))
     dp.callback_query.register(filter_today_callback, F.data == "filter_today")
     dp.callback_query.register(filter_week_callback, F.data == "filter_week")
     
@@ -470,3 +580,8 @@ def register_admin_handlers(dp):
     dp.callback_query.register(export_month_callback, F.data == "export_month")
     dp.callback_query.register(export_stats_callback, F.data == "export_stats")
     dp.callback_query.register(export_all_callback, F.data == "export_all")
+    dp.callback_query.register(export_xlsx_callback, F.data == "export_xlsx")
+    dp.message.register(export_command, Command("export"))
+    dp.callback_query.register(export_cancel_callback, F.data.startswith("export_cancel_"))
+    dp.callback_query.register(export_bundle_callback, F.data == "export_bundle")
+    dp.message.register(export_bundle_command, Command("export_bundle"))
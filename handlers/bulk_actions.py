@@ -0,0 +1,104 @@
+from aiogram import F, types
+from sqlalchemy import case, func, select
+
+from models import Request, Status
+from utils.auth import require_auth
+from utils.bulk_actions import BULK_ACTIONS, BULK_LIMIT, BulkRow, apply_bulk_action, read_keyboard, row_label
+from utils.container import Container
+from utils.keyboard import get_bulk_result_keyboard, get_bulk_select_keyboard
+from utils.similarity import get_similarity_index
+
+ACTIVE_STATUSES = (Status.OPEN, Status.IN_PROGRESS)
+
+
+@require_auth
+async def bulk_select_callback(callback: types.CallbackQuery, user, session):
+    """Мультивыбор: активные заявки с галочками"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    # Сначала заявки в работе (их закрывают в конце дня), затем открытые, старые выше
+    stmt = select(Request).where(Request.status.in_(ACTIVE_STATUSES)).order_by(
+        case((Request.status == Status.IN_PROGRESS, 0), else_=1), Request.created_at.asc()
+    ).limit(BULK_LIMIT)
+    requests = (await session.execute(stmt)).scalars().all()
+
+    if not requests:
+        await callback.answer("Активных заявок нет")
+        return
+
+    total = await session.scalar(select(func.count(Request.id)).where(Request.status.in_(ACTIVE_STATUSES)))
+    text = "☑️ <b>МАССОВЫЕ ДЕЙСТВИЯ</b>\n\nОтметьте заявки и выберите действие."
+    if total > len(requests):
+        text += f"\n\nПоказаны первые {len(requests)} из {total}."
+
+    rows = [BulkRow(request.id, row_label(request)) for request in requests]
+    await callback.message.edit_text(text, reply_markup=get_bulk_select_keyboard(rows, set()), parse_mode="HTML")
+    await callback.answer()
+
+
+@require_auth
+async def bulk_toggle_callback(callback: types.CallbackQuery, user, session):
+    """Отметить заявку или снять отметку (без запросов к базе)"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    rows, before = read_keyboard(callback.message.reply_markup)
+    if callback.data == "bulk_all":
+        selected = set(range(len(rows)))
+    elif callback.data == "bulk_none":
+        selected = set()
+    else:
+        request_id = int(callback.data.removeprefix("bulk_toggle_"))
+        selected = before ^ {i for i, row in enumerate(rows) if row.request_id == request_id}
+
+    # Telegram отклоняет правку без изменений
+    if selected != before:
+        await callback.message.edit_reply_markup(reply_markup=get_bulk_select_keyboard(rows, selected))
+    await callback.answer()
+
+
+@require_auth
+async def bulk_action_callback(callback: types.CallbackQuery, user, session, container: Container):
+    """Применить действие ко всем отмеченным заявкам одним запросом"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа к этой функции")
+        return
+
+    action = BULK_ACTIONS.get(callback.data.removeprefix("bulk_do_").rsplit("_", 1)[0])
+    rows, selected = read_keyboard(callback.message.reply_markup)
+    request_ids = [rows[i].request_id for i in sorted(selected)]
+    if action is None or not request_ids:
+        await callback.answer("Отметьте хотя бы одну заявку")
+        return
+
+    changed = await apply_bulk_action(session, action, request_ids, user)
+    await session.commit()
+
+    if action.transition.target in (Status.COMPLETED, Status.REJECTED):
+        # Закрытые заявки больше не предлагаются как похожие
+        similarity = get_similarity_index()
+        for request in changed:
+            similarity.discard(request.id)
+
+    text = f"{action.done}: {len(changed)}"
+    skipped = len(request_ids) - len(changed)
+    if skipped:
+        text += f"\n⏭️ Пропущено: {skipped} (статус уже изменён)"
+    await callback.message.edit_text(text, reply_markup=get_bulk_result_keyboard())
+    await callback.answer()
+
+    # Уведомления одним пакетом: одно сообщение на получателя
+    notification_service = container.notifications
+    if notification_service and changed:
+        await notification_service.notify_status_changes(session, changed)
+
+
+def register_bulk_actions_handlers(dp):
+    """Регистрация обработчиков массовых действий"""
+    dp.callback_query.register(bulk_select_callback, F.data == "bulk_select")
+    dp.callback_query.register(bulk_toggle_callback, F.data.startswith("bulk_toggle_"))
+    dp.callback_query.register(bulk_toggle_callback, F.data.in_({"bulk_all", "bulk_none"}))
+    dp.callback_query.register(bulk_action_callback, F.data.startswith("bulk_do_"))
@@ -1,11 +1,21 @@
 from aiogram import F, types
 from aiogram.fsm.context import FSMContext
+from sqlalchemy import select
 
-from models import File, Priority, Request
+from models import Comment, Priority, Request, RequestSubscriber
+from utils.attachments import AttachmentMeta, attach_to_request, attachment_meta_from_message
 from utils.auth import require_auth
-from utils.keyboard import get_back_keyboard, get_main_menu_keyboard, get_priority_keyboard
-from utils.messages import format_request_info
-from utils.validation import rate_limiter
+from utils.container import Container
+from utils.file_mirror import get_file_mirror
+from utils.keyboard import (
+    get_back_keyboard,
+    get_main_menu_keyboard,
+    get_priority_keyboard,
+    get_similar_requests_keyboard,
+)
+from utils.locations import ensure_location_index, get_location_index, get_or_create_location
+from utils.messages import format_request_info, format_similar_requests
+from utils.similarity import OPEN_STATUSES, find_similar_requests, get_similarity_index, request_text
 
 from .menu import CreateRequestStates
 
@@ -20,31 +30,38 @@ def get_yes_no_keyboard():
         [types.InlineKeyboardButton(text="⬅️ Назад", callback_data="cancel_create")]
     ])
 
+def get_additional_keyboard(suggestions: list[tuple[int, str]] = ()):
+    """Что дальше: локация, комментарий, приоритет (+ подсказки мест)"""
+    keyboard = [
+        [types.InlineKeyboardButton(text=f"📍 {name}", callback_data=f"pick_location_{location_id}")]
+        for location_id, name in suggestions
+    ]
+    keyboard += [
+        [types.InlineKeyboardButton(text="📍 Указать локацию", callback_data="add_location")],
+        [types.InlineKeyboardButton(text="💬 Добавить комментарий", callback_data="add_comment")],
+        [types.InlineKeyboardButton(text="✅ Готово, выбрать приоритет", callback_data="go_priority")],
+        [types.InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_create")]
+    ]
+    return types.InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 @require_auth
-async def description_received(update: types.Message, state: FSMContext, user, session):
+async def description_received(update: types.Message, state: FSMContext, user, session, container: Container):
     """Получено описание (фото, документ или текст)"""
     message = update  # update is the Message object for message handlers
     # Проверка rate limit
-    if not await rate_limiter.is_allowed(message.from_user.id, "create_request", max_requests=5, time_window=300):
+    if not await container.rate_limiter.is_allowed(message.from_user.id, "create_request", max_requests=5, time_window=300):
         await message.reply("⏱️ Слишком много запросов. Попробуйте позже.")
         return
 
     description = ""
-    file_id = None
-    file_type = None
-    file_name = None
+    attachment = attachment_meta_from_message(message)
 
     # Проверяем фото с подписью
     if message.photo:
-        file_id = message.photo[-1].file_id
-        file_type = "photo"
         description = message.caption or "📸 Фото без описания"
     # Проверяем документ с подписью
     elif message.document:
-        file_id = message.document.file_id
-        file_type = "document"
-        file_name = message.document.file_name or "документ"
-        description = message.caption or f"📄 {file_name}"
+        description = message.caption or f"📄 {message.document.file_name or 'документ'}"
     elif message.text:
         description = message.text.strip()
     else:
@@ -62,9 +79,7 @@ async def description_received(update: types.Message, state: FSMContext, user, s
     # Сохраняем в состояние
     await state.update_data(
         description=description,
-        file_id=file_id,
-        file_type=file_type,
-        file_name=file_name
+        attachment=attachment.to_dict() if attachment else None
     )
 
     # Переходим к вопросу о дополнении
@@ -106,24 +121,24 @@ async def additional_no_callback(callback: types.CallbackQuery, state: FSMContex
     await callback.answer()
 
 @require_auth
-async def priority_selected(callback: types.CallbackQuery, state: FSMContext, user, session):
+async def priority_selected(callback: types.CallbackQuery, state: FSMContext, user, session, container: Container):
     """Выбран приоритет - создаём заявку"""
     import logging
     logger = logging.getLogger(__name__)
 
+    keep_state = False
     try:
         priority_value = callback.data.replace("priority_", "")
-        logger.info(f"Priority selected: {priority_value}")
         priority = Priority(priority_value)
 
         data = await state.get_data()
-        logger.info(f"State data keys: {list(data.keys())}")
-        logger.info(f"State data: {data}")
+        # Полное состояние FSM пишется только на уровне DEBUG
+        logger.debug("Priority %s selected, state: %s", priority_value, data)
 
         # СТРОГАЯ валидация description
         description = data.get('description', '').strip()
         if not description:
-            logger.error(f"Empty description in state data: {data}")
+            logger.error("Empty description in state data: %s", data)
             await callback.message.edit_text(
                 "❌ <b>Ошибка создания заявки</b>\n\n"
                 "Описание заявки не найдено. Попробуйте создать заявку заново.",
@@ -150,7 +165,28 @@ async def priority_selected(callback: types.CallbackQuery, state: FSMContext, us
         if not title:
             title = "Заявка"
         
-        logger.info(f"Creating request with title: {title}, description length: {len(description)}")
+        # Похожая открытая заявка уже есть - предлагаем подписаться вместо дубля
+        similarity_text = request_text(description, data.get('location'))
+        if not data.get('duplicates_checked'):
+            similar = await find_similar_requests(session, similarity_text)
+            if similar:
+                keep_state = True
+                await state.update_data(duplicates_checked=True)
+                await callback.message.edit_text(
+                    format_similar_requests(similar),
+                    reply_markup=get_similar_requests_keyboard([r.id for r, _ in similar], priority.value),
+                    parse_mode="HTML"
+                )
+                await callback.answer()
+                return
+
+        logger.debug("Creating request with title: %s, description length: %d", title, len(description))
+
+        # Место: выбранное из подсказок или разобранное из текста
+        location_id = data.get('location_id')
+        if not location_id:
+            place = await get_or_create_location(session, data.get('location', 'Не указано'))
+            location_id = place.id if place else None
 
         # Создаём заявку
         request = Request(
@@ -158,35 +194,31 @@ async def priority_selected(callback: types.CallbackQuery, state: FSMContext, us
             title=title,
             description=description,
             location=data.get('location', 'Не указано'),
+            location_id=location_id,
             priority=priority
         )
         session.add(request)
         await session.commit()
         await session.refresh(request)
-        logger.info(f"Request created: ID={request.id}, user_id={user.id}, title={title}")
-
-        # Если есть фото - прикрепляем файл
-        if data.get('file_id'):
-            file = File(
-                request_id=request.id,
-                file_id=data['file_id'],
-                file_type=data.get('file_type', 'photo'),
-                file_name=data.get('file_name'),
-                uploaded_by=user.id
-            )
-            session.add(file)
-            await session.commit()
-            logger.info(f"File attached to request {request.id}")
+        logger.info("Request created: ID=%s, user_id=%s", request.id, user.id)
+        get_similarity_index().add(request.id, similarity_text)
+        if location_id:
+            get_location_index().touch(location_id)
 
-        # Отправляем уведомление администратору
-        from bot.main import bot
-        from utils.notifications import get_notification_service
+        # Если есть фото - прикрепляем файл (повторно присланный файл не дублируется)
+        if data.get('attachment'):
+            meta = AttachmentMeta.from_dict(data['attachment'])
+            await attach_to_request(session, request.id, meta, uploaded_by=user.id)
+            logger.debug("File attached to request %s", request.id)
+
+            mirror = get_file_mirror(callback.bot)
+            if mirror:
+                mirror.enqueue(meta.file_unique_id, meta.file_id)
 
-        notification_service = get_notification_service(bot)
+        # Отправляем уведомление администратору
+        notification_service = container.notifications
         if notification_service:
-            logger.info(f"Sending notification to admin about request {request.id}")
             await notification_service.notify_admin_new_request(request)
-            logger.info("✅ Notification sent successfully")
         else:
             logger.error("Notification service not available")
 
@@ -195,7 +227,6 @@ async def priority_selected(callback: types.CallbackQuery, state: FSMContext, us
 
         await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
         await callback.answer()
-        logger.info(f"User notified about successful request creation")
 
     except Exception as e:
         logger.error(f"Error creating request: {e}", exc_info=True)
@@ -208,12 +239,48 @@ async def priority_selected(callback: types.CallbackQuery, state: FSMContext, us
         except Exception as err:
             logger.error(f"Error sending error message: {err}", exc_info=True)
     finally:
-        # ✅ ГАРАНТИРОВАННАЯ очистка состояния
+        # ✅ ГАРАНТИРОВАННАЯ очистка состояния (кроме ожидания решения по похожей заявке)
         try:
-            await state.clear()
+            if not keep_state:
+                await state.clear()
         except Exception as e:
             logger.error(f"Error clearing state: {e}", exc_info=True)
 
+@require_auth
+async def subscribe_request_callback(callback: types.CallbackQuery, state: FSMContext, user, session):
+    """Подписаться на похожую заявку вместо создания дубля"""
+    request_id = int(callback.data.split("_")[-1])
+    request = await session.get(Request, request_id)
+    if not request or request.status not in OPEN_STATUSES:
+        await callback.answer("Эта заявка уже закрыта, создайте новую", show_alert=True)
+        return
+
+    data = await state.get_data()
+    if request.user_id == user.id:
+        text = f"📋 Ваша заявка #{request.id} уже в работе у завхоза, новая не создана."
+    else:
+        subscribed = await session.scalar(
+            select(RequestSubscriber.id).where(
+                RequestSubscriber.request_id == request.id, RequestSubscriber.user_id == user.id
+            )
+        )
+        if not subscribed:
+            session.add(RequestSubscriber(request_id=request.id, user_id=user.id))
+        # Описание и фото не теряются: добавляем их к существующей заявке
+        if data.get('description'):
+            session.add(Comment(request_id=request.id, user_id=user.id, comment=data['description']))
+        await session.commit()
+        if data.get('attachment'):
+            await attach_to_request(session, request.id, AttachmentMeta.from_dict(data['attachment']), uploaded_by=user.id)
+        text = (
+            f"🔔 Вы подписаны на заявку #{request.id}.\n\n"
+            "Ваше описание добавлено к ней комментарием, уведомления о статусе придут вам."
+        )
+
+    await state.clear()
+    await callback.message.edit_text(text, reply_markup=get_main_menu_keyboard(user.role == "admin"))
+    await callback.answer()
+
 @require_auth
 async def cancel_create_callback(callback: types.CallbackQuery, state: FSMContext, user, session):
     """Отмена создания заявки"""
@@ -230,8 +297,32 @@ async def cancel_create_callback(callback: types.CallbackQuery, state: FSMContex
 async def add_location_callback(callback: types.CallbackQuery, state: FSMContext, user, session):
     """Пользователь хочет добавить локацию"""
     await state.update_data(add_location=True, add_comment=False)
+    # Самые частые места - одной кнопкой
+    popular = (await ensure_location_index(session)).complete("")
+    keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
+        [types.InlineKeyboardButton(text=f"📍 {name}", callback_data=f"pick_location_{location_id}")]
+        for location_id, name in popular
+    ]) if popular else None
+    await callback.message.edit_text(
+        "📍 Укажите местоположение (кабинет, этаж, здание, коридор и т.д.):",
+        reply_markup=keyboard
+    )
+    await callback.answer()
+
+@require_auth
+async def pick_location_callback(callback: types.CallbackQuery, state: FSMContext, user, session):
+    """Выбрано место из подсказок"""
+    location_id = int(callback.data.split("_")[-1])
+    index = await ensure_location_index(session)
+    name = index.name(location_id)
+    if name is None:
+        await callback.answer("Место не найдено, укажите его текстом", show_alert=True)
+        return
+
+    await state.update_data(location=name, location_id=location_id, add_location=False, add_comment=False)
     await callback.message.edit_text(
-        "📍 Укажите местоположение (кабинет, этаж, здание, коридор и т.д.):"
+        f"✅ Локация: {name}\n\n📝 Что дальше?",
+        reply_markup=get_additional_keyboard()
     )
     await callback.answer()
 
@@ -249,6 +340,7 @@ async def location_or_comment_received(update: types.Message, state: FSMContext,
     """Получена локация или комментарий"""
     message = update  # update is the Message object for message handlers
     data = await state.get_data()
+    suggestions = []
 
     if data.get('add_location'):
         # Пользователь указывает локацию
@@ -261,9 +353,16 @@ async def location_or_comment_received(update: types.Message, state: FSMContext,
             await message.reply("❌ Локация слишком длинная. Максимум 100 символов.\n\n💡 Попробуйте заново:")
             return
 
-        await state.update_data(location=location)
+        await state.update_data(location=location, location_id=None)
         await message.reply("✅ Локация сохранена!")
 
+        # Похожие известные места: можно выбрать вместо введенного текста
+        suggestions = [
+            (location_id, name)
+            for location_id, name in (await ensure_location_index(session)).complete(location)
+            if name != location
+        ]
+
     elif data.get('add_comment'):
         # Пользователь добавляет комментарий
         comment = message.text.strip()
@@ -279,16 +378,9 @@ async def location_or_comment_received(update: types.Message, state: FSMContext,
         await message.reply("✅ Комментарий сохранён!")
 
     # Показываем меню что дальше
-    keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
-        [types.InlineKeyboardButton(text="📍 Указать локацию", callback_data="add_location")],
-        [types.InlineKeyboardButton(text="💬 Добавить комментарий", callback_data="add_comment")],
-        [types.InlineKeyboardButton(text="✅ Готово, выбрать приоритет", callback_data="go_priority")],
-        [types.InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_create")]
-    ])
-
     await message.reply(
         "📝 Что дальше?",
-        reply_markup=keyboard
+        reply_markup=get_additional_keyboard(suggestions)
     )
 
     await state.update_data(add_location=False, add_comment=False)
@@ -325,7 +417,9 @@ def register_create_request_handlers(dp):
     dp.callback_query.register(additional_no_callback, F.data == "additional_no")
     dp.callback_query.register(priority_selected, F.data.startswith("priority_"))
     dp.callback_query.register(cancel_create_callback, F.data == "cancel_create")
+    dp.callback_query.register(subscribe_request_callback, F.data.startswith("subscribe_request_"))
     dp.callback_query.register(add_location_callback, F.data == "add_location")
+    dp.callback_query.register(pick_location_callback, F.data.startswith("pick_location_"))
     dp.callback_query.register(add_comment_callback, F.data == "add_comment")
     dp.callback_query.register(go_priority_callback, F.data == "go_priority")
     
@@ -0,0 +1,107 @@
+import logging
+import os
+
+from aiogram import types
+from aiogram.types import InlineQueryResultArticle, InlineQueryResultsButton, InputTextMessageContent
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from database.connection import get_db
+from models import Request, User
+from utils.messages import PRIORITY_EMOJIS, STATUS_EMOJIS, format_request_info
+from utils.performance import CacheManager
+from utils.search import search_requests
+
+logger = logging.getLogger(__name__)
+
+# Inline-режим включается в @BotFather: /setinline
+INLINE_PAGE_SIZE = int(os.getenv("INLINE_PAGE_SIZE", 20))
+INLINE_CACHE_TTL = int(os.getenv("INLINE_CACHE_TTL", 30))
+# Сколько секунд Telegram кэширует ответ на своей стороне
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", 10))
+
+inline_cache = CacheManager(ttl=INLINE_CACHE_TTL)
+
+_LOAD_USERS = (selectinload(Request.user), selectinload(Request.assigned_user))
+
+
+def request_to_inline_result(request: Request, show_user: bool) -> InlineQueryResultArticle:
+    """Карточка заявки для inline-режима"""
+    return InlineQueryResultArticle(
+        id=str(request.id),
+        title=f"#{request.id} {request.title}",
+        description=(
+            f"{STATUS_EMOJIS[request.status]} {request.status.value} · "
+            f"{PRIORITY_EMOJIS[request.priority]} {request.priority.value} · {request.location}"
+        ),
+        input_message_content=InputTextMessageContent(
+            message_text=format_request_info(request, show_user=show_user),
+            parse_mode="HTML",
+        ),
+    )
+
+
+async def find_inline_requests(session, query: str, offset: str, user: User) -> tuple[list[Request], str]:
+    """Заявки для inline-запроса и offset следующей страницы
+
+    С текстом - полнотекстовый поиск (offset - курсор «ранг:id»),
+    без текста - последние заявки (offset - id последней показанной).
+    Завхоз видит все заявки, пользователь - только свои.
+    """
+    user_id = None if user.role == "admin" else user.id
+
+    if query.strip():
+        after = None
+        if offset:
+            rank, request_id = offset.rsplit(":", 1)
+            after = (float(rank), int(request_id))
+        page = await search_requests(session, query, limit=INLINE_PAGE_SIZE, after=after,
+                                     user_id=user_id, options=_LOAD_USERS)
+        next_offset = f"{page.next_cursor[0]!r}:{page.next_cursor[1]}" if page.next_cursor else ""
+        return page.requests, next_offset
+
+    stmt = select(Request).options(*_LOAD_USERS).order_by(Request.id.desc()).limit(INLINE_PAGE_SIZE + 1)
+    if offset:
+        stmt = stmt.where(Request.id < int(offset))
+    if user_id:
+        stmt = stmt.where(Request.user_id == user_id)
+    requests = list((await session.scalars(stmt)).all())
+    if len(requests) > INLINE_PAGE_SIZE:
+        requests = requests[:INLINE_PAGE_SIZE]
+        return requests, str(requests[-1].id)
+    return requests, ""
+
+
+async def inline_query_handler(inline_query: types.InlineQuery):
+    """Поиск заявок в inline-режиме: @bot 101 кран"""
+    query = " ".join(inline_query.query.lower().split())
+    offset = inline_query.offset or ""
+
+    async for session in get_db():
+        user = await session.scalar(select(User).where(User.telegram_id == inline_query.from_user.id))
+        if not user or not user.is_active:
+            await inline_query.answer(
+                [], cache_time=INLINE_CACHE_TIME, is_personal=True,
+                button=InlineQueryResultsButton(text="Открыть бота", start_parameter="inline"),
+            )
+            return
+
+        is_admin = user.role == "admin"
+        cache_key = f"{'admin' if is_admin else user.id}:{query}:{offset}"
+        cached = inline_cache.get(cache_key)
+        if cached is None:
+            try:
+                requests, next_offset = await find_inline_requests(session, query, offset, user)
+            except ValueError:
+                # Чужой или поврежденный offset
+                requests, next_offset = [], ""
+            cached = ([request_to_inline_result(request, is_admin) for request in requests], next_offset)
+            inline_cache.set(cache_key, cached)
+
+        results, next_offset = cached
+        await inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=True, next_offset=next_offset)
+
+
+def register_inline_handlers(dp):
+    """Регистрация inline-режима"""
+    dp.inline_query.register(inline_query_handler)
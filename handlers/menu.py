@@ -5,6 +5,7 @@ from sqlalchemy import select
 
 from models import Request
 from utils.auth import require_auth
+from utils.delivery import send_long_text
 from utils.keyboard import (
     get_back_keyboard,
     get_main_menu_keyboard,
@@ -73,7 +74,7 @@ async def my_requests_callback(callback: types.CallbackQuery, user, session):
         text = format_request_list(requests, "Ваши заявки")
         keyboard = get_back_keyboard("back_to_main")
 
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await send_long_text(callback.message, text, reply_markup=keyboard, document_name="my_requests.txt")
     await callback.answer()
 
 @require_auth
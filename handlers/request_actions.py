@@ -1,15 +1,18 @@
-from datetime import datetime
-
 from aiogram import F, types
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy import select
 
-from models import Comment, File, Request, Status
+from models import Comment, Request
+from utils.attachments import get_request_attachments
 from utils.auth import require_auth
+from utils.container import Container
+from utils.delivery import send_attachments
 from utils.keyboard import get_back_keyboard, get_request_actions_keyboard
 from utils.messages import format_request_info
-from utils.validation import rate_limiter, validate_comment
+from utils.similarity import get_similarity_index
+from utils.transitions import TransitionConflict, apply_transition
+from utils.validation import validate_comment
 
 
 class CommentStates(StatesGroup):
@@ -38,29 +41,16 @@ async def view_request_callback(callback: types.CallbackQuery, user, session):
 
     await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
-    # Отправляем фото если они есть
-    file_stmt = select(File).where(File.request_id == request_id)
-    file_result = await session.execute(file_stmt)
-    files = file_result.scalars().all()
+    # Отправляем вложения: фото альбомами, документы параллельно
+    files = await get_request_attachments(session, request_id)
 
     if files:
-        from bot.main import bot
-        for file in files:
-            if file.file_type == "photo":
-                try:
-                    await bot.send_photo(
-                        callback.message.chat.id,
-                        photo=file.file_id,
-                        caption=f"📸 Фото заявки #{request.id}"
-                    )
-                except Exception as e:
-                    import logging
-                    logging.error(f"Error sending photo: {e}")
+        await send_attachments(callback.message, files, caption=f"📸 Фото заявки #{request.id}")
 
     await callback.answer()
 
 @require_auth
-async def take_request_callback(callback: types.CallbackQuery, user, session):
+async def take_request_callback(callback: types.CallbackQuery, user, session, container: Container):
     """Взять заявку в работу"""
     if user.role != "admin":
         await callback.answer("У вас нет доступа к этой функции")
@@ -68,22 +58,15 @@ async def take_request_callback(callback: types.CallbackQuery, user, session):
 
     request_id = int(callback.data.split("_")[-1])
 
-    stmt = select(Request).where(Request.id == request_id)
-    result = await session.execute(stmt)
-    request = result.scalar_one_or_none()
-
-    if not request or request.status != Status.OPEN:
-        await callback.answer("Заявка не найдена или уже взята в работу")
+    try:
+        request = await apply_transition(session, request_id, "take", user)
+    except TransitionConflict as e:
+        await callback.answer(e.message)
         return
-
-    request.status = Status.IN_PROGRESS
-    request.assigned_to = user.id
     await session.commit()
 
     # Отправляем уведомление пользователю
-    from bot.main import bot
-    from utils.notifications import get_notification_service
-    notification_service = get_notification_service(bot)
+    notification_service = container.notifications
     if notification_service:
         await notification_service.notify_user_status_change(request)
 
@@ -94,7 +77,7 @@ async def take_request_callback(callback: types.CallbackQuery, user, session):
     await callback.answer()
 
 @require_auth
-async def complete_request_callback(callback: types.CallbackQuery, user, session):
+async def complete_request_callback(callback: types.CallbackQuery, user, session, container: Container):
     """Выполнить заявку"""
     if user.role != "admin":
         await callback.answer("У вас нет доступа к этой функции")
@@ -102,22 +85,17 @@ async def complete_request_callback(callback: types.CallbackQuery, user, session
 
     request_id = int(callback.data.split("_")[-1])
 
-    stmt = select(Request).where(Request.id == request_id)
-    result = await session.execute(stmt)
-    request = result.scalar_one_or_none()
-
-    if not request or request.status != Status.IN_PROGRESS:
-        await callback.answer("Заявка не найдена или не в работе")
+    try:
+        request = await apply_transition(session, request_id, "complete", user)
+    except TransitionConflict as e:
+        await callback.answer(e.message)
         return
-
-    request.status = Status.COMPLETED
-    request.completed_at = datetime.utcnow()
     await session.commit()
+    # Закрытая заявка больше не предлагается как похожая
+    get_similarity_index().discard(request.id)
 
     # Отправляем уведомление пользователю
-    from bot.main import bot
-    from utils.notifications import get_notification_service
-    notification_service = get_notification_service(bot)
+    notification_service = container.notifications
     if notification_service:
         await notification_service.notify_user_status_change(request)
 
@@ -128,7 +106,7 @@ async def complete_request_callback(callback: types.CallbackQuery, user, session
     await callback.answer()
 
 @require_auth
-async def reject_request_callback(callback: types.CallbackQuery, user, session):
+async def reject_request_callback(callback: types.CallbackQuery, user, session, container: Container):
     """Отклонить заявку"""
     if user.role != "admin":
         await callback.answer("У вас нет доступа к этой функции")
@@ -136,21 +114,17 @@ async def reject_request_callback(callback: types.CallbackQuery, user, session):
 
     request_id = int(callback.data.split("_")[-1])
 
-    stmt = select(Request).where(Request.id == request_id)
-    result = await session.execute(stmt)
-    request = result.scalar_one_or_none()
-
-    if not request or request.status in [Status.COMPLETED, Status.REJECTED]:
-        await callback.answer("Заявка не найдена или уже завершена")
+    try:
+        request = await apply_transition(session, request_id, "reject", user)
+    except TransitionConflict as e:
+        await callback.answer(e.message)
         return
-
-    request.status = Status.REJECTED
     await session.commit()
+    # Закрытая заявка больше не предлагается как похожая
+    get_similarity_index().discard(request.id)
 
     # Отправляем уведомление пользователю
-    from bot.main import bot
-    from utils.notifications import get_notification_service
-    notification_service = get_notification_service(bot)
+    notification_service = container.notifications
     if notification_service:
         await notification_service.notify_user_status_change(request)
 
@@ -174,10 +148,10 @@ async def add_comment_callback(callback: types.CallbackQuery, state: FSMContext,
     await callback.answer()
 
 @require_auth
-async def comment_received(message: types.Message, state: FSMContext, user, session):
+async def comment_received(message: types.Message, state: FSMContext, user, session, container: Container):
     """Комментарий получен"""
     # Проверка rate limit
-    if not await rate_limiter.is_allowed(message.from_user.id, "add_comment", max_requests=10, time_window=300):
+    if not await container.rate_limiter.is_allowed(message.from_user.id, "add_comment", max_requests=10, time_window=300):
         await message.reply("⏱️ Слишком много комментариев. Попробуйте позже.")
         return
 
@@ -0,0 +1,111 @@
+import html
+import logging
+
+from aiogram import F, types
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from utils.auth import require_auth
+from utils.delivery import send_long_text
+from utils.keyboard import get_back_keyboard, get_search_results_keyboard
+from utils.messages import format_request_list
+from utils.search import search_requests
+
+logger = logging.getLogger(__name__)
+
+
+class SearchStates(StatesGroup):
+    waiting_for_query = State()
+
+
+async def send_search_page(message: types.Message, session, state: FSMContext, query: str, page_number: int = 1,
+                           after: tuple[float, int] | None = None, edit: bool = False) -> None:
+    """Показать страницу результатов поиска; курсор следующей страницы хранится в FSM"""
+    page = await search_requests(session, query, after=after)
+    await state.update_data(
+        search_query=query,
+        search_cursor=list(page.next_cursor) if page.next_cursor else None,
+        search_page=page_number,
+    )
+
+    title = f"Поиск «{html.escape(query)}»" + (f", стр. {page_number}" if page_number > 1 else "")
+    text = format_request_list(page.requests, title)
+    keyboard = get_search_results_keyboard(page.requests, has_more=page.next_cursor is not None)
+    await send_long_text(message, text, reply_markup=keyboard, edit=edit, document_name="search.txt")
+
+
+@require_auth
+async def search_command(message: types.Message, command: CommandObject, state: FSMContext, user, session):
+    """Команда /search <запрос> - полнотекстовый поиск по заявкам и комментариям"""
+    if user.role != "admin":
+        await message.reply("У вас нет доступа")
+        return
+
+    if not command.args:
+        await state.set_state(SearchStates.waiting_for_query)
+        await message.answer("🔍 Введите слова для поиска (например: <i>кран 101</i>):", parse_mode="HTML")
+        return
+
+    await send_search_page(message, session, state, command.args)
+
+
+@require_auth
+async def search_start_callback(callback: types.CallbackQuery, state: FSMContext, user, session):
+    """Начать поиск из архива"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    await state.set_state(SearchStates.waiting_for_query)
+    await callback.message.edit_text(
+        "🔍 Введите слова для поиска по заголовку, описанию, локации и комментариям\n"
+        "(например: <i>кран 101</i>):",
+        reply_markup=get_back_keyboard("admin_archive"),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@require_auth
+async def search_query_received(message: types.Message, state: FSMContext, user, session):
+    """Запрос для поиска получен"""
+    if user.role != "admin":
+        await state.clear()
+        return
+
+    if not message.text:
+        await message.reply("❌ Отправьте текст запроса")
+        return
+
+    await state.set_state(None)
+    await send_search_page(message, session, state, message.text)
+
+
+@require_auth
+async def search_more_callback(callback: types.CallbackQuery, state: FSMContext, user, session):
+    """Следующая страница результатов"""
+    if user.role != "admin":
+        await callback.answer("У вас нет доступа")
+        return
+
+    data = await state.get_data()
+    if not data.get("search_query") or not data.get("search_cursor"):
+        await callback.answer("Поиск устарел, начните заново")
+        return
+
+    await send_search_page(
+        callback.message, session, state, data["search_query"],
+        page_number=data.get("search_page", 1) + 1,
+        after=tuple(data["search_cursor"]),
+        edit=True,
+    )
+    await callback.answer()
+
+
+def register_search_handlers(dp):
+    """Регистрация обработчиков поиска"""
+    dp.message.register(search_command, Command("search"))
+    dp.message.register(search_query_received, SearchStates.waiting_for_query)
+    dp.callback_query.register(search_start_callback, F.data == "search_start")
+    dp.callback_query.register(search_more_callback, F.data == "search_more")
@@ -1,8 +1,16 @@
 # Модели базы данных
+from .analytics import AnalyticsRequestState, AnalyticsSnapshot
+from .attachment import Attachment, RequestAttachment
 from .base import Base
 from .comment import Comment
+from .export_job import ExportJob
 from .file import File
+from .location import Location, install_location_counters
 from .request import Priority, Request, Status
+from .search import install_search_index
+from .subscriber import RequestSubscriber
 from .user import User
 
-__all__ = ["Base", "User", "Request", "Priority", "Status", "File", "Comment"]
+__all__ = ["Base", "User", "Request", "Priority", "Status", "File", "Comment", "Attachment", "RequestAttachment", "ExportJob", "RequestSubscriber", "Location",
+           "AnalyticsSnapshot", "AnalyticsRequestState",
+           "install_search_index", "install_location_counters"]
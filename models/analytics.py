@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, String
+
+from .base import Base
+
+
+class AnalyticsSnapshot(Base):
+    """Предрассчитанная аналитика: счетчики заявок по дням"""
+
+    __tablename__ = "analytics_snapshots"
+
+    name: str = Column(String(50), primary_key=True)
+    # {"cells": {"день|статус|приоритет": n}, "done": {"день": [n, часы]}, "totals": {"статус|приоритет": n},
+    #  "durations": {"приоритет|место|корзина": n}}
+    data: dict = Column(JSON, nullable=False, default=dict)
+    # Изменения заявок с updated_at >= watermark еще не учтены
+    watermark: Optional[datetime] = Column(DateTime, nullable=True)
+    refreshed_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
+    rebuilt_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class AnalyticsRequestState(Base):
+    """Как заявка учтена в снимке (чтобы вычесть старый вклад при изменении)"""
+
+    __tablename__ = "analytics_request_state"
+
+    request_id: int = Column(Integer, ForeignKey("requests.id", ondelete="CASCADE"), primary_key=True)
+    cell: str = Column(String(50), nullable=False)
+    done_day: Optional[str] = Column(String(10), nullable=True)
+    hours: Optional[float] = Column(Float, nullable=True)
+    location_id: Optional[int] = Column(Integer, nullable=True)
+    updated_at: datetime = Column(DateTime, nullable=False)
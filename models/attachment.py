@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class Attachment(Base):
+    """Уникальный файл Telegram (один на file_unique_id)"""
+
+    __tablename__ = "attachments"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    file_unique_id: str = Column(String(255), unique=True, nullable=False, index=True)  # Стабилен между ботами и пересылками
+    file_id: str = Column(String(255), nullable=False)  # Последний известный Telegram file_id
+    file_type: str = Column(String(50), nullable=False)  # photo, document
+    file_name: Optional[str] = Column(String(255), nullable=True)
+    file_size: Optional[int] = Column(Integer, nullable=True)
+    width: Optional[int] = Column(Integer, nullable=True)
+    height: Optional[int] = Column(Integer, nullable=True)
+    thumbnail_file_id: Optional[str] = Column(String(255), nullable=True)
+    created_at: datetime = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RequestAttachment(Base):
+    """Связь заявки с вложением"""
+
+    __tablename__ = "request_attachments"
+    __table_args__ = (UniqueConstraint("request_id", "attachment_id", name="uq_request_attachment"),)
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    request_id: int = Column(Integer, ForeignKey("requests.id"), nullable=False, index=True)
+    attachment_id: int = Column(Integer, ForeignKey("attachments.id"), nullable=False, index=True)
+    uploaded_by: Optional[int] = Column(Integer, ForeignKey("users.id"), nullable=True)
+    uploaded_at: datetime = Column(DateTime(timezone=True), server_default=func.now())
+
+    attachment = relationship("Attachment", lazy="joined")
+
+    @property
+    def file_id(self) -> str:
+        return self.attachment.file_id
+
+    @property
+    def file_type(self) -> str:
+        return self.attachment.file_type
+
+    @property
+    def file_name(self) -> Optional[str]:
+        return self.attachment.file_name
@@ -11,7 +11,7 @@ class Comment(Base):
     __tablename__ = "comments"
 
     id: int = Column(Integer, primary_key=True, index=True)
-    request_id: int = Column(Integer, ForeignKey("requests.id"), nullable=False)
+    request_id: int = Column(Integer, ForeignKey("requests.id"), nullable=False, index=True)
     user_id: int = Column(Integer, ForeignKey("users.id"), nullable=False)
     comment: str = Column(Text, nullable=False)
     created_at: datetime = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import JSON, BigInteger, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class ExportJob(Base):
+    """Фоновая задача экспорта"""
+
+    __tablename__ = "export_jobs"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    kind: str = Column(String(50), nullable=False)  # month, all, stats
+    params: dict = Column(JSON, default=dict, nullable=False)
+    status: str = Column(String(20), default="queued", nullable=False, index=True)  # queued, running, done, failed, cancelled
+    progress: int = Column(Integer, default=0, nullable=False)  # 0-100
+    requested_by: Optional[int] = Column(Integer, ForeignKey("users.id"), nullable=True)
+    chat_id: int = Column(BigInteger, nullable=False)
+    data_version: Optional[str] = Column(String(100), nullable=True)
+    error: Optional[str] = Column(Text, nullable=True)
+    created_at: datetime = Column(DateTime(timezone=True), server_default=func.now())
+    started_at: Optional[datetime] = Column(DateTime(timezone=True), nullable=True)
+    finished_at: Optional[datetime] = Column(DateTime(timezone=True), nullable=True)
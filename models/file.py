@@ -10,7 +10,7 @@ class File(Base):
     __tablename__ = "files"
 
     id: int = Column(Integer, primary_key=True, index=True)
-    request_id: int = Column(Integer, ForeignKey("requests.id"), nullable=False)
+    request_id: int = Column(Integer, ForeignKey("requests.id"), nullable=False, index=True)
     file_type: str = Column(String(50), nullable=False)  # photo, document
     file_id: str = Column(String(255), nullable=False)  # Telegram file_id
     file_name: Optional[str] = Column(String(255), nullable=True)
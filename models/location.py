@@ -0,0 +1,128 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class Location(Base):
+    """Место в школе: корпус / этаж / помещение"""
+
+    __tablename__ = "locations"
+
+    id: int = Column(Integer, primary_key=True)
+    # Нормализованный ключ «корпус|этаж|помещение» - одно место хранится один раз
+    key: str = Column(String(200), unique=True, nullable=False, index=True)
+    name: str = Column(String(100), nullable=False)
+    building: Optional[str] = Column(String(50), nullable=True)
+    floor: Optional[str] = Column(String(20), nullable=True)
+    room: Optional[str] = Column(String(100), nullable=True)
+    # Счетчики ведут триггеры БД на requests
+    request_count: int = Column(Integer, default=0, server_default="0", nullable=False)
+    open_count: int = Column(Integer, default=0, server_default="0", nullable=False, index=True)
+    created_at: datetime = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Счетчики заявок по месту: обновляются триггерами, поэтому верны и после массовых UPDATE.
+# Последний оператор пересчитывает их целиком (идемпотентно, чинит расхождения).
+_RECOUNT = """
+    UPDATE locations SET
+        request_count = (SELECT count(*) FROM requests r WHERE r.location_id = locations.id),
+        open_count = (SELECT count(*) FROM requests r
+                      WHERE r.location_id = locations.id AND r.status IN ('OPEN', 'IN_PROGRESS'))
+"""
+
+POSTGRES_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION location_counters_trigger() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            IF OLD.location_id IS NOT NULL THEN
+                UPDATE locations SET
+                    request_count = request_count - 1,
+                    open_count = open_count - CASE WHEN OLD.status IN ('OPEN', 'IN_PROGRESS') THEN 1 ELSE 0 END
+                WHERE id = OLD.location_id;
+            END IF;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            IF NEW.location_id IS NOT NULL THEN
+                UPDATE locations SET
+                    request_count = request_count + 1,
+                    open_count = open_count + CASE WHEN NEW.status IN ('OPEN', 'IN_PROGRESS') THEN 1 ELSE 0 END
+                WHERE id = NEW.location_id;
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS location_counters ON requests",
+    """
+    CREATE TRIGGER location_counters
+    AFTER INSERT OR UPDATE OF status, location_id OR DELETE ON requests
+    FOR EACH ROW EXECUTE FUNCTION location_counters_trigger()
+    """,
+    _RECOUNT,
+]
+
+_SQLITE_IS_OPEN = "({row}.status IN ('OPEN', 'IN_PROGRESS'))"
+
+SQLITE_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS location_counters_ai AFTER INSERT ON requests
+    WHEN new.location_id IS NOT NULL BEGIN
+        UPDATE locations SET request_count = request_count + 1,
+                             open_count = open_count + {_SQLITE_IS_OPEN.format(row="new")}
+        WHERE id = new.location_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS location_counters_au AFTER UPDATE OF status, location_id ON requests BEGIN
+        UPDATE locations SET request_count = request_count - 1,
+                             open_count = open_count - {_SQLITE_IS_OPEN.format(row="old")}
+        WHERE id = old.location_id;
+        UPDATE locations SET request_count = request_count + 1,
+                             open_count = open_count + {_SQLITE_IS_OPEN.format(row="new")}
+        WHERE id = new.location_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS location_counters_ad AFTER DELETE ON requests
+    WHEN old.location_id IS NOT NULL BEGIN
+        UPDATE locations SET request_count = request_count - 1,
+                             open_count = open_count - {_SQLITE_IS_OPEN.format(row="old")}
+        WHERE id = old.location_id;
+    END
+    """,
+    _RECOUNT,
+]
+
+LOCATION_DDL = {
+    "postgresql": POSTGRES_DDL,
+    "sqlite": SQLITE_DDL,
+}
+
+DROP_LOCATION_DDL = {
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS location_counters ON requests",
+        "DROP FUNCTION IF EXISTS location_counters_trigger()",
+    ],
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS {name}"
+        for name in ("location_counters_ai", "location_counters_au", "location_counters_ad")
+    ],
+}
+
+
+def install_location_counters(connection: Connection) -> None:
+    """Создать триггеры счетчиков по местам (идемпотентно)"""
+    for statement in LOCATION_DDL.get(connection.dialect.name, []):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_location_counters(target, connection: Connection, **kw) -> None:  # noqa: ARG001
+    install_location_counters(connection)
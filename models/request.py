@@ -27,18 +27,22 @@ class Request(Base):
     title: str = Column(String(100), nullable=False)
     description: str = Column(String(1000), nullable=False)
     location: str = Column(String(100), nullable=False)
+    location_id: Optional[int] = Column(Integer, ForeignKey("locations.id"), nullable=True, index=True)
     status: Status = Column(SQLEnum(Status), default=Status.OPEN, nullable=False)
     priority: Priority = Column(SQLEnum(Priority), default=Priority.MEDIUM, nullable=False)
     assigned_to: Optional[int] = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at: datetime = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at: datetime = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     completed_at: Optional[datetime] = Column(DateTime, nullable=True)
     history: list = Column(JSON, default=list, nullable=False)  # История всех изменений
 
     user = relationship("User", foreign_keys=[user_id], backref="requests")
     assigned_user = relationship("User", foreign_keys=[assigned_to])
+    place = relationship("Location", backref="requests")
     comments = relationship("Comment", backref="request", cascade="all, delete-orphan")
     files = relationship("File", backref="request", cascade="all, delete-orphan")
+    attachment_links = relationship("RequestAttachment", backref="request", cascade="all, delete-orphan")
+    subscribers = relationship("RequestSubscriber", backref="request", cascade="all, delete-orphan")
 
     def add_history_entry(self, action: str, details: str = "", user_id: Optional[int] = None) -> None:
         """Добавить запись в историю"""
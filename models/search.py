@@ -0,0 +1,153 @@
+# Полнотекстовый индекс заявок (заголовок, описание, локация, комментарии)
+#
+# PostgreSQL: таблица request_search с tsvector (русская морфология) и GIN-индексом.
+# SQLite: виртуальная таблица FTS5 request_fts.
+# Индекс обновляется триггерами БД, поэтому его не обходят ни ORM, ни массовые UPDATE.
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+
+from .base import Base
+
+POSTGRES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS request_search (
+        request_id INTEGER PRIMARY KEY REFERENCES requests(id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_request_search_document ON request_search USING GIN (document)",
+    """
+    CREATE OR REPLACE FUNCTION request_search_refresh(rid INTEGER) RETURNS VOID AS $$
+        INSERT INTO request_search (request_id, document)
+        SELECT r.id,
+               setweight(to_tsvector('russian', coalesce(r.title, '')), 'A') ||
+               setweight(to_tsvector('russian', coalesce(r.location, '')), 'A') ||
+               setweight(to_tsvector('russian', coalesce(r.description, '')), 'B') ||
+               setweight(to_tsvector('russian', coalesce(
+                   (SELECT string_agg(c.comment, ' ') FROM comments c WHERE c.request_id = r.id), ''
+               )), 'C')
+        FROM requests r
+        WHERE r.id = rid
+        ON CONFLICT (request_id) DO UPDATE SET document = EXCLUDED.document
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION request_search_requests_trigger() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM request_search_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION request_search_comments_trigger() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM request_search_refresh(OLD.request_id);
+        ELSE
+            PERFORM request_search_refresh(NEW.request_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS request_search_requests ON requests",
+    """
+    CREATE TRIGGER request_search_requests
+    AFTER INSERT OR UPDATE OF title, description, location ON requests
+    FOR EACH ROW EXECUTE FUNCTION request_search_requests_trigger()
+    """,
+    "DROP TRIGGER IF EXISTS request_search_comments ON comments",
+    """
+    CREATE TRIGGER request_search_comments
+    AFTER INSERT OR UPDATE OF comment OR DELETE ON comments
+    FOR EACH ROW EXECUTE FUNCTION request_search_comments_trigger()
+    """,
+    # Заявки, созданные до появления индекса
+    """
+    SELECT request_search_refresh(r.id) FROM requests r
+    WHERE NOT EXISTS (SELECT 1 FROM request_search s WHERE s.request_id = r.id)
+    """,
+]
+
+_SQLITE_COMMENTS = "(SELECT group_concat(comment, ' ') FROM comments WHERE request_id = {rid})"
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS request_fts USING fts5(
+        title, description, location, comments, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS request_fts_ai AFTER INSERT ON requests BEGIN
+        INSERT INTO request_fts (rowid, title, description, location, comments)
+        VALUES (new.id, new.title, new.description, new.location, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS request_fts_au AFTER UPDATE OF title, description, location ON requests BEGIN
+        UPDATE request_fts SET title = new.title, description = new.description, location = new.location
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS request_fts_ad AFTER DELETE ON requests BEGIN
+        DELETE FROM request_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS request_fts_comments_ai AFTER INSERT ON comments BEGIN
+        UPDATE request_fts SET comments = {_SQLITE_COMMENTS.format(rid="new.request_id")} WHERE rowid = new.request_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS request_fts_comments_au AFTER UPDATE OF comment ON comments BEGIN
+        UPDATE request_fts SET comments = {_SQLITE_COMMENTS.format(rid="new.request_id")} WHERE rowid = new.request_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS request_fts_comments_ad AFTER DELETE ON comments BEGIN
+        UPDATE request_fts SET comments = {_SQLITE_COMMENTS.format(rid="old.request_id")} WHERE rowid = old.request_id;
+    END
+    """,
+    # Заявки, созданные до появления индекса
+    f"""
+    INSERT INTO request_fts (rowid, title, description, location, comments)
+    SELECT r.id, r.title, r.description, r.location, coalesce({_SQLITE_COMMENTS.format(rid="r.id")}, '')
+    FROM requests r WHERE r.id NOT IN (SELECT rowid FROM request_fts)
+    """,
+]
+
+SEARCH_DDL = {
+    "postgresql": POSTGRES_DDL,
+    "sqlite": SQLITE_DDL,
+}
+
+DROP_SEARCH_DDL = {
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS request_search_comments ON comments",
+        "DROP TRIGGER IF EXISTS request_search_requests ON requests",
+        "DROP FUNCTION IF EXISTS request_search_comments_trigger()",
+        "DROP FUNCTION IF EXISTS request_search_requests_trigger()",
+        "DROP FUNCTION IF EXISTS request_search_refresh(INTEGER)",
+        "DROP TABLE IF EXISTS request_search",
+    ],
+    "sqlite": [
+        *(f"DROP TRIGGER IF EXISTS {name}" for name in (
+            "request_fts_ai", "request_fts_au", "request_fts_ad",
+            "request_fts_comments_ai", "request_fts_comments_au", "request_fts_comments_ad",
+        )),
+        "DROP TABLE IF EXISTS request_fts",
+    ],
+}
+
+
+def install_search_index(connection: Connection) -> None:
+    """Создать поисковый индекс и триггеры (идемпотентно)"""
+    for statement in SEARCH_DDL.get(connection.dialect.name, []):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection: Connection, **kw) -> None:  # noqa: ARG001
+    install_search_index(connection)
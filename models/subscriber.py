@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class RequestSubscriber(Base):
+    """Подписка пользователя на чужую заявку (вместо создания дубля)"""
+
+    __tablename__ = "request_subscribers"
+    __table_args__ = (UniqueConstraint("request_id", "user_id", name="uq_request_subscriber"),)
+
+    id: int = Column(Integer, primary_key=True)
+    request_id: int = Column(Integer, ForeignKey("requests.id"), nullable=False, index=True)
+    user_id: int = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at: datetime = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,146 @@
+"""Tests for the analytics report."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from models import Priority, Request, Status, User
+from utils.analytics import RequestAnalytics, format_analytics_report, report_cache
+from utils.analytics_engine import PRIORITY_CODES, duration_bucket, histogram_completion_stats
+from utils.locations import LocationIndex, get_or_create_location
+
+
+class TestFullReport:
+    """Test the single-statement report and its cache."""
+
+    async def _create_requests(self, db_session: any) -> None:
+        """Helper to create requests in every status."""
+        user = User(telegram_id=9900, username="analytics_user")
+        db_session.add(user)
+        await db_session.commit()
+        location = await get_or_create_location(db_session, "Каб. 101", index=LocationIndex())
+
+        now = datetime.utcnow()
+        db_session.add_all([
+            Request(user_id=user.id, title="Открыта", description="Описание", location="Каб. 101",
+                    location_id=location.id, priority=Priority.HIGH, created_at=now - timedelta(days=3)),
+            Request(user_id=user.id, title="В работе", description="Описание", location="Каб. 101",
+                    location_id=location.id, status=Status.IN_PROGRESS),
+            Request(user_id=user.id, title="Выполнена", description="Описание", location="Столовая",
+                    status=Status.COMPLETED, priority=Priority.LOW,
+                    created_at=now - timedelta(hours=10), completed_at=now - timedelta(hours=4)),
+            Request(user_id=user.id, title="Отклонена", description="Описание", location="Столовая",
+                    status=Status.REJECTED),
+        ])
+        await db_session.commit()
+        report_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_report_contents(self, db_session: any) -> None:
+        """All sections are filled from one statement (works on SQLite too)."""
+        await self._create_requests(db_session)
+
+        report = await RequestAnalytics.get_full_report(db_session)
+
+        assert report["metrics"] == {
+            "total": 4, "completed": 1, "rejected": 1, "in_progress": 1, "open": 1,
+            "completed_today": 1 if datetime.utcnow().hour >= 4 else 0, "completion_rate": 25.0,
+        }
+        assert report["overdue_high_priority"] == 1
+        assert report["avg_completion_time"]["avg_hours"] == pytest.approx(6, abs=0.01)
+        # Перцентили берутся из гистограммы снимка (точность около 2%)
+        assert report["avg_completion_time"]["p90_hours"] == pytest.approx(6, rel=0.02)
+        assert report["avg_completion_time"]["aging"][2] == 1
+        assert sum(day["count"] for day in report["daily_stats"]["daily"]) == 4
+        assert {"priority": "🔴 Высокий", "count": 1} in report["priority_distribution"]["distribution"]
+        assert report["location_distribution"]["distribution"] == [{"location": "Каб. 101", "open": 2, "total": 2}]
+        assert "Всего заявок: 4" in format_analytics_report(report)
+
+    @pytest.mark.asyncio
+    async def test_report_is_cached_by_snapshot_version(self, db_session: any, async_engine: any) -> None:
+        """Unchanged data only checks the snapshot for changes; writes invalidate."""
+        await self._create_requests(db_session)
+        first = await RequestAnalytics.get_full_report(db_session)
+        statements = []
+        event.listen(async_engine.sync_engine, "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+
+        assert await RequestAnalytics.get_full_report(db_session) is first
+        assert not any(statement.lstrip().startswith(("UPDATE", "INSERT")) for statement in statements)
+        assert len(statements) == 3
+
+        request = await db_session.get(Request, 1)
+        request.status = Status.COMPLETED
+        await db_session.commit()
+        statements.clear()
+
+        report = await RequestAnalytics.get_full_report(db_session)
+        assert report["metrics"]["completed"] == 2
+        assert report["data_version"] != first["data_version"]
+        # Промах кэша не читает таблицу заявок целиком: только измененные строки
+        assert all("updated_at >=" in statement for statement in statements if "FROM requests" in statement)
+
+
+class TestAnalyticsEngine:
+    """Test completion-time statistics from histograms."""
+
+    @staticmethod
+    def _stats(hours: np.ndarray, priority: np.ndarray, location: np.ndarray, **kwargs):
+        """Histogram statistics of completion times, cells as the snapshot keeps them."""
+        cells, counts = np.unique(
+            np.column_stack([priority, location, [duration_bucket(h) for h in hours]]), axis=0, return_counts=True
+        )
+        return histogram_completion_stats(
+            cells[:, 0], cells[:, 1], cells[:, 2], counts, float(hours.sum()),
+            kwargs.get("open_ages", np.array([])), kwargs.get("open_counts", np.array([])),
+        )
+
+    def test_completion_stats(self) -> None:
+        """Percentiles, histogram, breakdowns and aging in one pass."""
+        hours = np.arange(1, 11, dtype=np.float64)
+        priority = np.array([PRIORITY_CODES[Priority.HIGH]] * 5 + [PRIORITY_CODES[Priority.LOW]] * 5)
+        location = np.array([1, 2] * 5)
+
+        stats = self._stats(hours, priority, location, open_ages=np.array([1.0]), open_counts=np.array([2]))
+
+        assert stats.completed == 10
+        assert stats.mean_hours == 5.5
+        # Десять значений: процентиль лежит в корзине между соседними значениями
+        assert 5 <= stats.percentiles[50] <= 6
+        assert 9 <= stats.percentiles[90] <= 10
+        assert sum(stats.histogram) == 10
+        assert stats.by_priority[Priority.HIGH]["mean_hours"] == pytest.approx(3.0, rel=0.05)
+        assert stats.by_priority[Priority.LOW]["count"] == 5
+        assert set(stats.by_location) == {1, 2}
+        assert stats.aging == [0, 2, 0, 0, 0, 0]
+
+    def test_histogram_stats_match_exact(self) -> None:
+        """Statistics from the snapshot histograms are within 2% of the exact ones."""
+        rng = np.random.default_rng(2)
+        n = 5000
+        hours = rng.exponential(30, n)
+        priority = rng.integers(0, len(PRIORITY_CODES), n)
+        location = rng.integers(-1, 4, n)
+
+        approx = self._stats(hours, priority, location)
+
+        assert approx.completed == n
+        assert approx.mean_hours == round(float(hours.mean()), 2)
+        for q, value in zip((50, 90, 95), np.percentile(hours, (50, 90, 95))):
+            assert approx.percentiles[q] == pytest.approx(value, rel=0.02)
+        for code in range(4):
+            values = hours[location == code]
+            assert approx.by_location[code]["count"] == len(values)
+            assert approx.by_location[code]["p90_hours"] == pytest.approx(np.percentile(values, 90), rel=0.02)
+        assert -1 not in approx.by_location
+        assert set(approx.by_priority) == set(PRIORITY_CODES)
+
+    def test_empty_histogram(self) -> None:
+        """No completed requests - zeros instead of errors."""
+        stats = histogram_completion_stats([], [], [], [], 0.0, np.array([]), np.array([]))
+
+        assert stats.completed == 0
+        assert stats.percentiles[90] == 0.0
+        assert stats.by_location == {}
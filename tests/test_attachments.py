@@ -0,0 +1,120 @@
+"""Tests for the deduplicating attachment store."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Attachment, File, Request, RequestAttachment, User
+from utils.attachments import (
+    AttachmentMeta,
+    attach_to_request,
+    attachment_meta_from_message,
+    get_attachment_meta,
+    get_request_attachments,
+)
+
+
+class TestAttachmentStore:
+    """Test attachment deduplication."""
+
+    async def _create_requests(self, db_session: any, count: int = 2) -> list[Request]:
+        """Helper to create test requests."""
+        user = User(telegram_id=9100, username="attach_user")
+        db_session.add(user)
+        await db_session.commit()
+
+        requests = [
+            Request(user_id=user.id, title=f"Request {i}", description="Broken tap", location="Room 101")
+            for i in range(count)
+        ]
+        db_session.add_all(requests)
+        await db_session.commit()
+        return requests
+
+    @staticmethod
+    def _meta(file_id: str = "file_1", unique_id: str = "uniq_1") -> AttachmentMeta:
+        return AttachmentMeta(file_unique_id=unique_id, file_id=file_id, file_type="photo", file_size=2048)
+
+    @pytest.mark.asyncio
+    async def test_same_file_is_stored_once(self, db_session: any) -> None:
+        """Re-sending the same photo to two requests stores one attachment."""
+        first, second = await self._create_requests(db_session)
+
+        await attach_to_request(db_session, first.id, self._meta("file_a"))
+        await attach_to_request(db_session, second.id, self._meta("file_b"))
+
+        assert await db_session.scalar(select(func.count(Attachment.id))) == 1
+        assert await db_session.scalar(select(func.count(RequestAttachment.id))) == 2
+        attachment = await db_session.scalar(select(Attachment))
+        assert attachment.file_id == "file_b"
+
+    @pytest.mark.asyncio
+    async def test_duplicate_link_is_not_created(self, db_session: any) -> None:
+        """Attaching the same file twice to one request keeps a single link."""
+        (request,) = await self._create_requests(db_session, count=1)
+
+        first = await attach_to_request(db_session, request.id, self._meta())
+        second = await attach_to_request(db_session, request.id, self._meta())
+
+        assert first.id == second.id
+        assert await db_session.scalar(select(func.count(RequestAttachment.id))) == 1
+
+    @pytest.mark.asyncio
+    async def test_refreshed_file_id_is_kept_for_existing_link(self, db_session: any, async_engine: any) -> None:
+        """Re-attaching with a new file_id persists it and refreshes the metadata cache."""
+        (request,) = await self._create_requests(db_session, count=1)
+        await attach_to_request(db_session, request.id, self._meta("file_old", "uniq_refresh"))
+        assert (await get_attachment_meta(db_session, "uniq_refresh")).file_id == "file_old"
+
+        await attach_to_request(db_session, request.id, self._meta("file_new", "uniq_refresh"))
+        await db_session.rollback()
+
+        async with AsyncSession(async_engine) as other:
+            assert await other.scalar(select(Attachment.file_id)) == "file_new"
+        assert (await get_attachment_meta(db_session, "uniq_refresh")).file_id == "file_new"
+
+    @pytest.mark.asyncio
+    async def test_request_attachments_include_legacy_files(self, db_session: any) -> None:
+        """Links and legacy files rows are both returned."""
+        (request,) = await self._create_requests(db_session, count=1)
+        db_session.add(File(request_id=request.id, file_id="legacy", file_type="document"))
+        await db_session.commit()
+        await attach_to_request(db_session, request.id, self._meta())
+
+        attachments = await get_request_attachments(db_session, request.id)
+
+        assert [(a.file_id, a.file_type) for a in attachments] == [("file_1", "photo"), ("legacy", "document")]
+
+    @pytest.mark.asyncio
+    async def test_metadata_lookup(self, db_session: any) -> None:
+        """Stored metadata can be looked up by file_unique_id."""
+        (request,) = await self._create_requests(db_session, count=1)
+        await attach_to_request(db_session, request.id, self._meta(unique_id="uniq_meta"))
+
+        meta = await get_attachment_meta(db_session, "uniq_meta")
+
+        assert meta.file_size == 2048
+        assert await get_attachment_meta(db_session, "unknown") is None
+
+
+class TestAttachmentMetaFromMessage:
+    """Test metadata extraction."""
+
+    def test_photo_uses_largest_size(self) -> None:
+        """Largest photo size is stored, smallest is the thumbnail."""
+        small = MagicMock(file_id="small", file_unique_id="u_small", file_size=100, width=90, height=90)
+        large = MagicMock(file_id="large", file_unique_id="u_large", file_size=9000, width=1280, height=960)
+        message = MagicMock(photo=[small, large], document=None)
+
+        meta = attachment_meta_from_message(message)
+
+        assert meta.file_unique_id == "u_large"
+        assert meta.thumbnail_file_id == "small"
+        assert (meta.width, meta.height) == (1280, 960)
+
+    def test_text_message_has_no_attachment(self) -> None:
+        """Plain text yields no metadata."""
+        message = MagicMock(photo=None, document=None)
+        assert attachment_meta_from_message(message) is None
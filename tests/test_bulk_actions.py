@@ -0,0 +1,172 @@
+"""Tests for bulk admin actions."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from handlers.bulk_actions import bulk_action_callback
+from models import Request, RequestSubscriber, Status, User
+from utils.bulk_actions import (
+    BULK_ACTIONS,
+    BulkRow,
+    apply_bulk_action,
+    decode_selection,
+    encode_selection,
+    read_keyboard,
+)
+from utils.keyboard import get_bulk_select_keyboard
+from utils.notifications import NotificationService, format_status_changes
+
+
+class FakeBot:
+    """Records sent messages."""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.sent.append((chat_id, text))
+
+
+class StubMessage:
+    """Message carrying a keyboard; records edits."""
+
+    def __init__(self, reply_markup) -> None:
+        self.reply_markup = reply_markup
+        self.edits: list[str] = []
+
+    async def edit_text(self, text: str, **kwargs) -> None:
+        self.edits.append(text)
+
+
+async def _create_requests(db_session, statuses: list[Status]) -> tuple[User, User, list[Request]]:
+    author = User(telegram_id=2000, first_name="Author", role="user")
+    admin = User(telegram_id=2001, first_name="Admin", role="admin")
+    db_session.add_all([author, admin])
+    await db_session.commit()
+
+    requests = [
+        Request(user_id=author.id, title=f"Request {i}", description="Bulk", location="Room 1", status=status)
+        for i, status in enumerate(statuses)
+    ]
+    db_session.add_all(requests)
+    await db_session.commit()
+    return author, admin, requests
+
+
+class TestSelectionKeyboard:
+    """Test the selection kept in the keyboard."""
+
+    def test_selection_round_trip(self) -> None:
+        """Any set of rows survives the bitmask encoding."""
+        for rows in (set(), {0}, {1, 5, 39}, set(range(40))):
+            assert decode_selection(encode_selection(rows)) == rows
+        assert len(encode_selection(set(range(40)))) <= 8
+
+    def test_keyboard_round_trip(self) -> None:
+        """Rows and ticks are read back from a built keyboard."""
+        rows = [BulkRow(10, "🟡🔴 #10 Кран"), BulkRow(12, "🟢🟢 #12 Свет"), BulkRow(15, "🟢🟡 #15 Дверь")]
+        markup = get_bulk_select_keyboard(rows, {0, 2})
+
+        assert read_keyboard(markup) == (rows, {0, 2})
+        assert all(len(button.callback_data.encode()) <= 64 for line in markup.inline_keyboard for button in line)
+
+
+class TestBulkActions:
+    """Test single-statement status changes."""
+
+    @pytest.mark.asyncio
+    async def test_only_matching_statuses_change(self, db_session) -> None:
+        """Requests in another status are skipped; changed ones get updated_at."""
+        _, admin, requests = await _create_requests(
+            db_session, [Status.IN_PROGRESS, Status.IN_PROGRESS, Status.OPEN, Status.COMPLETED]
+        )
+        started = datetime.utcnow() - timedelta(seconds=1)
+
+        changed = await apply_bulk_action(db_session, BULK_ACTIONS["complete"], [r.id for r in requests], admin)
+        await db_session.commit()
+
+        assert sorted(row.id for row in changed) == [requests[0].id, requests[1].id]
+        stored = {r.id: r for r in (await db_session.scalars(select(Request).execution_options(populate_existing=True)))}
+        for request in requests[:2]:
+            assert stored[request.id].status == Status.COMPLETED
+            assert stored[request.id].completed_at is not None
+            assert stored[request.id].updated_at >= started
+        assert stored[requests[2].id].status == Status.OPEN
+
+    @pytest.mark.asyncio
+    async def test_take_assigns_admin(self, db_session) -> None:
+        """Taken requests are assigned to the admin."""
+        _, admin, requests = await _create_requests(db_session, [Status.OPEN, Status.OPEN])
+
+        changed = await apply_bulk_action(db_session, BULK_ACTIONS["take"], [r.id for r in requests], admin)
+        await db_session.commit()
+
+        assert len(changed) == 2
+        assigned = await db_session.scalars(select(Request.assigned_to).where(Request.id.in_([r.id for r in requests])))
+        assert set(assigned) == {admin.id}
+
+    @pytest.mark.asyncio
+    async def test_notifications_are_batched_per_recipient(self, db_session) -> None:
+        """The author gets one message for all requests, a subscriber one for theirs."""
+        author, admin, requests = await _create_requests(db_session, [Status.IN_PROGRESS] * 3)
+        subscriber = User(telegram_id=2002, first_name="Neighbour", role="user")
+        db_session.add(subscriber)
+        await db_session.commit()
+        db_session.add(RequestSubscriber(request_id=requests[0].id, user_id=subscriber.id))
+        await db_session.commit()
+
+        changed = await apply_bulk_action(db_session, BULK_ACTIONS["complete"], [r.id for r in requests], admin)
+        await db_session.commit()
+        bot = FakeBot()
+        await NotificationService(bot).notify_status_changes(db_session, changed)
+
+        sent = dict(bot.sent)
+        assert len(bot.sent) == 2
+        assert "Выполнены (3)" in sent[author.telegram_id]
+        assert sent[subscriber.telegram_id] == format_status_changes([changed[0]])
+
+    @pytest.mark.asyncio
+    async def test_long_notification_is_split_and_escaped(self, db_session) -> None:
+        """Titles are escaped and a batch over the message limit arrives in several messages."""
+        author, admin, requests = await _create_requests(db_session, [Status.IN_PROGRESS] * 40)
+        for request in requests:
+            request.title = "<b>Кран</b> & труба"
+            request.location = "Корпус <А> " + "этаж " * 25
+        await db_session.commit()
+
+        changed = await apply_bulk_action(db_session, BULK_ACTIONS["complete"], [r.id for r in requests], admin)
+        await db_session.commit()
+        bot = FakeBot()
+        await NotificationService(bot).notify_status_changes(db_session, changed)
+
+        texts = [text for chat_id, text in bot.sent if chat_id == author.telegram_id]
+        assert len(texts) > 1
+        assert all(len(text) <= 4096 for text in texts)
+        assert "&lt;b&gt;Кран&lt;/b&gt; &amp; труба" in texts[0]
+        assert sum(text.count("&lt;А&gt;") for text in texts) == 40
+
+    @pytest.mark.asyncio
+    async def test_callback_completes_ticked_rows(self, db_session) -> None:
+        """The handler applies the action to ticked rows and reports skipped ones."""
+        _, admin, requests = await _create_requests(db_session, [Status.IN_PROGRESS, Status.OPEN, Status.IN_PROGRESS])
+        rows = [BulkRow(r.id, f"#{r.id}") for r in requests]
+        markup = get_bulk_select_keyboard(rows, {0, 1})
+        message = StubMessage(markup)
+        answers = []
+
+        async def answer(*args, **kwargs) -> None:
+            answers.append(args)
+
+        callback = SimpleNamespace(data=f"bulk_do_complete_{encode_selection({0, 1})}", message=message, answer=answer)
+        bot = FakeBot()
+        container = SimpleNamespace(notifications=NotificationService(bot))
+
+        await bulk_action_callback.__wrapped__(callback, user=admin, session=db_session, container=container)
+
+        assert message.edits == ["✅ Выполнено: 1\n⏭️ Пропущено: 1 (статус уже изменён)"]
+        statuses = dict((await db_session.execute(select(Request.id, Request.status))).all())
+        assert [statuses[r.id] for r in requests] == [Status.COMPLETED, Status.OPEN, Status.IN_PROGRESS]
+        assert len(bot.sent) == 1
@@ -0,0 +1,104 @@
+"""Tests for ZIP report bundles."""
+
+import asyncio
+import json
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from handlers.admin import parse_date_range
+from models import File, Request, User
+from utils.attachments import AttachmentMeta, attach_to_request
+from utils.bundle_export import BundleBuilder, SpooledInputFile
+
+
+class FakeBot:
+    """Bot stub serving attachment content by file_id."""
+
+    def __init__(self, files: dict[str, bytes]) -> None:
+        self.files = files
+
+    async def download(self, file_id: str, destination) -> None:
+        await asyncio.sleep(0)
+        if file_id not in self.files:
+            raise RuntimeError("file not found")
+        destination.write(self.files[file_id])
+
+
+class TestBundleBuilder:
+    """Test bundle contents."""
+
+    async def _create_data(self, db_session: any) -> list[Request]:
+        """Helper to create requests with attachments."""
+        user = User(telegram_id=9300, username="bundle_user", first_name="Иван")
+        db_session.add(user)
+        await db_session.commit()
+
+        old = Request(user_id=user.id, title="Old", description="Old request", location="Room 1",
+                      created_at=datetime.utcnow() - timedelta(days=90))
+        first = Request(user_id=user.id, title="Кран", description="Течет кран", location="Room 101")
+        second = Request(user_id=user.id, title="Лампа", description="Не горит лампа", location="Room 202")
+        db_session.add_all([old, first, second])
+        await db_session.commit()
+
+        await attach_to_request(db_session, first.id, AttachmentMeta("u1", "photo_1", "photo"))
+        db_session.add(File(request_id=second.id, file_id="doc_1", file_type="document", file_name="act.pdf"))
+        db_session.add(File(request_id=second.id, file_id="missing", file_type="photo"))
+        await db_session.commit()
+        return [old, first, second]
+
+    @pytest.mark.asyncio
+    async def test_bundle_contains_csv_json_and_attachments(self, db_session: any) -> None:
+        """Bundle has the CSV, one JSON per request and fetched attachments."""
+        old, first, second = await self._create_data(db_session)
+        builder = BundleBuilder(FakeBot({"photo_1": b"jpeg", "doc_1": b"pdf"}))
+
+        bundle = await builder.build(db_session, date_from=datetime.utcnow() - timedelta(days=30))
+
+        with zipfile.ZipFile(bundle) as archive:
+            names = set(archive.namelist())
+            csv_text = archive.read("requests.csv").decode("utf-8-sig")
+            request_json = json.loads(archive.read(f"requests/{first.id}.json"))
+            photo = archive.read(f"attachments/{first.id}/01_photo.jpg")
+            document = archive.read(f"attachments/{second.id}/01_act.pdf")
+
+        assert f"requests/{old.id}.json" not in names
+        assert csv_text.count("\n") == 3
+        assert "Течет кран" in csv_text
+        assert request_json["attachments"][0]["file_type"] == "photo"
+        assert (photo, document) == (b"jpeg", b"pdf")
+        assert (builder.request_count, builder.attachment_count, builder.failed_attachments) == (2, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_spooled_input_file_streams_in_chunks(self, db_session: any) -> None:
+        """Upload wrapper yields the whole bundle in chunks."""
+        await self._create_data(db_session)
+        bundle = await BundleBuilder(FakeBot({})).build(db_session)
+
+        chunks = [chunk async for chunk in SpooledInputFile(bundle, "bundle.zip", chunk_size=64).read(None)]
+
+        bundle.seek(0)
+        assert b"".join(chunks) == bundle.read()
+        assert len(chunks) > 1
+
+
+class TestParseDateRange:
+    """Test command period parsing."""
+
+    def test_default_is_last_30_days(self) -> None:
+        """Without arguments the last 30 days are exported."""
+        date_from, date_to = parse_date_range(None)
+        assert (date_to - date_from).days == 30
+
+    def test_explicit_range_includes_end_day(self) -> None:
+        """The end date is included entirely."""
+        date_from, date_to = parse_date_range("01.09.2025 2025-09-30")
+        assert date_from == datetime(2025, 9, 1)
+        assert date_to.date() == datetime(2025, 9, 30).date()
+        assert date_to.hour == 23
+
+    def test_invalid_date(self) -> None:
+        """Invalid dates are rejected."""
+        with pytest.raises(ValueError):
+            parse_date_range("32.13.2025")
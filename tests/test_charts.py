@@ -0,0 +1,95 @@
+"""Tests for analytics charts."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.charts import ChartRenderer, render_chart, report_charts, send_report_charts
+
+pytest.importorskip("matplotlib")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+REPORT = {
+    "data_version": "4:4:2026-10-19T10:00:00",
+    "daily_stats": {"daily": [{"date": "2026-10-18", "count": 3}, {"date": "2026-10-19", "count": 1}]},
+    "status_distribution": {"distribution": [{"status": "📭 Открыта", "count": 2}]},
+    "priority_distribution": {"distribution": [{"priority": "🔴 Высокий", "count": 1}]},
+    "avg_completion_time": {"aging": [1, 0, 2, 0, 0, 0]},
+}
+
+
+class FakeBot:
+    """Records albums and answers with photo messages."""
+
+    def __init__(self) -> None:
+        self.albums = []
+
+    async def send_media_group(self, chat_id, media):
+        self.albums.append(media)
+        return [SimpleNamespace(photo=[SimpleNamespace(file_id=f"file-{i}")]) for i in range(len(media))]
+
+
+class TestCharts:
+    """Test rendering, caching and delivery."""
+
+    def test_every_chart_renders_png(self) -> None:
+        """All report charts render to PNG."""
+        for kind, data in report_charts(REPORT).items():
+            assert render_chart(kind, data).startswith(PNG_SIGNATURE)
+
+    @pytest.mark.asyncio
+    async def test_rendered_once_per_version(self, monkeypatch) -> None:
+        """Concurrent and repeated requests share one rendering."""
+        renderer = ChartRenderer(workers=1)
+        calls = []
+
+        async def fake_run(executor, func, kind, data):
+            calls.append(kind)
+            await asyncio.sleep(0.01)
+            return func(kind, data)
+
+        loop = asyncio.get_running_loop()
+        monkeypatch.setattr(loop, "run_in_executor", fake_run)
+        data = report_charts(REPORT)["daily"]
+
+        first, second = await asyncio.gather(
+            renderer.render("daily", data, "v1"), renderer.render("daily", data, "v1")
+        )
+        await renderer.render("daily", data, "v1")
+        await renderer.render("daily", data, "v2")
+
+        assert first == second
+        assert calls == ["daily", "daily"]
+        renderer.close()
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self) -> None:
+        """Charts are rendered in a worker process."""
+        renderer = ChartRenderer(workers=1)
+        try:
+            image = await renderer.render("backlog", report_charts(REPORT)["backlog"], "v1")
+        finally:
+            renderer.close()
+
+        assert image.startswith(PNG_SIGNATURE)
+
+    @pytest.mark.asyncio
+    async def test_resend_uses_file_ids(self, monkeypatch) -> None:
+        """Second delivery of the same version neither renders nor uploads."""
+        renderer = ChartRenderer()
+        rendered = []
+
+        async def fake_render(kind, data, version):
+            rendered.append(kind)
+            return PNG_SIGNATURE
+
+        monkeypatch.setattr(renderer, "render", fake_render)
+        bot = FakeBot()
+
+        assert await send_report_charts(bot, 1, REPORT, renderer) == 4
+        await send_report_charts(bot, 1, REPORT, renderer)
+
+        assert len(rendered) == 4
+        assert [photo.media for photo in bot.albums[1]] == ["file-0", "file-1", "file-2", "file-3"]
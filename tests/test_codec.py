@@ -0,0 +1,78 @@
+"""Tests for the JSON codec layer."""
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Text, cast, select
+
+from database.connection import create_engine_from_env
+from models import Base, Request, User
+from utils import codec
+from utils.codec import available_codecs, get_codec
+from utils.container import Container
+
+PAYLOADS = Path(__file__).resolve().parent.parent / "benchmarks" / "data" / "updates.jsonl"
+
+
+class Point:
+    """Type no JSON backend knows."""
+
+    def __init__(self, x: int) -> None:
+        self.x = x
+
+
+class TestCodec:
+    """Test that all backends behave the same."""
+
+    @pytest.mark.parametrize("backend", available_codecs(), ids=lambda backend: backend.name)
+    def test_round_trip_of_updates(self, backend) -> None:
+        """Recorded updates decode to the same values with every backend."""
+        reference = get_codec("json")
+        for line in PAYLOADS.read_text(encoding="utf-8").splitlines():
+            value = reference.loads(line)
+            assert backend.loads(line) == value
+            assert reference.loads(backend.dumps(value)) == value
+
+    @pytest.mark.parametrize("backend", available_codecs(), ids=lambda backend: backend.name)
+    def test_compatible_output(self, backend) -> None:
+        """Text stays readable, keys become strings, unknown types use default."""
+        encoded = backend.dumps({"title": "Кабинет 305", 1: [Point(2)]}, default=lambda obj: obj.x)
+
+        assert "Кабинет 305" in encoded
+        assert backend.loads(encoded) == {"title": "Кабинет 305", "1": [2]}
+
+    def test_unknown_backend(self) -> None:
+        """Misconfiguration is reported."""
+        with pytest.raises(ValueError):
+            get_codec("yaml")
+
+    def test_bot_session_uses_codec(self, monkeypatch) -> None:
+        """Bot API requests and responses go through the codec."""
+        monkeypatch.setenv("BOT_TOKEN", "123456:test")
+        bot = Container().bot
+
+        assert bot.session.json_dumps is codec.dumps
+        assert bot.session.json_loads is codec.loads
+
+    @pytest.mark.asyncio
+    async def test_history_column(self, tmp_path) -> None:
+        """JSON columns are stored and read through the codec."""
+        engine = create_engine_from_env(f"sqlite:///{tmp_path / 'codec.db'}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with engine.connect() as conn:
+                user_id = (await conn.execute(User.__table__.insert().values(telegram_id=1))).inserted_primary_key[0]
+                await conn.execute(Request.__table__.insert().values(
+                    user_id=user_id, title="Кран", description="Течет", location="Зал",
+                    history=[{"action": "создана", "at": datetime(2026, 10, 19).isoformat()}],
+                ))
+                await conn.commit()
+                raw = await conn.scalar(select(cast(Request.history, Text)))
+                history = await conn.scalar(select(Request.history))
+        finally:
+            await engine.dispose()
+
+        assert "создана" in raw
+        assert history == [{"action": "создана", "at": "2026-10-19T00:00:00"}]
@@ -0,0 +1,105 @@
+"""Tests for the application container."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils.container import Container, get_container, set_container
+from utils.performance import cached
+from utils.rate_limiter import MemoryRateLimiter
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def container():
+    """Fresh process-wide container."""
+    previous = get_container()
+    container = Container()
+    set_container(container)
+    yield container
+    set_container(previous)
+
+
+class TestContainer:
+    """Test lazy construction and overrides."""
+
+    def test_import_has_no_side_effects(self, tmp_path) -> None:
+        """The bot imports without configuration and creates nothing."""
+        env = {key: value for key, value in os.environ.items() if key not in ("DATABASE_URL", "BOT_TOKEN")}
+        env["PYTHONPATH"] = str(ROOT)
+        code = (
+            "import bot.main, database.connection, utils.rate_limiter\n"
+            "from utils.container import get_container\n"
+            "assert not any(get_container().is_built(name) for name in "
+            "('engine', 'bot', 'rate_limiter', 'dispatcher'))\n"
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True, timeout=120)
+
+        assert not (tmp_path / "logs").exists()
+
+    def test_components_are_built_once(self, container: Container) -> None:
+        """Components are built on first access and reused."""
+        assert not container.is_built("rate_limiter")
+
+        limiter = container.rate_limiter
+
+        assert container.is_built("rate_limiter")
+        assert container.rate_limiter is limiter
+
+    def test_override(self) -> None:
+        """Any component can be replaced, unknown names are rejected."""
+        limiter = MemoryRateLimiter()
+        container = Container(rate_limiter=limiter)
+
+        assert container.rate_limiter is limiter
+        with pytest.raises(ValueError):
+            container.override(database=object())
+
+    def test_missing_configuration_fails_on_use(self, monkeypatch) -> None:
+        """Missing settings are reported when the component is needed."""
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+        monkeypatch.delenv("BOT_TOKEN", raising=False)
+        container = Container()
+
+        with pytest.raises(ValueError, match="DATABASE_URL"):
+            container.engine
+        with pytest.raises(ValueError, match="BOT_TOKEN"):
+            container.bot
+
+    def test_dispatcher_passes_container(self, container: Container) -> None:
+        """Handlers receive the container as workflow data."""
+        assert container.dispatcher["container"] is container
+
+    @pytest.mark.asyncio
+    async def test_cached_uses_container_cache(self, container: Container) -> None:
+        """The cache behind @cached is the container's."""
+        calls = []
+
+        @cached()
+        async def compute(value: int) -> int:
+            calls.append(value)
+            return value * 2
+
+        assert await compute(2) == 4
+        assert await compute(2) == 4
+        assert calls == [2]
+        assert container.cache.get_stats()["cached_items"] == 1
+
+    @pytest.mark.asyncio
+    async def test_close_disposes_built_components(self, container: Container) -> None:
+        """Closing releases only what was built."""
+        class FakeEngine:
+            disposed = False
+
+            async def dispose(self) -> None:
+                self.disposed = True
+
+        container.override(engine=FakeEngine())
+        await container.close()
+
+        assert not container.is_built("bot")
+        assert container.engine.disposed
@@ -0,0 +1,236 @@
+"""Tests for long-message delivery helpers."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+
+from utils.delivery import (
+    SLOT_PRUNE_SIZE,
+    ChatSendLimiter,
+    html_to_plain_text,
+    send_attachments,
+    send_long_text,
+    split_html,
+)
+
+
+def _mock_message(chat_id: int = 42) -> MagicMock:
+    message = MagicMock()
+    message.chat.id = chat_id
+    message.edit_text = AsyncMock()
+    message.answer = AsyncMock()
+    message.answer_document = AsyncMock()
+    message.answer_photo = AsyncMock()
+    message.answer_media_group = AsyncMock()
+    return message
+
+
+def _attachment(file_id: str, file_type: str = "photo") -> MagicMock:
+    attachment = MagicMock()
+    attachment.file_id = file_id
+    attachment.file_type = file_type
+    return attachment
+
+
+class TestSplitHtml:
+    """Test HTML-safe splitting."""
+
+    def test_short_text_is_not_split(self) -> None:
+        """Text under the limit is returned as is."""
+        assert split_html("<b>hello</b>") == ["<b>hello</b>"]
+
+    def test_blank_text(self) -> None:
+        """Blank text produces no chunks."""
+        assert split_html("   ") == []
+
+    def test_chunks_respect_limit(self) -> None:
+        """Every chunk fits into the limit."""
+        text = "\n".join(f"{i}. <b>#{i}</b> Заявка номер {i}" for i in range(500))
+        chunks = split_html(text, limit=500)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 500 for chunk in chunks)
+        assert html_to_plain_text("".join(chunks)).count("Заявка номер") == 500
+
+    def test_open_tags_are_closed_and_reopened(self) -> None:
+        """A tag spanning a cut is closed in one chunk and reopened in the next."""
+        text = "<b>" + "\n".join("строка " * 5 for _ in range(40)) + "</b>"
+        chunks = split_html(text, limit=200)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith("<b>")
+            assert chunk.endswith("</b>")
+
+    def test_entities_are_not_cut(self) -> None:
+        """HTML entities stay intact."""
+        text = "&amp;" * 300
+        chunks = split_html(text, limit=64)
+
+        for chunk in chunks:
+            assert html_to_plain_text(chunk) == "&" * (len(chunk) // 5)
+
+    def test_long_line_is_split(self) -> None:
+        """A single line longer than the limit is still split."""
+        chunks = split_html("x" * 1000, limit=100)
+
+        assert "".join(chunks) == "x" * 1000
+        assert all(len(chunk) <= 100 for chunk in chunks)
+
+
+class TestChatSendLimiter:
+    """Test the per-chat send limiter."""
+
+    @pytest.mark.asyncio
+    async def test_retries_after_flood_control(self) -> None:
+        """TelegramRetryAfter is retried."""
+        limiter = ChatSendLimiter(per_chat_interval=0, retries=2)
+        func = AsyncMock(side_effect=[TelegramRetryAfter(method=MagicMock(), message="flood", retry_after=0), "ok"])
+
+        assert await limiter.send(1, func, "text") == "ok"
+        assert func.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_past_slots_are_dropped(self) -> None:
+        """Chats whose slot has passed are forgotten instead of piling up."""
+        limiter = ChatSendLimiter(per_chat_interval=0)
+        func = AsyncMock(return_value="ok")
+
+        for chat_id in range(3 * SLOT_PRUNE_SIZE):
+            await limiter.send(chat_id, func)
+
+        assert len(limiter._next_slot) <= SLOT_PRUNE_SIZE
+
+
+class TestSendLongText:
+    """Test message delivery."""
+
+    @pytest.mark.asyncio
+    async def test_short_text_edits_message(self) -> None:
+        """Short text is delivered with a single edit."""
+        message = _mock_message()
+        keyboard = MagicMock()
+
+        delivered = await send_long_text(message, "<b>ok</b>", reply_markup=keyboard, limiter=ChatSendLimiter(0))
+
+        assert delivered == 1
+        message.edit_text.assert_awaited_once_with("<b>ok</b>", reply_markup=keyboard, parse_mode="HTML")
+        message.answer.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_long_text_sends_continuation_chunks(self) -> None:
+        """Continuation chunks are sent in order with the keyboard on the last one."""
+        message = _mock_message()
+        keyboard = MagicMock()
+        text = "\n".join(f"<b>#{i}</b> {'описание ' * 10}" for i in range(60))
+
+        delivered = await send_long_text(message, text, reply_markup=keyboard, limiter=ChatSendLimiter(0))
+
+        assert delivered == message.answer.await_count + 1
+        assert message.edit_text.await_args.kwargs["reply_markup"] is None
+        assert message.answer.await_args_list[-1].kwargs["reply_markup"] is keyboard
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_does_not_stop_delivery(self) -> None:
+        """A chunk that fails to send is skipped, the rest are delivered."""
+        message = _mock_message()
+        message.answer = AsyncMock(side_effect=[RuntimeError("boom"), None, None, None, None, None])
+        text = "\n".join(f"<b>#{i}</b> {'описание ' * 10}" for i in range(60))
+
+        delivered = await send_long_text(message, text, limiter=ChatSendLimiter(0))
+
+        assert delivered == message.answer.await_count
+
+    @pytest.mark.asyncio
+    async def test_not_modified_is_not_resent(self) -> None:
+        """An edit rejected as "not modified" counts as shown; chunk 1 is not duplicated."""
+        message = _mock_message()
+        message.edit_text = AsyncMock(side_effect=TelegramBadRequest(
+            method=MagicMock(), message="Bad Request: message is not modified"
+        ))
+        text = "\n".join(f"<b>#{i}</b> {'описание ' * 10}" for i in range(60))
+
+        delivered = await send_long_text(message, text, limiter=ChatSendLimiter(0))
+
+        assert delivered == message.answer.await_count + 1
+        assert all(call.args[0] != message.edit_text.await_args.args[0] for call in message.answer.await_args_list)
+
+    @pytest.mark.asyncio
+    async def test_rejected_edit_keeps_order(self) -> None:
+        """When the edit is rejected, chunk 1 is answered before the continuation."""
+        message = _mock_message()
+        message.edit_text = AsyncMock(side_effect=TelegramBadRequest(
+            method=MagicMock(), message="Bad Request: message can't be edited"
+        ))
+        text = "\n".join(f"<b>#{i}</b> {'описание ' * 10}" for i in range(60))
+        chunks = split_html(text)
+
+        delivered = await send_long_text(message, text, limiter=ChatSendLimiter(0))
+
+        assert delivered == len(chunks)
+        assert [call.args[0] for call in message.answer.await_args_list] == chunks
+
+    @pytest.mark.asyncio
+    async def test_failed_edit_does_not_break_delivery(self) -> None:
+        """Any edit error is contained; continuation chunks are still counted."""
+        message = _mock_message()
+        message.edit_text = AsyncMock(side_effect=TelegramNetworkError(method=MagicMock(), message="timeout"))
+        text = "\n".join(f"<b>#{i}</b> {'описание ' * 10}" for i in range(60))
+
+        delivered = await send_long_text(message, text, limiter=ChatSendLimiter(0))
+
+        assert delivered == message.answer.await_count > 0
+
+    @pytest.mark.asyncio
+    async def test_huge_text_falls_back_to_document(self) -> None:
+        """Text needing too many messages is sent as a document."""
+        message = _mock_message()
+        text = "📋 <b>Заявки</b> (5000):\n\n" + "\n".join(f"#{i} {'текст ' * 20}" for i in range(5000))
+
+        await send_long_text(message, text, max_chunks=3, limiter=ChatSendLimiter(0))
+
+        message.answer_document.assert_awaited_once()
+        assert "вложении" in message.edit_text.await_args.args[0]
+
+
+class TestSendAttachments:
+    """Test attachment delivery."""
+
+    @pytest.mark.asyncio
+    async def test_photos_are_sent_as_one_media_group(self) -> None:
+        """Eight photos cost a single API call."""
+        message = _mock_message()
+        files = [_attachment(f"photo_{i}") for i in range(8)]
+
+        sent = await send_attachments(message, files, caption="Фото", limiter=ChatSendLimiter(0))
+
+        assert sent == 8
+        message.answer_media_group.assert_awaited_once()
+        media = message.answer_media_group.await_args.kwargs["media"]
+        assert [item.media for item in media] == [f"photo_{i}" for i in range(8)]
+        assert media[0].caption == "Фото"
+        assert media[1].caption is None
+
+    @pytest.mark.asyncio
+    async def test_photos_are_batched_by_ten(self) -> None:
+        """Eleven photos become a media group and a single photo."""
+        message = _mock_message()
+        files = [_attachment(f"photo_{i}") for i in range(11)]
+
+        await send_attachments(message, files, limiter=ChatSendLimiter(0))
+
+        assert message.answer_media_group.await_count == 1
+        message.answer_photo.assert_awaited_once_with(photo="photo_10", caption=None)
+
+    @pytest.mark.asyncio
+    async def test_documents_are_sent_separately(self) -> None:
+        """Documents are sent one by one next to the photos."""
+        message = _mock_message()
+        files = [_attachment("photo"), _attachment("doc_1", "document"), _attachment("doc_2", "document")]
+
+        sent = await send_attachments(message, files, limiter=ChatSendLimiter(0))
+
+        assert sent == 3
+        message.answer_photo.assert_awaited_once()
+        assert message.answer_document.await_count == 2
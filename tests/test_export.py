@@ -0,0 +1,140 @@
+"""Tests for streaming request exports."""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Request, Status, User
+from utils.export import EXPORT_WRITERS, ExportWriter, count_export_rows, export_requests, iter_export_rows
+
+
+class RecordingWriter(ExportWriter):
+    """Writer remembering batch sizes."""
+
+    def __init__(self, fileobj) -> None:
+        super().__init__(fileobj)
+        self.batches: list[int] = []
+
+    def write_batch(self, rows) -> None:
+        self.batches.append(len(rows))
+        self.rows += len(rows)
+
+
+class TestExport:
+    """Test export row source and writers."""
+
+    async def _create_requests(self, db_session: any) -> None:
+        """Helper to create five requests, two of them completed last year."""
+        author = User(telegram_id=9500, username="author", first_name="Иван", last_name="Петров")
+        worker = User(telegram_id=9501, username="worker", first_name="Сергей")
+        db_session.add_all([author, worker])
+        await db_session.commit()
+
+        old = datetime.utcnow() - timedelta(days=365)
+        db_session.add_all([
+            Request(user_id=author.id, title=f"Заявка {i}", description="Описание; с точкой с запятой",
+                    location="Каб. 101", status=Status.COMPLETED, assigned_to=worker.id,
+                    created_at=old, completed_at=old + timedelta(days=1))
+            for i in range(2)
+        ] + [
+            Request(user_id=author.id, title=f"Новая {i}", description="Описание", location="Каб. 202")
+            for i in range(3)
+        ])
+        await db_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_rows_are_streamed_in_batches(self, db_session: any) -> None:
+        """Rows arrive in batches of the requested size."""
+        await self._create_requests(db_session)
+
+        batches = [batch async for batch in iter_export_rows(db_session, batch_size=2)]
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        first = batches[0][0]
+        assert first[6] == "Иван Петров (@author)"
+        assert first[9] == "Сергей"
+
+    @pytest.mark.asyncio
+    async def test_filters(self, db_session: any) -> None:
+        """Status and date filters are applied to rows and counts."""
+        await self._create_requests(db_session)
+        since = datetime.utcnow() - timedelta(days=30)
+
+        assert await count_export_rows(db_session, status=Status.COMPLETED) == 2
+        assert await count_export_rows(db_session, date_from=since) == 3
+        rows = [row async for batch in iter_export_rows(db_session, status=Status.OPEN) for row in batch]
+        assert {row[5] for row in rows} == {Status.OPEN.value}
+
+    @pytest.mark.asyncio
+    async def test_csv_and_jsonl(self, db_session: any) -> None:
+        """CSV has a header and quoted fields, JSONL one object per row."""
+        await self._create_requests(db_session)
+
+        csv_output = io.BytesIO()
+        assert await export_requests(db_session, csv_output, "csv") == 5
+        lines = list(csv.reader(io.StringIO(csv_output.getvalue().decode("utf-8-sig")), delimiter=";"))
+        assert lines[0][0] == "ID заявки"
+        assert lines[1][2] == "Описание; с точкой с запятой"
+        assert len(lines) == 6
+
+        jsonl_output = io.BytesIO()
+        await export_requests(db_session, jsonl_output, "jsonl", status=Status.COMPLETED)
+        records = [json.loads(line) for line in jsonl_output.getvalue().decode("utf-8").splitlines()]
+        assert len(records) == 2
+        assert records[0]["completed_at"]
+
+    @pytest.mark.asyncio
+    async def test_writer_receives_batches(self, db_session: any, monkeypatch) -> None:
+        """Writers consume batches, never the whole result."""
+        await self._create_requests(db_session)
+        writers = []
+
+        def factory(fileobj):
+            writers.append(RecordingWriter(fileobj))
+            return writers[-1]
+
+        monkeypatch.setitem(EXPORT_WRITERS, "test", factory)
+        progress = []
+        await export_requests(db_session, io.BytesIO(), "test", batch_size=2, on_batch=progress.append)
+
+        assert writers[0].batches == [2, 2, 1]
+        assert progress == [2, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_xlsx(self, db_session: any) -> None:
+        """XLSX export produces a workbook."""
+        pytest.importorskip("xlsxwriter")
+        await self._create_requests(db_session)
+
+        output = io.BytesIO()
+        assert await export_requests(db_session, output, "xlsx") == 5
+        assert output.getvalue()[:2] == b"PK"
+
+    @pytest.mark.asyncio
+    async def test_parquet_and_arrow(self, db_session: any) -> None:
+        """Columnar exports keep types and row counts."""
+        pa = pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        await self._create_requests(db_session)
+
+        parquet_output = io.BytesIO()
+        await export_requests(db_session, parquet_output, "parquet", batch_size=2)
+        parquet_output.seek(0)
+        table = pq.read_table(parquet_output)
+        assert table.num_rows == 5
+        assert table.schema.field("created_at").type == pa.timestamp("us")
+        assert pq.ParquetFile(io.BytesIO(parquet_output.getvalue())).num_row_groups == 3
+
+        arrow_output = io.BytesIO()
+        await export_requests(db_session, arrow_output, "arrow")
+        assert pa.ipc.open_file(io.BytesIO(arrow_output.getvalue())).read_all().num_rows == 5
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self, db_session: any) -> None:
+        """Unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            await export_requests(db_session, io.BytesIO(), "pdf")
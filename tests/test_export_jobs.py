@@ -0,0 +1,213 @@
+"""Tests for background export jobs."""
+
+import asyncio
+import csv
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from models import ExportJob, Request, User
+from utils.delivery import ChatSendLimiter
+from utils.export_jobs import ExportJobManager, ExportResult, build_all_report, build_stats_report
+
+
+class GatedBuilder:
+    """Builder that reports progress and waits until released."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.paths: list[str] = []
+        self.release = asyncio.Event()
+        self.started = asyncio.Event()
+
+    async def __call__(self, session, params, progress) -> ExportResult:
+        self.calls += 1
+        progress(50)
+        self.started.set()
+        await self.release.wait()
+        with tempfile.NamedTemporaryFile(delete=False) as output:
+            output.write(b"data")
+        self.paths.append(output.name)
+        return ExportResult("report.csv", output.name, "Report")
+
+
+@pytest.fixture
+def session_factory(async_engine):
+    return sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def bot():
+    bot = MagicMock()
+    # Telegram returns the sent message with the file_id of the uploaded document
+    bot.send_document = AsyncMock(return_value=SimpleNamespace(document=SimpleNamespace(file_id="file-1")))
+    bot.send_message = AsyncMock()
+    bot.edit_message_text = AsyncMock()
+    return bot
+
+
+def make_manager(bot, session_factory, builder, **kwargs) -> ExportJobManager:
+    return ExportJobManager(
+        bot,
+        session_factory,
+        workers=2,
+        progress_interval=kwargs.pop("progress_interval", 60),
+        builders={"test": builder},
+        limiter=ChatSendLimiter(per_chat_interval=0),
+        **kwargs,
+    )
+
+
+class TestExportJobManager:
+    """Test queueing, coalescing, caching and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_are_coalesced(self, bot, session_factory) -> None:
+        """Two admins requesting the same export share one build."""
+        builder = GatedBuilder()
+        manager = make_manager(bot, session_factory, builder)
+
+        first, coalesced_first = await manager.submit("test", {"days": 30}, chat_id=1)
+        second, coalesced_second = await manager.submit("test", {"days": 30}, chat_id=2)
+        builder.release.set()
+        await manager.join()
+        await manager.stop()
+
+        assert first is second
+        assert (coalesced_first, coalesced_second) == (False, True)
+        assert builder.calls == 1
+        assert sorted(call.args[0] for call in bot.send_document.await_args_list) == [1, 2]
+        assert not os.path.exists(builder.paths[0])
+
+    @pytest.mark.asyncio
+    async def test_result_is_cached_until_data_changes(self, bot, session_factory) -> None:
+        """Unchanged data is served from cache; a new request invalidates it."""
+        builder = GatedBuilder()
+        builder.release.set()
+        manager = make_manager(bot, session_factory, builder)
+
+        await manager.submit("test", {}, chat_id=1)
+        await manager.join()
+        await manager.submit("test", {}, chat_id=1)
+        await manager.join()
+        assert builder.calls == 1
+
+        async with session_factory() as session:
+            user = User(telegram_id=9400, username="export_user")
+            session.add(user)
+            await session.commit()
+            session.add(Request(user_id=user.id, title="New", description="New request", location="Room 1"))
+            await session.commit()
+
+        await manager.submit("test", {}, chat_id=1)
+        await manager.join()
+        await manager.stop()
+        assert builder.calls == 2
+        documents = [call.args[1] for call in bot.send_document.await_args_list]
+        assert documents[1] == "file-1"
+        assert not isinstance(documents[2], str)
+
+    @pytest.mark.asyncio
+    async def test_result_cache_is_bounded(self, bot, session_factory) -> None:
+        """Only file_ids are cached, and old versions are evicted."""
+        builder = GatedBuilder()
+        builder.release.set()
+        manager = make_manager(bot, session_factory, builder, cache_size=2)
+
+        for days in range(3):
+            await manager.submit("test", {"days": days}, chat_id=1)
+            await manager.join()
+        await manager.stop()
+
+        assert len(manager.results) == 2
+        assert all(result.file_id == "file-1" and not result.path for result in manager.results.cache.values())
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_job(self, bot, session_factory) -> None:
+        """Cancelled job sends nothing and is recorded as cancelled."""
+        builder = GatedBuilder()
+        manager = make_manager(bot, session_factory, builder)
+
+        job, _ = await manager.submit("test", {}, chat_id=1)
+        manager.watch(job.id, 1, 100)
+        await builder.started.wait()
+
+        assert manager.cancel(job.id)
+        await manager.join()
+        await manager.stop()
+
+        assert not manager.cancel(job.id)
+        bot.send_document.assert_not_awaited()
+        assert "отменен" in bot.edit_message_text.await_args.kwargs["text"]
+        async with session_factory() as session:
+            assert (await session.get(ExportJob, job.id)).status == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_progress_is_reported(self, bot, session_factory) -> None:
+        """Status message is edited with the progress while the job runs."""
+        builder = GatedBuilder()
+        manager = make_manager(bot, session_factory, builder, progress_interval=0.01)
+
+        job, _ = await manager.submit("test", {}, chat_id=1)
+        manager.watch(job.id, 1, 100)
+        await builder.started.wait()
+        await asyncio.sleep(0.05)
+        builder.release.set()
+        await manager.join()
+        await manager.stop()
+
+        texts = [call.kwargs["text"] for call in bot.edit_message_text.await_args_list]
+        assert any("50%" in text for text in texts)
+        assert "готово" in texts[-1]
+        async with session_factory() as session:
+            row = await session.scalar(select(ExportJob))
+            assert (row.status, row.progress) == ("done", 100)
+            assert row.data_version
+
+
+class TestExportBuilders:
+    """Test report builders."""
+
+    @pytest.mark.asyncio
+    async def test_stats_report(self, db_session: any) -> None:
+        """Stats report counts requests by status."""
+        user = User(telegram_id=9401, username="stats_user")
+        db_session.add(user)
+        await db_session.commit()
+        db_session.add_all([
+            Request(user_id=user.id, title=f"R{i}", description="Test", location="Room 1") for i in range(3)
+        ])
+        await db_session.commit()
+
+        progress = []
+        result = await build_stats_report(db_session, {}, progress.append)
+
+        with open(result.path, encoding="utf-8") as report:
+            text = report.read()
+        os.unlink(result.path)
+        assert "Всего заявок: 3" in text
+        assert "открыта: 3" in text
+        assert progress[-1] == 90
+
+    @pytest.mark.asyncio
+    async def test_all_report_quotes_fields(self, db_session: any) -> None:
+        """Quotes, separators and newlines in a field stay inside one CSV cell."""
+        user = User(telegram_id=9402, username="csv_user")
+        db_session.add(user)
+        await db_session.commit()
+        db_session.add(Request(user_id=user.id, title='Кран "старый"; течет', description="Строка 1\nСтрока 2", location="Room; 1"))
+        await db_session.commit()
+
+        result = await build_all_report(db_session, {}, lambda _: None)
+
+        with open(result.path, encoding="utf-8-sig", newline="") as report:
+            rows = list(csv.reader(report, delimiter=";"))
+        os.unlink(result.path)
+        assert len(rows) == 2
+        assert rows[1][1:4] == ['Кран "старый"; течет', "Строка 1\nСтрока 2", "Room; 1"]
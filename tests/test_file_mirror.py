@@ -0,0 +1,109 @@
+"""Tests for the local attachment mirror."""
+
+import asyncio
+
+import pytest
+
+from models import Attachment
+from utils.file_mirror import FileMirror, MirrorQuotaExceeded, SegmentStore
+
+
+class FakeBot:
+    """Bot stub whose download() writes predefined content."""
+
+    def __init__(self, files: dict[str, bytes]) -> None:
+        self.files = files
+        self.downloads: list[str] = []
+
+    async def download(self, file_id: str, destination) -> None:
+        await asyncio.sleep(0)
+        self.downloads.append(file_id)
+        destination.write(self.files[file_id])
+
+
+class TestSegmentStore:
+    """Test the segment-backed blob store."""
+
+    def test_roundtrip(self, tmp_path) -> None:
+        """Stored content is read back through a memoryview."""
+        store = SegmentStore(str(tmp_path), quota_bytes=1024, segment_bytes=512)
+        store.put("u1", b"hello")
+
+        view = store.get("u1")
+
+        assert isinstance(view, memoryview)
+        assert view.tobytes() == b"hello"
+        assert store.get("missing") is None
+
+    def test_identical_content_is_stored_once(self, tmp_path) -> None:
+        """Two keys with the same bytes share one blob."""
+        store = SegmentStore(str(tmp_path), quota_bytes=1024, segment_bytes=512)
+        first = store.put("u1", b"same bytes")
+        second = store.put("u2", b"same bytes")
+
+        assert first == second
+        assert store.used_bytes == len(b"same bytes")
+
+    def test_segments_roll_over(self, tmp_path) -> None:
+        """A blob that does not fit into the current segment opens a new one."""
+        store = SegmentStore(str(tmp_path), quota_bytes=1024, segment_bytes=10)
+        first = store.put("u1", b"123456")
+        second = store.put("u2", b"abcdef")
+
+        assert second.segment == first.segment + 1
+        assert store.get("u2").tobytes() == b"abcdef"
+
+    def test_quota_is_enforced(self, tmp_path) -> None:
+        """Writes beyond the quota are refused."""
+        store = SegmentStore(str(tmp_path), quota_bytes=8, segment_bytes=64)
+        store.put("u1", b"12345")
+
+        with pytest.raises(MirrorQuotaExceeded):
+            store.put("u2", b"67890")
+
+    def test_index_survives_reopen(self, tmp_path) -> None:
+        """A reopened store finds previously written blobs."""
+        SegmentStore(str(tmp_path), quota_bytes=1024, segment_bytes=64).put("u1", b"persisted")
+
+        reopened = SegmentStore(str(tmp_path), quota_bytes=1024, segment_bytes=64)
+
+        assert "u1" in reopened
+        assert reopened.get("u1").tobytes() == b"persisted"
+
+
+class TestFileMirror:
+    """Test the background downloader."""
+
+    @pytest.mark.asyncio
+    async def test_enqueued_files_are_downloaded_once(self, tmp_path) -> None:
+        """Files are downloaded in the background and not re-queued once mirrored."""
+        bot = FakeBot({"f1": b"photo-1", "f2": b"photo-2"})
+        mirror = FileMirror(bot, SegmentStore(str(tmp_path), 1024, 512), concurrency=2)
+
+        assert mirror.enqueue("u1", "f1") is True
+        assert mirror.enqueue("u1", "f1") is False
+        mirror.enqueue("u2", "f2")
+        await mirror.join()
+
+        assert mirror.read("u2").tobytes() == b"photo-2"
+        assert mirror.enqueue("u1", "f1") is False
+        assert sorted(bot.downloads) == ["f1", "f2"]
+        await mirror.stop()
+
+    @pytest.mark.asyncio
+    async def test_backfill_schedules_stored_attachments(self, tmp_path, db_session: any) -> None:
+        """Backfill downloads every attachment from the database."""
+        db_session.add_all([
+            Attachment(file_unique_id="u1", file_id="f1", file_type="photo"),
+            Attachment(file_unique_id="u2", file_id="f2", file_type="document"),
+        ])
+        await db_session.commit()
+        bot = FakeBot({"f1": b"one", "f2": b"two"})
+        mirror = FileMirror(bot, SegmentStore(str(tmp_path), 1024, 512), concurrency=1)
+
+        scheduled = await mirror.backfill(db_session)
+        await mirror.join()
+
+        assert scheduled == 2
+        assert mirror.read("u1").tobytes() == b"one"
+        await mirror.stop()
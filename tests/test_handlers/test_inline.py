@@ -0,0 +1,77 @@
+"""Tests for inline-mode request lookup."""
+
+import pytest
+
+from handlers.inline import find_inline_requests, request_to_inline_result
+from models import Request, User
+
+
+class TestInlineLookup:
+    """Test inline results and paging."""
+
+    async def _create_test_data(self, db_session: any, count: int = 3) -> tuple:
+        """Helper to create a user, an admin and requests of both."""
+        user = User(telegram_id=1100, username="inline_user", role="user")
+        admin = User(telegram_id=1101, username="inline_admin", role="admin")
+        db_session.add_all([user, admin])
+        await db_session.commit()
+
+        db_session.add_all([
+            Request(user_id=user.id, title=f"Течет кран {i}", description="Вода", location="Room 101")
+            for i in range(count)
+        ])
+        db_session.add(Request(user_id=admin.id, title="Кран в столовой", description="Капает", location="Столовая"))
+        await db_session.commit()
+        return user, admin
+
+    @pytest.mark.asyncio
+    async def test_user_sees_only_own_requests(self, db_session: any) -> None:
+        """Regular users get their own requests, admins get all."""
+        user, admin = await self._create_test_data(db_session)
+
+        own, _ = await find_inline_requests(db_session, "кран", "", user)
+        everything, _ = await find_inline_requests(db_session, "кран", "", admin)
+
+        assert {request.user_id for request in own} == {user.id}
+        assert len(everything) == 4
+
+    @pytest.mark.asyncio
+    async def test_search_pages_use_next_offset(self, db_session: any, monkeypatch) -> None:
+        """next_offset continues the search without duplicates."""
+        monkeypatch.setattr("handlers.inline.INLINE_PAGE_SIZE", 2)
+        user, _ = await self._create_test_data(db_session, count=5)
+
+        seen, offset = [], ""
+        while True:
+            requests, offset = await find_inline_requests(db_session, "кран 101", offset, user)
+            seen.extend(request.id for request in requests)
+            if not offset:
+                break
+
+        assert len(seen) == len(set(seen)) == 5
+
+    @pytest.mark.asyncio
+    async def test_empty_query_lists_latest(self, db_session: any, monkeypatch) -> None:
+        """Without text the latest requests are listed, newest first."""
+        monkeypatch.setattr("handlers.inline.INLINE_PAGE_SIZE", 2)
+        _, admin = await self._create_test_data(db_session)
+
+        first, offset = await find_inline_requests(db_session, "", "", admin)
+        second, last_offset = await find_inline_requests(db_session, "", offset, admin)
+
+        ids = [request.id for request in first + second]
+        assert ids == sorted(ids, reverse=True)
+        assert len(ids) == 4
+        assert last_offset == ""
+
+    @pytest.mark.asyncio
+    async def test_result_card(self, db_session: any) -> None:
+        """Inline result carries the formatted request card."""
+        _, admin = await self._create_test_data(db_session, count=1)
+        (request, *_), _ = await find_inline_requests(db_session, "столовой", "", admin)
+
+        result = request_to_inline_result(request, show_user=True)
+
+        assert result.id == str(request.id)
+        assert "Кран в столовой" in result.title
+        assert "@inline_admin" in result.input_message_content.message_text
@@ -0,0 +1,31 @@
+"""Tests for the load-test harness."""
+
+import pytest
+
+from benchmarks.load_test import run_load_test
+
+
+class TestLoadTest:
+    """End-to-end run of the scenarios against the fake Bot API."""
+
+    @pytest.mark.asyncio
+    async def test_scenarios_complete(self) -> None:
+        """Users create requests and admins browse the panel without errors."""
+        report = await run_load_test(users=3, admins=1, iterations=1, timeout=10)
+
+        assert [r for r in report.steps if not r.ok] == []
+        assert report.requests_created == 3
+        assert {"admin.admin_stats", "admin.filter_high", "user.priority"} <= {
+            f"{r.scenario}.{r.step}" for r in report.steps
+        }
+        assert report.statements > report.updates
+        assert report.percentiles()["p50"] > 0
+
+    @pytest.mark.asyncio
+    async def test_flood_errors_reported(self) -> None:
+        """Flood errors are counted, not raised."""
+        report = await run_load_test(users=2, admins=0, flood_rate=1.0, timeout=1)
+
+        assert report.flood_errors > 0
+        assert all(not r.ok for r in report.steps)
+        assert report.requests_created == 0
@@ -0,0 +1,139 @@
+"""Tests for structured locations, counters and autocomplete."""
+
+import pytest
+from sqlalchemy import delete, update
+
+from models import Location, Request, Status, User
+from utils.locations import LocationIndex, get_or_create_location, parse_location, top_locations
+
+
+class TestParseLocation:
+    """Test splitting free text into building / floor / room."""
+
+    def test_markers_are_recognized(self) -> None:
+        """Building, floor and room markers are extracted in any order."""
+        parsed = parse_location("каб. 305, 3 этаж, корпус 2")
+
+        assert (parsed.building, parsed.floor, parsed.room) == ("2", "3", "305")
+        assert parsed.name == "Каб. 305, 3 этаж, Корпус 2"
+
+    def test_spelling_variants_share_a_key(self) -> None:
+        """Case, punctuation and word order do not create new places."""
+        assert parse_location("Кабинет 101").key == parse_location("каб 101").key
+        assert parse_location("Этаж 2, Корпус Б").key == parse_location("корп. б 2-й этаж").key
+
+    def test_named_places(self) -> None:
+        """Text without markers becomes the room name."""
+        parsed = parse_location("столовая")
+
+        assert parsed.room == "Столовая"
+        assert parse_location("Не указано") is None
+        assert parse_location("  ") is None
+
+
+class TestLocationIndex:
+    """Test the autocomplete trie."""
+
+    def _index(self) -> LocationIndex:
+        index = LocationIndex()
+        index.add(1, "Каб. 305, 3 этаж", weight=2)
+        index.add(2, "Каб. 301, 3 этаж", weight=7)
+        index.add(3, "Столовая", weight=1)
+        return index
+
+    def test_prefix_of_any_word(self) -> None:
+        """Suggestions match the start of any word, most used first."""
+        index = self._index()
+
+        assert [location_id for location_id, _ in index.complete("30")] == [2, 1]
+        assert [location_id for location_id, _ in index.complete("305")] == [1]
+        assert [location_id for location_id, _ in index.complete("стол")] == [3]
+        assert index.complete("спорт") == []
+
+    def test_popular_and_touch(self) -> None:
+        """Empty prefix lists popular places; touch re-ranks them."""
+        index = self._index()
+        for _ in range(10):
+            index.touch(3)
+
+        assert [location_id for location_id, _ in index.complete("", limit=2)] == [3, 2]
+
+    def test_discard_prunes_branches(self) -> None:
+        """Removed places are not suggested and leave no empty nodes."""
+        index = self._index()
+
+        index.discard(3)
+
+        assert index.complete("стол") == []
+        assert "с" not in index._root.children
+        assert 3 not in index
+
+
+class TestLocationCounters:
+    """Test trigger-maintained counters and location lookups."""
+
+    async def _create_user(self, db_session: any) -> User:
+        user = User(telegram_id=9800, username="location_user")
+        db_session.add(user)
+        await db_session.commit()
+        return user
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_deduplicates(self, db_session: any) -> None:
+        """Same place typed differently is stored once and indexed."""
+        index = LocationIndex()
+
+        first = await get_or_create_location(db_session, "Кабинет 101", index=index)
+        second = await get_or_create_location(db_session, "каб. 101", index=index)
+        await db_session.commit()
+
+        assert first.id == second.id
+        assert index.complete("101") == [(first.id, "Каб. 101")]
+        assert await get_or_create_location(db_session, "Не указано", index=index) is None
+
+    @pytest.mark.asyncio
+    async def test_counters_follow_requests(self, db_session: any) -> None:
+        """Inserts, status changes, bulk updates and deletes keep counters right."""
+        user = await self._create_user(db_session)
+        location = await get_or_create_location(db_session, "Спортзал", index=LocationIndex())
+        other = await get_or_create_location(db_session, "Столовая", index=LocationIndex())
+        requests = [
+            Request(user_id=user.id, title=f"Заявка {i}", description="Описание", location="Спортзал",
+                    location_id=location.id)
+            for i in range(3)
+        ]
+        db_session.add_all(requests)
+        await db_session.commit()
+
+        requests[0].status = Status.COMPLETED
+        await db_session.commit()
+        await db_session.execute(
+            update(Request).where(Request.id == requests[1].id).values(location_id=other.id)
+        )
+        await db_session.execute(delete(Request).where(Request.id == requests[2].id))
+        await db_session.commit()
+
+        await db_session.refresh(location)
+        await db_session.refresh(other)
+        assert (location.request_count, location.open_count) == (1, 0)
+        assert (other.request_count, other.open_count) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_top_locations(self, db_session: any) -> None:
+        """Report orders places by open requests and skips unused ones."""
+        user = await self._create_user(db_session)
+        busy = await get_or_create_location(db_session, "Каб. 201", index=LocationIndex())
+        quiet = await get_or_create_location(db_session, "Каб. 202", index=LocationIndex())
+        await get_or_create_location(db_session, "Каб. 203", index=LocationIndex())
+        db_session.add_all([
+            Request(user_id=user.id, title="A", description="Описание", location="Каб. 201", location_id=busy.id),
+            Request(user_id=user.id, title="B", description="Описание", location="Каб. 201", location_id=busy.id),
+            Request(user_id=user.id, title="C", description="Описание", location="Каб. 202", location_id=quiet.id,
+                    status=Status.COMPLETED),
+        ])
+        await db_session.commit()
+
+        report = await top_locations(db_session)
+
+        assert [(loc.id, loc.open_count) for loc in report] == [(busy.id, 2), (quiet.id, 0)]
+        assert await db_session.get(Location, busy.id) is not None
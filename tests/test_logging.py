@@ -0,0 +1,112 @@
+"""Tests for the queue-based logging pipeline."""
+
+import json
+import logging
+import queue
+import threading
+import time
+
+import pytest
+
+from utils import logging_config
+from utils.logging_config import (
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    build_formatter,
+    get_logger,
+    init_logging,
+    parse_sample_rates,
+    shutdown_logging,
+)
+
+
+def make_record(msg: str = "event", level: int = logging.INFO) -> logging.LogRecord:
+    """Helper to create a stdlib record."""
+    return logging.LogRecord("test", level, __file__, 1, msg, (), None)
+
+
+class SlowHandler(logging.Handler):
+    """Handler that stalls like a hung disk."""
+
+    def __init__(self, release: threading.Event) -> None:
+        super().__init__()
+        self.resume = release
+        self.lines = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.resume.wait(5)
+        self.lines.append(self.format(record))
+
+
+class TestSampling:
+    """Test sampling and rate limiting."""
+
+    def test_rate_limit_per_event(self) -> None:
+        """Only rate_limit records per event per second pass; the next window reports the rest."""
+        now = [100.0]
+        sampler = SamplingFilter(rates={}, rate_limit=3, clock=lambda: now[0])
+
+        kept = [sampler.filter(make_record("hot")) for _ in range(5)]
+        other = sampler.filter(make_record("other"))
+        now[0] += 1
+        record = make_record("hot")
+
+        assert kept == [True, True, True, False, False]
+        assert other
+        assert sampler.filter(record)
+        assert record.suppressed == 2
+
+    def test_sampling_and_warnings(self) -> None:
+        """Sampled-out events are dropped, warnings always pass."""
+        sampler = SamplingFilter(rates={"noisy": 0.0}, rate_limit=0)
+
+        assert not sampler.filter(make_record("noisy"))
+        assert sampler.filter(make_record("noisy", logging.WARNING))
+        assert sampler.sampled == 1
+
+    def test_parse_sample_rates(self) -> None:
+        """Rates are read from the environment format."""
+        assert parse_sample_rates("a=0.1, b=1") == {"a": 0.1, "b": 1.0}
+        assert parse_sample_rates("") == {}
+
+
+class TestPipeline:
+    """Test the queue handler and rendering."""
+
+    def test_full_queue_drops_instead_of_blocking(self) -> None:
+        """A stalled writer never blocks the logging call."""
+        handler = NonBlockingQueueHandler(queue.Queue(2))
+
+        started = time.perf_counter()
+        for _ in range(5):
+            handler.handle(make_record())
+
+        assert time.perf_counter() - started < 0.1
+        assert handler.dropped == 3
+
+    def test_slow_disk_does_not_block(self, monkeypatch) -> None:
+        """Records are written by the listener thread, rendered as JSON."""
+        monkeypatch.setattr(logging_config, "LOG_FORMAT", "json")
+        release = threading.Event()
+        slow = SlowHandler(release)
+        slow.setFormatter(build_formatter())
+        root = logging.getLogger()
+        level = root.level
+
+        init_logging(handlers=[slow])
+        try:
+            started = time.perf_counter()
+            get_logger("tests.pipeline").info("request_created", request_id=7)
+            logging.getLogger("tests.pipeline").warning("disk %s", "slow")
+            elapsed = time.perf_counter() - started
+        finally:
+            release.set()
+            shutdown_logging()
+            root.setLevel(level)
+
+        assert elapsed < 0.5
+        events = [json.loads(line) for line in slow.lines]
+        assert {"event": "request_created", "request_id": 7}.items() <= events[-2].items()
+        assert events[-1]["event"] == "disk slow"
+        assert events[-1]["level"] == "WARNING"
+        assert all(not isinstance(handler, NonBlockingQueueHandler) for handler in root.handlers)
@@ -0,0 +1,106 @@
+"""Tests for full-text request search."""
+
+import pytest
+from sqlalchemy import delete, update
+
+from models import Comment, Request, Status, User
+from utils.search import build_match_query, query_terms, search_requests
+
+
+class TestSearch:
+    """Test trigger-maintained index, ranking and pagination."""
+
+    async def _create_requests(self, db_session: any) -> User:
+        """Helper to create a user with a few requests."""
+        user = User(telegram_id=9600, username="search_user")
+        db_session.add(user)
+        await db_session.commit()
+
+        db_session.add_all([
+            Request(user_id=user.id, title="Течет кран", description="Вода на полу", location="Каб. 101"),
+            Request(user_id=user.id, title="Не горит лампа", description="Кран рядом ни при чем", location="Каб. 202"),
+            Request(user_id=user.id, title="Сломан стул", description="Ножка шатается", location="Актовый зал",
+                    status=Status.COMPLETED),
+        ])
+        await db_session.commit()
+        return user
+
+    @pytest.mark.asyncio
+    async def test_title_match_ranks_first(self, db_session: any) -> None:
+        """Matches in the title outrank matches in the description."""
+        await self._create_requests(db_session)
+
+        page = await search_requests(db_session, "кран")
+
+        assert [request.title for request in page.requests] == ["Течет кран", "Не горит лампа"]
+        assert page.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_all_terms_must_match_as_prefixes(self, db_session: any) -> None:
+        """Every term is required and matched as a prefix."""
+        await self._create_requests(db_session)
+
+        page = await search_requests(db_session, "кра 101")
+
+        assert [request.location for request in page.requests] == ["Каб. 101"]
+        assert (await search_requests(db_session, "кран 303")).requests == []
+
+    @pytest.mark.asyncio
+    async def test_comments_and_updates_are_indexed(self, db_session: any) -> None:
+        """Triggers keep the index in sync with comments and edits."""
+        user = await self._create_requests(db_session)
+        request = (await search_requests(db_session, "стул")).requests[0]
+
+        db_session.add(Comment(request_id=request.id, user_id=user.id, comment="Заказали новый у поставщика"))
+        await db_session.commit()
+        assert [r.id for r in (await search_requests(db_session, "поставщик")).requests] == [request.id]
+
+        await db_session.execute(update(Request).where(Request.id == request.id).values(title="Сломан стол"))
+        await db_session.commit()
+        assert (await search_requests(db_session, "стул")).requests == []
+
+        await db_session.execute(delete(Comment).where(Comment.request_id == request.id))
+        await db_session.commit()
+        assert (await search_requests(db_session, "поставщик")).requests == []
+
+    @pytest.mark.asyncio
+    async def test_keyset_pagination(self, db_session: any) -> None:
+        """Pages follow each other without gaps or duplicates."""
+        user = User(telegram_id=9601, username="search_pages")
+        db_session.add(user)
+        await db_session.commit()
+        db_session.add_all([
+            Request(user_id=user.id, title=f"Протечка {i}", description="Протечка в трубе" * (i % 3 + 1),
+                    location="Подвал")
+            for i in range(12)
+        ])
+        await db_session.commit()
+
+        ids, cursor = [], None
+        while True:
+            page = await search_requests(db_session, "протечка", limit=5, after=cursor)
+            ids.extend(request.id for request in page.requests)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert len(ids) == 12
+        assert len(set(ids)) == 12
+
+    @pytest.mark.asyncio
+    async def test_filters(self, db_session: any) -> None:
+        """Status filter is applied on top of the match."""
+        await self._create_requests(db_session)
+
+        page = await search_requests(db_session, "зал", status=Status.OPEN)
+
+        assert page.requests == []
+
+    def test_query_is_sanitized(self) -> None:
+        """Operators and quotes never reach the index query."""
+        terms = query_terms('кран" OR * NEAR(101)')
+
+        assert terms == ["кран", "or", "near", "101"]
+        assert build_match_query(terms[:2], "sqlite") == '"кран"* "or"*'
+        assert build_match_query(terms[:2], "postgresql") == "кран:* & or:*"
+        assert query_terms("!!!") == []
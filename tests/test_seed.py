@@ -0,0 +1,69 @@
+"""Tests for the data seeding tool and the query benchmark."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from benchmarks.queries import build_cases, compare, run_benchmark
+from benchmarks.seed import seed_database
+from models import Comment, File, Location, Request, Status, User
+from utils.snapshots import get_snapshot
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+class TestSeedDatabase:
+    """Test bulk generation of realistic rows."""
+
+    @pytest.mark.asyncio
+    async def test_rows_added(self, async_engine, db_session) -> None:
+        """Requests come with users, comments and files."""
+        added = await seed_database(async_engine, 500, seed=1, now=NOW, batch_size=200)
+
+        assert added["requests"] == 500
+        assert await db_session.scalar(select(func.count(Request.id))) == 500
+        assert await db_session.scalar(select(func.count(User.id))) == added["users"]
+        assert await db_session.scalar(select(func.count(User.id)).where(User.role == "admin")) == 3
+        assert await db_session.scalar(select(func.count(Comment.id))) == added["comments"] > 0
+        assert await db_session.scalar(select(func.count(File.id))) == added["files"] > 0
+        assert await db_session.scalar(select(func.max(Request.created_at))) <= NOW
+
+    @pytest.mark.asyncio
+    async def test_derived_data_consistent(self, async_engine, db_session) -> None:
+        """Trigger counters and the analytics snapshot match the rows."""
+        await seed_database(async_engine, 300, seed=2, now=NOW)
+
+        located = await db_session.scalar(select(func.count(Request.id)).where(Request.location_id.is_not(None)))
+        assert await db_session.scalar(select(func.sum(Location.request_count))) == located
+        snapshot = await get_snapshot(db_session)
+        assert sum(snapshot.totals.values()) == 300
+
+    @pytest.mark.asyncio
+    async def test_additive_and_deterministic(self, async_engine, db_session) -> None:
+        """Seeding twice appends rows; the same seed gives the same data."""
+        await seed_database(async_engine, 100, seed=3, now=NOW)
+        await seed_database(async_engine, 100, seed=3, now=NOW)
+
+        assert await db_session.scalar(select(func.count(Request.id))) == 200
+        first = (await db_session.execute(
+            select(Request.title, Request.status, Request.created_at).order_by(Request.id)
+        )).all()
+        assert first[:100] == first[100:]
+        assert {row.status for row in first} >= {Status.OPEN, Status.COMPLETED}
+
+
+class TestQueryBenchmark:
+    """Test the query benchmark runner."""
+
+    @pytest.mark.asyncio
+    async def test_run_and_compare(self) -> None:
+        """Every case runs on a small database; results compare with a baseline."""
+        results = await run_benchmark(sizes=(200,), repeat=1, progress=lambda line: None)
+
+        by_case = results["sizes"]["200"]
+        assert results["dialect"] == "sqlite"
+        assert set(by_case) == {case.name for case in build_cases()}
+        assert by_case["admin.open_requests"]["statements"] == 1
+        assert all(result["median_ms"] > 0 for result in by_case.values())
+        assert "admin.open_requests" in compare(results, results)
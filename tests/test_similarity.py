@@ -0,0 +1,108 @@
+"""Tests for near-duplicate request detection."""
+
+import pytest
+
+from models import Request, RequestSubscriber, Status, User
+from utils.notifications import get_request_recipients
+from utils.similarity import SimilarityIndex, find_similar_requests, request_text, shingles
+
+
+class TestSimilarityIndex:
+    """Test MinHash/LSH index."""
+
+    TEXTS = {
+        1: "Течет кран в кабинете 101",
+        2: "Не горит лампа в коридоре 2 этаж",
+        3: "Сломан стул в актовом зале",
+        4: "Не работает интернет в учительской",
+    }
+
+    def _index(self) -> SimilarityIndex:
+        index = SimilarityIndex()
+        for request_id, text in self.TEXTS.items():
+            index.add(request_id, text)
+        return index
+
+    def test_rephrased_report_is_found(self) -> None:
+        """Word order, case and ё do not hide a duplicate."""
+        index = self._index()
+
+        assert [request_id for request_id, _ in index.query("течёт кран 101")] == [1]
+        assert [request_id for request_id, _ in index.query("лампа не горит, коридор 2 этаж")] == [2]
+
+    def test_unrelated_report_is_not_matched(self) -> None:
+        """Different problems are not suggested."""
+        assert self._index().query("Не работает принтер") == []
+
+    def test_discard_and_reindex(self) -> None:
+        """Removed requests are not returned, re-adding replaces the text."""
+        index = self._index()
+
+        index.discard(1)
+        assert index.query("течет кран 101") == []
+        assert 1 not in index
+
+        index.add(3, "Течет кран в кабинете 101")
+        index.add(3, "Сломан стул в актовом зале")
+        assert [request_id for request_id, _ in index.query("сломан стул актовый зал")] == [3]
+
+    def test_short_and_empty_texts(self) -> None:
+        """Degenerate input does not break shingling."""
+        assert shingles("!!!") == frozenset()
+        assert shingles("Ок") == frozenset(["ок"])
+        assert self._index().query("") == []
+
+
+class TestFindSimilarRequests:
+    """Test lookups against the database."""
+
+    async def _create_requests(self, db_session: any) -> tuple[User, list[Request]]:
+        """Helper to create a user with an open and a completed request."""
+        user = User(telegram_id=9700, username="dup_user")
+        db_session.add(user)
+        await db_session.commit()
+
+        requests = [
+            Request(user_id=user.id, title="Течет кран", description="Течет кран", location="Каб. 101"),
+            Request(user_id=user.id, title="Течет кран", description="Течет кран", location="Каб. 202",
+                    status=Status.COMPLETED),
+        ]
+        db_session.add_all(requests)
+        await db_session.commit()
+        return user, requests
+
+    @pytest.mark.asyncio
+    async def test_only_open_requests_are_suggested(self, db_session: any) -> None:
+        """Index loads open requests; closed ones are never suggested."""
+        _, (open_request, _) = await self._create_requests(db_session)
+        index = SimilarityIndex()
+
+        similar = await find_similar_requests(db_session, request_text("кран течет", "каб 101"), index=index)
+
+        assert index.loaded
+        assert [request.id for request, _ in similar] == [open_request.id]
+
+    @pytest.mark.asyncio
+    async def test_request_closed_elsewhere_is_dropped(self, db_session: any) -> None:
+        """Requests closed without updating the index are filtered and evicted."""
+        _, (open_request, _) = await self._create_requests(db_session)
+        index = SimilarityIndex()
+        await index.load(db_session)
+
+        open_request.status = Status.REJECTED
+        await db_session.commit()
+
+        assert await find_similar_requests(db_session, "Течет кран Каб. 101", index=index) == []
+        assert open_request.id not in index
+
+    @pytest.mark.asyncio
+    async def test_subscribers_receive_notifications(self, db_session: any) -> None:
+        """Author and subscribers are notification recipients."""
+        user, (request, _) = await self._create_requests(db_session)
+        subscriber = User(telegram_id=9701, username="subscriber")
+        db_session.add(subscriber)
+        await db_session.commit()
+        db_session.add(RequestSubscriber(request_id=request.id, user_id=subscriber.id))
+        await db_session.commit()
+
+        assert sorted(await get_request_recipients(db_session, request)) == [9700, 9701]
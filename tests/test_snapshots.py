@@ -0,0 +1,143 @@
+"""Tests for materialized analytics snapshots."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from models import Priority, Request, Status, User
+from utils import snapshots
+from utils.analytics_engine import duration_bucket
+from utils.snapshots import Snapshot, get_snapshot, rebuild_snapshot, refresh_snapshot
+
+
+class TestSnapshots:
+    """Test incremental refresh, windows and concurrent rebuilds."""
+
+    async def _create_requests(self, db_session: any) -> list[Request]:
+        """Helper to create requests spread over the last days."""
+        user = User(telegram_id=9950, username="snapshot_user")
+        db_session.add(user)
+        await db_session.commit()
+
+        now = datetime.utcnow()
+        requests = [
+            Request(user_id=user.id, title=f"Заявка {i}", description="Описание", location="Зал",
+                    priority=Priority.HIGH if i % 2 else Priority.LOW, created_at=now - timedelta(days=i),
+                    updated_at=now - timedelta(days=i))
+            for i in range(10)
+        ]
+        db_session.add_all(requests)
+        await db_session.commit()
+        return requests
+
+    @pytest.mark.asyncio
+    async def test_incremental_refresh_matches_rebuild(self, db_session: any) -> None:
+        """Inserts and status changes applied incrementally equal a full rebuild."""
+        requests = await self._create_requests(db_session)
+        await refresh_snapshot(db_session)
+
+        now = datetime.utcnow()
+        requests[3].status = Status.COMPLETED
+        requests[3].completed_at = now
+        requests[4].status = Status.IN_PROGRESS
+        db_session.add(Request(user_id=requests[0].user_id, title="Новая", description="Описание", location="Зал"))
+        await db_session.commit()
+        # Массовое изменение в обход ORM тоже учитывается (по updated_at)
+        await db_session.execute(
+            update(Request).where(Request.id == requests[5].id).values(status=Status.REJECTED, updated_at=now)
+        )
+        await db_session.commit()
+
+        incremental = await refresh_snapshot(db_session)
+        rebuilt = await rebuild_snapshot(db_session)
+
+        assert incremental.cells == rebuilt.cells
+        assert incremental.totals == rebuilt.totals
+        assert incremental.durations == rebuilt.durations
+        assert incremental.done.keys() == rebuilt.done.keys()
+        for day, (count, hours) in rebuilt.done.items():
+            assert incremental.done[day][0] == count
+            assert incremental.done[day][1] == pytest.approx(hours, abs=1e-3)
+
+    @pytest.mark.asyncio
+    async def test_late_commit_behind_watermark(self, db_session: any) -> None:
+        """A row committed after a refresh with an older updated_at is still counted."""
+        requests = await self._create_requests(db_session)
+        now = datetime.utcnow()
+        # Другая транзакция уже сдвинула watermark к now
+        await db_session.execute(update(Request).where(Request.id == requests[0].id).values(updated_at=now))
+        await db_session.commit()
+        await refresh_snapshot(db_session)
+
+        # Строка, получившая updated_at до refresh, но закоммиченная после него
+        await db_session.execute(
+            update(Request).where(Request.id == requests[1].id)
+            .values(status=Status.REJECTED, updated_at=now - timedelta(seconds=30))
+        )
+        await db_session.commit()
+        snapshot = await refresh_snapshot(db_session)
+
+        assert snapshot.totals == (await rebuild_snapshot(db_session)).totals
+        assert snapshot.watermark == now
+
+    @pytest.mark.asyncio
+    async def test_windows(self, db_session: any) -> None:
+        """Windows sum day buckets; all-time uses totals."""
+        requests = await self._create_requests(db_session)
+        requests[0].status = Status.COMPLETED
+        requests[0].completed_at = datetime.utcnow()
+        await db_session.commit()
+
+        snapshot = await refresh_snapshot(db_session)
+        today = datetime.utcnow().date()
+
+        assert snapshot.window("today", today)["created"] == 1
+        assert snapshot.window("today", today)["completed"] == 1
+        assert snapshot.window("7d", today)["created"] == 7
+        assert snapshot.window("all", today)["created"] == 10
+        assert snapshot.window("all", today)["priority"] == {"LOW": 5, "HIGH": 5}
+        assert [day["count"] for day in snapshot.daily(3, today)] == [1, 1, 1]
+        assert snapshot.overdue(today) == 4
+
+    @pytest.mark.asyncio
+    async def test_reads_do_not_wait_for_rebuild(self, db_session: any, async_engine: any) -> None:
+        """While a rebuild holds the lock, readers get the last committed snapshot."""
+        await self._create_requests(db_session)
+        committed = await get_snapshot(db_session)
+        factory = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with snapshots._lock:
+            async with factory() as other:
+                snapshot = await asyncio.wait_for(get_snapshot(other), timeout=1)
+
+        assert snapshot.version == committed.version
+
+    @pytest.mark.asyncio
+    async def test_read_leaves_caller_session_alone(self, db_session: any) -> None:
+        """The refresh commits in its own session, not the caller's pending work."""
+        await self._create_requests(db_session)
+        db_session.add(User(telegram_id=9951, username="pending_user"))
+
+        snapshot = await get_snapshot(db_session)
+        await db_session.rollback()
+
+        assert snapshot.window("all", datetime.utcnow().date())["created"] == 10
+        assert await db_session.scalar(select(func.count(User.id))) == 1
+
+    def test_apply_removes_empty_buckets(self) -> None:
+        """Counters dropping to zero disappear from the snapshot."""
+        snapshot = Snapshot()
+        snapshot.apply("2026-10-19|OPEN|HIGH", None, None, 1)
+        snapshot.apply("2026-10-19|OPEN|HIGH", None, None, -1)
+        snapshot.apply("2026-10-18|COMPLETED|LOW", "2026-10-19", 5.0, 1, 7)
+        snapshot.apply("2026-10-18|COMPLETED|HIGH", "2026-10-19", 2.0, 1)
+        snapshot.apply("2026-10-18|COMPLETED|HIGH", "2026-10-19", 2.0, -1)
+
+        assert snapshot.cells == {"2026-10-18|COMPLETED|LOW": 1}
+        assert snapshot.totals == {"COMPLETED|LOW": 1}
+        assert snapshot.done == {"2026-10-19": [1, 5.0]}
+        assert snapshot.durations == {f"LOW|7|{duration_bucket(5.0)}": 1}
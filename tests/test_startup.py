@@ -0,0 +1,185 @@
+"""Tests for startup schema verification and warmup."""
+
+import pytest
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
+
+from database.connection import warm_pool
+from database.migrations import (
+    SCHEMA_REVISION,
+    SchemaNotReady,
+    ensure_schema,
+    get_schema_revision,
+    run_alembic_upgrade,
+    sync_url,
+)
+from models import Base, Request
+
+# Схема базы, созданной create_all из моделей до появления миграций
+BASELINE_DDL = [
+    """CREATE TABLE users (
+        id INTEGER NOT NULL, telegram_id INTEGER NOT NULL, username VARCHAR(255),
+        first_name VARCHAR(255), last_name VARCHAR(255), role VARCHAR(50), is_active BOOLEAN,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME, PRIMARY KEY (id)
+    )""",
+    "CREATE UNIQUE INDEX ix_users_telegram_id ON users (telegram_id)",
+    "CREATE INDEX ix_users_id ON users (id)",
+    """CREATE TABLE requests (
+        id INTEGER NOT NULL, user_id INTEGER NOT NULL, title VARCHAR(100) NOT NULL,
+        description VARCHAR(1000) NOT NULL, location VARCHAR(100) NOT NULL, status VARCHAR(11) NOT NULL,
+        priority VARCHAR(6) NOT NULL, assigned_to INTEGER, created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL, completed_at DATETIME, history JSON NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id), FOREIGN KEY(assigned_to) REFERENCES users (id)
+    )""",
+    """CREATE TABLE comments (
+        id INTEGER NOT NULL, request_id INTEGER NOT NULL, user_id INTEGER NOT NULL, comment TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id),
+        FOREIGN KEY(request_id) REFERENCES requests (id), FOREIGN KEY(user_id) REFERENCES users (id)
+    )""",
+    "CREATE INDEX ix_comments_id ON comments (id)",
+    """CREATE TABLE files (
+        id INTEGER NOT NULL, request_id INTEGER NOT NULL, file_type VARCHAR(50) NOT NULL,
+        file_id VARCHAR(255) NOT NULL, file_name VARCHAR(255), uploaded_by INTEGER,
+        uploaded_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id),
+        FOREIGN KEY(request_id) REFERENCES requests (id), FOREIGN KEY(uploaded_by) REFERENCES users (id)
+    )""",
+    "CREATE INDEX ix_files_id ON files (id)",
+    "INSERT INTO users (id, telegram_id, role) VALUES (1, 100, 'user')",
+    """INSERT INTO requests (id, user_id, title, description, location, status, priority, created_at, updated_at, history)
+    VALUES (1, 1, 'Кран', 'Течет', 'Корпус 1, каб. 12', 'OPEN', 'HIGH', '2025-10-01', '2025-10-01', '[]')""",
+]
+
+
+def missing_columns(conn) -> dict[str, set[str]]:
+    """Model columns the database lacks, by table."""
+    inspector = inspect(conn)
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        if {column.name for column in table.columns} - columns:
+            missing[table.name] = {column.name for column in table.columns} - columns
+    return missing
+
+
+@pytest.fixture
+async def empty_engine():
+    """Engine of an empty in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    yield engine
+    await engine.dispose()
+
+
+class TestSchema:
+    """Test schema verification."""
+
+    def test_revision_is_alembic_head(self) -> None:
+        """SCHEMA_REVISION follows the latest migration."""
+        script = pytest.importorskip("alembic.script")
+        from alembic.config import Config
+
+        from database.migrations import ROOT
+
+        config = Config()
+        config.set_main_option("script_location", str(ROOT / "alembic"))
+        assert script.ScriptDirectory.from_config(config).get_current_head() == SCHEMA_REVISION
+
+    @pytest.mark.asyncio
+    async def test_alembic_upgrade_empty_database(self, tmp_path) -> None:
+        """The whole migration chain applies to an empty database."""
+        pytest.importorskip("alembic")
+        path = tmp_path / "fresh.db"
+
+        run_alembic_upgrade(f"sqlite:///{path}")
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            assert await ensure_schema(engine, migrate=False) == "current"
+            async with engine.connect() as conn:
+                assert await conn.run_sync(missing_columns) == {}
+        finally:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_baseline_database_is_upgraded(self, tmp_path) -> None:
+        """A database created by create_all before migrations is stamped and upgraded."""
+        pytest.importorskip("alembic")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'baseline.db'}")
+        try:
+            async with engine.begin() as conn:
+                for statement in BASELINE_DDL:
+                    await conn.execute(text(statement))
+
+            with pytest.raises(SchemaNotReady, match="database.migrations"):
+                await ensure_schema(engine, migrate=False)
+            assert await ensure_schema(engine, migrate=True) == "migrated"
+
+            assert await get_schema_revision(engine) == SCHEMA_REVISION
+            async with engine.connect() as conn:
+                assert await conn.run_sync(missing_columns) == {}
+                request = (await conn.execute(select(Request.title, Request.location_id))).one()
+                count = await conn.scalar(text("SELECT request_count FROM locations"))
+                indexes = await conn.run_sync(lambda sync: {i["name"] for i in inspect(sync).get_indexes("comments")})
+        finally:
+            await engine.dispose()
+
+        assert request.title == "Кран"
+        assert request.location_id is not None
+        assert count == 1
+        assert "ix_comments_request_id" in indexes
+
+    @pytest.mark.asyncio
+    async def test_create_then_verify(self, empty_engine: any) -> None:
+        """An empty database is created and stamped without DB_AUTO_MIGRATE; next start only checks it."""
+        assert await ensure_schema(empty_engine, migrate=False) == "created"
+        assert await get_schema_revision(empty_engine) == SCHEMA_REVISION
+
+        async with empty_engine.connect() as conn:
+            # Триггеры ставятся обработчиками after_create
+            triggers = (await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))).all()
+        assert triggers
+
+        assert await ensure_schema(empty_engine, migrate=False) == "current"
+
+    @pytest.mark.asyncio
+    async def test_outdated_revision(self, empty_engine: any) -> None:
+        """An older revision is reported instead of being silently accepted."""
+        await ensure_schema(empty_engine, migrate=True)
+        async with empty_engine.begin() as conn:
+            await conn.execute(text("UPDATE alembic_version SET version_num = 'e5a8f2c9d130'"))
+
+        with pytest.raises(SchemaNotReady, match="e5a8f2c9d130"):
+            await ensure_schema(empty_engine, migrate=False)
+
+    @pytest.mark.asyncio
+    async def test_unknown_database_is_not_stamped(self, async_engine: any) -> None:
+        """Tables newer than the baseline without a revision are not guessed at."""
+        with pytest.raises(SchemaNotReady, match="alembic stamp"):
+            await ensure_schema(async_engine, migrate=True)
+        assert await get_schema_revision(async_engine) is None
+
+    def test_sync_url(self) -> None:
+        """Alembic gets a synchronous driver."""
+        assert sync_url("postgresql+asyncpg://u:p@h/db") == "postgresql+psycopg2://u:p@h/db"
+        assert sync_url("sqlite+aiosqlite:///./zavhoz.db") == "sqlite:///./zavhoz.db"
+
+
+class TestWarmPool:
+    """Test connection pool warmup."""
+
+    @pytest.mark.asyncio
+    async def test_opens_connections(self, tmp_path) -> None:
+        """Connections are opened and returned to the pool."""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=3)
+        try:
+            assert await warm_pool(engine, 3) == 3
+            assert engine.pool.checkedin() == 3
+        finally:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_null_pool(self) -> None:
+        """Nothing to warm without a pool."""
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=NullPool)
+        assert await warm_pool(engine, 3) == 0
+        await engine.dispose()
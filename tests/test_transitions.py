@@ -0,0 +1,161 @@
+"""Tests for atomic request status transitions."""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database.connection import create_engine_from_env
+from handlers.request_actions import take_request_callback
+from models import Base, Request, Status, User
+from utils.transitions import TRANSITIONS, TransitionConflict, apply_transition, apply_transitions
+
+
+async def _create_request(db_session, status: Status = Status.OPEN) -> tuple[User, User, Request]:
+    author = User(telegram_id=3000, first_name="Author", role="user")
+    admin = User(telegram_id=3001, first_name="Admin", role="admin")
+    db_session.add_all([author, admin])
+    await db_session.commit()
+
+    request = Request(user_id=author.id, title="Кран", description="Течет", location="Room 1", status=status)
+    db_session.add(request)
+    await db_session.commit()
+    return author, admin, request
+
+
+class TestTransitions:
+    """Test the transition table and the conditional update."""
+
+    def test_table(self) -> None:
+        """Only forward moves out of OPEN and IN_PROGRESS are allowed."""
+        allowed = {(source, t.target) for t in TRANSITIONS.values() for source in t.sources}
+
+        assert allowed == {
+            (Status.OPEN, Status.IN_PROGRESS),
+            (Status.IN_PROGRESS, Status.COMPLETED),
+            (Status.OPEN, Status.REJECTED),
+            (Status.IN_PROGRESS, Status.REJECTED),
+        }
+
+    @pytest.mark.asyncio
+    async def test_take_updates_status_and_history(self, db_session) -> None:
+        """One statement sets status, assignee, updated_at and appends history."""
+        _, admin, request = await _create_request(db_session)
+        started = datetime.utcnow() - timedelta(seconds=1)
+
+        taken = await apply_transition(db_session, request.id, "take", admin)
+        await db_session.commit()
+        completed = await apply_transition(db_session, request.id, "complete", admin)
+        await db_session.commit()
+
+        assert taken.assigned_to == admin.id
+        assert completed.status == Status.COMPLETED
+        assert completed.completed_at is not None
+        assert completed.updated_at >= started
+        assert [entry["action"] for entry in completed.history] == ["take", "complete"]
+        assert completed.history[0]["user_id"] == admin.id
+
+    @pytest.mark.asyncio
+    async def test_conflict_reports_current_status(self, db_session) -> None:
+        """A disallowed or stale transition changes nothing and names the status."""
+        _, admin, request = await _create_request(db_session)
+
+        with pytest.raises(TransitionConflict) as conflict:
+            await apply_transition(db_session, request.id, "complete", admin)
+        assert conflict.value.current == Status.OPEN
+        assert "открыта" in conflict.value.message
+
+        with pytest.raises(TransitionConflict) as missing:
+            await apply_transition(db_session, request.id + 100, "take", admin)
+        assert missing.value.current is None
+        assert missing.value.message == "Заявка не найдена"
+
+        stored = await db_session.scalar(
+            select(Request).where(Request.id == request.id).execution_options(populate_existing=True)
+        )
+        assert stored.status == Status.OPEN
+        assert stored.history == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_take_has_one_winner(self, tmp_path) -> None:
+        """Two admins taking the same request: one wins, the other gets a conflict."""
+        engine = create_engine_from_env(f"sqlite:///{tmp_path / 'race.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            _, admin, request = await _create_request(session)
+
+        async def take() -> str:
+            async with factory() as session:
+                try:
+                    await apply_transition(session, request.id, "take", admin)
+                    await session.commit()
+                    return "won"
+                except TransitionConflict:
+                    return "lost"
+
+        try:
+            results = await asyncio.gather(take(), take())
+            async with factory() as session:
+                stored = await session.get(Request, request.id)
+        finally:
+            await engine.dispose()
+
+        assert sorted(results) == ["lost", "won"]
+        assert len(stored.history) == 1
+
+    @pytest.mark.asyncio
+    async def test_bulk_appends_history(self, db_session) -> None:
+        """The bulk variant appends history to every changed request."""
+        _, admin, request = await _create_request(db_session, Status.IN_PROGRESS)
+
+        changed = await apply_transitions(db_session, [request.id], "reject", admin)
+        await db_session.commit()
+
+        history = await db_session.scalar(select(Request.history).where(Request.id == request.id))
+        assert [row.status for row in changed] == [Status.REJECTED]
+        assert [entry["action"] for entry in history] == ["reject"]
+
+    @pytest.mark.asyncio
+    async def test_take_callback_reports_lost_race(self, db_session) -> None:
+        """The handler answers with the current status instead of failing."""
+        _, admin, request = await _create_request(db_session, Status.IN_PROGRESS)
+        answers = []
+
+        async def answer(text: str = None, **kwargs) -> None:
+            answers.append(text)
+
+        callback = SimpleNamespace(data=f"take_request_{request.id}", answer=answer)
+        container = SimpleNamespace(notifications=None)
+
+        await take_request_callback.__wrapped__(callback, user=admin, session=db_session, container=container)
+
+        assert answers == [f"Заявка #{request.id} уже в статусе «в работе»"]
+
+    @pytest.mark.asyncio
+    async def test_take_callback_shows_request(self, db_session) -> None:
+        """The reply names the author although they were never loaded in this session."""
+        _, admin, request = await _create_request(db_session)
+        db_session.expunge_all()
+        edits = []
+
+        async def edit_text(text: str, **kwargs) -> None:
+            edits.append(text)
+
+        async def answer(*args, **kwargs) -> None:
+            pass
+
+        callback = SimpleNamespace(
+            data=f"take_request_{request.id}", answer=answer, message=SimpleNamespace(edit_text=edit_text)
+        )
+        container = SimpleNamespace(notifications=None)
+
+        await take_request_callback.__wrapped__(callback, user=admin, session=db_session, container=container)
+
+        assert "взята в работу" in edits[0]
+        assert "Author" in edits[0]
@@ -0,0 +1,154 @@
+"""Tests for the update recorder and the replay benchmark."""
+
+import pytest
+from aiogram.types import Update
+
+from benchmarks.replay import read_log, replay, update_key
+from utils.update_recorder import UpdateRecorder, anonymize, mask_text, pseudonym
+
+BOT = {"id": 7000000001, "is_bot": True, "first_name": "ZAVhoz", "username": "zavhoz_bot"}
+
+
+def message(update_id: int, user_id: int, text: str) -> dict:
+    """Private text message update."""
+    user = {"id": user_id, "is_bot": False, "first_name": "Мария", "last_name": "Иванова", "username": "m_iv"}
+    update = {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1760850000,
+            "chat": {"id": user_id, "type": "private", "first_name": "Мария", "username": "m_iv"},
+            "from": user,
+            "text": text,
+        },
+    }
+    if text.startswith("/"):
+        update["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+    return update
+
+
+def callback(update_id: int, user_id: int, data: str) -> dict:
+    """Callback query update from a bot message."""
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": "Мария"},
+            "chat_instance": "-512",
+            "data": data,
+            "message": {
+                "message_id": 1000 + update_id,
+                "date": 1760850000,
+                "chat": {"id": user_id, "type": "private"},
+                "from": BOT,
+                "text": "🏠 Главное меню",
+            },
+        },
+    }
+
+
+class TestAnonymize:
+    """Test removal of personal data."""
+
+    def test_names_removed_and_ids_pseudonymous(self) -> None:
+        """Names go away, the same id maps to the same pseudonym."""
+        data = anonymize(message(1, 111222333, "/start"), "salt")
+
+        assert data["message"]["from"]["id"] == data["message"]["chat"]["id"] == pseudonym(111222333, "salt")
+        assert data["message"]["from"]["id"] != 111222333
+        assert "last_name" not in data["message"]["from"]
+        assert "username" not in data["message"]["chat"]
+        assert "Мария" not in str(data)
+
+    def test_bot_kept(self) -> None:
+        """The bot user is not personal data."""
+        data = anonymize(callback(2, 111222333, "create_request"), "salt")
+
+        assert data["callback_query"]["message"]["from"] == BOT
+
+    def test_text_masked_keeping_length(self) -> None:
+        """Phones, e-mails and mentions are masked; the rest of the text is kept."""
+        text = "Кабинет 305, звонить +7 (915) 123-45-67 или a.b@mail.ru"
+        masked = mask_text(text)
+
+        assert len(masked) == len(text)
+        assert masked.startswith("Кабинет 305, звонить *")
+        assert "915" not in masked and "mail" not in masked
+
+    def test_salt_changes_pseudonyms(self) -> None:
+        """Different salts give unlinkable ids."""
+        assert pseudonym(111222333, "a") != pseudonym(111222333, "b")
+        assert pseudonym(-100123, "a") < 0
+
+
+class TestUpdateRecorder:
+    """Test the recorder middleware."""
+
+    @pytest.mark.asyncio
+    async def test_records_and_handles(self, tmp_path) -> None:
+        """Updates are written to the log and still handled."""
+        recorder = UpdateRecorder(str(tmp_path / "updates.log"), salt="salt")
+        recorder.write_header([555])
+        handled = []
+
+        async def handler(event, data):
+            handled.append(event.update_id)
+
+        await recorder(handler, Update.model_validate(message(1, 111222333, "/start")), {})
+        recorder.close()
+
+        updates, admins = read_log(tmp_path / "updates.log")
+        assert handled == [1]
+        assert admins == {pseudonym(555, "salt")}
+        assert updates[0][1]["message"]["from"]["id"] == pseudonym(111222333, "salt")
+        assert update_key(updates[0][1]) == ("message", "/start")
+
+    @pytest.mark.asyncio
+    async def test_recording_error_does_not_break_handling(self, tmp_path) -> None:
+        """A failing write is logged, the update is handled anyway."""
+        recorder = UpdateRecorder(str(tmp_path / "updates.log"))
+        recorder.close()
+        handled = []
+
+        async def handler(event, data):
+            handled.append(event.update_id)
+
+        await recorder(handler, Update.model_validate(message(1, 1, "/start")), {})
+
+        assert handled == [1]
+
+
+class TestReplay:
+    """Test replaying a recorded log."""
+
+    def test_update_key(self) -> None:
+        """Numbers in callback data are normalized."""
+        assert update_key(callback(1, 1, "take_1234")) == ("callback_query", "take_N")
+        assert update_key(message(1, 1, "Течет кран")) == ("message", "text")
+
+    @pytest.mark.asyncio
+    async def test_replay_log(self, tmp_path) -> None:
+        """A recorded conversation replays through the handlers without errors."""
+        path = tmp_path / "updates.log"
+        recorder = UpdateRecorder(str(path), salt="salt")
+        recorder.write_header([500])
+        conversation = [
+            message(1, 100, "/start"),
+            callback(2, 100, "create_request"),
+            message(3, 100, "Не работает батарея в кабинете 305, в классе холодно"),
+            callback(4, 100, "additional_no"),
+            callback(5, 100, "priority_средний"),
+            message(6, 500, "/start"),
+            callback(7, 500, "admin_panel"),
+            callback(8, 500, "admin_stats"),
+        ]
+        for update in conversation:
+            recorder.record(Update.model_validate(update))
+        recorder.close()
+
+        report = await replay(path, speed=0, seed_requests=20)
+
+        assert report.updates == len(conversation)
+        assert [r for r in report.steps if not r.ok] == []
+        assert report.statements > 0
+        assert report.to_dict()["steps"]["callback_query.admin_stats"]["count"] == 1
@@ -2,12 +2,100 @@
 Модуль аналитики для ZAVhoz - генерирует статистику и тренды по заявкам.
 """
 
-from datetime import datetime, timedelta
+import os
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, false, func, select, true, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import Priority, Request, Status
+from models import Location, Priority, Request, Status
+from utils.analytics_engine import AGING_BINS, CompletionStats
+from utils.performance import CacheManager
+from utils.snapshots import WINDOWS, Snapshot, get_snapshot
+
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", 600))
+
+# Отчеты кэшируются по версии снимка: любое изменение заявок дает новый ключ
+report_cache = CacheManager(ttl=ANALYTICS_CACHE_TTL)
+
+PRIORITY_LABELS = {
+    Priority.HIGH: "🔴 Высокий",
+    Priority.MEDIUM: "🟡 Средний",
+    Priority.LOW: "🟢 Низкий"
+}
+
+STATUS_LABELS = {
+    Status.OPEN: "📭 Открыта",
+    Status.IN_PROGRESS: "⚙️ В работе",
+    Status.COMPLETED: "✅ Выполнена",
+    Status.REJECTED: "❌ Отклонена"
+}
+
+
+def completion_time_section(stats: CompletionStats) -> dict:
+    """Раздел отчета о времени выполнения"""
+    return {
+        "avg_hours": stats.mean_hours,
+        "avg_days": round(stats.mean_hours / 24, 2),
+        **{f"p{q}_hours": value for q, value in stats.percentiles.items()},
+        "by_priority": {
+            PRIORITY_LABELS[priority]: values["p90_hours"] for priority, values in stats.by_priority.items()
+        },
+        "aging": stats.aging,
+    }
+
+
+async def location_section(session: AsyncSession, slow_ids: list[int], limit: int = 5) -> tuple[dict, dict[int, str]]:
+    """Места с наибольшим числом открытых заявок и названия мест ``slow_ids`` одним запросом"""
+    top = select(Location.id, Location.name, Location.open_count, Location.request_count).where(
+        Location.request_count > 0
+    ).order_by(Location.open_count.desc(), Location.request_count.desc()).limit(limit).subquery()
+    stmt = select(true(), top.c.id, top.c.name, top.c.open_count, top.c.request_count)
+    if slow_ids:
+        stmt = union_all(stmt, select(
+            false(), Location.id, Location.name, Location.open_count, Location.request_count
+        ).where(Location.id.in_(slow_ids)))
+
+    rows = (await session.execute(stmt)).all()
+    top_rows = sorted((row for row in rows if row[0]), key=lambda row: (-row[3], -row[4]))
+    distribution = {"distribution": [{"location": row[2], "open": row[3], "total": row[4]} for row in top_rows]}
+    return distribution, {row[1]: row[2] for row in rows}
+
+
+def build_report(snapshot: Snapshot, days: int = 7, today: date | None = None) -> dict:
+    """Собрать словарь отчета из снимка аналитики"""
+    today = today or datetime.utcnow().date()
+    windows = {name: snapshot.window(name, today) for name in WINDOWS}
+    status_counts = {Status[name]: count for name, count in windows["all"]["status"].items()}
+    priority_counts = {Priority[name]: count for name, count in windows["all"]["priority"].items()}
+
+    total = windows["all"]["created"]
+    completed = status_counts.get(Status.COMPLETED, 0)
+    metrics = {
+        "total": total,
+        "completed": completed,
+        "rejected": status_counts.get(Status.REJECTED, 0),
+        "in_progress": status_counts.get(Status.IN_PROGRESS, 0),
+        "open": status_counts.get(Status.OPEN, 0),
+        "completed_today": windows["today"]["completed"],
+        "completion_rate": round(completed / total * 100, 2) if total else 0,
+    }
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "metrics": metrics,
+        "windows": windows,
+        "daily_stats": {"period_days": days, "daily": snapshot.daily(days, today)},
+        "priority_distribution": {"distribution": [
+            {"priority": PRIORITY_LABELS[priority], "count": priority_counts[priority]}
+            for priority in Priority if priority in priority_counts
+        ]},
+        "status_distribution": {"distribution": [
+            {"status": STATUS_LABELS[status], "count": status_counts[status]}
+            for status in Status if status in status_counts
+        ]},
+        "overdue_high_priority": snapshot.overdue(today),
+    }
 
 
 class RequestAnalytics:
@@ -46,15 +134,9 @@ class RequestAnalytics:
         result = await session.execute(stmt)
         rows = result.all()
 
-        priority_map = {
-            Priority.HIGH: "🔴 Высокий",
-            Priority.MEDIUM: "🟡 Средний",
-            Priority.LOW: "🟢 Низкий"
-        }
-
         return {
             "distribution": [
-                {"priority": priority_map.get(row[0], str(row[0])), "count": row[1]}
+                {"priority": PRIORITY_LABELS.get(row[0], str(row[0])), "count": row[1]}
                 for row in rows
             ]
         }
@@ -70,37 +152,36 @@ class RequestAnalytics:
         result = await session.execute(stmt)
         rows = result.all()
 
-        status_map = {
-            Status.OPEN: "📭 Открыта",
-            Status.IN_PROGRESS: "⚙️ В работе",
-            Status.COMPLETED: "✅ Выполнена",
-            Status.REJECTED: "❌ Отклонена"
-        }
-
         return {
             "distribution": [
-                {"status": status_map.get(row[0], str(row[0])), "count": row[1]}
+                {"status": STATUS_LABELS.get(row[0], str(row[0])), "count": row[1]}
                 for row in rows
             ]
         }
 
     @staticmethod
-    async def get_avg_completion_time(session: AsyncSession) -> dict:
-        """Среднее время выполнения заявок (в часах)"""
-        stmt = select(
-            func.avg(
-                func.extract('epoch', Request.completed_at - Request.created_at) / 3600
-            )
-        ).where(Request.status == Status.COMPLETED)
+    async def get_location_distribution(session: AsyncSession, limit: int = 5) -> dict:
+        """Места с наибольшим числом открытых заявок (счетчики таблицы мест)"""
+        stmt = select(Location.name, Location.open_count, Location.request_count).where(
+            Location.request_count > 0
+        ).order_by(Location.open_count.desc(), Location.request_count.desc()).limit(limit)
 
         result = await session.execute(stmt)
-        avg_hours = result.scalar() or 0
+        rows = result.all()
 
         return {
-            "avg_hours": round(avg_hours, 2),
-            "avg_days": round(avg_hours / 24, 2)
+            "distribution": [
+                {"location": row[0], "open": row[1], "total": row[2]}
+                for row in rows
+            ]
         }
 
+    @staticmethod
+    async def get_avg_completion_time(session: AsyncSession) -> dict:
+        """Время выполнения заявок: среднее, медиана и перцентили (в часах)"""
+        snapshot = await get_snapshot(session)
+        return completion_time_section(snapshot.completion_stats(datetime.utcnow().date()))
+
     @staticmethod
     async def get_performance_metrics(session: AsyncSession) -> dict:
         """Метрики производительности"""
@@ -147,24 +228,37 @@ class RequestAnalytics:
         return result.scalar() or 0
 
     @staticmethod
-    async def get_full_report(session: AsyncSession) -> dict:
-        """Полный аналитический отчёт"""
-        metrics = await RequestAnalytics.get_performance_metrics(session)
-        daily = await RequestAnalytics.get_daily_stats(session, days=7)
-        priority_dist = await RequestAnalytics.get_priority_distribution(session)
-        status_dist = await RequestAnalytics.get_status_distribution(session)
-        avg_time = await RequestAnalytics.get_avg_completion_time(session)
-        overdue = await RequestAnalytics.get_high_priority_pending(session)
-
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "metrics": metrics,
-            "daily_stats": daily,
-            "priority_distribution": priority_dist,
-            "status_distribution": status_dist,
-            "avg_completion_time": avg_time,
-            "overdue_high_priority": overdue
-        }
+    async def get_full_report(session: AsyncSession, days: int = 7) -> dict:
+        """Полный аналитический отчёт
+
+        Счетчики и время выполнения берутся из снимка аналитики (обновляется
+        инкрементально, не зависит от размера таблицы), места - одним
+        запросом. Отчет кэшируется по версии снимка.
+        """
+        snapshot = await get_snapshot(session)
+        version = snapshot.version
+        cache_key = f"full:{days}:{version}"
+        report = report_cache.get(cache_key)
+        if report is None:
+            today = datetime.utcnow().date()
+            report = build_report(snapshot, days=days, today=today)
+            stats = snapshot.completion_stats(today)
+            report["avg_completion_time"] = completion_time_section(stats)
+            # Где дольше всего чинят: p90 по местам с достаточной выборкой
+            slow = sorted(
+                ((location_id, values) for location_id, values in stats.by_location.items() if values["count"] >= 3),
+                key=lambda item: -item[1]["p90_hours"],
+            )[:3]
+            report["location_distribution"], names = await location_section(
+                session, [location_id for location_id, _ in slow]
+            )
+            report["avg_completion_time"]["slowest_locations"] = [
+                {"location": names.get(location_id, "?"), "p90_hours": values["p90_hours"]}
+                for location_id, values in slow
+            ]
+            report["data_version"] = version
+            report_cache.set(cache_key, report)
+        return report
 
 
 def format_analytics_report(report: dict) -> str:
@@ -185,6 +279,13 @@ def format_analytics_report(report: dict) -> str:
     text += f"  📭 Открыто: {metrics['open']}\n"
     text += f"  📊 Процент выполнения: {metrics['completion_rate']}%\n\n"
 
+    windows = report.get("windows")
+    if windows:
+        text += "<b>🗓️ По периодам (создано / выполнено):</b>\n"
+        for name, label in (("today", "Сегодня"), ("7d", "7 дней"), ("30d", "30 дней")):
+            text += f"  {label}: {windows[name]['created']} / {windows[name]['completed']}\n"
+        text += "\n"
+
     text += "<b>🎯 По приоритету:</b>\n"
     for p in priority:
         text += f"  {p['priority']}: {p['count']}\n"
@@ -195,8 +296,31 @@ def format_analytics_report(report: dict) -> str:
         text += f"  {s['status']}: {s['count']}\n"
     text += "\n"
 
+    locations = report.get("location_distribution", {}).get("distribution", [])
+    if locations:
+        text += "<b>📍 По местам (открыто / всего):</b>\n"
+        for loc in locations:
+            text += f"  {loc['location']}: {loc['open']} / {loc['total']}\n"
+        text += "\n"
+
     text += "<b>⏱️ Время выполнения:</b>\n"
-    text += f"  Среднее: {avg_time['avg_hours']} ч ({avg_time['avg_days']} дн)\n\n"
+    text += f"  Среднее: {avg_time['avg_hours']} ч ({avg_time['avg_days']} дн)\n"
+    if "p90_hours" in avg_time:
+        text += f"  Медиана: {avg_time['p50_hours']} ч · 90% заявок: до {avg_time['p90_hours']} ч\n"
+        for label, p90 in avg_time["by_priority"].items():
+            text += f"    {label}: 90% до {p90} ч\n"
+    for loc in avg_time.get("slowest_locations", []):
+        text += f"  🐢 {loc['location']}: 90% до {loc['p90_hours']} ч\n"
+    text += "\n"
+
+    aging = avg_time.get("aging")
+    if aging and sum(aging):
+        text += "<b>⏳ Возраст открытых заявок:</b>\n"
+        for (low, high), count in zip(zip(AGING_BINS, AGING_BINS[1:]), aging):
+            if count:
+                period = f"{low}-{high} дн" if high != float("inf") else f"более {low} дн"
+                text += f"  {period}: {count}\n"
+        text += "\n"
 
     if overdue > 0:
         text += f"⚠️ <b>ВНИМАНИЕ!</b> {overdue} заявок высокого приоритета просрочены!\n"
@@ -0,0 +1,195 @@
+"""Deduplicating attachment store keyed by Telegram ``file_unique_id``.
+
+Telegram gives every file a ``file_unique_id`` that stays the same when the
+same photo or document is sent again, so an attachment row is stored once and
+requests only reference it through ``request_attachments``.
+"""
+
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Optional, Union
+
+from aiogram import types
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Attachment, File, RequestAttachment
+from utils.performance import CacheManager
+
+logger = logging.getLogger(__name__)
+
+# Metadata of stored attachments never changes, only file_id may be refreshed
+_meta_cache = CacheManager(ttl=24 * 3600)
+
+
+@dataclass(frozen=True)
+class AttachmentMeta:
+    """Telegram file metadata needed to store and display an attachment."""
+
+    file_unique_id: str
+    file_id: str
+    file_type: str
+    file_name: Optional[str] = None
+    file_size: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    thumbnail_file_id: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize for FSM storage."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "AttachmentMeta":
+        """Deserialize from FSM storage."""
+        return cls(**data)
+
+    @classmethod
+    def from_model(cls, attachment: Attachment) -> "AttachmentMeta":
+        """Build from a stored attachment row."""
+        return cls(
+            file_unique_id=attachment.file_unique_id,
+            file_id=attachment.file_id,
+            file_type=attachment.file_type,
+            file_name=attachment.file_name,
+            file_size=attachment.file_size,
+            width=attachment.width,
+            height=attachment.height,
+            thumbnail_file_id=attachment.thumbnail_file_id,
+        )
+
+
+def attachment_meta_from_message(message: types.Message) -> Optional[AttachmentMeta]:
+    """Extract attachment metadata from a photo or document message.
+
+    Args:
+        message: Incoming message
+
+    Returns:
+        AttachmentMeta or None if the message has no photo/document
+    """
+    if message.photo:
+        largest = message.photo[-1]
+        smallest = message.photo[0]
+        return AttachmentMeta(
+            file_unique_id=largest.file_unique_id,
+            file_id=largest.file_id,
+            file_type="photo",
+            file_size=largest.file_size,
+            width=largest.width,
+            height=largest.height,
+            thumbnail_file_id=smallest.file_id if smallest is not largest else None,
+        )
+    if message.document:
+        document = message.document
+        return AttachmentMeta(
+            file_unique_id=document.file_unique_id,
+            file_id=document.file_id,
+            file_type="document",
+            file_name=document.file_name,
+            file_size=document.file_size,
+            thumbnail_file_id=document.thumbnail.file_id if document.thumbnail else None,
+        )
+    return None
+
+
+async def get_or_create_attachment(session: AsyncSession, meta: AttachmentMeta) -> Attachment:
+    """Return the stored attachment for ``meta.file_unique_id``, creating it once.
+
+    Args:
+        session: SQLAlchemy async session
+        meta: Attachment metadata
+
+    Returns:
+        Attachment model instance
+    """
+    stmt = select(Attachment).where(Attachment.file_unique_id == meta.file_unique_id)
+    attachment = await session.scalar(stmt)
+    if attachment:
+        if attachment.file_id != meta.file_id:
+            attachment.file_id = meta.file_id
+        return attachment
+
+    attachment = Attachment(**meta.to_dict())
+    try:
+        async with session.begin_nested():
+            session.add(attachment)
+    except IntegrityError:
+        # Concurrent upload of the same file won the insert
+        attachment = await session.scalar(stmt)
+    return attachment
+
+
+async def attach_to_request(
+    session: AsyncSession,
+    request_id: int,
+    meta: AttachmentMeta,
+    uploaded_by: Optional[int] = None,
+) -> RequestAttachment:
+    """Link an attachment to a request without storing duplicates.
+
+    Args:
+        session: SQLAlchemy async session
+        request_id: Request ID
+        meta: Attachment metadata
+        uploaded_by: ID of the user who uploaded the file
+
+    Returns:
+        RequestAttachment link (existing one if the file is already attached)
+    """
+    attachment = await get_or_create_attachment(session, meta)
+
+    link = await session.scalar(
+        select(RequestAttachment).where(
+            RequestAttachment.request_id == request_id,
+            RequestAttachment.attachment_id == attachment.id,
+        )
+    )
+    if link is None:
+        link = RequestAttachment(request_id=request_id, attachment=attachment, uploaded_by=uploaded_by)
+        session.add(link)
+    # И для уже прикрепленного файла: get_or_create_attachment мог обновить file_id
+    await session.commit()
+    _meta_cache.set(meta.file_unique_id, AttachmentMeta.from_model(attachment))
+    return link
+
+
+async def get_attachment_meta(session: AsyncSession, file_unique_id: str) -> Optional[AttachmentMeta]:
+    """Get cached thumbnail/size metadata of a stored attachment.
+
+    Args:
+        session: SQLAlchemy async session
+        file_unique_id: Telegram file_unique_id
+
+    Returns:
+        AttachmentMeta or None if the file is unknown
+    """
+    meta = _meta_cache.get(file_unique_id)
+    if meta is not None:
+        return meta
+
+    attachment = await session.scalar(select(Attachment).where(Attachment.file_unique_id == file_unique_id))
+    if not attachment:
+        return None
+
+    meta = AttachmentMeta.from_model(attachment)
+    _meta_cache.set(file_unique_id, meta)
+    return meta
+
+
+async def get_request_attachments(session: AsyncSession, request_id: int) -> list[Union[RequestAttachment, File]]:
+    """All attachments of a request: deduplicated links plus legacy ``files`` rows.
+
+    Args:
+        session: SQLAlchemy async session
+        request_id: Request ID
+
+    Returns:
+        Objects exposing ``file_id``, ``file_type`` and ``file_name``
+    """
+    links = await session.scalars(
+        select(RequestAttachment).where(RequestAttachment.request_id == request_id).order_by(RequestAttachment.id)
+    )
+    legacy = await session.scalars(select(File).where(File.request_id == request_id).order_by(File.id))
+    return [*links.unique().all(), *legacy.all()]
@@ -20,11 +20,11 @@ ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", 0))
 T = TypeVar("T", bound=Callable[..., Any])
 
 
-async def get_or_create_user(message: types.Message, session: AsyncSession) -> User:
+async def get_or_create_user(message: types.Message | types.CallbackQuery, session: AsyncSession) -> User:
     """Get or create user from Telegram message.
 
     Args:
-        message: Aiogram message object
+        message: Aiogram message or callback query (its author is used)
         session: SQLAlchemy async session
 
     Returns:
@@ -91,8 +91,8 @@ def require_auth(func: T) -> T:
             # Get database session
             async for session in get_db():
                 try:
-                    # Get or create user
-                    user = await get_or_create_user(message, session)
+                    # Get or create user (for callbacks message.from_user is the bot)
+                    user = await get_or_create_user(update, session)
 
                     if not user.is_active:
                         if isinstance(update, types.CallbackQuery):
@@ -0,0 +1,133 @@
+"""Bulk admin actions over several requests at once.
+
+The admin ticks requests in a checkbox keyboard and applies one action to
+all of them. The selection lives in the keyboard itself: every checkbox
+button carries its request id (``bulk_toggle_<id>``) and the action buttons
+carry the ticked rows as a base-36 bitmask (``bulk_do_complete_<mask>``).
+Ticking a box therefore needs neither a query nor FSM storage, and an old
+keyboard still works after a restart.
+
+An action is a transition of ``utils.transitions`` applied with one
+``UPDATE ... WHERE id IN (...) AND status IN (...) RETURNING``: requests
+whose status was changed meanwhile (by another admin or an earlier tap)
+are not returned and are reported as skipped.
+"""
+
+import logging
+import string
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User
+from utils.transitions import TRANSITIONS, Transition, apply_transitions
+
+logger = logging.getLogger(__name__)
+
+# Строк с галочками в одной клавиатуре (лимит Telegram - 100 кнопок)
+BULK_LIMIT = 40
+
+CHECKED = "✅"
+UNCHECKED = "⬜"
+
+_DIGITS = string.digits + string.ascii_lowercase
+
+
+@dataclass(frozen=True)
+class BulkAction:
+    """Button of a status transition applied to the selected requests."""
+
+    name: str
+    label: str
+    done: str
+
+    @property
+    def transition(self) -> Transition:
+        """Transition of ``utils.transitions`` with the same name."""
+        return TRANSITIONS[self.name]
+
+
+BULK_ACTIONS = {
+    action.name: action
+    for action in (
+        BulkAction("take", "🔧 В работу", "🔧 Взято в работу"),
+        BulkAction("complete", "✅ Выполнить", "✅ Выполнено"),
+        BulkAction("reject", "❌ Отклонить", "❌ Отклонено"),
+    )
+}
+
+
+@dataclass(frozen=True)
+class BulkRow:
+    """One checkbox row: request id and its button text without the mark."""
+
+    request_id: int
+    label: str
+
+
+def encode_selection(rows: set[int]) -> str:
+    """Encode selected row positions as a base-36 bitmask ("0" for none)."""
+    mask = sum(1 << row for row in rows)
+    digits = ""
+    while mask:
+        mask, digit = divmod(mask, 36)
+        digits = _DIGITS[digit] + digits
+    return digits or "0"
+
+
+def decode_selection(mask: str) -> set[int]:
+    """Row positions of a bitmask made by ``encode_selection``."""
+    value = int(mask, 36)
+    return {row for row in range(value.bit_length()) if value >> row & 1}
+
+
+def row_label(request: Any) -> str:
+    """Checkbox button text of a request (without the mark)."""
+    from utils.messages import PRIORITY_EMOJIS, STATUS_EMOJIS
+
+    return f"{STATUS_EMOJIS[request.status]}{PRIORITY_EMOJIS[request.priority]} #{request.id} {request.title[:30]}"
+
+
+def read_keyboard(markup: Optional[InlineKeyboardMarkup]) -> tuple[list[BulkRow], set[int]]:
+    """Rows and selected row positions of a bulk selection keyboard.
+
+    Args:
+        markup: Keyboard made by ``utils.keyboard.get_bulk_select_keyboard``
+
+    Returns:
+        Rows in keyboard order and positions of the ticked ones
+    """
+    rows: list[BulkRow] = []
+    mask = "0"
+    for buttons in markup.inline_keyboard if markup else []:
+        for button in buttons:
+            data = button.callback_data or ""
+            if data.startswith("bulk_toggle_"):
+                rows.append(BulkRow(int(data.removeprefix("bulk_toggle_")), button.text.split(" ", 1)[1]))
+            elif data.startswith("bulk_do_"):
+                # Маска одна и та же во всех кнопках действий
+                mask = data.rsplit("_", 1)[1]
+    return rows, {row for row in decode_selection(mask) if row < len(rows)}
+
+
+async def apply_bulk_action(session: AsyncSession, action: BulkAction, request_ids: list[int], admin: User) -> list[Any]:
+    """Apply an action to the selected requests with one statement.
+
+    Only requests the transition allows are changed. The caller commits.
+
+    Args:
+        session: Database session
+        action: Action to apply
+        request_ids: Selected requests
+        admin: Admin performing the action
+
+    Returns:
+        Changed requests as rows (id, user_id, title, location, status)
+    """
+    changed = await apply_transitions(session, request_ids, action.name, admin)
+    logger.info(
+        f"Bulk {action.name} by {admin.telegram_id}: {len(changed)} of {len(request_ids)} requests changed"
+    )
+    return changed
@@ -0,0 +1,252 @@
+"""ZIP report bundles: CSV, per-request JSON and attachment files.
+
+The archive is written incrementally into a spooled temporary file (in memory
+up to ``BUNDLE_SPOOL_MAX_MB``, on disk beyond), requests are read in batches
+and attachments are fetched concurrently but written as soon as each one
+arrives, so memory stays bounded regardless of the bundle size.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from collections.abc import AsyncGenerator
+from datetime import datetime
+from typing import IO, Any, Optional
+
+from aiogram import Bot
+from aiogram.types import InputFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from models import File, Request, RequestAttachment, User
+from utils.export import CsvExportWriter
+from utils.file_mirror import FileMirror
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_SPOOL_MAX_MB = int(os.getenv("BUNDLE_SPOOL_MAX_MB", 16))
+BUNDLE_FETCH_CONCURRENCY = int(os.getenv("BUNDLE_FETCH_CONCURRENCY", 4))
+BUNDLE_BATCH_SIZE = int(os.getenv("BUNDLE_BATCH_SIZE", 100))
+# Bot API upload limit for documents
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+CSV_HEADER = [
+    "ID", "Дата создания", "Дата завершения", "Приоритет", "Статус",
+    "Заголовок", "Описание", "Локация", "Пользователь", "Исполнитель", "Вложений",
+]
+
+_EXTENSIONS = {"photo": ".jpg", "document": ""}
+
+
+class SpooledInputFile(InputFile):
+    """Upload a (spooled) temporary file in chunks without reading it whole."""
+
+    def __init__(self, file: IO[bytes], filename: str, chunk_size: int = 64 * 1024) -> None:
+        """Initialize with an open binary file object."""
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.file = file
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:  # noqa: ARG002
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+
+def _user_name(user: Optional[User]) -> str:
+    if not user:
+        return ""
+    name = f"{user.first_name or ''} {user.last_name or ''}".strip()
+    return f"{name} (@{user.username})" if user.username else name
+
+
+async def _iter_batches(
+    session: AsyncSession,
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+) -> AsyncGenerator[list[tuple[Request, User, Optional[User]]], None]:
+    """Yield (request, author, assignee) rows in batches, streamed from the DB."""
+    assignee = aliased(User)
+    stmt = (
+        select(Request, User, assignee)
+        .join(User, Request.user_id == User.id)
+        .outerjoin(assignee, Request.assigned_to == assignee.id)
+        .order_by(Request.id)
+        .execution_options(yield_per=BUNDLE_BATCH_SIZE)
+    )
+    if date_from:
+        stmt = stmt.where(Request.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(Request.created_at <= date_to)
+
+    result = await session.stream(stmt)
+    async for partition in result.partitions(BUNDLE_BATCH_SIZE):
+        yield [tuple(row) for row in partition]
+
+
+async def _load_attachments(session: AsyncSession, request_ids: list[int]) -> dict[int, list[Any]]:
+    """Attachments of a batch of requests (two queries per batch)."""
+    by_request: dict[int, list[Any]] = {request_id: [] for request_id in request_ids}
+    links = await session.scalars(
+        select(RequestAttachment).where(RequestAttachment.request_id.in_(request_ids)).order_by(RequestAttachment.id)
+    )
+    for link in links.unique():
+        by_request[link.request_id].append(link)
+    legacy = await session.scalars(select(File).where(File.request_id.in_(request_ids)).order_by(File.id))
+    for file in legacy:
+        by_request[file.request_id].append(file)
+    return by_request
+
+
+class BundleBuilder:
+    """Build a report bundle ZIP for a date range."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        mirror: Optional[FileMirror] = None,
+        concurrency: int = BUNDLE_FETCH_CONCURRENCY,
+    ) -> None:
+        """Initialize builder."""
+        self.bot = bot
+        self.mirror = mirror
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.request_count = 0
+        self.attachment_count = 0
+        self.failed_attachments = 0
+
+    async def _fetch(self, attachment: Any) -> bytes:
+        """Attachment content from the local mirror or the Bot API."""
+        unique_id = getattr(getattr(attachment, "attachment", None), "file_unique_id", None)
+        if self.mirror and unique_id:
+            view = self.mirror.read(unique_id)
+            if view is not None:
+                return view.tobytes()
+        async with self.semaphore:
+            buffer = io.BytesIO()
+            await self.bot.download(attachment.file_id, destination=buffer)
+            return buffer.getvalue()
+
+    async def _write_attachments(self, archive: zipfile.ZipFile, attachments: dict[int, list[Any]]) -> None:
+        """Fetch a batch of attachments concurrently, writing each as soon as it arrives."""
+
+        async def fetch(request_id: int, index: int, attachment: Any) -> tuple[str, Optional[bytes]]:
+            base_name = attachment.file_name or f"{attachment.file_type}{_EXTENSIONS.get(attachment.file_type, '')}"
+            name = f"attachments/{request_id}/{index:02d}_{base_name}"
+            try:
+                return name, await self._fetch(attachment)
+            except Exception as e:
+                logger.error(f"Error fetching attachment of request {request_id}: {e}")
+                return name, None
+
+        tasks = [
+            fetch(request_id, index, attachment)
+            for request_id, files in attachments.items()
+            for index, attachment in enumerate(files, 1)
+        ]
+        for next_done in asyncio.as_completed(tasks):
+            name, data = await next_done
+            if data is None:
+                self.failed_attachments += 1
+                continue
+            # Photos and documents are usually compressed already
+            archive.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+            self.attachment_count += 1
+
+    async def build(
+        self,
+        session: AsyncSession,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> IO[bytes]:
+        """Build the bundle.
+
+        Args:
+            session: SQLAlchemy async session
+            date_from: Include requests created at or after this moment
+            date_to: Include requests created at or before this moment
+
+        Returns:
+            Spooled temporary file positioned at the start of the ZIP
+        """
+        spool_limit = BUNDLE_SPOOL_MAX_MB * 1024 * 1024
+        bundle = tempfile.SpooledTemporaryFile(max_size=spool_limit)  # noqa: SIM115
+        csv_buffer = tempfile.SpooledTemporaryFile(max_size=spool_limit)  # noqa: SIM115
+
+        try:
+            writer = CsvExportWriter(csv_buffer, CSV_HEADER)
+
+            with zipfile.ZipFile(bundle, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                async for batch in _iter_batches(session, date_from, date_to):
+                    attachments = await _load_attachments(session, [request.id for request, _, _ in batch])
+                    rows = []
+                    for request, author, assignee in batch:
+                        files = attachments[request.id]
+                        rows.append([
+                            request.id,
+                            request.created_at,
+                            request.completed_at,
+                            request.priority.value,
+                            request.status.value,
+                            request.title,
+                            request.description,
+                            request.location,
+                            _user_name(author),
+                            _user_name(assignee),
+                            len(files),
+                        ])
+                        archive.writestr(
+                            f"requests/{request.id}.json",
+                            json.dumps(self._request_json(request, author, assignee, files), ensure_ascii=False, indent=2),
+                        )
+                        self.request_count += 1
+                    writer.write_batch(rows)
+                    await self._write_attachments(archive, attachments)
+                writer.close()
+
+                # CSV is complete only now; copy it into the archive in chunks
+                csv_buffer.seek(0)
+                with archive.open("requests.csv", "w") as csv_entry:
+                    while chunk := csv_buffer.read(64 * 1024):
+                        csv_entry.write(chunk)
+        except BaseException:
+            bundle.close()
+            raise
+        finally:
+            csv_buffer.close()
+
+        bundle.seek(0)
+        return bundle
+
+    @staticmethod
+    def _request_json(request: Request, author: User, assignee: Optional[User], files: list[Any]) -> dict[str, Any]:
+        return {
+            "id": request.id,
+            "title": request.title,
+            "description": request.description,
+            "location": request.location,
+            "priority": request.priority.value,
+            "status": request.status.value,
+            "user": _user_name(author),
+            "assignee": _user_name(assignee),
+            "created_at": request.created_at.isoformat() if request.created_at else None,
+            "completed_at": request.completed_at.isoformat() if request.completed_at else None,
+            "history": request.history or [],
+            "attachments": [
+                {"file_type": file.file_type, "file_name": file.file_name, "file_id": file.file_id} for file in files
+            ],
+        }
+
+
+def bundle_size(bundle: IO[bytes]) -> int:
+    """Size of a built bundle in bytes."""
+    position = bundle.tell()
+    bundle.seek(0, io.SEEK_END)
+    size = bundle.tell()
+    bundle.seek(position)
+    return size
+
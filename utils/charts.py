@@ -0,0 +1,255 @@
+"""Analytics charts rendered off the event loop.
+
+Matplotlib is slow and holds the GIL, so charts are rendered in a process
+pool: the asyncio loop only ships small lists of numbers to a worker and
+gets PNG bytes back. Rendered images are cached by (chart, data version);
+once a chart has been sent, Telegram's ``file_id`` is remembered as well,
+so repeated views cost neither rendering nor uploading.
+
+Matplotlib is an optional dependency (``pip install .[charts]``); without
+it ``ChartsUnavailable`` is raised and callers fall back to text reports.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from utils.performance import CacheManager
+
+logger = logging.getLogger(__name__)
+
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", 1))
+CHART_CACHE_TTL = int(os.getenv("CHART_CACHE_TTL", 3600))
+
+_COLORS = ["#4e79a7", "#f28e2b", "#59a14f", "#e15759", "#76b7b2", "#edc948"]
+
+
+class ChartsUnavailable(Exception):
+    """Raised when matplotlib is not installed."""
+
+
+def _figure(title: str) -> tuple[Any, Any]:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 4.5), dpi=100)
+    ax.set_title(title)
+    ax.spines[["top", "right"]].set_visible(False)
+    return fig, ax
+
+
+def _png(fig: Any) -> bytes:
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def render_daily_trend(data: dict) -> bytes:
+    """Line chart of new requests per day."""
+    fig, ax = _figure("Новые заявки по дням")
+    dates = [day["date"][5:] for day in data["daily"]]
+    counts = [day["count"] for day in data["daily"]]
+    ax.plot(dates, counts, marker="o", color=_COLORS[0])
+    ax.fill_between(dates, counts, alpha=0.15, color=_COLORS[0])
+    ax.set_ylim(bottom=0)
+    ax.yaxis.get_major_locator().set_params(integer=True)
+    return _png(fig)
+
+
+def render_distribution(data: dict) -> bytes:
+    """Horizontal bar chart of a distribution."""
+    fig, ax = _figure(data["title"])
+    ax.barh(data["labels"], data["counts"], color=_COLORS[:len(data["labels"])])
+    ax.invert_yaxis()
+    ax.xaxis.get_major_locator().set_params(integer=True)
+    return _png(fig)
+
+
+def render_backlog(data: dict) -> bytes:
+    """Bar chart of open requests by age."""
+    fig, ax = _figure("Возраст открытых заявок")
+    ax.bar(data["labels"], data["counts"], color=_COLORS[3])
+    ax.set_ylabel("Заявок")
+    ax.yaxis.get_major_locator().set_params(integer=True)
+    return _png(fig)
+
+
+CHART_RENDERERS: dict[str, Callable[[dict], bytes]] = {
+    "daily": render_daily_trend,
+    "status": render_distribution,
+    "priority": render_distribution,
+    "backlog": render_backlog,
+}
+
+
+def render_chart(kind: str, data: dict) -> bytes:
+    """Render a chart to PNG (runs in a worker process).
+
+    Raises:
+        ChartsUnavailable: If matplotlib is not installed
+    """
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError as e:
+        raise ChartsUnavailable("Charts require matplotlib") from e
+    return CHART_RENDERERS[kind](data)
+
+
+def _label(text: str) -> str:
+    """Label without the emoji prefix (no glyphs in the chart font)."""
+    return text.split(" ", 1)[-1]
+
+
+def report_charts(report: dict) -> dict[str, dict]:
+    """Chart data of an analytics report (plain lists, cheap to pickle)."""
+    from utils.analytics_engine import AGING_BINS
+
+    aging = report["avg_completion_time"].get("aging", [])
+    return {
+        "daily": {"daily": report["daily_stats"]["daily"]},
+        "status": {
+            "title": "Заявки по статусу",
+            "labels": [_label(item["status"]) for item in report["status_distribution"]["distribution"]],
+            "counts": [item["count"] for item in report["status_distribution"]["distribution"]],
+        },
+        "priority": {
+            "title": "Заявки по приоритету",
+            "labels": [_label(item["priority"]) for item in report["priority_distribution"]["distribution"]],
+            "counts": [item["count"] for item in report["priority_distribution"]["distribution"]],
+        },
+        "backlog": {
+            "labels": [
+                f"{low}-{high} дн" if high != float("inf") else f">{low} дн"
+                for low, high in zip(AGING_BINS, AGING_BINS[1:])
+            ],
+            "counts": aging,
+        },
+    }
+
+
+class ChartRenderer:
+    """Renders charts in a process pool and caches the results."""
+
+    def __init__(self, workers: int = CHART_WORKERS, cache_ttl: int = CHART_CACHE_TTL) -> None:
+        """Create a renderer; the pool is started on first use.
+
+        Args:
+            workers: Number of worker processes
+            cache_ttl: Lifetime of cached images, seconds
+        """
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._images = CacheManager(ttl=cache_ttl)
+        self._file_ids = CacheManager(ttl=cache_ttl)
+        self._pending: dict[str, asyncio.Future] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: воркеры не наследуют состояние event loop и соединения БД
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def render(self, kind: str, data: dict, version: str) -> bytes:
+        """PNG of a chart, rendered once per data version.
+
+        Concurrent requests for the same chart share one rendering.
+
+        Args:
+            kind: Chart kind (key of ``CHART_RENDERERS``)
+            data: Chart data
+            version: Data version the chart was built from
+
+        Returns:
+            PNG bytes
+
+        Raises:
+            ChartsUnavailable: If matplotlib is not installed
+        """
+        key = f"{kind}:{version}"
+        image = self._images.get(key)
+        if image is not None:
+            return image
+
+        pending = self._pending.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = asyncio.ensure_future(loop.run_in_executor(self._executor(), render_chart, kind, data))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        image = await asyncio.shield(pending)
+        self._images.set(key, image)
+        return image
+
+    def file_id(self, kind: str, version: str) -> Optional[str]:
+        """Telegram file_id of a chart that has already been sent."""
+        return self._file_ids.get(f"{kind}:{version}")
+
+    def remember_file_id(self, kind: str, version: str, file_id: str) -> None:
+        """Remember the file_id Telegram assigned to a sent chart."""
+        self._file_ids.set(f"{kind}:{version}", file_id)
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_renderer: Optional[ChartRenderer] = None
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Get the process-wide chart renderer."""
+    global _renderer
+    if _renderer is None:
+        _renderer = ChartRenderer()
+    return _renderer
+
+
+async def send_report_charts(bot: Any, chat_id: int, report: dict, renderer: Optional[ChartRenderer] = None) -> int:
+    """Send the charts of an analytics report as a photo album.
+
+    Charts already sent for this data version are re-sent by ``file_id``,
+    the rest are rendered (or taken from the image cache) and uploaded.
+
+    Args:
+        bot: Bot instance
+        chat_id: Target chat
+        report: Report from ``RequestAnalytics.get_full_report``
+        renderer: Renderer to use, the global one by default
+
+    Returns:
+        Number of charts sent
+
+    Raises:
+        ChartsUnavailable: If matplotlib is not installed
+    """
+    from aiogram.types import BufferedInputFile, InputMediaPhoto
+
+    renderer = renderer or get_chart_renderer()
+    version = report["data_version"]
+    charts = report_charts(report)
+
+    async def media(kind: str, data: dict) -> InputMediaPhoto:
+        file_id = renderer.file_id(kind, version)
+        if file_id:
+            return InputMediaPhoto(media=file_id)
+        image = await renderer.render(kind, data, version)
+        return InputMediaPhoto(media=BufferedInputFile(image, filename=f"{kind}.png"))
+
+    album = await asyncio.gather(*(media(kind, data) for kind, data in charts.items()))
+    messages = await bot.send_media_group(chat_id, media=list(album))
+    for kind, message in zip(charts, messages):
+        if message.photo:
+            renderer.remember_file_id(kind, version, message.photo[-1].file_id)
+    return len(messages)
@@ -0,0 +1,101 @@
+"""JSON codec shared by the Bot API session, the database and logs.
+
+The fastest installed backend is used: orjson, then msgspec, then the
+standard library (``JSON_CODEC`` forces one). All backends produce the same
+JSON for the data the bot handles: non-ASCII text is kept as is, dict keys
+that are not strings are converted to strings and unknown types go through
+``default``. Whitespace may differ, so compare decoded values, not strings.
+"""
+
+import json
+import logging
+import os
+from collections.abc import Callable
+from typing import Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+JSON_CODEC = os.getenv("JSON_CODEC", "")
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+class Codec(NamedTuple):
+    """JSON encoder and decoder pair."""
+
+    name: str
+    dumps: Callable[..., str]
+    loads: Callable[[Any], Any]
+
+
+def _orjson() -> Codec:
+    import orjson
+
+    def dumps(obj: Any, default: Optional[Callable] = None, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    return Codec("orjson", dumps, orjson.loads)
+
+
+def _msgspec() -> Codec:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, default: Optional[Callable] = None, **kwargs: Any) -> str:
+        return msgspec.json.encode(obj, enc_hook=default).decode()
+
+    def loads(data: Any) -> Any:
+        return decoder.decode(data.encode() if isinstance(data, str) else data)
+
+    return Codec("msgspec", dumps, loads)
+
+
+def _stdlib() -> Codec:
+    def dumps(obj: Any, default: Optional[Callable] = None, **kwargs: Any) -> str:
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":"))
+
+    return Codec("json", dumps, json.loads)
+
+
+_FACTORIES = {"orjson": _orjson, "msgspec": _msgspec, "json": _stdlib}
+
+
+def get_codec(name: str = "") -> Codec:
+    """Get a codec.
+
+    Args:
+        name: Backend name; the fastest installed one if empty
+
+    Returns:
+        Codec
+
+    Raises:
+        ImportError: If the requested backend is not installed
+        ValueError: If the backend is unknown
+    """
+    if name:
+        if name not in _FACTORIES:
+            raise ValueError(f"Unknown JSON codec: {name}")
+        return _FACTORIES[name]()
+    for backend in BACKENDS:
+        try:
+            return _FACTORIES[backend]()
+        except ImportError:
+            continue
+    raise AssertionError("unreachable: stdlib json is always available")
+
+
+def available_codecs() -> list[Codec]:
+    """All installed backends, fastest first."""
+    codecs = []
+    for backend in BACKENDS:
+        try:
+            codecs.append(_FACTORIES[backend]())
+        except ImportError:
+            continue
+    return codecs
+
+
+codec = get_codec(JSON_CODEC)
+dumps = codec.dumps
+loads = codec.loads
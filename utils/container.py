@@ -0,0 +1,127 @@
+"""Application container with lazily constructed components.
+
+Importing modules has no side effects: the database engine, the bot, the
+rate limiter (possibly a Redis client) and the services are built on first
+access. Handlers receive the container from the dispatcher as the
+``container`` argument, so tests and benchmarks can swap any component::
+
+    container = Container(bot=FakeBot(), rate_limiter=MemoryRateLimiter())
+    set_container(container)
+"""
+
+import logging
+import os
+from functools import cached_property
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Компоненты, которые умеет строить контейнер (и которые можно подменить)
+COMPONENTS = ("engine", "session_factory", "bot", "dispatcher", "rate_limiter", "cache", "notifications")
+
+
+class Container:
+    """Application components, each built on first access."""
+
+    def __init__(self, **overrides: Any) -> None:
+        """Create a container.
+
+        Args:
+            **overrides: Ready components to use instead of building them
+        """
+        self.override(**overrides)
+
+    def override(self, **components: Any) -> None:
+        """Replace components (built or not)."""
+        unknown = set(components) - set(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown components: {', '.join(sorted(unknown))}")
+        # cached_property хранит значение в __dict__, туда же кладем подмену
+        self.__dict__.update(components)
+
+    def is_built(self, name: str) -> bool:
+        """Whether a component has been built (or overridden)."""
+        return name in self.__dict__
+
+    @cached_property
+    def engine(self) -> Any:
+        """Async SQLAlchemy engine."""
+        from database.connection import create_engine_from_env
+
+        return create_engine_from_env()
+
+    @cached_property
+    def session_factory(self) -> Any:
+        """Factory of async sessions bound to ``engine``."""
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.orm import sessionmaker
+
+        return sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    @cached_property
+    def bot(self) -> Any:
+        """Telegram bot (Bot API JSON goes through ``utils.codec``)."""
+        from aiogram import Bot
+        from aiogram.client.session.aiohttp import AiohttpSession
+
+        from utils import codec
+
+        token = os.getenv("BOT_TOKEN")
+        if not token:
+            raise ValueError("BOT_TOKEN environment variable is not set")
+        return Bot(token=token, session=AiohttpSession(json_loads=codec.loads, json_dumps=codec.dumps))
+
+    @cached_property
+    def dispatcher(self) -> Any:
+        """Dispatcher; passes the container to handlers."""
+        from aiogram import Dispatcher
+        from aiogram.fsm.storage.memory import MemoryStorage
+
+        return Dispatcher(storage=MemoryStorage(), container=self)
+
+    @cached_property
+    def rate_limiter(self) -> Any:
+        """Rate limiter (Redis when REDIS_URL is set)."""
+        from utils.rate_limiter import get_rate_limiter
+
+        return get_rate_limiter()
+
+    @cached_property
+    def cache(self) -> Any:
+        """General-purpose in-process cache."""
+        from utils.performance import CacheManager
+
+        return CacheManager()
+
+    @cached_property
+    def notifications(self) -> Any:
+        """Notification service (None if it could not be created)."""
+        from utils.notifications import get_notification_service
+
+        return get_notification_service(self.bot)
+
+    async def close(self) -> None:
+        """Release the components that hold connections."""
+        if self.is_built("bot"):
+            await self.bot.session.close()
+        if self.is_built("rate_limiter") and hasattr(self.rate_limiter, "close"):
+            await self.rate_limiter.close()
+        if self.is_built("engine"):
+            await self.engine.dispose()
+
+
+_container: Optional[Container] = None
+
+
+def get_container() -> Container:
+    """Get the process-wide container."""
+    global _container
+    if _container is None:
+        _container = Container()
+    return _container
+
+
+def set_container(container: Optional[Container]) -> None:
+    """Replace the process-wide container (None resets it)."""
+    global _container
+    _container = container
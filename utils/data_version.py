@@ -0,0 +1,23 @@
+"""Dataset version used as a cache key for reports and exports."""
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Request
+
+
+async def get_data_version(session: AsyncSession) -> str:
+    """Get a cheap fingerprint of the requests table.
+
+    Changes whenever a request is created, deleted or updated (every write
+    path bumps ``updated_at``), so results cached under it never go stale.
+
+    Args:
+        session: SQLAlchemy async session
+
+    Returns:
+        Version string
+    """
+    stmt = select(func.count(Request.id), func.max(Request.id), func.max(Request.updated_at))
+    count, max_id, last_update = (await session.execute(stmt)).one()
+    return f"{count}:{max_id or 0}:{last_update.isoformat() if last_update else ''}"
@@ -0,0 +1,411 @@
+"""Delivery helpers: HTML-safe message splitting and per-chat send throttling."""
+
+import asyncio
+import html
+import logging
+import os
+import re
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional, Protocol
+
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import BufferedInputFile, InputMediaPhoto
+
+logger = logging.getLogger(__name__)
+
+# Telegram limit for a single text message (UTF-16 code units after parsing)
+MESSAGE_LIMIT = 4096
+# Above this number of chunks the text is sent as a document instead
+MAX_CHUNKS = int(os.getenv("DELIVERY_MAX_CHUNKS", 5))
+# Minimal pause between two sends into the same chat, seconds
+PER_CHAT_INTERVAL = float(os.getenv("DELIVERY_PER_CHAT_INTERVAL", "0.3"))
+# Maximum number of Bot API calls in flight across all chats
+GLOBAL_CONCURRENCY = int(os.getenv("DELIVERY_GLOBAL_CONCURRENCY", 25))
+# Chats remembered by the limiter before those with past slots are dropped
+SLOT_PRUNE_SIZE = 1024
+# Telegram accepts 2-10 items per media group
+MEDIA_GROUP_LIMIT = 10
+# Maximum number of documents of one request being sent at the same time
+DOCUMENT_CONCURRENCY = int(os.getenv("DELIVERY_DOCUMENT_CONCURRENCY", 3))
+
+_TOKEN_RE = re.compile(r"<[^>]*>|&#?\w+;|\n|[ \t]+|[^<&\n \t]+|[<&]")
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z][\w-]*)[^>]*>")
+
+
+def _utf16_len(text: str) -> int:
+    """Length of text as counted by Telegram (UTF-16 code units)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _closing_tags(stack: list[tuple[str, str]]) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(stack))
+
+
+def _apply_tag(stack: list[tuple[str, str]], token: str) -> None:
+    """Update the open-tag stack with a single token."""
+    match = _TAG_RE.fullmatch(token)
+    if not match:
+        return
+    closing, name = match.group(1), match.group(2).lower()
+    if not closing:
+        stack.append((name, token))
+        return
+    for index in range(len(stack) - 1, -1, -1):
+        if stack[index][0] == name:
+            del stack[index]
+            return
+
+
+class _ChunkBuilder:
+    """Accumulate tokens into chunks, closing and reopening tags at the cuts."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.chunks: list[str] = []
+        self.stack: list[tuple[str, str]] = []
+        self._start()
+
+    def _start(self) -> None:
+        opening = "".join(tag for _, tag in self.stack)
+        self.parts = [opening]
+        self.size = _utf16_len(opening)
+        self.has_content = False
+
+    def fits(self, tokens: list[str]) -> bool:
+        stack = list(self.stack)
+        for token in tokens:
+            _apply_tag(stack, token)
+        added = sum(_utf16_len(token) for token in tokens)
+        return self.size + added + _utf16_len(_closing_tags(stack)) <= self.limit
+
+    def add(self, tokens: list[str]) -> None:
+        for token in tokens:
+            _apply_tag(self.stack, token)
+            self.parts.append(token)
+            self.size += _utf16_len(token)
+            if token.strip():
+                self.has_content = True
+
+    def flush(self) -> None:
+        if self.has_content:
+            chunk = ("".join(self.parts) + _closing_tags(self.stack)).strip()
+            self.chunks.append(chunk)
+        self._start()
+
+
+def _split_token(token: str, size: int) -> list[str]:
+    """Split an oversized plain-text token into pieces of at most ``size`` chars."""
+    return [token[i:i + size] for i in range(0, len(token), size)]
+
+
+def split_html(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Split Telegram HTML into chunks that each fit into one message.
+
+    Cuts are made on line boundaries where possible, never inside a tag or an
+    HTML entity. Tags left open at a cut are closed at the end of the chunk and
+    reopened at the start of the next one, so every chunk is valid HTML.
+
+    Args:
+        text: HTML text (Telegram subset)
+        limit: Maximum chunk length in UTF-16 code units
+
+    Returns:
+        List of non-empty chunks (empty list for blank text)
+    """
+    if _utf16_len(text) <= limit:
+        return [text] if text.strip() else []
+
+    builder = _ChunkBuilder(limit)
+    # Leave room for reopened/closed tags when a single token must be cut
+    token_budget = max(limit // 2, 1)
+
+    lines: list[list[str]] = [[]]
+    for token in _TOKEN_RE.findall(text):
+        lines[-1].append(token)
+        if token == "\n":
+            lines.append([])
+
+    for line in lines:
+        if builder.fits(line):
+            builder.add(line)
+            continue
+        builder.flush()
+        if builder.fits(line):
+            builder.add(line)
+            continue
+        # The line alone does not fit: fall back to token-by-token filling
+        for token in line:
+            pieces = [token] if _TAG_RE.fullmatch(token) or len(token) <= token_budget else _split_token(token, token_budget)
+            for piece in pieces:
+                if not builder.fits([piece]):
+                    builder.flush()
+                builder.add([piece])
+
+    builder.flush()
+    return builder.chunks
+
+
+def html_to_plain_text(text: str) -> str:
+    """Strip Telegram HTML tags and unescape entities."""
+    return html.unescape(_TAG_RE.sub("", text))
+
+
+class ChatSendLimiter:
+    """Throttle outgoing Bot API calls per chat and globally.
+
+    Calls into the same chat start at least ``per_chat_interval`` apart (each
+    call reserves the next free slot of its chat, so concurrent callers are
+    spread out instead of bursting); the total number of calls in flight is
+    capped by ``global_concurrency``. Callers that need ordering simply await
+    their sends one by one. ``TelegramRetryAfter`` pushes the chat's next slot
+    back by the requested time and the call is retried.
+    """
+
+    def __init__(
+        self,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+        global_concurrency: int = GLOBAL_CONCURRENCY,
+        retries: int = 3,
+    ) -> None:
+        """Initialize limiter."""
+        self.per_chat_interval = per_chat_interval
+        self.retries = retries
+        self._global = asyncio.Semaphore(global_concurrency)
+        self._next_slot: dict[int, float] = {}
+        self._prune_at = SLOT_PRUNE_SIZE
+
+    def _reserve_slot(self, chat_id: int) -> float:
+        """Reserve the next start time for a call into ``chat_id``."""
+        now = time.monotonic()
+        if len(self._next_slot) >= self._prune_at:
+            # Прошедший слот равносилен его отсутствию; без чистки словарь растет с каждым новым чатом
+            self._next_slot = {chat: slot for chat, slot in self._next_slot.items() if slot > now}
+            self._prune_at = max(SLOT_PRUNE_SIZE, 2 * len(self._next_slot))
+        slot = max(now, self._next_slot.get(chat_id, 0.0))
+        self._next_slot[chat_id] = slot + self.per_chat_interval
+        return slot - now
+
+    async def send(self, chat_id: int, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Call ``func(*args, **kwargs)`` respecting the limits for ``chat_id``.
+
+        Args:
+            chat_id: Target chat ID
+            func: Coroutine function performing the Bot API call
+
+        Returns:
+            Whatever ``func`` returns
+        """
+        attempt = 0
+        while True:
+            wait = self._reserve_slot(chat_id)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                async with self._global:
+                    return await func(*args, **kwargs)
+            except TelegramRetryAfter as e:
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                logger.warning(f"Flood control for chat {chat_id}, retry in {e.retry_after}s")
+                self._next_slot[chat_id] = time.monotonic() + e.retry_after
+
+
+class Attachment(Protocol):
+    """Anything carrying a Telegram file reference (e.g. ``models.File``)."""
+
+    file_id: str
+    file_type: str
+
+
+# Global limiter instance
+send_limiter = ChatSendLimiter()
+
+
+async def _show_first_chunk(
+    message: types.Message,
+    text: str,
+    reply_markup: Optional[types.InlineKeyboardMarkup],
+    edit: bool,
+    limiter: ChatSendLimiter,
+) -> bool:
+    """Edit the original message (or answer) with the first chunk.
+
+    Never raises: whatever happens to the first chunk, the rest still follow.
+    """
+    chat_id = message.chat.id
+    if edit:
+        try:
+            await limiter.send(chat_id, message.edit_text, text, reply_markup=reply_markup, parse_mode="HTML")
+            return True
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                # Сообщение уже показывает этот текст
+                return True
+            logger.warning(f"Cannot edit message in chat {chat_id}, sending a new one: {e}")
+        except Exception as e:
+            # Правка могла и дойти (сетевая ошибка) - не дублируем ее новым сообщением
+            logger.error(f"Error editing first chunk in chat {chat_id}: {e}", exc_info=True)
+            return False
+    try:
+        await limiter.send(chat_id, message.answer, text, reply_markup=reply_markup, parse_mode="HTML")
+        return True
+    except Exception as e:
+        logger.error(f"Error delivering first chunk to chat {chat_id}: {e}", exc_info=True)
+        return False
+
+
+async def _send_continuation(
+    message: types.Message,
+    chunks: list[str],
+    reply_markup: Optional[types.InlineKeyboardMarkup],
+    limiter: ChatSendLimiter,
+) -> int:
+    """Send the remaining chunks in order; a failed chunk does not stop the rest."""
+    delivered = 0
+    for index, chunk in enumerate(chunks):
+        markup = reply_markup if index == len(chunks) - 1 else None
+        try:
+            await limiter.send(message.chat.id, message.answer, chunk, reply_markup=markup, parse_mode="HTML")
+            delivered += 1
+        except Exception as e:
+            logger.error(f"Error delivering chunk {index + 2} to chat {message.chat.id}: {e}", exc_info=True)
+    return delivered
+
+
+async def send_long_text(
+    message: types.Message,
+    text: str,
+    reply_markup: Optional[types.InlineKeyboardMarkup] = None,
+    *,
+    edit: bool = True,
+    document_name: str = "report.txt",
+    max_chunks: int = MAX_CHUNKS,
+    limiter: Optional[ChatSendLimiter] = None,
+) -> int:
+    """Deliver HTML text of any length into the chat of ``message``.
+
+    Short text behaves exactly like ``edit_text``. Longer text is split with
+    :func:`split_html`: the first chunk replaces the original message (or is
+    answered if the edit is rejected), then the rest follow in order, keyboard
+    on the last one. Text needing more than ``max_chunks`` messages is attached
+    as a plain text document instead.
+
+    Args:
+        message: Message to edit (e.g. ``callback.message``)
+        text: HTML text
+        reply_markup: Keyboard for the final message
+        edit: Edit ``message`` instead of answering with a new one
+        document_name: File name for the document fallback
+        max_chunks: Chunk count above which the document fallback is used
+        limiter: Send limiter (global one by default)
+
+    Returns:
+        Number of messages delivered
+    """
+    limiter = limiter or send_limiter
+    chunks = split_html(text) or [text]
+
+    if len(chunks) > max_chunks:
+        notice = (
+            f"{html.escape(html_to_plain_text(chunks[0].splitlines()[0]))}\n\n"
+            "📎 Список слишком большой для сообщения — полная версия во вложении."
+        )
+        document = BufferedInputFile(html_to_plain_text(text).encode("utf-8"), filename=document_name)
+        # Уведомление должно прийти раньше вложения, даже если правку пришлось заменить ответом
+        shown = await _show_first_chunk(message, notice, reply_markup, edit, limiter)
+        try:
+            await limiter.send(message.chat.id, message.answer_document, document)
+        except Exception as e:
+            logger.error(f"Error sending document to chat {message.chat.id}: {e}")
+            return int(shown)
+        return int(shown) + 1
+
+    if len(chunks) == 1:
+        return int(await _show_first_chunk(message, chunks[0], reply_markup, edit, limiter))
+
+    # Продолжение - только после первой части: ответ вместо отклоненной правки иначе пришел бы последним
+    shown = await _show_first_chunk(message, chunks[0], None, edit, limiter)
+    return int(shown) + await _send_continuation(message, chunks[1:], reply_markup, limiter)
+
+
+async def _send_photos(
+    message: types.Message,
+    photos: list[str],
+    caption: Optional[str],
+    limiter: ChatSendLimiter,
+) -> int:
+    """Send photos as media groups of up to ``MEDIA_GROUP_LIMIT`` items."""
+    chat_id = message.chat.id
+    sent = 0
+    for start in range(0, len(photos), MEDIA_GROUP_LIMIT):
+        batch = photos[start:start + MEDIA_GROUP_LIMIT]
+        batch_caption = caption if start == 0 else None
+        try:
+            if len(batch) == 1:
+                await limiter.send(chat_id, message.answer_photo, photo=batch[0], caption=batch_caption)
+            else:
+                media = [
+                    InputMediaPhoto(media=file_id, caption=batch_caption if index == 0 else None)
+                    for index, file_id in enumerate(batch)
+                ]
+                await limiter.send(chat_id, message.answer_media_group, media=media)
+            sent += len(batch)
+        except Exception as e:
+            logger.error(f"Error sending photos to chat {chat_id}: {e}", exc_info=True)
+    return sent
+
+
+async def _send_documents(
+    message: types.Message,
+    documents: list[str],
+    limiter: ChatSendLimiter,
+) -> int:
+    """Send documents concurrently, at most ``DOCUMENT_CONCURRENCY`` at a time."""
+    semaphore = asyncio.Semaphore(DOCUMENT_CONCURRENCY)
+
+    async def send_one(file_id: str) -> bool:
+        async with semaphore:
+            try:
+                await limiter.send(message.chat.id, message.answer_document, document=file_id)
+                return True
+            except Exception as e:
+                logger.error(f"Error sending document to chat {message.chat.id}: {e}", exc_info=True)
+                return False
+
+    results = await asyncio.gather(*(send_one(file_id) for file_id in documents))
+    return sum(results)
+
+
+async def send_attachments(
+    message: types.Message,
+    files: list[Attachment],
+    caption: Optional[str] = None,
+    *,
+    limiter: Optional[ChatSendLimiter] = None,
+) -> int:
+    """Send request attachments into the chat of ``message``.
+
+    Photos are grouped into media groups (one API call per 10 photos, caption
+    on the first one); documents are sent concurrently next to them.
+
+    Args:
+        message: Message whose chat receives the attachments
+        files: Attachments with ``file_id`` and ``file_type`` (photo/document)
+        caption: Caption for the first photo
+        limiter: Send limiter (global one by default)
+
+    Returns:
+        Number of attachments delivered
+    """
+    limiter = limiter or send_limiter
+    photos = [file.file_id for file in files if file.file_type == "photo"]
+    documents = [file.file_id for file in files if file.file_type == "document"]
+
+    sent_photos, sent_documents = await asyncio.gather(
+        _send_photos(message, photos, caption, limiter),
+        _send_documents(message, documents, limiter),
+    )
+    return sent_photos + sent_documents
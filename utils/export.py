@@ -1,64 +1,337 @@
+"""Streaming request exports.
+
+Rows are read from the database in batches (``session.stream`` with
+``yield_per``) as plain column tuples without loading ORM objects, and each
+batch is handed to a format writer right away, so memory use does not grow
+with the size of the export. XLSX and Parquet/Arrow writers need the optional
+``xlsxwriter`` and ``pyarrow`` packages (``pip install .[export]``).
+"""
+
 import csv
 import io
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
 from datetime import datetime
+from typing import IO, Any, Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from models import Request, Status, User
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 500))
+
+# (key, header) in row order
+EXPORT_COLUMNS: list[tuple[str, str]] = [
+    ("id", "ID заявки"),
+    ("title", "Название"),
+    ("description", "Описание"),
+    ("location", "Местоположение"),
+    ("priority", "Приоритет"),
+    ("status", "Статус"),
+    ("user", "Пользователь"),
+    ("created_at", "Дата создания"),
+    ("completed_at", "Дата выполнения"),
+    ("assignee", "Исполнитель"),
+]
+
+ExportRow = tuple[Any, ...]
+
+
+class ExportFormatUnavailable(Exception):
+    """Raised when a format needs an optional package that is not installed."""
+
+
+def _person(first_name: Optional[str], last_name: Optional[str], username: Optional[str] = None) -> str:
+    name = f"{first_name or ''} {last_name or ''}".strip()
+    return f"{name} (@{username or 'N/A'})".strip() if username is not None else name
+
+
+def _filtered(stmt: Select, status: Optional[Status], date_from: Optional[datetime], date_to: Optional[datetime]) -> Select:
+    if status:
+        stmt = stmt.where(Request.status == status)
+    if date_from:
+        stmt = stmt.where(Request.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(Request.created_at <= date_to)
+    return stmt
+
+
+async def count_export_rows(
+    session: AsyncSession,
+    status: Optional[Status] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> int:
+    """Number of rows an export with these filters would contain."""
+    return await session.scalar(_filtered(select(func.count(Request.id)), status, date_from, date_to)) or 0
+
+
+async def iter_export_rows(
+    session: AsyncSession,
+    status: Optional[Status] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[list[ExportRow]]:
+    """Stream export rows in batches.
 
-from database.connection import get_db
-from models import Request, Status
-
-
-async def export_requests_to_csv(requests: list[Request]) -> str:
-    """Экспорт заявок в CSV"""
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=';')
-
-    # Заголовки
-    writer.writerow([
-        'ID заявки',
-        'Название',
-        'Описание',
-        'Местоположение',
-        'Приоритет',
-        'Статус',
-        'Пользователь',
-        'Дата создания',
-        'Дата выполнения',
-        'Исполнитель'
-    ])
-
-    # Данные
-    for request in requests:
-        writer.writerow([
-            request.id,
-            request.title,
-            request.description,
-            request.location,
-            request.priority.value,
-            request.status.value,
-            f"{request.user.first_name or ''} {request.user.last_name or ''} (@{request.user.username or 'N/A'})".strip(),
-            request.created_at.strftime('%d.%m.%Y %H:%M'),
-            request.completed_at.strftime('%d.%m.%Y %H:%M') if request.completed_at else '',
-            f"{request.assignee.first_name or ''} {request.assignee.last_name or ''}".strip() if request.assignee else ''
-        ])
-
-    return output.getvalue()
-
-async def get_requests_for_export(status: Status = None, date_from: datetime = None, date_to: datetime = None) -> list[Request]:
-    """Получить заявки для экспорта"""
-    async for session in get_db():
-        stmt = session.query(Request).options(
-            session.joinedload(Request.user),
-            session.joinedload(Request.assignee)
+    Args:
+        session: SQLAlchemy async session
+        status: Only requests with this status
+        date_from: Only requests created at or after this moment
+        date_to: Only requests created at or before this moment
+        batch_size: Rows per batch
+
+    Yields:
+        Lists of row tuples in ``EXPORT_COLUMNS`` order
+    """
+    assignee = aliased(User)
+    stmt = _filtered(
+        select(
+            Request.id, Request.title, Request.description, Request.location,
+            Request.priority, Request.status,
+            User.first_name, User.last_name, User.username,
+            Request.created_at, Request.completed_at,
+            assignee.first_name, assignee.last_name,
+        )
+        .join(User, Request.user_id == User.id)
+        .outerjoin(assignee, Request.assigned_to == assignee.id)
+        .order_by(Request.id)
+        .execution_options(yield_per=batch_size),
+        status, date_from, date_to,
+    )
+    result = await session.stream(stmt)
+    async for partition in result.partitions(batch_size):
+        yield [
+            (
+                row[0], row[1], row[2], row[3], row[4].value, row[5].value,
+                _person(row[6], row[7], row[8]), row[9], row[10], _person(row[11], row[12]),
+            )
+            for row in partition
+        ]
+
+
+class ExportWriter(ABC):
+    """Base class of format writers: ``write_batch`` repeatedly, then ``close``."""
+
+    extension = ""
+    media_type = "application/octet-stream"
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        """Start writing into a binary file object."""
+        self.fileobj = fileobj
+        self.rows = 0
+
+    @abstractmethod
+    def write_batch(self, rows: list[ExportRow]) -> None:
+        """Write a batch of rows."""
+
+    def close(self) -> None:
+        """Finish the output; the file object itself stays open."""
+
+
+class CsvExportWriter(ExportWriter):
+    """Semicolon separated CSV with BOM (opens correctly in Excel).
+
+    ``headers`` replaces the ``EXPORT_COLUMNS`` header row for callers
+    writing rows of their own shape (the report bundle).
+    """
+
+    extension = "csv"
+    media_type = "text/csv"
+
+    def __init__(self, fileobj: IO[bytes], headers: Optional[list[str]] = None) -> None:
+        super().__init__(fileobj)
+        self._text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._text, delimiter=";")
+        self._writer.writerow(headers or [header for _, header in EXPORT_COLUMNS])
+
+    def write_batch(self, rows: list[ExportRow]) -> None:
+        self._writer.writerows(
+            [value.strftime("%d.%m.%Y %H:%M") if isinstance(value, datetime) else value for value in row]
+            for row in rows
         )
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self._text.flush()
+        self._text.detach()
+
+
+class JsonlExportWriter(ExportWriter):
+    """One JSON object per line."""
+
+    extension = "jsonl"
+    media_type = "application/x-ndjson"
+
+    _keys = [key for key, _ in EXPORT_COLUMNS]
+
+    def write_batch(self, rows: list[ExportRow]) -> None:
+        lines = [
+            json.dumps(
+                {key: value.isoformat() if isinstance(value, datetime) else value for key, value in zip(self._keys, row)},
+                ensure_ascii=False,
+            )
+            for row in rows
+        ]
+        self.fileobj.write(("\n".join(lines) + "\n").encode("utf-8"))
+        self.rows += len(rows)
+
+
+class XlsxExportWriter(ExportWriter):
+    """XLSX in xlsxwriter's constant memory mode (each row is flushed as written)."""
+
+    extension = "xlsx"
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        super().__init__(fileobj)
+        try:
+            import xlsxwriter
+        except ImportError as e:
+            raise ExportFormatUnavailable("XLSX export requires xlsxwriter") from e
+
+        self._workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True})
+        self._sheet = self._workbook.add_worksheet("Заявки")
+        self._date_format = self._workbook.add_format({"num_format": "dd.mm.yyyy hh:mm"})
+        header_format = self._workbook.add_format({"bold": True})
+        self._sheet.write_row(0, 0, [header for _, header in EXPORT_COLUMNS], header_format)
+
+    def write_batch(self, rows: list[ExportRow]) -> None:
+        for row in rows:
+            self.rows += 1
+            for column, value in enumerate(row):
+                if isinstance(value, datetime):
+                    self._sheet.write_datetime(self.rows, column, value, self._date_format)
+                elif value is not None:
+                    self._sheet.write(self.rows, column, value)
+
+    def close(self) -> None:
+        self._workbook.close()
+
+
+def _arrow_schema() -> Any:
+    import pyarrow as pa
+
+    types = {"id": pa.int64(), "created_at": pa.timestamp("us"), "completed_at": pa.timestamp("us")}
+    return pa.schema([(key, types.get(key, pa.string())) for key, _ in EXPORT_COLUMNS])
+
+
+class _ArrowExportWriter(ExportWriter):
+    """Base of columnar writers: each batch becomes one Arrow record batch."""
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        super().__init__(fileobj)
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ExportFormatUnavailable(f"{self.extension} export requires pyarrow") from e
+
+        self._pa = pa
+        self._schema = _arrow_schema()
+
+    def _record_batch(self, rows: list[ExportRow]) -> Any:
+        columns = list(zip(*rows))
+        return self._pa.RecordBatch.from_arrays(
+            [self._pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+
+
+class ParquetExportWriter(_ArrowExportWriter):
+    """Parquet file with one row group per batch."""
+
+    extension = "parquet"
+    media_type = "application/vnd.apache.parquet"
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        super().__init__(fileobj)
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(fileobj, self._schema, compression="zstd")
+
+    def write_batch(self, rows: list[ExportRow]) -> None:
+        if rows:
+            self._writer.write_batch(self._record_batch(rows))
+            self.rows += len(rows)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ArrowExportWriter(_ArrowExportWriter):
+    """Arrow IPC file (Feather v2)."""
+
+    extension = "arrow"
+    media_type = "application/vnd.apache.arrow.file"
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        super().__init__(fileobj)
+        self._writer = self._pa.ipc.new_file(fileobj, self._schema)
+
+    def write_batch(self, rows: list[ExportRow]) -> None:
+        if rows:
+            self._writer.write_batch(self._record_batch(rows))
+            self.rows += len(rows)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+EXPORT_WRITERS: dict[str, type[ExportWriter]] = {
+    "csv": CsvExportWriter,
+    "jsonl": JsonlExportWriter,
+    "xlsx": XlsxExportWriter,
+    "parquet": ParquetExportWriter,
+    "arrow": ArrowExportWriter,
+}
+
+
+async def export_requests(
+    session: AsyncSession,
+    fileobj: IO[bytes],
+    fmt: str = "csv",
+    status: Optional[Status] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Export requests into ``fileobj`` batch by batch.
 
-        if status:
-            stmt = stmt.filter(Request.status == status)
+    Args:
+        session: SQLAlchemy async session
+        fileobj: Binary file object receiving the output
+        fmt: Output format (key of ``EXPORT_WRITERS``)
+        status: Only requests with this status
+        date_from: Only requests created at or after this moment
+        date_to: Only requests created at or before this moment
+        batch_size: Rows per batch
+        on_batch: Called with the number of rows written so far
 
-        if date_from:
-            stmt = stmt.filter(Request.created_at >= date_from)
+    Returns:
+        Number of exported rows
 
-        if date_to:
-            stmt = stmt.filter(Request.created_at <= date_to)
+    Raises:
+        ValueError: If the format is unknown
+        ExportFormatUnavailable: If the format's optional package is missing
+    """
+    if fmt not in EXPORT_WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
 
-        stmt = stmt.order_by(Request.created_at.desc())
-        result = await session.execute(stmt)
-        return result.scalars().all()
+    writer = EXPORT_WRITERS[fmt](fileobj)
+    try:
+        async for batch in iter_export_rows(session, status, date_from, date_to, batch_size):
+            writer.write_batch(batch)
+            if on_batch:
+                on_batch(writer.rows)
+    finally:
+        writer.close()
+    return writer.rows
@@ -0,0 +1,502 @@
+"""Background export jobs.
+
+Exports are built by a bounded pool of worker tasks instead of the callback
+handler. Identical requests submitted while a job is queued or running are
+coalesced into that job, and a status message is edited with the progress;
+jobs can be cancelled. Builders write into a temporary file that is
+uploaded from disk and deleted afterwards, so an export never sits in
+memory as a whole. Once a file has been uploaded, the ``file_id``
+Telegram assigned to it is kept per dataset version in a bounded LRU, so an
+unchanged export is re-sent without rebuilding; the file itself is not kept.
+Every job is recorded in the ``export_jobs`` table.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import IO, Any, Optional
+
+from aiogram import Bot
+from aiogram.types import FSInputFile
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import ExportJob, Priority, Request, Status
+from utils.data_version import get_data_version
+from utils.delivery import ChatSendLimiter, send_limiter
+from utils.export import EXPORT_WRITERS, count_export_rows, export_requests
+from utils.keyboard import get_export_job_keyboard
+from utils.performance import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+EXPORT_WORKERS: int = int(os.getenv("EXPORT_WORKERS", 2))
+EXPORT_QUEUE_SIZE: int = int(os.getenv("EXPORT_QUEUE_SIZE", 50))
+EXPORT_PROGRESS_INTERVAL: float = float(os.getenv("EXPORT_PROGRESS_INTERVAL", 3.0))
+EXPORT_CACHE_SIZE: int = int(os.getenv("EXPORT_CACHE_SIZE", 32))
+
+KIND_TITLES = {
+    "month": "Отчет за месяц",
+    "stats": "Статистика",
+    "all": "Все заявки",
+    "requests": "Выгрузка заявок",
+}
+
+ProgressCallback = Callable[[int], None]
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    """Built export; without ``path`` and ``file_id`` there was nothing to export."""
+
+    filename: str
+    # Временный файл; удаляется после отправки
+    path: Optional[str]
+    caption: str
+    # Документ, уже загруженный в Telegram: отправляется повторно без файла
+    file_id: Optional[str] = None
+
+
+ExportBuilder = Callable[[AsyncSession, dict[str, Any], ProgressCallback], Awaitable[ExportResult]]
+
+
+class ExportQueueFull(Exception):
+    """Raised when too many export jobs are waiting."""
+
+
+@dataclass
+class ActiveJob:
+    """In-memory state of a queued or running job."""
+
+    id: int
+    kind: str
+    params: dict[str, Any]
+    key: str
+    chat_ids: list[int]
+    status_messages: list[tuple[int, int]] = field(default_factory=list)
+    progress: int = 0
+    state: str = "queued"
+    cancelled: bool = False
+    cache_key: str = ""
+    task: Optional[asyncio.Task] = None
+
+
+def job_key(kind: str, params: dict[str, Any]) -> str:
+    """Key identifying equal export requests."""
+    return f"{kind}:{json.dumps(params, sort_keys=True)}"
+
+
+def progress_text(kind: str, progress: int, state: str = "running") -> str:
+    """Text of the status message."""
+    title = KIND_TITLES.get(kind, kind)
+    if state == "queued":
+        return f"⏳ {title}: в очереди..."
+    filled = progress // 10
+    return f"⏳ {title}: {'▓' * filled}{'░' * (10 - filled)} {progress}%"
+
+
+def _temp_file() -> IO[bytes]:
+    """Temporary file for an export; the job manager deletes it after delivery."""
+    return tempfile.NamedTemporaryFile(prefix="export_", delete=False)  # noqa: SIM115
+
+
+async def _run_export(
+    session: AsyncSession,
+    progress: ProgressCallback,
+    fmt: str = "csv",
+    status: Optional[Status] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> tuple[int, Optional[str]]:
+    """Run ``utils.export.export_requests`` into a temporary file reporting progress.
+
+    Returns:
+        Number of rows and path of the file; (0, None) when nothing matches
+    """
+    total = await count_export_rows(session, status, date_from, date_to)
+    if not total:
+        return 0, None
+
+    def on_batch(rows: int) -> None:
+        progress(min(99, rows * 100 // total))
+
+    output = _temp_file()
+    try:
+        with output:
+            rows = await export_requests(session, output, fmt, status, date_from, date_to, on_batch=on_batch)
+    except BaseException:
+        # В том числе отмена задания
+        os.unlink(output.name)
+        raise
+    return rows, output.name
+
+
+async def build_month_report(session: AsyncSession, params: dict[str, Any], progress: ProgressCallback) -> ExportResult:
+    """Отчет по заявкам за последние ``days`` дней до ``as_of``"""
+    as_of = datetime.fromisoformat(params["as_of"])
+    since = as_of - timedelta(days=params.get("days", 30))
+
+    rows, path = await _run_export(session, progress, date_from=since)
+    if not rows:
+        return ExportResult("", None, "Нет данных за последний месяц")
+    return ExportResult(
+        f"monthly_report_{as_of.strftime('%Y%m%d')}.csv",
+        path,
+        f"📊 Отчет по заявкам за месяц\nПериод: {since.strftime('%d.%m.%Y')} - {as_of.strftime('%d.%m.%Y')}\n"
+        f"Всего заявок: {rows}",
+    )
+
+
+async def build_all_report(session: AsyncSession, params: dict[str, Any], progress: ProgressCallback) -> ExportResult:  # noqa: ARG001
+    """Все заявки CSV"""
+    rows, path = await _run_export(session, progress)
+    if not rows:
+        return ExportResult("", None, "Нет заявок для экспорта")
+    return ExportResult(
+        f"all_requests_{datetime.now().strftime('%Y%m%d')}.csv",
+        path,
+        f"📋 Все заявки ({rows})",
+    )
+
+
+async def build_stats_report(session: AsyncSession, params: dict[str, Any], progress: ProgressCallback) -> ExportResult:  # noqa: ARG001
+    """Статистический отчет"""
+    stats_lines = [
+        "СТАТИСТИКА РАБОТЫ",
+        f"Отчет от: {datetime.now().strftime('%d.%m.%Y %H:%M')}",
+        "",
+    ]
+
+    total = await session.scalar(select(func.count(Request.id))) or 0
+    by_priority = dict((await session.execute(select(Request.priority, func.count(Request.id)).group_by(Request.priority))).all())
+    progress(50)
+    by_status = dict((await session.execute(select(Request.status, func.count(Request.id)).group_by(Request.status))).all())
+    progress(90)
+
+    stats_lines.extend([
+        "ОБЩАЯ СТАТИСТИКА:",
+        f"Всего заявок: {total}",
+        f"Выполнено: {by_status.get(Status.COMPLETED, 0)}",
+        f"Отклонено: {by_status.get(Status.REJECTED, 0)}",
+        "",
+        "ПО ПРИОРИТЕТАМ:",
+        *(f"{priority.value}: {by_priority.get(priority, 0)}" for priority in [Priority.HIGH, Priority.MEDIUM, Priority.LOW]),
+        "",
+        "ПО СТАТУСАМ:",
+        *(f"{status.value}: {by_status.get(status, 0)}" for status in [Status.OPEN, Status.IN_PROGRESS, Status.COMPLETED, Status.REJECTED]),
+    ])
+    with _temp_file() as output:
+        output.write("\n".join(stats_lines).encode("utf-8"))
+    return ExportResult(
+        f"stats_report_{datetime.now().strftime('%Y%m%d_%H%M')}.txt",
+        output.name,
+        "📊 Статистический отчет",
+    )
+
+
+async def build_requests_export(session: AsyncSession, params: dict[str, Any], progress: ProgressCallback) -> ExportResult:
+    """Выгрузка заявок в формате ``format`` (csv, jsonl, xlsx, parquet, arrow) с фильтрами"""
+    fmt = params.get("format", "csv")
+    status = Status[params["status"]] if params.get("status") else None
+    date_from = datetime.fromisoformat(params["date_from"]) if params.get("date_from") else None
+    date_to = datetime.fromisoformat(params["date_to"]) if params.get("date_to") else None
+
+    rows, path = await _run_export(session, progress, fmt, status, date_from, date_to)
+    if not rows:
+        return ExportResult("", None, "Нет заявок для экспорта")
+
+    return ExportResult(
+        f"requests_{datetime.now().strftime('%Y%m%d')}.{EXPORT_WRITERS[fmt].extension}",
+        path,
+        f"📋 Заявки ({rows}), формат {fmt.upper()}",
+    )
+
+
+EXPORT_BUILDERS: dict[str, ExportBuilder] = {
+    "month": build_month_report,
+    "all": build_all_report,
+    "stats": build_stats_report,
+    "requests": build_requests_export,
+}
+
+
+class ExportJobManager:
+    """Queue of export jobs processed by a bounded pool of workers."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: Callable[[], AsyncSession],
+        workers: int = EXPORT_WORKERS,
+        progress_interval: float = EXPORT_PROGRESS_INTERVAL,
+        cache_size: int = EXPORT_CACHE_SIZE,
+        builders: Optional[dict[str, ExportBuilder]] = None,
+        limiter: Optional[ChatSendLimiter] = None,
+    ) -> None:
+        """Initialize manager; workers start on first submit."""
+        self.bot = bot
+        self.session_factory = session_factory
+        self.worker_count = workers
+        self.progress_interval = progress_interval
+        self.builders = builders or EXPORT_BUILDERS
+        self.limiter = limiter or send_limiter
+        self.results = LRUCache(max_size=cache_size)
+        self.queue: asyncio.Queue[ActiveJob] = asyncio.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._active: dict[int, ActiveJob] = {}
+        self._by_key: dict[str, ActiveJob] = {}
+        self._submit_lock = asyncio.Lock()
+        self._workers: list[asyncio.Task] = []
+
+    def _ensure_workers(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def submit(
+        self,
+        kind: str,
+        params: dict[str, Any],
+        chat_id: int,
+        requested_by: Optional[int] = None,
+    ) -> tuple[ActiveJob, bool]:
+        """Queue an export or join an identical job that is not finished yet.
+
+        Args:
+            kind: Export kind (key of the builders mapping)
+            params: JSON-serializable builder parameters
+            chat_id: Chat receiving the result
+            requested_by: User ID of the requester
+
+        Returns:
+            Job and whether it was coalesced into an existing one
+
+        Raises:
+            ExportQueueFull: If too many jobs are waiting
+        """
+        if kind not in self.builders:
+            raise ValueError(f"Unknown export kind: {kind}")
+
+        key = job_key(kind, params)
+        async with self._submit_lock:
+            job = self._by_key.get(key)
+            if job and not job.cancelled:
+                if chat_id not in job.chat_ids:
+                    job.chat_ids.append(chat_id)
+                return job, True
+
+            if self.queue.full():
+                raise ExportQueueFull("Export queue is full")
+
+            async with self.session_factory() as session:
+                row = ExportJob(kind=kind, params=params, chat_id=chat_id, requested_by=requested_by)
+                session.add(row)
+                await session.commit()
+
+            job = ActiveJob(id=row.id, kind=kind, params=params, key=key, chat_ids=[chat_id])
+            self._active[job.id] = job
+            self._by_key[key] = job
+            self.queue.put_nowait(job)
+            self._ensure_workers()
+            return job, False
+
+    def get(self, job_id: int) -> Optional[ActiveJob]:
+        """Queued or running job."""
+        return self._active.get(job_id)
+
+    def watch(self, job_id: int, chat_id: int, message_id: int) -> bool:
+        """Edit the given message with the job progress.
+
+        Returns:
+            False if the job is already finished
+        """
+        job = self._active.get(job_id)
+        if job is None:
+            return False
+        job.status_messages.append((chat_id, message_id))
+        return True
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job.
+
+        Returns:
+            False if the job is already finished
+        """
+        job = self._active.get(job_id)
+        if job is None or job.cancelled:
+            return False
+        job.cancelled = True
+        # Let new requests start a fresh job instead of joining the cancelled one
+        self._by_key.pop(job.key, None)
+        if job.task:
+            job.task.cancel()
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Export job {job.id} crashed: {e}", exc_info=True)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: ActiveJob) -> None:
+        if job.cancelled:
+            await self._finish(job, "cancelled")
+            return
+
+        job.state = "running"
+        await self._update_row(job.id, status="running", started_at=datetime.utcnow())
+        reporter = asyncio.create_task(self._report_progress(job))
+        job.task = asyncio.create_task(self._execute(job))
+        try:
+            result = await job.task
+        except asyncio.CancelledError:
+            if not job.cancelled:
+                raise
+            await self._finish(job, "cancelled")
+            return
+        except Exception as e:
+            logger.error(f"Export job {job.id} failed: {e}", exc_info=True)
+            await self._finish(job, "failed", error=str(e))
+            return
+        finally:
+            reporter.cancel()
+
+        try:
+            await self._deliver(job, result)
+        finally:
+            if result.path:
+                with contextlib.suppress(OSError):
+                    os.unlink(result.path)
+        await self._finish(job, "done")
+
+    async def _execute(self, job: ActiveJob) -> ExportResult:
+        """Build the export or take it from the cache."""
+        async with self.session_factory() as session:
+            version = await get_data_version(session)
+            await self._update_row(job.id, data_version=version)
+
+            job.cache_key = f"{job.key}:{version}"
+            result = self.results.get(job.cache_key)
+            if result is None:
+                def set_progress(value: int) -> None:
+                    job.progress = value
+
+                result = await self.builders[job.kind](session, job.params, set_progress)
+                if not result.path:
+                    self.results.set(job.cache_key, result)
+            job.progress = 100
+            return result
+
+    async def _report_progress(self, job: ActiveJob) -> None:
+        """Periodically edit status messages while the progress changes."""
+        reported = -1
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            if job.progress != reported:
+                reported = job.progress
+                await self._edit_status(job, progress_text(job.kind, reported), with_cancel=True)
+
+    async def _edit_status(self, job: ActiveJob, text: str, with_cancel: bool = False) -> None:
+        markup = get_export_job_keyboard(job.id) if with_cancel else None
+        for chat_id, message_id in job.status_messages:
+            try:
+                await self.bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id, reply_markup=markup)
+            except Exception as e:
+                logger.debug(f"Could not edit export status message: {e}")
+
+    async def _deliver(self, job: ActiveJob, result: ExportResult) -> None:
+        for chat_id in job.chat_ids:
+            try:
+                if result.file_id:
+                    await self.limiter.send(chat_id, self.bot.send_document, chat_id, result.file_id, caption=result.caption)
+                elif result.path:
+                    # Файл читается с диска частями при загрузке
+                    document = FSInputFile(result.path, filename=result.filename)
+                    message = await self.limiter.send(chat_id, self.bot.send_document, chat_id, document, caption=result.caption)
+                    file_id = getattr(getattr(message, "document", None), "file_id", None)
+                    if isinstance(file_id, str):
+                        # Остальным получателям и следующим запросам - по file_id, без файла
+                        result = replace(result, path=None, file_id=file_id)
+                        self.results.set(job.cache_key, result)
+                else:
+                    await self.limiter.send(chat_id, self.bot.send_message, chat_id, result.caption)
+            except Exception as e:
+                logger.error(f"Error sending export {job.id} to {chat_id}: {e}")
+
+    async def _finish(self, job: ActiveJob, state: str, error: Optional[str] = None) -> None:
+        job.state = state
+        self._active.pop(job.id, None)
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+        await self._update_row(job.id, status=state, progress=job.progress, error=error, finished_at=datetime.utcnow())
+        title = KIND_TITLES.get(job.kind, job.kind)
+        texts = {
+            "done": f"✅ {title}: готово",
+            "cancelled": f"🚫 {title}: экспорт отменен",
+            "failed": f"❌ {title}: ошибка экспорта",
+        }
+        await self._edit_status(job, texts[state])
+
+    async def _update_row(self, job_id: int, **values: Any) -> None:
+        try:
+            async with self.session_factory() as session:
+                await session.execute(update(ExportJob).where(ExportJob.id == job_id).values(**values))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error updating export job {job_id}: {e}")
+
+    async def mark_interrupted(self) -> int:
+        """Fail jobs left queued or running by a previous process.
+
+        Returns:
+            Number of updated jobs
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(ExportJob)
+                .where(ExportJob.status.in_(["queued", "running"]))
+                .values(status="failed", error="interrupted by restart", finished_at=datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount or 0
+
+    async def join(self) -> None:
+        """Wait until all queued jobs are processed."""
+        await self.queue.join()
+
+    async def stop(self) -> None:
+        """Cancel workers."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+_manager: Optional[ExportJobManager] = None
+
+
+def get_export_manager(bot: Optional[Bot] = None) -> Optional[ExportJobManager]:
+    """Get the export job manager.
+
+    Args:
+        bot: Bot used for delivery, required on first call
+
+    Returns:
+        ExportJobManager instance or None if not initialized
+    """
+    global _manager
+    if _manager is None and bot is not None:
+        from database.connection import async_session
+
+        _manager = ExportJobManager(bot, async_session)
+    return _manager
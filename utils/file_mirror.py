@@ -0,0 +1,294 @@
+"""Optional local mirror of Telegram attachments.
+
+Attachments are downloaded in the background through ``bot.download`` and
+appended to large segment files. Content is deduplicated by SHA-256, an
+append-only JSONL index maps ``file_unique_id`` to (segment, offset, length),
+and reads return zero-copy ``memoryview`` slices of memory-mapped segments.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from aiogram import Bot
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Attachment
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+FILE_MIRROR_ENABLED: bool = os.getenv("FILE_MIRROR_ENABLED", "false").lower() == "true"
+FILE_MIRROR_DIR: str = os.getenv("FILE_MIRROR_DIR", "data/mirror")
+FILE_MIRROR_QUOTA_MB: int = int(os.getenv("FILE_MIRROR_QUOTA_MB", 2048))
+FILE_MIRROR_SEGMENT_MB: int = int(os.getenv("FILE_MIRROR_SEGMENT_MB", 64))
+FILE_MIRROR_CONCURRENCY: int = int(os.getenv("FILE_MIRROR_CONCURRENCY", 4))
+FILE_MIRROR_QUEUE_SIZE: int = int(os.getenv("FILE_MIRROR_QUEUE_SIZE", 1000))
+
+_MB = 1024 * 1024
+
+
+class MirrorQuotaExceeded(Exception):
+    """Raised when storing a file would exceed the disk quota."""
+
+
+@dataclass(frozen=True)
+class MirrorEntry:
+    """Location of a stored blob."""
+
+    sha256: str
+    segment: int
+    offset: int
+    length: int
+
+
+class SegmentStore:
+    """Content-addressed, append-only blob store backed by segment files.
+
+    Thread-safe: writes are expected to run in a worker thread
+    (``asyncio.to_thread``) so disk I/O never blocks the event loop.
+    """
+
+    def __init__(self, root: str, quota_bytes: int, segment_bytes: int) -> None:
+        """Open (or create) the store under ``root``."""
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._by_digest: dict[str, MirrorEntry] = {}
+        self._by_key: dict[str, str] = {}
+        self._segment_sizes: dict[int, int] = {}
+        self._maps: dict[int, mmap.mmap] = {}
+
+        (self.root / "segments").mkdir(parents=True, exist_ok=True)
+        self._index_path = self.root / "index.jsonl"
+        self._load()
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.root / "segments" / f"segment-{segment:06d}.bin"
+
+    def _load(self) -> None:
+        """Rebuild in-memory maps from segments and the index."""
+        for path in self.root.glob("segments/segment-*.bin"):
+            self._segment_sizes[int(path.stem.split("-")[1])] = path.stat().st_size
+
+        if not self._index_path.exists():
+            return
+
+        with open(self._index_path, encoding="utf-8") as index:
+            for line in index:
+                try:
+                    record = json.loads(line)
+                    entry = MirrorEntry(record["sha256"], record["segment"], record["offset"], record["length"])
+                except (ValueError, KeyError):
+                    logger.warning("Skipping corrupted mirror index line")
+                    continue
+                # Data is written before its index line, but guard against truncated segments
+                if entry.offset + entry.length > self._segment_sizes.get(entry.segment, 0):
+                    continue
+                self._by_digest.setdefault(entry.sha256, entry)
+                self._by_key[record["key"]] = entry.sha256
+
+    @property
+    def used_bytes(self) -> int:
+        """Bytes used by segment files."""
+        return sum(self._segment_sizes.values())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._by_key
+
+    def _append_index(self, key: str, entry: MirrorEntry) -> None:
+        record = {"key": key, "sha256": entry.sha256, "segment": entry.segment,
+                  "offset": entry.offset, "length": entry.length}
+        with open(self._index_path, "a", encoding="utf-8") as index:
+            index.write(json.dumps(record) + "\n")
+        self._by_key[key] = entry.sha256
+
+    def put(self, key: str, data: bytes) -> MirrorEntry:
+        """Store ``data`` under ``key``; identical content is stored once.
+
+        Args:
+            key: Telegram file_unique_id
+            data: File content
+
+        Returns:
+            Location of the stored blob
+
+        Raises:
+            MirrorQuotaExceeded: If the store is full
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._by_digest.get(digest)
+            if entry:
+                if self._by_key.get(key) != digest:
+                    self._append_index(key, entry)
+                return entry
+
+            if self.used_bytes + len(data) > self.quota_bytes:
+                raise MirrorQuotaExceeded(f"Mirror quota of {self.quota_bytes} bytes exceeded")
+
+            segment = max(self._segment_sizes, default=1)
+            offset = self._segment_sizes.get(segment, 0)
+            if offset and offset + len(data) > self.segment_bytes:
+                segment, offset = segment + 1, 0
+
+            with open(self._segment_path(segment), "ab") as segment_file:
+                segment_file.write(data)
+                segment_file.flush()
+                os.fsync(segment_file.fileno())
+            self._segment_sizes[segment] = offset + len(data)
+
+            entry = MirrorEntry(digest, segment, offset, len(data))
+            self._by_digest[digest] = entry
+            self._append_index(key, entry)
+            return entry
+
+    def _map(self, segment: int, needed: int) -> mmap.mmap:
+        """Memory-map a segment, remapping if it grew past the old mapping."""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < needed:
+            with open(self._segment_path(segment), "rb") as segment_file:
+                # Old mappings are released once no memoryview refers to them
+                mapped = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def get(self, key: str) -> Optional[memoryview]:
+        """Zero-copy view of the content stored under ``key``.
+
+        Args:
+            key: Telegram file_unique_id
+
+        Returns:
+            Read-only memoryview or None if the file is not mirrored
+        """
+        with self._lock:
+            digest = self._by_key.get(key)
+            if digest is None:
+                return None
+            entry = self._by_digest[digest]
+            mapped = self._map(entry.segment, entry.offset + entry.length)
+        return memoryview(mapped)[entry.offset:entry.offset + entry.length]
+
+    def close(self) -> None:
+        """Drop memory mappings."""
+        with self._lock:
+            self._maps.clear()
+
+
+class FileMirror:
+    """Background downloader feeding a :class:`SegmentStore`."""
+
+    def __init__(self, bot: Bot, store: SegmentStore, concurrency: int = FILE_MIRROR_CONCURRENCY) -> None:
+        """Initialize mirror; workers start on first use."""
+        self.bot = bot
+        self.store = store
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize=FILE_MIRROR_QUEUE_SIZE)
+        self._pending: set[str] = set()
+        self._workers: list[asyncio.Task] = []
+
+    def _ensure_workers(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def enqueue(self, file_unique_id: str, file_id: str) -> bool:
+        """Schedule a download; already mirrored or queued files are skipped.
+
+        Returns:
+            True if the download was scheduled
+        """
+        if file_unique_id in self.store or file_unique_id in self._pending:
+            return False
+        try:
+            self.queue.put_nowait((file_unique_id, file_id))
+        except asyncio.QueueFull:
+            logger.warning(f"Mirror queue is full, skipping {file_unique_id}")
+            return False
+        self._pending.add(file_unique_id)
+        self._ensure_workers()
+        return True
+
+    async def backfill(self, session: AsyncSession) -> int:
+        """Schedule downloads of all stored attachments that are not mirrored yet.
+
+        Returns:
+            Number of scheduled downloads
+        """
+        result = await session.execute(select(Attachment.file_unique_id, Attachment.file_id))
+        scheduled = 0
+        for file_unique_id, file_id in result:
+            if file_unique_id in self.store or file_unique_id in self._pending:
+                continue
+            self._pending.add(file_unique_id)
+            self._ensure_workers()
+            # Unlike enqueue(), wait for free queue slots instead of dropping files
+            await self.queue.put((file_unique_id, file_id))
+            scheduled += 1
+        return scheduled
+
+    async def _worker(self) -> None:
+        while True:
+            file_unique_id, file_id = await self.queue.get()
+            try:
+                buffer = io.BytesIO()
+                await self.bot.download(file_id, destination=buffer)
+                await asyncio.to_thread(self.store.put, file_unique_id, buffer.getvalue())
+            except MirrorQuotaExceeded as e:
+                logger.warning(f"Not mirroring {file_unique_id}: {e}")
+            except Exception as e:
+                logger.error(f"Error mirroring {file_unique_id}: {e}", exc_info=True)
+            finally:
+                self._pending.discard(file_unique_id)
+                self.queue.task_done()
+
+    def read(self, file_unique_id: str) -> Optional[memoryview]:
+        """Zero-copy view of a mirrored file or None."""
+        return self.store.get(file_unique_id)
+
+    async def join(self) -> None:
+        """Wait until all queued downloads are processed."""
+        await self.queue.join()
+
+    async def stop(self) -> None:
+        """Cancel workers and release mappings."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.store.close()
+
+
+_mirror: Optional[FileMirror] = None
+
+
+def get_file_mirror(bot: Optional[Bot] = None) -> Optional[FileMirror]:
+    """Get the file mirror (None when FILE_MIRROR_ENABLED is off).
+
+    Args:
+        bot: Bot used for downloads, required on first call
+
+    Returns:
+        FileMirror instance or None
+    """
+    global _mirror
+    if not FILE_MIRROR_ENABLED:
+        return None
+    if _mirror is None and bot is not None:
+        try:
+            store = SegmentStore(FILE_MIRROR_DIR, FILE_MIRROR_QUOTA_MB * _MB, FILE_MIRROR_SEGMENT_MB * _MB)
+            _mirror = FileMirror(bot, store)
+        except Exception as e:
+            logger.error(f"Error creating file mirror: {e}", exc_info=True)
+            return None
+    return _mirror
@@ -52,6 +52,16 @@ def get_priority_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+def get_similar_requests_keyboard(request_ids: list[int], priority_value: str) -> InlineKeyboardMarkup:
+    """Найдена похожая заявка: подписаться или всё равно создать"""
+    keyboard = [
+        [InlineKeyboardButton(text=f"🔔 Подписаться на #{request_id}", callback_data=f"subscribe_request_{request_id}")]
+        for request_id in request_ids
+    ]
+    keyboard.append([InlineKeyboardButton(text="➕ Все равно создать новую", callback_data=f"priority_{priority_value}")])
+    keyboard.append([InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_create")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 def get_request_actions_keyboard(request_id: int, is_admin: bool = False) -> InlineKeyboardMarkup:
     """Клавиатура действий с заявкой"""
     keyboard = [
@@ -74,6 +84,7 @@ def get_admin_panel_keyboard() -> InlineKeyboardMarkup:
     keyboard = [
         [InlineKeyboardButton(text="📋 Открытые заявки", callback_data="admin_open_requests")],
         [InlineKeyboardButton(text="🎯 Фильры", callback_data="admin_filters_menu")],
+        [InlineKeyboardButton(text="☑️ Массовые действия", callback_data="bulk_select")],
         [InlineKeyboardButton(text="📊 Статистика", callback_data="admin_stats")],
         [InlineKeyboardButton(text="📁 Архив", callback_data="admin_archive")],
         [InlineKeyboardButton(text="📤 Экспорт", callback_data="admin_export_menu")],
@@ -91,6 +102,8 @@ def get_admin_filters_menu_keyboard() -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="📅 Сегодня", callback_data="filter_today")],
         [InlineKeyboardButton(text="📅 На неделю", callback_data="filter_week")],
         [InlineKeyboardButton(text="📋 Все открытые", callback_data="admin_open_requests")],
+        [InlineKeyboardButton(text="📍 По местам", callback_data="filter_locations")],
+        [InlineKeyboardButton(text="☑️ Выбрать несколько", callback_data="bulk_select")],
         [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_admin")],
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
@@ -102,10 +115,78 @@ def get_admin_export_menu_keyboard() -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="📊 Отчет за месяц", callback_data="export_month")],
         [InlineKeyboardButton(text="📈 Статистика", callback_data="export_stats")],
         [InlineKeyboardButton(text="📋 Все заявки CSV", callback_data="export_all")],
+        [InlineKeyboardButton(text="📗 Все заявки XLSX", callback_data="export_xlsx")],
+        [InlineKeyboardButton(text="📦 Архив с фото (ZIP)", callback_data="export_bundle")],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_admin")],
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_export_job_keyboard(job_id: int) -> InlineKeyboardMarkup:
+    """Кнопка отмены фонового экспорта"""
+    keyboard = [[InlineKeyboardButton(text="🚫 Отменить", callback_data=f"export_cancel_{job_id}")]]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_archive_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура архива"""
+    keyboard = [
+        [InlineKeyboardButton(text="🔍 Поиск по всем заявкам", callback_data="search_start")],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_admin")],
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_bulk_select_keyboard(rows: list, selected: set[int]) -> InlineKeyboardMarkup:
+    """Мультивыбор заявок: галочки и действия над отмеченными (выбор - битовая маска в callback_data)"""
+    from utils.bulk_actions import BULK_ACTIONS, CHECKED, UNCHECKED, encode_selection
+
+    mask = encode_selection(selected)
+    keyboard = [
+        [InlineKeyboardButton(
+            text=f"{CHECKED if i in selected else UNCHECKED} {row.label}",
+            callback_data=f"bulk_toggle_{row.request_id}",
+        )]
+        for i, row in enumerate(rows)
+    ]
+    keyboard.append([
+        InlineKeyboardButton(text="☑️ Все", callback_data="bulk_all"),
+        InlineKeyboardButton(text="⬜ Снять", callback_data="bulk_none"),
+    ])
+    keyboard.append([
+        InlineKeyboardButton(text=f"{action.label} ({len(selected)})", callback_data=f"bulk_do_{action.name}_{mask}")
+        for action in BULK_ACTIONS.values()
+    ])
+    keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_admin")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_bulk_result_keyboard() -> InlineKeyboardMarkup:
+    """После массового действия: снова к списку или в панель"""
+    keyboard = [
+        [InlineKeyboardButton(text="☑️ К списку", callback_data="bulk_select")],
         [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_admin")],
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+def get_search_results_keyboard(requests: list, has_more: bool = False) -> InlineKeyboardMarkup:
+    """Результаты поиска: открыть заявку, следующая страница, новый поиск"""
+    keyboard = [
+        [InlineKeyboardButton(text=f"#{request.id} {request.title[:30]}", callback_data=f"view_request_{request.id}")]
+        for request in requests
+    ]
+    if has_more:
+        keyboard.append([InlineKeyboardButton(text="➡️ Еще результаты", callback_data="search_more")])
+    keyboard.append([InlineKeyboardButton(text="🔍 Новый поиск", callback_data="search_start")])
+    keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_admin")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_location_report_keyboard(locations: list) -> InlineKeyboardMarkup:
+    """Места с открытыми заявками: открыть список заявок места"""
+    keyboard = [
+        [InlineKeyboardButton(text=f"📍 {location.name[:40]} ({location.open_count})",
+                              callback_data=f"filter_location_{location.id}")]
+        for location in locations if location.open_count
+    ]
+    keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_filters_menu")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 def get_filter_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура фильтров"""
     keyboard = [
@@ -152,6 +233,14 @@ def get_search_filter_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+def get_stats_keyboard() -> InlineKeyboardMarkup:
+    """Экран статистики: графики и назад"""
+    keyboard = [
+        [InlineKeyboardButton(text="📈 Графики", callback_data="admin_charts")],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_admin")],
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 def get_back_keyboard(callback_data: str = "back") -> InlineKeyboardMarkup:
     """Клавиатура с кнопкой назад"""
     keyboard = [[InlineKeyboardButton(text="⬅️ Назад", callback_data=callback_data)]]
@@ -0,0 +1,284 @@
+"""Structured school locations and autocomplete.
+
+Free-text locations typed by users ("каб. 305, 3 этаж", "Корпус 2 столовая")
+are parsed into building / floor / room and stored once in the ``locations``
+table; requests reference them by ``location_id``. Per-location request
+counters are maintained by database triggers (see ``models.location``), so
+location reports are primary-key lookups instead of ``GROUP BY`` over raw
+strings.
+
+Autocomplete is served from an in-memory prefix trie over the words of every
+location name: typing the beginning of any word ("30", "стол") narrows the
+suggestions without touching the database.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Location
+
+logger = logging.getLogger(__name__)
+
+NO_LOCATION = "Не указано"
+AUTOCOMPLETE_LIMIT = 5
+
+_BUILDING_RE = re.compile(r"\b(?:корпус|корп|здание|зд|строение|стр)\b\.?\s*№?\s*(\w+)", re.IGNORECASE)
+_FLOOR_RE = re.compile(r"\b(?:(\d+)\s*-?\s*(?:й|ой|ий)?\s*этаж\w*|этаж\w*\s*(\d+))", re.IGNORECASE)
+_ROOM_RE = re.compile(
+    r"\b(?:кабинет|каб|кб|аудитория|ауд|комната|комн|помещение|пом)\b\.?\s*№?\s*(\w+)", re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class ParsedLocation:
+    """Location split into its parts."""
+
+    building: Optional[str]
+    floor: Optional[str]
+    room: Optional[str]
+
+    @property
+    def key(self) -> str:
+        """Normalized key used to deduplicate locations."""
+        return "|".join(normalize(part or "") for part in (self.building, self.floor, self.room))
+
+    @property
+    def name(self) -> str:
+        """Human readable name: room, floor, building."""
+        parts = []
+        if self.room:
+            parts.append(f"Каб. {self.room}" if self.room[0].isdigit() else self.room)
+        if self.floor:
+            parts.append(f"{self.floor} этаж")
+        if self.building:
+            parts.append(f"Корпус {self.building}")
+        return ", ".join(parts)[:100]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold ё and keep only words."""
+    return " ".join(re.findall(r"\w+", text.lower().replace("ё", "е")))
+
+
+def parse_location(text: str) -> Optional[ParsedLocation]:
+    """Split a free-text location into building, floor and room.
+
+    Recognized markers ("корпус 2", "3 этаж", "каб. 305") are extracted;
+    whatever is left becomes the room name ("Столовая", "Спортзал").
+
+    Args:
+        text: Location as typed by the user
+
+    Returns:
+        Parsed location or None when the text is empty or "Не указано"
+    """
+    text = (text or "").strip()
+    if not text or text == NO_LOCATION:
+        return None
+
+    building = floor = room = None
+    rest = text
+    if match := _BUILDING_RE.search(rest):
+        building = match.group(1).upper() if len(match.group(1)) == 1 else match.group(1)
+        rest = rest[:match.start()] + " " + rest[match.end():]
+    if match := _FLOOR_RE.search(rest):
+        floor = match.group(1) or match.group(2)
+        rest = rest[:match.start()] + " " + rest[match.end():]
+    if match := _ROOM_RE.search(rest):
+        room = match.group(1)
+        rest = rest[:match.start()] + " " + rest[match.end():]
+
+    rest = " ".join(re.findall(r"[\w-]+", rest))
+    if rest and not room:
+        room = rest[0].upper() + rest[1:]
+
+    if not (building or floor or room):
+        return None
+    return ParsedLocation(building=building, floor=floor, room=room)
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self) -> None:
+        self.children: dict[str, "_TrieNode"] = {}
+        self.ids: set[int] = set()
+
+
+class LocationIndex:
+    """Prefix trie over location names for autocomplete.
+
+    Every word-start suffix of a normalized name is inserted and each node
+    keeps the ids of all locations below it, so a lookup costs
+    ``O(len(prefix))`` plus sorting the (few) matches by popularity.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self._root = _TrieNode()
+        self._names: dict[int, str] = {}
+        self._weights: dict[int, int] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, location_id: int) -> bool:
+        return location_id in self._names
+
+    @staticmethod
+    def _suffixes(name: str) -> list[str]:
+        words = normalize(name).split()
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def add(self, location_id: int, name: str, weight: int = 0) -> None:
+        """Index (or re-index) a location."""
+        self.discard(location_id)
+        self._names[location_id] = name
+        self._weights[location_id] = weight
+        for suffix in self._suffixes(name):
+            node = self._root
+            node.ids.add(location_id)
+            for char in suffix:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.add(location_id)
+
+    def discard(self, location_id: int) -> None:
+        """Remove a location if it is indexed."""
+        name = self._names.pop(location_id, None)
+        self._weights.pop(location_id, None)
+        if name is None:
+            return
+        for suffix in self._suffixes(name):
+            node = self._root
+            node.ids.discard(location_id)
+            path = []
+            for char in suffix:
+                child = node.children.get(char)
+                if child is None:
+                    break
+                path.append((node, char, child))
+                child.ids.discard(location_id)
+                node = child
+            # Пустые ветки удаляем, чтобы trie не рос от переименований
+            for parent, char, child in reversed(path):
+                if child.ids:
+                    break
+                del parent.children[char]
+
+    def touch(self, location_id: int, delta: int = 1) -> None:
+        """Bump the popularity of a location."""
+        if location_id in self._weights:
+            self._weights[location_id] += delta
+
+    def name(self, location_id: int) -> Optional[str]:
+        """Indexed name of a location."""
+        return self._names.get(location_id)
+
+    def complete(self, prefix: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[tuple[int, str]]:
+        """Locations with a word starting with ``prefix``, most used first.
+
+        Args:
+            prefix: Text typed by the user; an empty prefix returns the most
+                popular locations
+            limit: Maximal number of suggestions
+
+        Returns:
+            (location_id, name) pairs
+        """
+        node = self._root
+        for char in normalize(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        ranked = sorted(node.ids, key=lambda location_id: (-self._weights[location_id], self._names[location_id]))
+        return [(location_id, self._names[location_id]) for location_id in ranked[:limit]]
+
+    async def load(self, session: AsyncSession) -> None:
+        """Index all known locations."""
+        result = await session.execute(select(Location.id, Location.name, Location.request_count))
+        for location_id, name, request_count in result:
+            self.add(location_id, name, request_count)
+        self.loaded = True
+        logger.info(f"Location index loaded: {len(self)} locations")
+
+
+_index = LocationIndex()
+
+
+def get_location_index() -> LocationIndex:
+    """Get the process-wide location index."""
+    return _index
+
+
+async def ensure_location_index(session: AsyncSession, index: Optional[LocationIndex] = None) -> LocationIndex:
+    """Get a loaded location index (the global one by default)."""
+    if index is None:
+        index = _index
+    if not index.loaded:
+        await index.load(session)
+    return index
+
+
+async def get_or_create_location(
+    session: AsyncSession,
+    text: str,
+    index: Optional[LocationIndex] = None,
+) -> Optional[Location]:
+    """Find the location described by ``text`` or create it.
+
+    The location is flushed, not committed: it becomes part of the caller's
+    transaction (usually the one creating the request).
+
+    Args:
+        session: SQLAlchemy async session
+        text: Free-text location
+        index: Autocomplete index to update, the global one by default
+
+    Returns:
+        Location or None when ``text`` does not describe a place
+    """
+    parsed = parse_location(text)
+    if parsed is None:
+        return None
+
+    location = await session.scalar(select(Location).where(Location.key == parsed.key))
+    if location is None:
+        location = Location(
+            key=parsed.key, name=parsed.name, building=parsed.building, floor=parsed.floor, room=parsed.room
+        )
+        try:
+            async with session.begin_nested():
+                session.add(location)
+        except IntegrityError:
+            # Параллельно создали то же место
+            location = await session.scalar(select(Location).where(Location.key == parsed.key))
+
+    if index is None:
+        index = _index
+    if location.id not in index:
+        index.add(location.id, location.name, location.request_count or 0)
+    return location
+
+
+async def top_locations(session: AsyncSession, limit: int = 10) -> list[Location]:
+    """Locations with the most open requests.
+
+    Reads the trigger-maintained counters through the ``open_count`` index,
+    no aggregation over ``requests`` is needed. Counters change behind the
+    ORM's back, so already loaded instances are refreshed.
+    """
+    result = await session.scalars(
+        select(Location)
+        .where(Location.request_count > 0)
+        .order_by(Location.open_count.desc(), Location.request_count.desc(), Location.id)
+        .limit(limit)
+        .execution_options(populate_existing=True)
+    )
+    return list(result)
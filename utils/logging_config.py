@@ -1,14 +1,35 @@
-"""Structured logging configuration with structlog."""
+"""Structured logging configuration with structlog.
 
+Logging never blocks the event loop: the root logger has a single
+``QueueHandler`` that puts records on a bounded queue, and a listener
+thread owns the console and rotating file handlers. Records are rendered
+(JSON via ``utils.codec``) in that thread, so a slow disk only fills
+the queue; when it is full, records are dropped instead of waiting.
+
+Before a record is queued it passes ``SamplingFilter``: noisy events can be
+sampled (``LOG_SAMPLE_RATES``) and every event is rate-limited
+(``LOG_RATE_LIMIT`` per second). Warnings and errors are never dropped.
+Arguments of a record are formatted only by the listener thread, so a
+filtered-out record costs no formatting at all.
+"""
+
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
+import random
 import sys
+import time
+from collections.abc import Callable
 from datetime import datetime
+from typing import Optional
 
 import structlog
 from dotenv import load_dotenv
 
+from utils import codec
+
 load_dotenv()
 
 # Configuration
@@ -17,9 +38,16 @@ LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json or text
 LOG_FILE = os.getenv("LOG_FILE", "logs/app.log")
 LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10485760))  # 10MB
 LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", 20))  # records of one event per second, 0 = unlimited
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "performance_recorded=0.1")
 
-# Ensure logs directory exists
-os.makedirs(os.path.dirname(LOG_FILE) if os.path.dirname(LOG_FILE) else "logs", exist_ok=True)
+
+def capture_exc_info(logger, method_name, event_dict):
+    """Take ``exc_info=True`` from the calling thread (rendering happens elsewhere)."""
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
 
 
 def add_log_level(logger, method_name, event_dict):
@@ -30,48 +58,152 @@ def add_log_level(logger, method_name, event_dict):
 
 
 def add_timestamp(logger, method_name, event_dict):
-    """Add timestamp to event dict."""
+    """Add timestamp to event dict (time of the call, not of rendering)."""
     if "timestamp" not in event_dict:
-        event_dict["timestamp"] = datetime.utcnow().isoformat()
+        record = event_dict.get("_record")
+        moment = datetime.utcfromtimestamp(record.created) if record else datetime.utcnow()
+        event_dict["timestamp"] = moment.isoformat()
     return event_dict
 
 
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Parse ``event=rate,...`` into a dict."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        event, _, rate = item.rpartition("=")
+        rates[event.strip()] = float(rate)
+    return rates
+
+
+def event_key(record: logging.LogRecord) -> str:
+    """What sampling and rate limits count: structlog event or message template."""
+    if isinstance(record.msg, dict):
+        return str(record.msg.get("event"))
+    return str(record.msg)
+
+
+class SamplingFilter(logging.Filter):
+    """Per-event sampling and rate limiting (warnings and errors always pass)."""
+
+    def __init__(
+        self,
+        rates: Optional[dict[str, float]] = None,
+        rate_limit: int = LOG_RATE_LIMIT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a filter.
+
+        Args:
+            rates: Share of records kept per event (default 1.0)
+            rate_limit: Records of one event per second, 0 = unlimited
+            clock: Time source
+        """
+        super().__init__()
+        self.rates = parse_sample_rates(LOG_SAMPLE_RATES) if rates is None else rates
+        self.rate_limit = rate_limit
+        self.clock = clock
+        self.sampled = 0
+        self.suppressed = 0
+        self._second = 0
+        # event -> [секунда, записей за секунду, подавлено]
+        self._windows: dict[str, list[int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Whether to keep the record."""
+        if record.levelno >= logging.WARNING:
+            return True
+        key = event_key(record)
+
+        rate = self.rates.get(key, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled += 1
+            return False
+
+        if not self.rate_limit:
+            return True
+        second = int(self.clock())
+        if second != self._second:
+            # Окна прошлых секунд без подавленных записей больше не нужны
+            self._second = second
+            self._windows = {name: window for name, window in self._windows.items() if window[2]}
+        window = self._windows.get(key)
+        if window is None or window[0] != second:
+            suppressed = window[2] if window else 0
+            window = self._windows[key] = [second, 0, 0]
+            if suppressed:
+                # Первая запись нового окна сообщает, сколько было отброшено
+                if isinstance(record.msg, dict):
+                    record.msg["suppressed"] = suppressed
+                else:
+                    record.suppressed = suppressed
+        if window[1] >= self.rate_limit:
+            window[2] += 1
+            self.suppressed += 1
+            return False
+        window[1] += 1
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never waits: records are dropped when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        """Create a handler for ``log_queue``."""
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Keep the record as is: it is formatted in the listener thread."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put the record on the queue without blocking."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 def configure_structlog() -> None:
-    """Configure structlog for structured logging."""
-    # Timestamper
-    structlog.processors.TimeStamper(fmt="iso")
-
-    # Shared processors
-    shared_processors = [
-        add_log_level,
-        add_timestamp,
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-    ]
+    """Configure structlog on top of stdlib logging.
+
+    Only level filtering happens in the calling thread; timestamps,
+    tracebacks and rendering are done by ``build_formatter``.
+    """
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            capture_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
 
+def build_formatter(colors: bool = False) -> structlog.stdlib.ProcessorFormatter:
+    """Formatter for structlog and stdlib records (runs in the listener thread)."""
     if LOG_FORMAT == "json":
-        # JSON format
-        structlog.configure(
-            processors=shared_processors
-            + [
-                structlog.processors.JSONRenderer(),
-            ],
-            context_class=dict,
-            logger_factory=structlog.PrintLoggerFactory(),
-            cache_logger_on_first_use=True,
-        )
+        renderer = structlog.processors.JSONRenderer(serializer=codec.dumps)
     else:
-        # Text format
-        structlog.configure(
-            processors=shared_processors
-            + [
-                structlog.dev.ConsoleRenderer(),
-            ],
-            context_class=dict,
-            logger_factory=structlog.PrintLoggerFactory(),
-            cache_logger_on_first_use=True,
-        )
+        renderer = structlog.dev.ConsoleRenderer(colors=colors)
+
+    return structlog.stdlib.ProcessorFormatter(
+        # Только для записей stdlib logging
+        foreign_pre_chain=[structlog.stdlib.ExtraAdder(allow=["suppressed"])],
+        processors=[
+            add_log_level,
+            add_timestamp,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            renderer,
+        ],
+    )
 
 
 def get_logger(name: str) -> structlog.BoundLogger:
@@ -79,41 +211,26 @@ def get_logger(name: str) -> structlog.BoundLogger:
     return structlog.get_logger(name)
 
 
-def setup_file_logging() -> None:
-    """Setup file-based logging with rotation."""
-    # Create rotating file handler
+def build_file_handler() -> logging.Handler:
+    """File-based handler with rotation."""
+    # Ensure logs directory exists
+    os.makedirs(os.path.dirname(LOG_FILE) if os.path.dirname(LOG_FILE) else "logs", exist_ok=True)
+
     file_handler = logging.handlers.RotatingFileHandler(
         LOG_FILE,
         maxBytes=LOG_MAX_BYTES,
         backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
     )
+    file_handler.setFormatter(build_formatter())
+    return file_handler
 
-    # Set formatter
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    file_handler.setFormatter(formatter)
-
-    # Get root logger and add handler
-    root_logger = logging.getLogger()
-    root_logger.addHandler(file_handler)
-    root_logger.setLevel(getattr(logging, LOG_LEVEL))
 
-
-def setup_console_logging() -> None:
-    """Setup console logging."""
+def build_console_handler() -> logging.Handler:
+    """Console handler."""
     console_handler = logging.StreamHandler(sys.stdout)
-
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    console_handler.setFormatter(formatter)
-
-    root_logger = logging.getLogger()
-    root_logger.addHandler(console_handler)
-    root_logger.setLevel(getattr(logging, LOG_LEVEL))
+    console_handler.setFormatter(build_formatter(colors=sys.stdout.isatty()))
+    return console_handler
 
 
 class BotContextLogger:
@@ -158,10 +275,48 @@ class BotContextLogger:
         return True
 
 
-def init_logging() -> None:
-    """Initialize all logging systems."""
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def init_logging(handlers: Optional[list[logging.Handler]] = None) -> None:
+    """Initialize all logging systems.
+
+    Args:
+        handlers: Handlers run by the listener thread (console and file by default)
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
     configure_structlog()
-    setup_console_logging()
-    setup_file_logging()
+    if handlers is None:
+        handlers = [build_console_handler(), build_file_handler()]
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(SamplingFilter())
+    root_logger = logging.getLogger()
+    root_logger.addHandler(_queue_handler)
+    root_logger.setLevel(getattr(logging, LOG_LEVEL))
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
     logger = get_logger(__name__)
     logger.info("logging_initialized", level=LOG_LEVEL, format=LOG_FORMAT)
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    if _queue_handler.dropped:
+        print(f"logging: {_queue_handler.dropped} records dropped (queue full)", file=sys.stderr)
+    _listener = _queue_handler = None
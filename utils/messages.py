@@ -1,5 +1,5 @@
 
-from models import Priority, Request, Status
+from models import Location, Priority, Request, Status
 
 
 # Shared emoji mappings
@@ -72,6 +72,25 @@ def format_request_list(requests: list[Request], title: str = "Заявки") ->
 
     return message.strip()
 
+def format_similar_requests(similar: list[tuple[Request, float]]) -> str:
+    """Предложение подписаться на похожую открытую заявку"""
+    message = "🔁 <b>Похоже, об этом уже сообщили</b>\n\n"
+    for request, _ in similar:
+        message += f"{STATUS_EMOJIS[request.status]} <b>#{request.id}</b> {request.title[:60]}\n"
+        message += f"   📍 {request.location} · 📅 {request.created_at.strftime('%d.%m %H:%M')}\n\n"
+    message += "Подписаться на существующую заявку вместо создания новой? Уведомления о статусе придут и вам."
+    return message
+
+def format_location_report(locations: list[Location]) -> str:
+    """Отчет по местам: где больше всего открытых заявок"""
+    if not locations:
+        return "📍 <b>Заявки по местам</b>\n\nПока нет заявок с указанным местом."
+    message = "📍 <b>Заявки по местам</b>\n\n"
+    for location in locations:
+        message += f"<b>{location.name}</b>\n"
+        message += f"   📭 Открыто: {location.open_count} · 📋 Всего: {location.request_count}\n"
+    return message.strip()
+
 def get_welcome_message(user_name: str, is_admin: bool = False) -> str:
     """Приветственное сообщение - дружелюбное и понятное"""
     if is_admin:
@@ -202,12 +221,18 @@ def get_admin_help_message() -> str:
         "   → По приоритету (срочные первыми)\n"
         "   → По статусу (в работе, выполнено)\n"
         "   → По дате (сегодня, неделя)\n\n"
+        "☑️ <b>Массовые действия</b>\n"
+        "   → Отметьте несколько заявок галочками\n"
+        "   → Взять в работу, выполнить или отклонить все сразу\n\n"
         "📊 <b>Статистика</b>\n"
         "   → Текущая нагрузка\n"
         "   → Выполнено за день\n"
         "   → Полезные советы\n\n"
         "📁 <b>Архив</b>\n"
-        "   → Последние 50 выполненных\n\n"
+        "   → Последние 50 выполненных\n"
+        "   → Поиск по всем заявкам и комментариям\n"
+        "      <code>/search кран 101</code>\n"
+        "   → В любом чате: <code>@имя_бота кран 101</code>\n\n"
         "📤 <b>Экспорт</b>\n"
         "   → Отчет за месяц (CSV)\n"
         "   → Статистика (TXT)\n"
@@ -233,6 +258,14 @@ def get_admin_export_help_message() -> str:
         "   📋 Формат: CSV (все данные)\n"
         "   📝 Содержит: полная информация\n"
         "   💾 Для глубокого анализа\n\n"
+        "📗 <b>Выгрузка за период</b>\n"
+        "   📋 Форматы: CSV, JSONL, XLSX, Parquet, Arrow\n"
+        "   📅 Кнопка XLSX - все заявки, за период:\n"
+        "      <code>/export xlsx 01.01.2025 31.12.2025</code>\n\n"
+        "📦 <b>Архив с фото</b>\n"
+        "   📋 Формат: ZIP (CSV + JSON + фото)\n"
+        "   📅 Кнопка - за 30 дней, за период:\n"
+        "      <code>/export_bundle 01.09.2025 30.09.2025</code>\n\n"
         "<b>Как использовать:</b>\n"
         "1. Выберите нужный отчет\n"
         "2. Дождитесь загрузки файла\n"
@@ -2,18 +2,32 @@
 Модуль уведомлений для ZAVhoz.
 """
 
+import asyncio
+import html
 import logging
 import os
 from datetime import datetime, timedelta
 
 from aiogram import Bot
-from sqlalchemy import and_, select
+from sqlalchemy import and_, or_, select, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import Priority, Request, Status
+from models import Priority, Request, RequestSubscriber, Status, User
 
 logger = logging.getLogger(__name__)
 
+STATUS_MESSAGES = {
+    Status.IN_PROGRESS: "✅ Заявка принята в работу!",
+    Status.COMPLETED: "🎉 Заявка выполнена!",
+    Status.REJECTED: "❌ Заявка отклонена."
+}
+
+BULK_STATUS_MESSAGES = {
+    Status.IN_PROGRESS: "✅ Приняты в работу",
+    Status.COMPLETED: "🎉 Выполнены",
+    Status.REJECTED: "❌ Отклонены"
+}
+
 
 class NotificationService:
     """Сервис уведомлений"""
@@ -56,6 +70,47 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Error notifying user: {e}")
 
+    async def notify_user_status_change(self, request) -> None:
+        """Уведомить автора и подписчиков заявки об изменении статуса"""
+        try:
+            from database.connection import async_session
+
+            text = format_status_changes([request])
+
+            async with async_session() as session:
+                recipients = await get_request_recipients(session, request)
+
+            for telegram_id in recipients:
+                try:
+                    await self.bot.send_message(telegram_id, text, parse_mode="HTML")
+                except Exception as e:
+                    logger.error(f"Error notifying {telegram_id} about request {request.id}: {e}")
+        except Exception as e:
+            logger.error(f"Error notifying about status change: {e}", exc_info=True)
+
+    async def notify_status_changes(self, session: AsyncSession, requests: list) -> None:
+        """Уведомить о смене статуса нескольких заявок: одно сообщение на получателя"""
+        try:
+            from utils.delivery import send_limiter, split_html
+
+            recipients = await get_recipients_by_request(session, [request.id for request in requests])
+            by_recipient: dict[int, list] = {}
+            for request in requests:
+                for telegram_id in recipients.get(request.id, ()):
+                    by_recipient.setdefault(telegram_id, []).append(request)
+
+            async def send(telegram_id: int, changed: list) -> None:
+                # Длинный список - несколько сообщений; ошибка одного не отменяет остальные
+                for chunk in split_html(format_status_changes(changed)):
+                    try:
+                        await send_limiter.send(telegram_id, self.bot.send_message, telegram_id, chunk, parse_mode="HTML")
+                    except Exception as e:
+                        logger.error(f"Error notifying {telegram_id} about {len(changed)} requests: {e}")
+
+            await asyncio.gather(*(send(telegram_id, changed) for telegram_id, changed in by_recipient.items()))
+        except Exception as e:
+            logger.error(f"Error notifying about status changes: {e}", exc_info=True)
+
     async def notify_sla_breach(self, request, sla_hours: int = 24) -> None:
         """Уведомить администратора о нарушении SLA"""
         try:
@@ -135,11 +190,57 @@ class NotificationService:
             text = format_analytics_report(report)
 
             await self.bot.send_message(admin_id, text, parse_mode="HTML")
+
+            from utils.charts import ChartsUnavailable, send_report_charts
+            try:
+                await send_report_charts(self.bot, admin_id, report)
+            except ChartsUnavailable:
+                logger.info("Digest charts skipped: matplotlib is not installed")
             logger.info("Daily digest sent to admin")
         except Exception as e:
             logger.error(f"Error sending daily digest: {e}")
 
 
+async def get_request_recipients(session: AsyncSession, request) -> list[int]:
+    """Telegram ID автора и подписчиков заявки"""
+    subscribers = select(RequestSubscriber.user_id).where(RequestSubscriber.request_id == request.id)
+    stmt = select(User.telegram_id).where(or_(User.id == request.user_id, User.id.in_(subscribers)))
+    return list((await session.scalars(stmt)).all())
+
+
+async def get_recipients_by_request(session: AsyncSession, request_ids: list[int]) -> dict[int, set[int]]:
+    """Telegram ID авторов и подписчиков для каждой из заявок (один запрос)"""
+    authors = select(Request.id, User.telegram_id).join(User, User.id == Request.user_id).where(
+        Request.id.in_(request_ids)
+    )
+    subscribers = select(RequestSubscriber.request_id, User.telegram_id).join(
+        User, User.id == RequestSubscriber.user_id
+    ).where(RequestSubscriber.request_id.in_(request_ids))
+    recipients: dict[int, set[int]] = {}
+    for request_id, telegram_id in await session.execute(union_all(authors, subscribers)):
+        recipients.setdefault(request_id, set()).add(telegram_id)
+    return recipients
+
+
+def format_status_changes(requests: list) -> str:
+    """Текст уведомления о смене статуса одной или нескольких заявок"""
+    if len(requests) == 1:
+        request = requests[0]
+        message = STATUS_MESSAGES.get(request.status, f"📝 Статус заявки изменён на {request.status.value}")
+        return f"{message}\n\n📋 <b>Заявка #{request.id}</b>: {html.escape(request.title)}\n📍 {html.escape(request.location)}"
+
+    text = ""
+    for status in Status:
+        changed = [request for request in requests if request.status == status]
+        if not changed:
+            continue
+        text += f"{BULK_STATUS_MESSAGES.get(status, status.value)} ({len(changed)}):\n"
+        for request in changed:
+            text += f"  • <b>#{request.id}</b> {html.escape(request.title[:40])} · 📍 {html.escape(request.location)}\n"
+        text += "\n"
+    return text.strip()
+
+
 def get_notification_service(bot: Bot) -> NotificationService | None:
     """Получить сервис уведомлений"""
     try:
@@ -2,6 +2,7 @@
 
 import asyncio
 import time
+from collections import OrderedDict
 from collections.abc import Callable
 from contextlib import asynccontextmanager
 from functools import wraps
@@ -26,7 +27,8 @@ class PerformanceMetrics:
         if operation not in self.metrics:
             self.metrics[operation] = []
         self.metrics[operation].append(duration)
-        logger.info("performance_recorded", operation=operation, duration_ms=duration * 1000)
+        # Каждое измерение - только на DEBUG и с сэмплированием (LOG_SAMPLE_RATES)
+        logger.debug("performance_recorded", operation=operation, duration_ms=duration * 1000)
 
     def get_stats(self, operation: str) -> dict[str, float]:
         """Get statistics for an operation."""
@@ -217,8 +219,45 @@ class CacheManager:
         }
 
 
-# Global cache instance
-cache = CacheManager()
+class LRUCache:
+    """In-memory cache holding at most ``max_size`` entries.
+
+    The least recently used entry is evicted on ``set``, so keys that are
+    never read again (e.g. those of an old data version) cannot accumulate.
+    """
+
+    def __init__(self, max_size: int = 128) -> None:
+        """Initialize cache with a size limit."""
+        self.max_size = max_size
+        self.cache: OrderedDict[str, Any] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        """Get value from cache and mark it as recently used."""
+        if key not in self.cache:
+            return None
+        self.cache.move_to_end(key)
+        return self.cache[key]
+
+    def set(self, key: str, value: Any) -> None:
+        """Set value in cache, evicting the least recently used entries."""
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Delete value from cache."""
+        self.cache.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+
+def _shared_cache() -> CacheManager:
+    """Application cache (built by the container on first use)."""
+    from utils.container import get_container
+
+    return get_container().cache
 
 
 def cached(ttl: int = 3600) -> Callable:
@@ -231,6 +270,7 @@ def cached(ttl: int = 3600) -> Callable:
             cache_key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
 
             # Try to get from cache
+            cache = _shared_cache()
             cached_value = cache.get(cache_key)
             if cached_value is not None:
                 return cached_value
@@ -246,6 +286,7 @@ def cached(ttl: int = 3600) -> Callable:
             cache_key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
 
             # Try to get from cache
+            cache = _shared_cache()
             cached_value = cache.get(cache_key)
             if cached_value is not None:
                 return cached_value
@@ -141,5 +141,10 @@ def get_rate_limiter() -> RateLimiterBackend:
         return MemoryRateLimiter()
 
 
-# Global rate limiter instance
-rate_limiter = get_rate_limiter()
+def __getattr__(name: str) -> RateLimiterBackend:
+    # Общий лимитер создается контейнером при первом обращении
+    if name == "rate_limiter":
+        from utils.container import get_container
+
+        return get_container().rate_limiter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,116 @@
+"""Full-text search over requests and their comments.
+
+Uses the trigger-maintained index from ``models.search``: ``tsvector`` with
+Russian stemming and a GIN index on PostgreSQL, FTS5 on SQLite. Every query
+term is matched as a prefix, results are ranked (``ts_rank_cd`` / ``bm25``)
+and paginated by keyset on (rank, id), so deep pages cost the same as the
+first one.
+"""
+
+import logging
+import os
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Float, Integer, and_, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.base import ExecutableOption
+
+from models import Request, Status
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PAGE_SIZE: int = int(os.getenv("SEARCH_PAGE_SIZE", 10))
+MAX_QUERY_TERMS = 8
+
+# Lower rank is better on both backends
+_POSTGRES_HITS = """
+    SELECT request_id, -ts_rank_cd(document, to_tsquery('russian', :query)) AS rank
+    FROM request_search
+    WHERE document @@ to_tsquery('russian', :query)
+"""
+# Column weights: title, description, location, comments
+_SQLITE_HITS = """
+    SELECT rowid AS request_id, bm25(request_fts, 10.0, 3.0, 10.0, 1.0) AS rank
+    FROM request_fts
+    WHERE request_fts MATCH :query
+"""
+
+Cursor = tuple[float, int]
+
+
+@dataclass
+class SearchPage:
+    """One page of search results."""
+
+    requests: list[Request]
+    next_cursor: Optional[Cursor]
+
+
+def query_terms(query: str) -> list[str]:
+    """Split user input into index terms (letters and digits only)."""
+    return re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+
+
+def build_match_query(terms: list[str], dialect: str) -> str:
+    """Backend query matching all terms as prefixes."""
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+async def search_requests(
+    session: AsyncSession,
+    query: str,
+    limit: int = SEARCH_PAGE_SIZE,
+    after: Optional[Cursor] = None,
+    status: Optional[Status] = None,
+    user_id: Optional[int] = None,
+    options: Sequence[ExecutableOption] = (),
+) -> SearchPage:
+    """Find requests matching all words of ``query``.
+
+    Args:
+        session: SQLAlchemy async session
+        query: User input
+        limit: Page size
+        after: Cursor returned with the previous page
+        status: Only requests with this status
+        user_id: Only requests of this author
+        options: Loader options for the returned requests
+
+    Returns:
+        Page of requests, best matches first
+    """
+    terms = query_terms(query)
+    if not terms:
+        return SearchPage([], None)
+
+    dialect = session.bind.dialect.name
+    hits = (
+        text(_POSTGRES_HITS if dialect == "postgresql" else _SQLITE_HITS)
+        .bindparams(query=build_match_query(terms, dialect))
+        .columns(request_id=Integer, rank=Float)
+        .subquery("hits")
+    )
+    stmt = (
+        select(Request, hits.c.rank)
+        .join(hits, Request.id == hits.c.request_id)
+        .order_by(hits.c.rank, Request.id)
+        .limit(limit + 1)
+        .options(*options)
+    )
+    if after:
+        rank, request_id = after
+        stmt = stmt.where(or_(hits.c.rank > rank, and_(hits.c.rank == rank, Request.id > request_id)))
+    if status:
+        stmt = stmt.where(Request.status == status)
+    if user_id:
+        stmt = stmt.where(Request.user_id == user_id)
+
+    rows = (await session.execute(stmt)).all()
+    page = rows[:limit]
+    next_cursor = (page[-1][1], page[-1][0].id) if len(rows) > limit else None
+    return SearchPage([request for request, _ in page], next_cursor)
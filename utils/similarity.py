@@ -0,0 +1,201 @@
+"""Near-duplicate detection for open requests.
+
+Each request text is turned into a set of character shingles, summarized by
+a MinHash signature and put into LSH buckets (``LSH_BANDS`` bands of
+``LSH_ROWS`` rows). A lookup only inspects requests sharing at least one
+bucket with the query, so its cost does not grow with the number of open
+requests; candidates are then confirmed with the exact Jaccard similarity.
+The index lives in memory, is loaded lazily and updated as requests are
+created or closed.
+"""
+
+import logging
+import os
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Request, Status
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+LSH_BANDS = 32
+LSH_ROWS = 2
+NUM_PERMUTATIONS = LSH_BANDS * LSH_ROWS
+SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", 0.4))
+
+OPEN_STATUSES = (Status.OPEN, Status.IN_PROGRESS)
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures must not change between restarts
+_rng = random.Random(20251019)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold ё and keep only words."""
+    return " ".join(re.findall(r"\w+", text.lower().replace("ё", "е")))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> frozenset[str]:
+    """Character shingles of the normalized text."""
+    normalized = normalize(text)
+    if len(normalized) <= size:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i:i + size] for i in range(len(normalized) - size + 1))
+
+
+def minhash(shingle_set: frozenset[str]) -> tuple[int, ...]:
+    """MinHash signature of a shingle set."""
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMUTATIONS)
+
+
+def jaccard(first: frozenset[str], second: frozenset[str]) -> float:
+    """Exact Jaccard similarity."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def request_text(description: str, location: Optional[str] = None) -> str:
+    """Text a request is compared by."""
+    if location and location != "Не указано":
+        return f"{description} {location}"
+    return description
+
+
+class SimilarityIndex:
+    """MinHash/LSH index of request texts."""
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self._shingles: dict[int, frozenset[str]] = {}
+        self._bands: dict[int, list[int]] = {}
+        self._buckets: dict[tuple[int, int], set[int]] = defaultdict(set)
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._shingles)
+
+    def __contains__(self, request_id: int) -> bool:
+        return request_id in self._shingles
+
+    @staticmethod
+    def _band_keys(signature: tuple[int, ...]) -> list[int]:
+        return [hash(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)]
+
+    def add(self, request_id: int, text: str) -> None:
+        """Index (or re-index) a request."""
+        self.discard(request_id)
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return
+        keys = self._band_keys(minhash(shingle_set))
+        self._shingles[request_id] = shingle_set
+        self._bands[request_id] = keys
+        for band, key in enumerate(keys):
+            self._buckets[(band, key)].add(request_id)
+
+    def discard(self, request_id: int) -> None:
+        """Remove a request if it is indexed."""
+        keys = self._bands.pop(request_id, None)
+        self._shingles.pop(request_id, None)
+        for band, key in enumerate(keys or []):
+            bucket = self._buckets.get((band, key))
+            if bucket is not None:
+                bucket.discard(request_id)
+                if not bucket:
+                    del self._buckets[(band, key)]
+
+    def query(self, text: str, threshold: float = SIMILARITY_THRESHOLD, limit: int = 3) -> list[tuple[int, float]]:
+        """Indexed requests similar to ``text``.
+
+        Args:
+            text: Text to compare
+            threshold: Minimal Jaccard similarity
+            limit: Maximal number of results
+
+        Returns:
+            (request_id, similarity) pairs, most similar first
+        """
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return []
+
+        candidates: set[int] = set()
+        for band, key in enumerate(self._band_keys(minhash(shingle_set))):
+            candidates |= self._buckets.get((band, key), set())
+
+        scored = [(request_id, jaccard(shingle_set, self._shingles[request_id])) for request_id in candidates]
+        scored = [item for item in scored if item[1] >= threshold]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    async def load(self, session: AsyncSession) -> None:
+        """Index all open requests."""
+        result = await session.execute(
+            select(Request.id, Request.description, Request.location).where(Request.status.in_(OPEN_STATUSES))
+        )
+        for request_id, description, location in result:
+            self.add(request_id, request_text(description, location))
+        self.loaded = True
+        logger.info(f"Similarity index loaded: {len(self)} open requests")
+
+
+_index = SimilarityIndex()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Get the process-wide similarity index."""
+    return _index
+
+
+async def find_similar_requests(
+    session: AsyncSession,
+    text: str,
+    limit: int = 3,
+    index: Optional[SimilarityIndex] = None,
+) -> list[tuple[Request, float]]:
+    """Open requests similar to ``text``.
+
+    Candidates are re-checked in the database, so requests closed by paths
+    that did not update the index are dropped (and removed from it).
+
+    Args:
+        session: SQLAlchemy async session
+        text: Text of the new request
+        limit: Maximal number of results
+        index: Index to use, the global one by default
+
+    Returns:
+        (request, similarity) pairs, most similar first
+    """
+    if index is None:
+        index = _index
+    if not index.loaded:
+        await index.load(session)
+
+    matches = index.query(text, limit=limit * 2)
+    if not matches:
+        return []
+
+    requests = {
+        request.id: request
+        for request in await session.scalars(select(Request).where(Request.id.in_([rid for rid, _ in matches])))
+    }
+    similar = []
+    for request_id, score in matches:
+        request = requests.get(request_id)
+        if request is None or request.status not in OPEN_STATUSES:
+            index.discard(request_id)
+            continue
+        similar.append((request, score))
+    return similar[:limit]
@@ -0,0 +1,391 @@
+"""Materialized analytics snapshots with incremental refresh.
+
+The snapshot keeps request counters bucketed by day of creation
+(``day|status|priority``), completions by day of completion and all-time
+totals. Any window (today, 7d, 30d, all) is a sum over at most 30 day
+buckets, so reading stats does not depend on the size of ``requests``.
+Completion times are kept as log-scale histograms per priority and
+location (``priority|location|bucket``); like the counters they are
+mergeable, so percentiles, breakdowns and the backlog aging curve are
+computed from the snapshot as well.
+
+Refresh is incremental: only requests with ``updated_at`` at or after the
+watermark minus ``REFRESH_LOOKBACK`` are read. ``updated_at`` is stamped
+when a transaction flushes, not when it commits, so a row can become
+visible with a timestamp older than the watermark; the lookback picks such
+rows up. ``analytics_request_state`` remembers how each request was
+counted, so its old contribution is subtracted before the new one is
+added. That makes reprocessing a row harmless and status changes exact.
+
+A full rebuild recomputes everything inside one transaction. Readers keep
+using the last committed snapshot in the meantime instead of waiting.
+Read paths never write through their own session: ``get_snapshot``
+refreshes in a separate one.
+Deleted requests are only dropped by a rebuild; the bot never deletes
+them.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import String, and_, case, cast, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import AnalyticsRequestState, AnalyticsSnapshot, Priority, Request, Status
+from utils.analytics_engine import (
+    PRIORITY_CODES,
+    CompletionStats,
+    duration_bucket,
+    epoch_seconds,
+    histogram_completion_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "requests"
+WINDOWS: dict[str, Optional[int]] = {"today": 1, "7d": 7, "30d": 30, "all": None}
+ACTIVE_STATUSES = (Status.OPEN.name, Status.IN_PROGRESS.name)
+REFRESH_CHUNK = 500
+# Транзакция может закоммитить строку позже, чем проставила ей updated_at
+REFRESH_LOOKBACK = timedelta(minutes=5)
+
+# Одно обновление снимка за раз; чтения во время перестройки берут прошлый снимок
+_lock = asyncio.Lock()
+
+
+@dataclass
+class Snapshot:
+    """Snapshot counters."""
+
+    cells: dict[str, int] = field(default_factory=dict)
+    done: dict[str, list] = field(default_factory=dict)
+    totals: dict[str, int] = field(default_factory=dict)
+    durations: dict[str, int] = field(default_factory=dict)
+    watermark: Optional[datetime] = None
+
+    @classmethod
+    def from_data(cls, data: dict, watermark: Optional[datetime]) -> "Snapshot":
+        """Build from the JSON stored in ``analytics_snapshots``."""
+        return cls(
+            cells=dict(data.get("cells", {})),
+            done={day: list(values) for day, values in data.get("done", {}).items()},
+            totals=dict(data.get("totals", {})),
+            durations=dict(data.get("durations", {})),
+            watermark=watermark,
+        )
+
+    def to_data(self) -> dict:
+        """JSON representation."""
+        return {"cells": self.cells, "done": self.done, "totals": self.totals, "durations": self.durations}
+
+    @property
+    def version(self) -> str:
+        """Cache key: changes whenever the snapshot absorbs changes."""
+        return f"snapshot:{self.watermark.isoformat() if self.watermark else ''}:{sum(self.totals.values())}"
+
+    def apply(
+        self,
+        cell: str,
+        done_day: Optional[str],
+        hours: Optional[float],
+        sign: int,
+        location_id: Optional[int] = None,
+    ) -> None:
+        """Add (sign=1) or remove (sign=-1) one request."""
+        _bump(self.cells, cell, sign)
+        _bump(self.totals, cell.split("|", 1)[1], sign)
+        if done_day:
+            _bump(self.durations, duration_key(cell, location_id, hours), sign)
+            count, total_hours = self.done.get(done_day, [0, 0.0])
+            if count + sign:
+                self.done[done_day] = [count + sign, total_hours + sign * (hours or 0.0)]
+            else:
+                self.done.pop(done_day, None)
+
+    def window(self, name: str, today: date) -> dict:
+        """Counters of a window.
+
+        Args:
+            name: Window name (key of ``WINDOWS``)
+            today: Last day of the window
+
+        Returns:
+            Created requests by status and priority, completions and
+            their average duration within the window
+        """
+        days = WINDOWS[name]
+        by_status: dict[str, int] = defaultdict(int)
+        by_priority: dict[str, int] = defaultdict(int)
+        if days is None:
+            cells = ((f"|{key}", count) for key, count in self.totals.items())
+            done = self.done.values()
+        else:
+            first = today - timedelta(days=days - 1)
+            cells = (
+                (cell[10:], count)
+                for day in _days(first, today)
+                for cell, count in self._cells_of(day)
+            )
+            done = [self.done[day.isoformat()] for day in _days(first, today) if day.isoformat() in self.done]
+
+        for key, count in cells:
+            _, status, priority = key.split("|")
+            by_status[status] += count
+            by_priority[priority] += count
+        completed = sum(count for count, _ in done)
+        hours = sum(total for _, total in done)
+
+        return {
+            "created": sum(by_status.values()),
+            "status": dict(by_status),
+            "priority": dict(by_priority),
+            "completed": completed,
+            "avg_hours": round(hours / completed, 2) if completed else 0.0,
+        }
+
+    def daily(self, days: int, today: date) -> list[dict]:
+        """New requests per day for the last ``days`` days (days with none skipped)."""
+        result = []
+        for day in _days(today - timedelta(days=days - 1), today):
+            count = sum(count for _, count in self._cells_of(day))
+            if count:
+                result.append({"date": day.isoformat(), "count": count})
+        return result
+
+    def overdue(self, today: date, days: int = 2) -> int:
+        """High-priority requests still active, created more than ``days`` days ago."""
+        cutoff = (today - timedelta(days=days)).isoformat()
+        return sum(
+            count for cell, count in self.cells.items()
+            if cell[:10] < cutoff and cell.endswith(f"|{Priority.HIGH.name}") and cell.split("|")[1] in ACTIVE_STATUSES
+        )
+
+    def completion_stats(self, today: date) -> CompletionStats:
+        """Completion-time statistics and backlog aging from the histograms.
+
+        Args:
+            today: Day the age of open requests is counted to
+
+        Returns:
+            Statistics with percentiles interpolated within a bucket
+            (see ``utils.analytics_engine``)
+        """
+        keys = [key.split("|") for key in self.durations]
+        open_cells = [
+            ((today - date.fromisoformat(cell[:10])).days, count)
+            for cell, count in self.cells.items()
+            if cell.split("|")[1] in ACTIVE_STATUSES
+        ]
+        return histogram_completion_stats(
+            priority=[PRIORITY_CODES[Priority[priority]] for priority, _, _ in keys],
+            location=[int(location) for _, location, _ in keys],
+            buckets=[int(bucket) for _, _, bucket in keys],
+            counts=list(self.durations.values()),
+            total_hours=sum(hours for _, hours in self.done.values()),
+            open_ages=[age for age, _ in open_cells],
+            open_counts=[count for _, count in open_cells],
+        )
+
+    def _cells_of(self, day: date) -> list[tuple[str, int]]:
+        prefix = day.isoformat()
+        return [
+            (f"{prefix}|{status.name}|{priority.name}", self.cells[key])
+            for status in Status for priority in Priority
+            if (key := f"{prefix}|{status.name}|{priority.name}") in self.cells
+        ]
+
+
+def _days(first: date, last: date) -> list[date]:
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def _bump(counters: dict[str, int], key: str, delta: int) -> None:
+    value = counters.get(key, 0) + delta
+    if value:
+        counters[key] = value
+    else:
+        counters.pop(key, None)
+
+
+def request_cell(created_at: datetime, status: Status, priority: Priority) -> str:
+    """Bucket a request is counted in."""
+    return f"{created_at.date().isoformat()}|{status.name}|{priority.name}"
+
+
+def duration_key(cell: str, location_id: Optional[int], hours: Optional[float]) -> str:
+    """Completion-time histogram cell of a completed request."""
+    location = -1 if location_id is None else location_id
+    return f"{cell.rsplit('|', 1)[1]}|{location}|{duration_bucket(hours or 0.0)}"
+
+
+def _request_state(row: Any) -> tuple[str, Optional[str], Optional[float]]:
+    """(cell, done_day, hours) of a request row."""
+    cell = request_cell(row.created_at, row.status, row.priority)
+    if row.status == Status.COMPLETED and row.completed_at is not None:
+        hours = (row.completed_at - row.created_at).total_seconds() / 3600
+        return cell, row.completed_at.date().isoformat(), hours
+    return cell, None, None
+
+
+async def _load_row(session: AsyncSession, lock: bool = False) -> Optional[AnalyticsSnapshot]:
+    return await session.get(AnalyticsSnapshot, SNAPSHOT_NAME, populate_existing=True, with_for_update=lock)
+
+
+async def refresh_snapshot(session: AsyncSession) -> Snapshot:
+    """Apply request changes since the watermark to the snapshot.
+
+    Builds the snapshot from scratch if there is none yet.
+
+    Args:
+        session: SQLAlchemy async session
+
+    Returns:
+        Up-to-date snapshot
+    """
+    row = await _load_row(session, lock=True)
+    if row is None:
+        return await rebuild_snapshot(session)
+
+    stmt = select(
+        Request.id, Request.created_at, Request.status, Request.priority, Request.completed_at, Request.updated_at,
+        Request.location_id,
+    )
+    if row.watermark is not None:
+        stmt = stmt.where(Request.updated_at >= row.watermark - REFRESH_LOOKBACK)
+    changes = (await session.execute(stmt)).all()
+    snapshot = Snapshot.from_data(row.data or {}, row.watermark)
+
+    applied = 0
+    for start in range(0, len(changes), REFRESH_CHUNK):
+        chunk = changes[start:start + REFRESH_CHUNK]
+        states = {
+            state.request_id: state
+            for state in await session.scalars(
+                select(AnalyticsRequestState).where(AnalyticsRequestState.request_id.in_([r.id for r in chunk]))
+            )
+        }
+        for change in chunk:
+            state = states.get(change.id)
+            if state is not None and state.updated_at == change.updated_at:
+                # Уже учтена (строка в окне lookback)
+                continue
+            cell, done_day, hours = _request_state(change)
+            if state is None:
+                session.add(AnalyticsRequestState(
+                    request_id=change.id, cell=cell, done_day=done_day, hours=hours,
+                    location_id=change.location_id, updated_at=change.updated_at,
+                ))
+            else:
+                snapshot.apply(state.cell, state.done_day, state.hours, -1, state.location_id)
+                state.cell, state.done_day, state.hours = cell, done_day, hours
+                state.location_id, state.updated_at = change.location_id, change.updated_at
+            snapshot.apply(cell, done_day, hours, 1, change.location_id)
+            applied += 1
+
+    if not applied:
+        await session.commit()
+        return snapshot
+
+    snapshot.watermark = max([change.updated_at for change in changes] + ([row.watermark] if row.watermark else []))
+    row.data = snapshot.to_data()
+    row.watermark = snapshot.watermark
+    row.refreshed_at = datetime.utcnow()
+    await session.commit()
+    logger.debug(f"Analytics snapshot refreshed with {applied} changed requests")
+    return snapshot
+
+
+async def rebuild_snapshot(session: AsyncSession) -> Snapshot:
+    """Recompute the snapshot and the per-request state from scratch.
+
+    Per-request state is copied with one ``INSERT ... SELECT`` and the
+    counters are aggregated from that copy, so both always agree; rows
+    changed meanwhile are picked up by the next refresh.
+
+    Args:
+        session: SQLAlchemy async session
+
+    Returns:
+        Rebuilt snapshot
+    """
+    dialect = session.bind.dialect.name
+    is_done = and_(Request.status == Status.COMPLETED, Request.completed_at.is_not(None))
+    cell = (
+        cast(func.date(Request.created_at), String(10)) + literal("|")
+        + cast(Request.status, String(20)) + literal("|") + cast(Request.priority, String(20))
+    )
+    hours = (epoch_seconds(Request.completed_at, dialect) - epoch_seconds(Request.created_at, dialect)) / 3600
+
+    await session.execute(delete(AnalyticsRequestState))
+    await session.execute(
+        insert(AnalyticsRequestState).from_select(
+            ["request_id", "cell", "done_day", "hours", "location_id", "updated_at"],
+            select(
+                Request.id,
+                cell,
+                case((is_done, cast(func.date(Request.completed_at), String(10))), else_=None),
+                case((is_done, hours), else_=None),
+                Request.location_id,
+                Request.updated_at,
+            ),
+        )
+    )
+
+    snapshot = Snapshot()
+    state = AnalyticsRequestState
+    for cell_key, count in await session.execute(select(state.cell, func.count()).group_by(state.cell)):
+        snapshot.cells[cell_key] = count
+        _bump(snapshot.totals, cell_key.split("|", 1)[1], count)
+    done = select(state.done_day, func.count(), func.sum(state.hours)).where(
+        state.done_day.is_not(None)
+    ).group_by(state.done_day)
+    for day, count, total_hours in await session.execute(done):
+        snapshot.done[day] = [count, float(total_hours or 0)]
+    durations = await session.stream(
+        select(state.cell, state.location_id, state.hours).where(state.done_day.is_not(None))
+        .execution_options(yield_per=REFRESH_CHUNK)
+    )
+    async for partition in durations.partitions(REFRESH_CHUNK):
+        for cell_key, location_id, done_hours in partition:
+            _bump(snapshot.durations, duration_key(cell_key, location_id, done_hours), 1)
+    snapshot.watermark = await session.scalar(select(func.max(state.updated_at)))
+
+    row = await _load_row(session, lock=True)
+    now = datetime.utcnow()
+    if row is None:
+        row = AnalyticsSnapshot(name=SNAPSHOT_NAME)
+        session.add(row)
+    row.data = snapshot.to_data()
+    row.watermark = snapshot.watermark
+    row.refreshed_at = row.rebuilt_at = now
+    await session.commit()
+    logger.info(f"Analytics snapshot rebuilt: {sum(snapshot.totals.values())} requests")
+    return snapshot
+
+
+async def get_snapshot(session: AsyncSession) -> Snapshot:
+    """Snapshot for read paths.
+
+    ``session`` is only read from: the incremental refresh locks, writes
+    and commits in a session of its own, so the caller's pending work is
+    left alone. While another refresh or a rebuild is running, the last
+    committed snapshot is returned without waiting.
+    """
+    if _lock.locked():
+        row = await _load_row(session)
+        if row is not None:
+            return Snapshot.from_data(row.data or {}, row.watermark)
+    async with _lock:
+        async with AsyncSession(session.bind, expire_on_commit=False) as refresh_session:
+            return await refresh_snapshot(refresh_session)
+
+
+async def rebuild_snapshot_concurrently(session_factory: Any) -> Snapshot:
+    """Rebuild in a separate session while readers use the old snapshot."""
+    async with _lock:
+        async with session_factory() as session:
+            return await rebuild_snapshot(session)
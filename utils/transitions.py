@@ -0,0 +1,155 @@
+"""Request status transitions as a declarative table.
+
+Every status change of a request goes through ``TRANSITIONS``::
+
+    OPEN ──take──▶ IN_PROGRESS ──complete──▶ COMPLETED
+      │                 │
+      └────reject───────┴──────────────────▶ REJECTED
+
+A transition is applied with one conditional statement,
+``UPDATE requests SET ... WHERE id = :id AND status IN (:sources) RETURNING``,
+which also appends the history entry (``json_insert`` on SQLite, ``||`` on
+``jsonb`` in PostgreSQL) and sets ``updated_at``. There is no read before
+the write, so two admins pressing "take" at once cannot both win: the
+loser's statement matches no row and ``TransitionConflict`` reports the
+status the request is actually in.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import JSON, cast, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models import Request, Status, User
+from utils import codec
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Transition:
+    """Allowed status change."""
+
+    name: str
+    sources: tuple[Status, ...]
+    target: Status
+
+
+TRANSITIONS = {
+    transition.name: transition
+    for transition in (
+        Transition("take", (Status.OPEN,), Status.IN_PROGRESS),
+        Transition("complete", (Status.IN_PROGRESS,), Status.COMPLETED),
+        Transition("reject", (Status.OPEN, Status.IN_PROGRESS), Status.REJECTED),
+    )
+}
+
+
+class TransitionConflict(Exception):
+    """The request is missing or no longer in a source status of the transition."""
+
+    def __init__(self, request_id: int, transition: Transition, current: Optional[Status]) -> None:
+        self.request_id = request_id
+        self.transition = transition
+        self.current = current
+        super().__init__(f"Request {request_id}: cannot {transition.name} from {current.name if current else 'missing'}")
+
+    @property
+    def message(self) -> str:
+        """Explanation for the admin."""
+        if self.current is None:
+            return "Заявка не найдена"
+        return f"Заявка #{self.request_id} уже в статусе «{self.current.value}»"
+
+
+def _history_append(dialect: str, entry: dict) -> Any:
+    """SQL expression: ``requests.history`` with ``entry`` appended."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import JSONB
+
+        added = cast(literal(codec.dumps([entry])), JSONB)
+        return cast(cast(Request.history, JSONB).op("||", return_type=JSONB)(added), JSON)
+    return func.json_insert(Request.history, "$[#]", func.json(codec.dumps(entry)))
+
+
+def transition_values(transition: Transition, user: User, dialect: str) -> dict[str, Any]:
+    """SET clause of a transition: status, timestamps, assignee and history."""
+    now = datetime.utcnow()
+    # updated_at явно: по нему обновляются снимок аналитики и версия данных
+    values: dict[str, Any] = {"status": transition.target, "updated_at": now}
+    if transition.target == Status.IN_PROGRESS:
+        values["assigned_to"] = user.id
+    elif transition.target == Status.COMPLETED:
+        values["completed_at"] = now
+    values["history"] = _history_append(dialect, {
+        "timestamp": now.isoformat(),
+        "action": transition.name,
+        "details": f"Статус: {transition.target.value}",
+        "user_id": user.id,
+    })
+    return values
+
+
+async def apply_transition(session: AsyncSession, request_id: int, name: str, user: User) -> Request:
+    """Change the status of one request if the transition is allowed.
+
+    The caller commits.
+
+    Args:
+        session: Database session
+        request_id: Request to change
+        name: Transition name (``take``, ``complete``, ``reject``)
+        user: Admin performing it
+
+    Returns:
+        The changed request with its author and assignee loaded
+
+    Raises:
+        TransitionConflict: Request not found or in another status (lost race)
+    """
+    transition = TRANSITIONS[name]
+    stmt = (
+        update(Request)
+        .where(Request.id == request_id, Request.status.in_(transition.sources))
+        .values(**transition_values(transition, user, session.bind.dialect.name))
+        .returning(Request)
+        # Автор и исполнитель нужны для ответа завхозу; ленивая загрузка в async невозможна
+        .options(selectinload(Request.user), selectinload(Request.assigned_user))
+        .execution_options(populate_existing=True)
+    )
+    request = (await session.scalars(stmt)).one_or_none()
+    if request is None:
+        # Проигранная гонка или устаревшая кнопка: узнаем текущий статус
+        current = await session.scalar(select(Request.status).where(Request.id == request_id))
+        logger.info(f"Transition {name} of request {request_id} by {user.telegram_id} rejected: status {current}")
+        raise TransitionConflict(request_id, transition, current)
+    return request
+
+
+async def apply_transitions(session: AsyncSession, request_ids: list[int], name: str, user: User) -> list[Any]:
+    """Change the status of several requests with one statement.
+
+    Requests not in a source status are left as they are. The caller commits.
+
+    Args:
+        session: Database session
+        request_ids: Requests to change
+        name: Transition name
+        user: Admin performing it
+
+    Returns:
+        Changed requests as rows (id, user_id, title, location, status)
+    """
+    transition = TRANSITIONS[name]
+    stmt = (
+        update(Request)
+        .where(Request.id.in_(request_ids), Request.status.in_(transition.sources))
+        .values(**transition_values(transition, user, session.bind.dialect.name))
+        .returning(Request.id, Request.user_id, Request.title, Request.location, Request.status)
+        .execution_options(synchronize_session=False)
+    )
+    return list((await session.execute(stmt)).all())
@@ -0,0 +1,175 @@
+"""Optional recorder of incoming updates for replay benchmarks.
+
+With ``UPDATE_LOG_PATH`` set, a dispatcher middleware appends every update
+to a JSON lines log as ``{"at": <unix time>, "update": {...}}``. Updates
+are anonymized before writing: user and chat ids are replaced with salted
+hashes (stable within the log, so conversations still line up), names and
+usernames are dropped, phone numbers, e-mails and mentions in texts are
+masked with ``*`` of the same length (entity offsets stay valid) and
+shared contacts and locations are blanked.
+
+Each start writes a header record ``{"at": ..., "admins": [...]}`` with the
+pseudonymous ids of the admins, so ``benchmarks.replay`` can seed the same
+roles.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import secrets
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+from typing import Any, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from utils import codec
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+UPDATE_LOG_PATH: str = os.getenv("UPDATE_LOG_PATH", "")
+# Без соли псевдонимы случайны для каждого запуска
+UPDATE_LOG_SALT: str = os.getenv("UPDATE_LOG_SALT", "")
+UPDATE_LOG_FLUSH_SECONDS: float = float(os.getenv("UPDATE_LOG_FLUSH_SECONDS", 1))
+
+# Поля пользователя/чата с персональными данными
+PERSONAL_FIELDS = ("first_name", "last_name", "username", "title", "bio")
+TEXT_FIELDS = ("text", "caption", "query")
+
+PII_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.]+"  # e-mail
+    r"|@\w{3,}"  # упоминание
+    r"|\+?\d[\d\s()-]{8,}\d"  # телефон
+)
+
+
+def pseudonym(value: int, salt: str) -> int:
+    """Stable pseudonymous id of a user or chat (sign is kept)."""
+    digest = hashlib.blake2b(f"{salt}:{abs(value)}".encode(), digest_size=8).digest()
+    pseudo = 1_000_000_000 + int.from_bytes(digest, "big") % 9_000_000_000
+    return -pseudo if value < 0 else pseudo
+
+
+def mask_text(text: str) -> str:
+    """Mask phone numbers, e-mails and mentions, keeping the length."""
+    return PII_PATTERN.sub(lambda match: "*" * len(match.group()), text)
+
+
+def anonymize(data: Any, salt: str) -> Any:
+    """Anonymized copy of an update (as a JSON-compatible dict).
+
+    Args:
+        data: Update or any part of it
+        salt: Salt of id pseudonyms
+
+    Returns:
+        Copy without personal data
+    """
+    if isinstance(data, list):
+        return [anonymize(item, salt) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    # Пользователь (is_bot) или чат (type и числовой id); бота не трогаем
+    if "is_bot" in data:
+        is_person = not data["is_bot"]
+    else:
+        is_person = "type" in data and isinstance(data.get("id"), int)
+    result = {}
+    for key, value in data.items():
+        if is_person and key in PERSONAL_FIELDS:
+            continue
+        if (is_person and key == "id") or (key == "user_id" and isinstance(value, int)):
+            result[key] = pseudonym(value, salt)
+        elif key == "chat_instance":
+            result[key] = hashlib.blake2b(f"{salt}:{value}".encode(), digest_size=8).hexdigest()
+        elif key in TEXT_FIELDS and isinstance(value, str):
+            result[key] = mask_text(value)
+        elif key == "contact":
+            result[key] = {"phone_number": "*" * len(value.get("phone_number", "")), "first_name": "*"}
+        elif key == "location":
+            result[key] = {"latitude": 0.0, "longitude": 0.0}
+        else:
+            result[key] = anonymize(value, salt)
+    if is_person and "is_bot" in data:
+        result["first_name"] = "User"
+    return result
+
+
+class UpdateRecorder(BaseMiddleware):
+    """Outer update middleware appending anonymized updates to a log."""
+
+    def __init__(self, path: str, salt: str = "", flush_seconds: float = UPDATE_LOG_FLUSH_SECONDS) -> None:
+        """Open the log for appending.
+
+        Args:
+            path: Log file
+            salt: Salt of id pseudonyms (random if empty)
+            flush_seconds: Max delay before written updates reach the file
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.salt = salt or secrets.token_hex(16)
+        self.flush_seconds = flush_seconds
+        self.recorded = 0
+        self._file = open(path, "a", encoding="utf-8")
+        self._flushed_at = time.monotonic()
+
+    def write_header(self, admin_ids: Iterable[int]) -> None:
+        """Record the (pseudonymous) admins of this run."""
+        admins = sorted(pseudonym(telegram_id, self.salt) for telegram_id in admin_ids)
+        self._write({"at": time.time(), "admins": admins})
+
+    def record(self, update: Update) -> None:
+        """Append an update."""
+        data = update.model_dump(mode="json", exclude_none=True, by_alias=True)
+        self._write({"at": time.time(), "update": anonymize(data, self.salt)})
+        self.recorded += 1
+
+    def _write(self, record: dict) -> None:
+        self._file.write(codec.dumps(record) + "\n")
+        # Буфер файла сбрасываем не чаще раза в flush_seconds
+        now = time.monotonic()
+        if now - self._flushed_at >= self.flush_seconds:
+            self._file.flush()
+            self._flushed_at = now
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """Record the update, then handle it."""
+        try:
+            self.record(event)
+        except Exception as e:
+            # Запись не должна мешать обработке
+            logger.error(f"Error recording update: {e}", exc_info=True)
+        return await handler(event, data)
+
+    def close(self) -> None:
+        """Flush and close the log."""
+        if not self._file.closed:
+            self._file.close()
+
+
+_recorder: Optional[UpdateRecorder] = None
+
+
+def get_update_recorder() -> Optional[UpdateRecorder]:
+    """Get the update recorder (None when UPDATE_LOG_PATH is not set)."""
+    global _recorder
+    if not UPDATE_LOG_PATH:
+        return None
+    if _recorder is None:
+        try:
+            _recorder = UpdateRecorder(UPDATE_LOG_PATH, UPDATE_LOG_SALT)
+        except OSError as e:
+            logger.error(f"Error opening update log: {e}", exc_info=True)
+            return None
+    return _recorder
@@ -4,8 +4,6 @@ import logging
 import re
 from typing import Tuple, Optional
 
-from utils.rate_limiter import rate_limiter
-
 logger = logging.getLogger(__name__)
 
 